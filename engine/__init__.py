@@ -0,0 +1,5 @@
+"""PDF工具箱处理核心
+
+本包不依赖tkinter，所有函数只接收普通参数并返回结果对象，
+既可以被 tools/ 下的界面调用，也可以在无界面的批处理节点上直接使用。
+"""
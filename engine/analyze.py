@@ -0,0 +1,218 @@
+"""PDF体积构成分析
+
+遍历对象图，按类别统计各部分占用的字节数（图片按编码方式、字体按是否子集化、
+内容流、元数据、无引用的对象等），并估算各种压缩策略可能节省的空间。
+流的大小取自 /Length，不读取也不解码流数据，适合在决定如何压缩之前对大量文件做初筛。
+"""
+import os
+
+from engine import scheduler
+from engine.common import FileResult
+
+# 各压缩策略对相应部分的预计压缩比例（经验值，只用于排序和初筛）
+ESTIMATED_SAVINGS = {
+    "images_lossy": 0.5,      # 已是JPEG/JPEG2000的图片，降采样并重新编码
+    "images_lossless": 0.7,   # Flate或未压缩的图片，改为JPEG或调色板
+    "uncompressed": 0.7,      # 未压缩的非图片流
+    "fonts_full": 0.6,        # 完整嵌入的字体，子集化
+    "structure": 0.3,         # 没有对象流的文件，打包为对象流
+}
+# 预计节省不足文件大小的这个比例时不推荐该策略
+MIN_WORTHWHILE = 0.05
+
+STRATEGY_NAMES = {
+    "images": "图片降采样/重新编码",
+    "streams": "流压缩",
+    "unused": "清理无用对象",
+    "fonts": "字体子集化 (Ghostscript)",
+    "structure": "对象流打包",
+}
+
+LOSSY_FILTERS = ("/DCTDecode", "/JPXDecode")
+FONT_FILE_KEYS = ("/FontFile", "/FontFile2", "/FontFile3")
+
+
+def check_dependency():
+    """检查分析所需的依赖，缺失时返回错误提示"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return "文件分析需要pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
+    return None
+
+
+def _stream_length(stream):
+    try:
+        return int(stream.get("/Length", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _last_filter(stream):
+    """流的最后一个过滤器（决定数据的最终编码），没有时返回None"""
+    import pikepdf
+
+    filters = stream.get("/Filter")
+    if isinstance(filters, pikepdf.Array):
+        filters = filters[-1] if len(filters) else None
+    return str(filters) if filters is not None else None
+
+
+def _is_subset(font_name):
+    """子集字体的名称以6个大写字母加 "+" 开头，例如 ABCDEF+SimSun"""
+    name = str(font_name).lstrip("/")
+    return len(name) > 7 and name[6] == "+" and name[:6].isalpha() and name[:6].isupper()
+
+
+def reachable_objects(pdf):
+    """从trailer出发可达的间接对象 objgen 集合"""
+    import pikepdf
+
+    seen = set()
+    stack = [pdf.trailer]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, pikepdf.Array):
+            values = list(container)
+        else:
+            values = [container[key] for key in container.keys()]
+        for value in values:
+            if not isinstance(value, pikepdf.Object):
+                continue
+            if value.is_indirect:
+                if value.objgen in seen:
+                    continue
+                seen.add(value.objgen)
+            if isinstance(value, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+                stack.append(value)
+    return seen
+
+
+def _content_streams(pdf):
+    """页面内容流和表单XObject的 objgen 集合"""
+    import pikepdf
+
+    contents = set()
+    for page in pdf.pages:
+        value = page.obj.get("/Contents")
+        for stream in (value if isinstance(value, pikepdf.Array) else [value]):
+            if isinstance(stream, pikepdf.Stream):
+                contents.add(stream.objgen)
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Form":
+            contents.add(obj.objgen)
+    return contents
+
+
+def _font_files(pdf):
+    """嵌入字体文件 {objgen: 是否子集}"""
+    import pikepdf
+
+    fonts = {}
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Dictionary) or obj.get("/Type") != "/FontDescriptor":
+            continue
+        for key in FONT_FILE_KEYS:
+            font_file = obj.get(key)
+            if isinstance(font_file, pikepdf.Stream):
+                fonts[font_file.objgen] = _is_subset(obj.get("/FontName", ""))
+    return fonts
+
+
+def _add(bucket, key, size):
+    count, total = bucket.get(key, (0, 0))
+    bucket[key] = (count + 1, total + size)
+
+
+def analyze_file(input_path):
+    """分析单个文件的体积构成，返回 FileResult，info 为统计结果
+
+    info 包含：
+      categories  各类别字节数（images/fonts/content/metadata/other/structure）
+      images      {编码方式: (数量, 字节数)}，"无压缩" 表示未压缩
+      fonts       {"subset"/"full": (数量, 字节数)}
+      unused      (无引用对象数量, 其中流的字节数)
+      suggestions [(策略名称, 预计节省字节数)]，按节省从多到少排列
+    """
+    import pikepdf
+
+    file_size = os.path.getsize(input_path)
+    with pikepdf.open(input_path) as pdf:
+        reachable = reachable_objects(pdf)
+        contents = _content_streams(pdf)
+        font_files = _font_files(pdf)
+
+        categories = dict.fromkeys(("images", "fonts", "content", "metadata", "other"), 0)
+        images, fonts = {}, {}
+        unused_count = unused_bytes = 0
+        uncompressed = 0
+        has_object_streams = False
+
+        for obj in pdf.objects:
+            if not isinstance(obj, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+                continue
+            type_name = obj.get("/Type") if not isinstance(obj, pikepdf.Array) else None
+            if type_name in ("/ObjStm", "/XRef"):
+                # 对象流和交叉引用流属于文件结构，本身不被其他对象引用
+                has_object_streams = True
+                continue
+            if obj.objgen not in reachable:
+                unused_count += 1
+                if isinstance(obj, pikepdf.Stream):
+                    unused_bytes += _stream_length(obj)
+                continue
+            if not isinstance(obj, pikepdf.Stream):
+                continue
+
+            size = _stream_length(obj)
+            filter_name = _last_filter(obj)
+            if obj.get("/Subtype") == "/Image":
+                categories["images"] += size
+                _add(images, filter_name.lstrip("/") if filter_name else "无压缩", size)
+                continue
+
+            if filter_name is None:
+                uncompressed += size
+            if obj.objgen in font_files:
+                categories["fonts"] += size
+                _add(fonts, "subset" if font_files[obj.objgen] else "full", size)
+            elif type_name == "/Metadata":
+                categories["metadata"] += size
+            elif obj.objgen in contents:
+                categories["content"] += size
+            else:
+                categories["other"] += size
+
+        page_count = len(pdf.pages)
+
+    # 非流对象、交叉引用表等无法不解析就得到大小，按剩余部分计
+    categories["structure"] = max(0, file_size - sum(categories.values()) - unused_bytes)
+
+    lossy = sum(total for name, (_, total) in images.items() if "/" + name in LOSSY_FILTERS)
+    savings = {
+        "images": lossy * ESTIMATED_SAVINGS["images_lossy"]
+        + (categories["images"] - lossy) * ESTIMATED_SAVINGS["images_lossless"],
+        "streams": uncompressed * ESTIMATED_SAVINGS["uncompressed"],
+        "unused": unused_bytes,
+        "fonts": fonts.get("full", (0, 0))[1] * ESTIMATED_SAVINGS["fonts_full"],
+        "structure": 0 if has_object_streams else categories["structure"] * ESTIMATED_SAVINGS["structure"],
+    }
+    suggestions = sorted(((STRATEGY_NAMES[key], int(value)) for key, value in savings.items()
+                          if value >= file_size * MIN_WORTHWHILE),
+                         key=lambda item: item[1], reverse=True)
+
+    info = {
+        "pages": page_count,
+        "categories": categories,
+        "images": images,
+        "fonts": fonts,
+        "unused": (unused_count, unused_bytes),
+        "suggestions": suggestions,
+    }
+    return FileResult(input_path, original_size=file_size, info=info)
+
+
+def analyze_files(files, progress=None, should_stop=None):
+    """并行分析多个文件的体积构成"""
+    jobs = [(file_path, (file_path,)) for file_path in files]
+    return scheduler.map_files(analyze_file, jobs, progress, should_stop, "正在分析: ")
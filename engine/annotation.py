@@ -0,0 +1,56 @@
+import os
+from PyPDF2 import PdfWriter
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+from engine.doc_cache import open_reader
+
+
+def write_annotation_notes(notes_path, annotations):
+    """记录注释信息到外部文件"""
+    with open(notes_path, 'w', encoding='utf-8') as notes_file:
+        notes_file.write("PDF注释信息\n")
+        notes_file.write("=" * 50 + "\n")
+        for i, annotation in enumerate(annotations, 1):
+            notes_file.write(f"注释 {i}:\n")
+            notes_file.write(f"  类型: {annotation['type']}\n")
+            notes_file.write(f"  页码: {annotation['page']}\n")
+            if annotation['text']:
+                notes_file.write(f"  文本: {annotation['text']}\n")
+            if annotation['color']:
+                notes_file.write(f"  颜色: {annotation['color']}\n")
+            notes_file.write("\n")
+
+
+def add_annotations_to_pdf(pdf_file, output_dir, annotations):
+    """将注释添加到PDF文件"""
+    file_name = os.path.basename(pdf_file)
+    name = base_name(pdf_file)
+    output_path = os.path.join(output_dir, f"{name}_with_annotations.pdf")
+
+    try:
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            # 注意：PyPDF2对注释的支持有限，这里只保存副本并把注释记录到外部文件
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+
+        write_annotation_notes(os.path.join(output_dir, f"{name}_annotations.txt"), annotations)
+    except Exception as e:
+        raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+
+    return output_path
+
+
+def _add_annotations_to_pdf_job(pdf_file, output_dir, annotations):
+    return FileResult(pdf_file, output_path=add_annotations_to_pdf(pdf_file, output_dir, annotations))
+
+
+def add_annotations_to_pdfs(files, output_dir, annotations, progress=None, should_stop=None):
+    """将注释添加到多个PDF文件，各文件在进程池中并行处理"""
+    jobs = [(pdf_file, (pdf_file, output_dir, annotations)) for pdf_file in files]
+    return scheduler.map_files(_add_annotations_to_pdf_job, jobs, progress, should_stop)
@@ -0,0 +1,66 @@
+import os
+from PyPDF2 import PdfWriter
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+from engine.doc_cache import open_reader
+
+OPERATION_NAMES = {
+    "compress": "PDF压缩",
+    "encrypt": "PDF加密",
+    "decrypt": "PDF解密",
+    "rotate": "PDF旋转",
+    "add_watermark": "添加水印",
+    "add_header_footer": "添加页眉页脚"
+}
+
+
+def get_operation_name(operation):
+    """获取操作的中文名称"""
+    return OPERATION_NAMES.get(operation, operation)
+
+
+def apply_operation(pdf_file, operation, output_dir, params=None):
+    """应用单个操作到PDF文件，返回输出路径"""
+    output_path = os.path.join(output_dir, f"{base_name(pdf_file)}_{operation}.pdf")
+
+    try:
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            # 注意：这里只是简化的实现，各操作的参数暂未生效
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+
+        return output_path
+    except Exception as e:
+        raise Exception(f"执行 {operation} 操作时出错: {str(e)}")
+
+
+def process_file(pdf_file, operations, output_dir, params=None):
+    """依次对单个文件应用所有操作"""
+    temp_file = pdf_file
+    intermediate = []
+
+    for operation in operations:
+        temp_file = apply_operation(temp_file, operation, output_dir, params)
+        intermediate.append(temp_file)
+
+    final_output = os.path.join(output_dir, f"{base_name(pdf_file)}_processed.pdf")
+    os.replace(temp_file, final_output)
+
+    # 清理中间文件
+    for path in intermediate[:-1]:
+        if os.path.exists(path):
+            os.remove(path)
+
+    return FileResult(pdf_file, output_path=final_output)
+
+
+def process_batch_files(files, operations, output_dir, params=None, progress=None, should_stop=None):
+    """批量处理PDF文件，各文件在进程池中并行处理"""
+    jobs = [(pdf_file, (pdf_file, operations, output_dir, params)) for pdf_file in files]
+    return scheduler.map_files(process_file, jobs, progress, should_stop)
@@ -0,0 +1,199 @@
+"""黑白扫描页的CCITT G4压缩
+
+很多黑白文件扫描后以8位灰度（Flate或JPEG）保存，每个像素占一个字节。
+这里用NumPy在抽样像素的直方图上检测几乎只有黑白两种亮度的图片，
+二值化后用Pillow（libtiff）编码为CCITT Group 4，在PDF中保存为1位图片，
+体积通常只有原来的几分之一。检测只看抽样像素的直方图，可以对批量文件的每一页执行。
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from engine.images import MIN_PIXELS, MIN_SAVING, decode_image
+
+# 直方图检测时行列方向的抽样间隔
+SAMPLE_STEP = 4
+# 亮度在这个区间内的像素视为中间调（非黑非白）
+MIDTONE_RANGE = (64, 192)
+# 中间调像素不超过这个比例时视为黑白图片（JPEG边缘的振铃会产生少量中间调）
+MAX_MIDTONE_FRACTION = 0.05
+# 彩色图片99%像素的通道差异不超过这个值才可能是黑白扫描（容忍JPEG色度噪声）
+MAX_COLOR_SPREAD = 40
+# TIFF标签：行/条带、条带偏移、条带字节数
+TIFF_ROWS_PER_STRIP = 278
+TIFF_STRIP_OFFSETS = 273
+TIFF_STRIP_BYTE_COUNTS = 279
+
+
+def check_dependency():
+    """检查G4压缩所需的依赖，缺失时返回错误提示"""
+    missing = []
+    for module, package in (("numpy", "numpy"), ("pikepdf", "pikepdf"), ("PIL", "Pillow")):
+        try:
+            __import__(module)
+        except ImportError:
+            missing.append(package)
+    if missing:
+        return f"黑白扫描压缩需要以下库。\n\n请运行以下命令安装:\npip install {' '.join(missing)}"
+
+    from PIL import features
+    if not features.check("libtiff"):
+        return "黑白扫描压缩需要带libtiff支持的Pillow。\n\n请运行以下命令重新安装:\npip install --force-reinstall Pillow"
+    return None
+
+
+def luminance(pixels):
+    """RGB转为亮度，灰度图片原样返回"""
+    import numpy as np
+
+    if pixels.ndim == 2:
+        return pixels
+    weights = np.array([299, 587, 114], dtype=np.uint32)
+    return ((pixels.astype(np.uint32) @ weights + 500) // 1000).astype(np.uint8)
+
+
+def _otsu(histogram):
+    """按直方图计算使类间方差最大的阈值（Otsu），亮度不超过阈值的像素为黑"""
+    import numpy as np
+
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    sum_dark = np.cumsum(histogram * levels)
+    mean_dark = sum_dark / np.maximum(weight_dark, 1)
+    mean_light = (sum_dark[-1] - sum_dark) / np.maximum(weight_light, 1)
+    variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(variance))
+
+
+def bilevel_threshold(pixels):
+    """图片基本只有黑白两种亮度时返回二值化阈值，否则返回None
+
+    只检查行列方向每隔 SAMPLE_STEP 个的抽样像素。
+    """
+    import numpy as np
+
+    sample = pixels[::SAMPLE_STEP, ::SAMPLE_STEP]
+    if sample.ndim == 3:
+        channels = sample.astype(np.int16)
+        spread = channels.max(axis=2) - channels.min(axis=2)
+        if np.percentile(spread, 99) > MAX_COLOR_SPREAD:
+            return None
+    histogram = np.bincount(luminance(sample).ravel(), minlength=256)
+
+    low, high = MIDTONE_RANGE
+    if histogram[low:high].sum() > histogram.sum() * MAX_MIDTONE_FRACTION:
+        return None
+    return _otsu(histogram)
+
+
+def encode_g4(black):
+    """把布尔数组（True为黑）编码为CCITT G4数据
+
+    数据中0表示白，与PDF CCITTFaxDecode的默认解释（BlackIs1为false）一致。
+    """
+    from PIL import Image
+
+    height = black.shape[0]
+    buffer = io.BytesIO()
+    # 整张图片写为一个条带，G4数据才能直接作为PDF流使用
+    Image.fromarray(black).save(buffer, "TIFF", compression="group4",
+                                tiffinfo={TIFF_ROWS_PER_STRIP: height})
+    with Image.open(buffer) as tiff:
+        offsets = tiff.tag_v2[TIFF_STRIP_OFFSETS]
+        counts = tiff.tag_v2[TIFF_STRIP_BYTE_COUNTS]
+    if len(offsets) != 1:
+        raise ValueError("G4编码结果包含多个条带")
+    return buffer.getvalue()[offsets[0]:offsets[0] + counts[0]]
+
+
+def _convert(pixels):
+    """线程池中执行：检测并编码，不是黑白图片时返回None"""
+    threshold = bilevel_threshold(pixels)
+    if threshold is None:
+        return None
+    return encode_g4(luminance(pixels) <= threshold)
+
+
+def _candidate(image):
+    import pikepdf
+
+    if not isinstance(image, pikepdf.Stream) or image.get("/Subtype") != "/Image":
+        return False
+    if int(image.get("/Width", 0)) * int(image.get("/Height", 0)) < MIN_PIXELS:
+        return False
+    # 颜色键遮罩按8位取值给出，改为1位后无法对应
+    return "/Mask" not in image or isinstance(image.Mask, pikepdf.Stream)
+
+
+def _apply(image, data, original_length):
+    """新数据更小时把图片改为1位CCITT G4，返回节省的字节数"""
+    import pikepdf
+
+    if len(data) > original_length * (1 - MIN_SAVING):
+        return 0
+    width, height = int(image.Width), int(image.Height)
+    image.write(data, filter=pikepdf.Name.CCITTFaxDecode,
+                decode_parms=pikepdf.Dictionary(K=-1, Columns=width, Rows=height))
+    image.ColorSpace = pikepdf.Name.DeviceGray
+    image.BitsPerComponent = 1
+    if "/Interpolate" in image:
+        del image["/Interpolate"]
+    return original_length - len(data)
+
+
+def convert_images(pdf, max_workers=4, skip=()):
+    """把 pdf（pikepdf.Pdf）中的黑白8位图片改为CCITT G4编码，返回统计信息
+
+    skip 中的图片（objgen）保持不变。
+    """
+    stats = {"images": 0, "converted": 0, "bytes_saved": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def collect(done):
+            for future in done:
+                image, original_length = futures.pop(future)
+                try:
+                    data = future.result()
+                except Exception:
+                    continue
+                if data is None:
+                    continue
+                saved = _apply(image, data, original_length)
+                if saved:
+                    stats["converted"] += 1
+                    stats["bytes_saved"] += saved
+
+        for image in pdf.objects:
+            if not _candidate(image) or image.objgen in skip:
+                continue
+            try:
+                pixels = decode_image(image)
+            except Exception:
+                pixels = None
+            if pixels is None:
+                continue
+            stats["images"] += 1
+
+            # 解码后的整页扫描较占内存，同时在途的图片数量有上限
+            while len(futures) >= max_workers * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+            futures[pool.submit(_convert, pixels)] = (image, len(image.read_raw_bytes()))
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    return stats
+
+
+def convert_file(input_path, output_path):
+    """对单个文件执行G4转换并保存，返回统计信息"""
+    import pikepdf
+
+    with pikepdf.open(input_path) as pdf:
+        stats = convert_images(pdf)
+        pdf.save(output_path)
+    return stats
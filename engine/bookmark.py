@@ -0,0 +1,62 @@
+import os
+from PyPDF2 import PdfWriter
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+from engine.doc_cache import cached_fact, open_reader
+
+
+def flatten_outline(outline, level=0):
+    """把嵌套大纲展开为 (标题, 页码(1-based), 层级) 列表"""
+    bookmarks = []
+    for item in outline:
+        if isinstance(item, list):
+            # 嵌套书签
+            bookmarks.extend(flatten_outline(item, level + 1))
+        else:
+            bookmarks.append((item.title, item.page_number + 1, level))
+    return bookmarks
+
+
+def _read_outline(pdf_file):
+    with open_reader(pdf_file) as reader:
+        return flatten_outline(reader.outline) if reader.outline else []
+
+
+def read_bookmarks(pdf_file):
+    """读取PDF文件中的书签"""
+    return list(cached_fact(pdf_file, "outline", _read_outline))
+
+
+def add_bookmarks_to_pdf(pdf_file, output_dir, bookmarks):
+    """将书签添加到PDF文件"""
+    file_name = os.path.basename(pdf_file)
+    output_path = os.path.join(output_dir, f"{base_name(pdf_file)}_with_bookmarks.pdf")
+
+    try:
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            for title, page_number, level in bookmarks:
+                # PyPDF2需要0-based页码
+                writer.add_outline_item(title, page_number - 1)
+
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+    except Exception as e:
+        raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+
+    return output_path
+
+
+def _add_bookmarks_to_pdf_job(pdf_file, output_dir, bookmarks):
+    return FileResult(pdf_file, output_path=add_bookmarks_to_pdf(pdf_file, output_dir, bookmarks))
+
+
+def add_bookmarks_to_pdfs(files, output_dir, bookmarks, progress=None, should_stop=None):
+    """将书签添加到多个PDF文件，各文件在进程池中并行处理"""
+    jobs = [(pdf_file, (pdf_file, output_dir, bookmarks)) for pdf_file in files]
+    return scheduler.map_files(_add_bookmarks_to_pdf_job, jobs, progress, should_stop)
@@ -0,0 +1,91 @@
+import os
+
+# 覆盖持久化数据目录的环境变量
+DATA_DIR_ENV = "PDF_TOOLBOX_HOME"
+
+
+class FileResult:
+    """单个文件的处理结果"""
+
+    def __init__(self, input_path, success=True, output_path="", error="",
+                 original_size=0, output_size=0, info=None):
+        self.input_path = input_path
+        self.success = success
+        self.output_path = output_path
+        self.error = error
+        self.original_size = original_size
+        self.output_size = output_size
+        # 各工具附加的额外信息，例如生成的图片数量
+        self.info = info if info is not None else {}
+
+    @property
+    def file_name(self):
+        return os.path.basename(self.input_path)
+
+    @property
+    def reduction(self):
+        """体积减少的百分比"""
+        if not self.original_size:
+            return 0.0
+        return (1 - self.output_size / self.original_size) * 100
+
+    def __repr__(self):
+        status = "ok" if self.success else f"failed: {self.error}"
+        return f"FileResult({self.input_path!r}, {status})"
+
+
+def failed(input_path, error):
+    """构造失败结果"""
+    return FileResult(input_path, success=False, error=str(error))
+
+
+def format_file_size(size_bytes):
+    """格式化文件大小显示"""
+    if size_bytes == 0:
+        return "0 B"
+
+    size_names = ["B", "KB", "MB", "GB"]
+    i = 0
+    while size_bytes >= 1024 and i < len(size_names) - 1:
+        size_bytes /= 1024.0
+        i += 1
+
+    return f"{size_bytes:.2f} {size_names[i]}"
+
+
+def base_name(file_path):
+    """获取不带扩展名的文件名"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def suffixed_output_path(file_path, output_dir, suffix, ext=None):
+    """根据后缀生成输出路径，例如 a.pdf -> output_dir/a_compressed.pdf"""
+    name, original_ext = os.path.splitext(os.path.basename(file_path))
+    if ext is None:
+        ext = original_ext
+    return os.path.join(output_dir, f"{name}{suffix}{ext}")
+
+
+def default_output_dir(output_dir, files):
+    """未指定输出目录时使用第一个文件所在目录"""
+    if output_dir:
+        return output_dir
+    return os.path.dirname(files[0]) if files else ""
+
+
+def report_progress(progress, percent, message=""):
+    """调用进度回调（如果有）"""
+    if progress is not None:
+        progress(percent, message)
+
+
+def stop_requested(should_stop):
+    """检查是否请求停止"""
+    return should_stop is not None and should_stop()
+
+
+def data_dir():
+    """持久化数据（统计、缓存等）所在目录，可通过环境变量 PDF_TOOLBOX_HOME 指定"""
+    path = os.environ.get(DATA_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".pdf_toolbox")
+    os.makedirs(path, exist_ok=True)
+    return path
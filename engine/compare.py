@@ -0,0 +1,61 @@
+from engine.doc_cache import open_reader
+
+
+def compare_pdfs(file1, file2, compare_pages=True, compare_metadata=True, compare_text=True):
+    """比较两个PDF文件，返回比较报告文本"""
+    lines = []
+
+    try:
+        with open_reader(file1) as reader1, open_reader(file2) as reader2:
+            lines.append("PDF比较结果\n")
+            lines.append("=" * 50 + "\n\n")
+
+            # 比较页数
+            if compare_pages:
+                pages1 = len(reader1.pages)
+                pages2 = len(reader2.pages)
+                verdict = " → 页数不同\n" if pages1 != pages2 else " → 页数相同\n"
+                lines.append(f"页数比较: {pages1} 页 vs {pages2} 页{verdict}")
+
+            # 比较元数据
+            if compare_metadata:
+                metadata1 = reader1.metadata
+                metadata2 = reader2.metadata
+
+                lines.append("\n元数据比较:\n")
+
+                keys = set()
+                if metadata1:
+                    keys.update(metadata1.keys())
+                if metadata2:
+                    keys.update(metadata2.keys())
+
+                for key in sorted(keys):
+                    value1 = metadata1.get(key, "") if metadata1 else ""
+                    value2 = metadata2.get(key, "") if metadata2 else ""
+                    verdict = " → 不同\n" if value1 != value2 else " → 相同\n"
+                    lines.append(f"  {key}: {value1} vs {value2}{verdict}")
+
+            # 比较文本内容
+            if compare_text:
+                lines.append("\n文本内容比较:\n")
+
+                min_pages = min(len(reader1.pages), len(reader2.pages))
+                for i in range(min_pages):
+                    text1 = reader1.pages[i].extract_text() or ""
+                    text2 = reader2.pages[i].extract_text() or ""
+
+                    if text1 != text2:
+                        lines.append(f"  第 {i+1} 页: 文本内容不同\n")
+
+                # 如果页数不同，提示剩余页面
+                if len(reader1.pages) != len(reader2.pages):
+                    lines.append(f"  注意: 由于页数不同，只比较了前 {min_pages} 页\n")
+
+            lines.append("\n" + "=" * 50 + "\n")
+            lines.append("比较完成\n")
+
+    except Exception as e:
+        raise Exception(f"比较PDF文件时出错: {str(e)}")
+
+    return "".join(lines)
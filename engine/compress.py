@@ -0,0 +1,651 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import PyPDF2
+
+from engine import dedup, fingerprint, flate, ghostscript, scheduler
+from engine.common import FileResult, data_dir, suffixed_output_path
+from engine.doc_cache import page_count
+from engine.linearize import linearize_file
+
+BACKENDS = ("pikepdf", "pypdfium2", "ghostscript")
+# auto 同时运行所有可用的后端，保留最小的有效结果
+ALGORITHMS = BACKENDS + ("auto",)
+LEVELS = ("low", "medium", "high")
+
+# auto 模式下各后端的超时时间（秒）
+BACKEND_TIMEOUTS = {
+    "pikepdf": 300,
+    "pypdfium2": 300,
+    "ghostscript": 600,
+}
+
+# 按目标大小压缩时依次尝试的 (分辨率, JPEG质量)，越往后压缩越强
+TARGET_STEPS = ((300, 85), (200, 80), (150, 75), (150, 60), (120, 50), (100, 40), (72, 30), (72, 20))
+
+# 记录各类文件上哪个后端胜出
+WINNERS_FILE = "compress_winners.json"
+
+# Ghostscript 压缩级别对应的预设
+GS_PDF_SETTINGS = {
+    "high": "/screen",
+    "medium": "/ebook",
+    "low": "/printer",
+}
+
+
+def check_dependency(algorithm):
+    """检查压缩算法所需的依赖，缺失时返回错误提示，否则返回None"""
+    if algorithm == "auto":
+        if not available_backends():
+            return "没有可用的压缩后端。\n\n请至少安装 pikepdf、pypdfium2 或 Ghostscript 中的一个"
+
+    elif algorithm == "pikepdf":
+        try:
+            import pikepdf  # noqa: F401
+        except ImportError:
+            return "未安装pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
+
+    elif algorithm == "pypdfium2":
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return "未安装pypdfium2库。\n\n请运行以下命令安装:\npip install pypdfium2"
+
+    elif algorithm == "ghostscript":
+        # 路径和版本在进程内只检测一次
+        return ghostscript.check_dependency()
+
+    return None
+
+
+def compress_with_pikepdf(input_path, output_path, level="medium", dedupe=True, stats=None,
+                          flate_level=None):
+    """使用pikepdf压缩PDF
+
+    dedupe 为 True 时先合并重复的流对象；flate_level 不为None时按该zlib级别并行重新压缩流。
+    传入 stats 字典时写入各步骤的统计信息（"dedup"、"flate"）。
+    """
+    import pikepdf
+
+    with pikepdf.open(input_path) as pdf:
+        if dedupe:
+            dedup_stats = dedup.dedupe_streams(pdf)
+            if stats is not None:
+                stats["dedup"] = dedup_stats
+
+        # 根据压缩级别设置选项
+        if level == "high":
+            # 强力压缩
+            options = {"object_stream_mode": pikepdf.ObjectStreamMode.generate,
+                       "stream_decode_level": pikepdf.StreamDecodeLevel.generalized}
+        elif level == "medium":
+            # 中等压缩
+            options = {"object_stream_mode": pikepdf.ObjectStreamMode.preserve,
+                       "stream_decode_level": pikepdf.StreamDecodeLevel.specialized}
+        else:
+            # 轻度压缩
+            options = {"object_stream_mode": pikepdf.ObjectStreamMode.preserve}
+
+        if flate_level is not None:
+            flate_stats = flate.recompress_streams(pdf, flate_level, try_predictors=True)
+            if stats is not None:
+                stats["flate"] = flate_stats
+            # 流已经按指定级别压缩过，保存时不再解码重压
+            options["stream_decode_level"] = pikepdf.StreamDecodeLevel.none
+
+        pdf.save(output_path, compress_streams=True, **options)
+
+    return os.path.getsize(output_path)
+
+
+# PDFium不支持多线程，自动模式下各文件在线程中处理时需要串行调用
+_pdfium_lock = threading.Lock()
+
+
+def compress_with_pypdfium2(input_path, output_path, level="medium"):
+    """使用pypdfium2压缩PDF"""
+    with _pdfium_lock:
+        return _compress_with_pypdfium2(input_path, output_path, level)
+
+
+def _compress_with_pypdfium2(input_path, output_path, level):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(input_path)
+
+    # 设置保存选项
+    save_args = {}
+    if level == "high":
+        save_args["compress"] = pdfium.PdfCompressMode.ALL
+    elif level == "medium":
+        save_args["compress"] = pdfium.PdfCompressMode.IMAGE
+    else:
+        save_args["compress"] = pdfium.PdfCompressMode.NONE
+
+    pdf.save(output_path, **save_args)
+    pdf.close()
+
+    return os.path.getsize(output_path)
+
+
+def ghostscript_args(input_path, output_path, level="medium"):
+    """生成Ghostscript命令行参数"""
+    executable = ghostscript.find_executable()
+    return [
+        executable[0] if executable else "gs", "-sDEVICE=pdfwrite", "-dCompatibilityLevel=1.4",
+        f"-dPDFSETTINGS={GS_PDF_SETTINGS.get(level, '/printer')}",
+        "-dNOPAUSE", "-dQUIET", "-dBATCH",
+        f"-sOutputFile={output_path}", input_path
+    ]
+
+
+def compress_with_ghostscript(input_path, output_path, level="medium", timeout=None, executor=None):
+    """使用Ghostscript压缩PDF，超时后终止进程并抛出 subprocess.TimeoutExpired
+
+    executor 为 ghostscript.GhostscriptExecutor，未指定时使用进程内的默认执行器；
+    timeout 不为None时覆盖执行器的时间上限。
+    """
+    executor = executor or ghostscript.default_executor()
+    if not ghostscript.find_executable():
+        raise Exception(ghostscript.GHOSTSCRIPT_MISSING)
+    executor.run(ghostscript_args(input_path, output_path, level), os.path.basename(input_path), timeout)
+    return os.path.getsize(output_path)
+
+
+COMPRESSORS = {
+    "pikepdf": compress_with_pikepdf,
+    "pypdfium2": compress_with_pypdfium2,
+    "ghostscript": compress_with_ghostscript,
+}
+
+
+_available_backends = None
+
+
+def available_backends():
+    """已安装依赖的压缩后端（每个进程只检查一次）"""
+    global _available_backends
+    if _available_backends is None:
+        _available_backends = [name for name in BACKENDS if check_dependency(name) is None]
+    return _available_backends
+
+
+def file_profile(input_path):
+    """按文件大小和平均每页字节数对文件归类，用于统计各后端的胜出情况"""
+    size = os.path.getsize(input_path)
+    per_page = size / max(1, page_count(input_path))
+
+    if per_page < 50 * 1024:
+        content = "文本"
+    elif per_page < 500 * 1024:
+        content = "图文"
+    else:
+        content = "扫描"
+
+    if size < 1024 * 1024:
+        size_class = "<1MB"
+    elif size < 10 * 1024 * 1024:
+        size_class = "1-10MB"
+    elif size < 100 * 1024 * 1024:
+        size_class = "10-100MB"
+    else:
+        size_class = ">100MB"
+
+    return f"{content}/{size_class}"
+
+
+def _run_backend(backend, input_path, output_path, level, timeout, expected_pages, executor=None):
+    """运行一个后端并检查输出是否有效，返回输出大小"""
+    if backend == "ghostscript":
+        compress_with_ghostscript(input_path, output_path, level, timeout=timeout, executor=executor)
+    else:
+        COMPRESSORS[backend](input_path, output_path, level)
+
+    # 输出必须能正常解析且页数不变
+    pages = len(PyPDF2.PdfReader(output_path).pages)
+    if pages != expected_pages:
+        raise ValueError(f"输出页数不一致: {pages}/{expected_pages}")
+    return os.path.getsize(output_path)
+
+
+def compress_auto(input_path, output_path, level="medium", timeouts=None, executor=None):
+    """同时运行所有可用的后端，保留最小的有效输出，返回 (胜出的后端, 大小, 各后端结果)
+
+    各后端结果为输出大小或错误信息。Ghostscript超时会被终止；
+    pikepdf 和 pypdfium2 在线程中运行无法强制终止，超时后放弃其结果。
+    executor 为Ghostscript后端使用的执行器。
+    """
+    backends = available_backends()
+    if not backends:
+        raise Exception("没有可用的压缩后端")
+    timeouts = dict(BACKEND_TIMEOUTS, **(timeouts or {}))
+    expected_pages = page_count(input_path)
+
+    # 候选文件放在输出目录中，胜出的结果可以直接改名替换
+    work_dir = tempfile.mkdtemp(prefix=".compress_", dir=os.path.dirname(os.path.abspath(output_path)))
+    pool = ThreadPoolExecutor(max_workers=len(backends))
+    try:
+        start = time.monotonic()
+        futures = {pool.submit(_run_backend, backend, input_path,
+                               os.path.join(work_dir, f"{backend}.pdf"), level,
+                               timeouts[backend], expected_pages, executor): backend
+                   for backend in backends}
+        outcomes = {}
+        pending = set(futures)
+        while pending:
+            elapsed = time.monotonic() - start
+            remaining = min(timeouts[futures[future]] - elapsed for future in pending)
+            done, pending = wait(pending, timeout=max(0, remaining), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    outcomes[futures[future]] = future.result()
+                except Exception as e:
+                    outcomes[futures[future]] = f"{type(e).__name__}: {e}"
+
+            elapsed = time.monotonic() - start
+            for future in [f for f in pending if elapsed >= timeouts[futures[f]]]:
+                future.cancel()
+                outcomes[futures[future]] = "超时"
+                pending.discard(future)
+
+        sizes = {backend: size for backend, size in outcomes.items() if isinstance(size, int)}
+        if not sizes:
+            details = "; ".join(f"{backend}: {error}" for backend, error in outcomes.items())
+            raise Exception(f"所有压缩后端均失败 ({details})")
+
+        winner = min(sizes, key=sizes.get)
+        os.replace(os.path.join(work_dir, f"{winner}.pdf"), output_path)
+        return winner, sizes[winner], outcomes
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _save_compact(pdf, output_path):
+    import pikepdf
+
+    pdf.save(output_path, compress_streams=True,
+             object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    return os.path.getsize(output_path)
+
+
+def _convert_scans(pdf, info, convert_bilevel, mrc_layers):
+    """扫描页转换：黑白图片改为CCITT G4，彩色扫描改为MRC分层，统计信息写入 info"""
+    if convert_bilevel:
+        from engine import bilevel
+
+        info["bilevel"] = bilevel.convert_images(pdf)
+    if mrc_layers:
+        from engine import mrc
+
+        info["mrc"] = mrc.layer_images(pdf)
+
+
+def _prepare_images(input_path, output_path, convert_bilevel, mrc_quality, recompress, overrides=None):
+    """压缩前的图片处理，文档只打开一次，返回各步骤的统计信息
+
+    mrc_quality 不为None时把彩色扫描改为MRC分层，背景和前景按该JPEG质量编码。
+    recompress 为 (目标DPI, 质量, 格式) 时最后对其余图片降采样并重新编码。
+    overrides 为画质检查回退的图片 {objgen: (DPI, 质量) 或 None}，这些图片不做扫描页转换，
+    重新编码时使用各自的设置（None表示保持原样）。
+    """
+    import pikepdf
+    from engine import images
+
+    overrides = overrides or {}
+    stats = {}
+    with pikepdf.open(input_path) as pdf:
+        if convert_bilevel:
+            from engine import bilevel
+
+            stats["bilevel"] = bilevel.convert_images(pdf, skip=overrides)
+        if mrc_quality is not None:
+            from engine import mrc
+
+            stats["mrc"] = mrc.layer_images(pdf, quality=mrc_quality, skip=overrides)
+        if recompress is not None:
+            stats["images"] = images.recompress_images(pdf, *recompress, overrides=overrides)
+        pdf.save(output_path)
+    return stats
+
+
+def compress_to_target(input_path, output_path, max_bytes, image_format="jpeg", convert_bilevel=False,
+                       mrc_layers=False):
+    """压缩到不超过 max_bytes：在 TARGET_STEPS 上二分查找满足大小的最高质量设置
+
+    文档只解析一次，图片只解码一次；每次尝试只重新编码图片，并用
+    "图片以外部分的大小 + 新图片大小" 估算输出大小，选定后再实际保存校验，
+    估算偏小时继续尝试更强的设置。全部设置都无法满足时保留最小的结果。
+    convert_bilevel、mrc_layers 见 _convert_scans。返回 (输出大小, 附加信息)。
+    """
+    info = {"algorithm": "target", "target_size": max_bytes, "dpi": None, "quality": None}
+    # 每次尝试都写到临时文件，源文档关闭后再替换目标文件（覆盖原文件时输出路径就是输入路径）
+    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix=".target_",
+                                     dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        size = _search_target(input_path, temp_path, max_bytes, image_format, convert_bilevel, mrc_layers, info)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return size, info
+
+
+def _search_target(input_path, output_path, max_bytes, image_format, convert_bilevel, mrc_layers, info):
+    """compress_to_target 的查找过程，结果写到 output_path，返回输出大小"""
+    import pikepdf
+    from engine import images
+
+    with pikepdf.open(input_path) as pdf:
+        info["dedup"] = dedup.dedupe_streams(pdf)
+        # 转换后的G4图片和分层表单不再参与按质量搜索
+        _convert_scans(pdf, info, convert_bilevel, mrc_layers)
+        decoded = images.DecodedImages(pdf)
+
+        # 不动图片时就已满足要求则直接返回
+        size = _save_compact(pdf, output_path)
+        info["probes"] = 1
+        if size <= max_bytes or not decoded.entries:
+            info["target_met"] = size <= max_bytes
+            return size
+        other_bytes = size - decoded.original_bytes
+
+        attempts = {}
+
+        def attempt(index):
+            if index not in attempts:
+                encoded = decoded.encode(*TARGET_STEPS[index], image_format)
+                attempts[index] = (encoded, other_bytes + decoded.estimate(encoded))
+                info["probes"] += 1
+            return attempts[index]
+
+        low, high, best = 0, len(TARGET_STEPS) - 1, None
+        while low <= high:
+            middle = (low + high) // 2
+            if attempt(middle)[1] <= max_bytes:
+                best, high = middle, middle - 1
+            else:
+                low = middle + 1
+
+        index = len(TARGET_STEPS) - 1 if best is None else best
+        while True:
+            encoded, estimate = attempt(index)
+            info["images"] = decoded.apply(encoded)
+            size = _save_compact(pdf, output_path)
+            if size <= max_bytes or index == len(TARGET_STEPS) - 1:
+                break
+            # 估算偏小：按实际误差修正后改用更强的设置
+            other_bytes += size - estimate
+            attempts.clear()
+            index += 1
+
+    info["dpi"], info["quality"] = TARGET_STEPS[index]
+    info["target_met"] = size <= max_bytes
+    return size
+
+
+def load_winner_stats():
+    """读取各类文件上各后端的胜出次数 {文件类别: {后端: 次数}}"""
+    try:
+        with open(os.path.join(data_dir(), WINNERS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_winners(results):
+    """把 auto 压缩的胜出后端按文件类别累计到统计文件"""
+    stats = load_winner_stats()
+    for result in results:
+        profile = result.info.get("profile")
+        winner = result.info.get("algorithm")
+        if result.success and profile and winner:
+            counts = stats.setdefault(profile, {})
+            counts[winner] = counts.get(winner, 0) + 1
+
+    path = os.path.join(data_dir(), WINNERS_FILE)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return stats
+
+
+def _compress_backend(input_path, output_path, algorithm, level, flate_level=None, executor=None):
+    """用指定算法压缩，返回 (输出大小, 附加信息)
+
+    flate_level 不为None时重新压缩流：pikepdf在同一次保存中完成，其他后端对输出再处理一遍。
+    executor 为Ghostscript后端使用的执行器。
+    """
+    if algorithm == "pikepdf":
+        info = {"algorithm": algorithm}
+        compressed_size = compress_with_pikepdf(input_path, output_path, level, stats=info,
+                                                flate_level=flate_level)
+        return compressed_size, info
+
+    if algorithm == "auto":
+        profile = file_profile(input_path)
+        winner, compressed_size, outcomes = compress_auto(input_path, output_path, level, executor=executor)
+        info = {"algorithm": winner, "profile": profile, "candidates": outcomes}
+    elif algorithm == "ghostscript":
+        compressed_size = compress_with_ghostscript(input_path, output_path, level, executor=executor)
+        info = {"algorithm": algorithm}
+    else:
+        compressor = COMPRESSORS.get(algorithm)
+        if compressor is None:
+            raise ValueError(f"不支持的压缩算法: {algorithm}")
+        compressed_size = compressor(input_path, output_path, level)
+        info = {"algorithm": algorithm}
+
+    if flate_level is not None:
+        info["flate"] = flate.recompress_file(output_path, flate_level, try_predictors=True)
+        compressed_size = os.path.getsize(output_path)
+    return compressed_size, info
+
+
+def _compress_pass(input_path, output_path, algorithm, level, flate_level, convert_bilevel, mrc_quality,
+                   recompress, overrides=None, executor=None):
+    """图片处理加压缩后端的一次完整压缩，返回 (输出大小, 附加信息)"""
+    stage_stats = {}
+    source_path = input_path
+    if recompress is not None or convert_bilevel or mrc_quality is not None:
+        fd, source_path = tempfile.mkstemp(suffix=".pdf", prefix=".images_",
+                                           dir=os.path.dirname(os.path.abspath(output_path)))
+        os.close(fd)
+
+    try:
+        if source_path != input_path:
+            stage_stats = _prepare_images(input_path, source_path, convert_bilevel, mrc_quality,
+                                          recompress, overrides)
+        compressed_size, info = _compress_backend(source_path, output_path, algorithm, level, flate_level,
+                                                  executor)
+    finally:
+        if source_path != input_path and os.path.exists(source_path):
+            os.remove(source_path)
+
+    # 检查压缩结果
+    if compressed_size < 0:
+        raise Exception("压缩失败")
+
+    info.update(stage_stats)
+    return compressed_size, info
+
+
+def _guard_quality(input_path, output_path, settings, min_ssim, compressed_size, info, executor=None):
+    """画质检查：SSIM低于 min_ssim 的页面上的图片逐级改用更温和的设置重新压缩
+
+    每轮只复查图片有变化的页面，所有回退级别用完后保留这些图片的原样。
+    返回最后一次压缩的 (输出大小, 附加信息)，info["quality"] 为检查结果。
+    """
+    import pikepdf
+    from engine import images, quality
+
+    with pikepdf.open(input_path) as pdf:
+        page_images = images.images_by_page(pdf)
+    recompress = settings[-1]
+    target_dpi, image_quality = recompress[:2] if recompress is not None else (None, 0)
+
+    scores = quality.score_pages(input_path, output_path)
+    all_scores = dict(scores)
+    steps = {}
+    fallback_pages = set()
+    while True:
+        failing = {index for index, (value, _) in scores.items() if value < min_ssim}
+        pending = {objgen for index in failing for objgen in page_images[index]
+                   if steps.get(objgen, -1) < len(quality.FALLBACK_STEPS)}
+        if not pending:
+            break
+        for objgen in pending:
+            steps[objgen] = steps.get(objgen, -1) + 1
+        fallback_pages |= failing
+
+        compressed_size, info = _compress_pass(input_path, output_path, *settings,
+                                               quality.fallback_settings(steps, target_dpi, image_quality),
+                                               executor)
+        changed = [index for index, objgens in enumerate(page_images) if objgens & pending]
+        scores = quality.score_pages(input_path, output_path, changed)
+        all_scores.update(scores)
+
+    info["quality"] = {
+        "pages": len(all_scores),
+        "min_ssim": min((value for value, _ in all_scores.values()), default=1.0),
+        "min_psnr": min((value for _, value in all_scores.values()), default=float("inf")),
+        "fallback_pages": sorted(index + 1 for index in fallback_pages),
+        "failed_pages": sorted(index + 1 for index, (value, _) in all_scores.items() if value < min_ssim),
+    }
+    return compressed_size, info
+
+
+def _linearize_output(output_path, info):
+    """线性化压缩结果，返回新的文件大小"""
+    linearize_file(output_path)
+    info["linearized"] = True
+    return os.path.getsize(output_path)
+
+
+def compress_file(input_path, output_path, algorithm="pikepdf", level="medium",
+                  optimize_images=False, image_quality=75, image_format="jpeg", image_dpi=None,
+                  target_size=None, linearize=False, flate_level=None, convert_bilevel=False,
+                  mrc_layers=False, min_ssim=None, executor=None):
+    """压缩单个PDF文件
+
+    optimize_images 为 True 时先对图片降采样并重新编码，再交给压缩后端处理；
+    image_dpi 未指定时按压缩级别取 images.DEFAULT_DPI 中的值。
+    指定 target_size（字节）时改为按目标大小压缩，忽略算法、级别和图片参数。
+    linearize 为 True 时对压缩结果线性化（快速网页查看）。
+    flate_level 不为None时按该zlib级别并行重新压缩无损编码和未压缩的流。
+    convert_bilevel 为 True 时把黑白扫描图片改为1位CCITT G4编码，
+    mrc_layers 为 True 时把彩色扫描拆分为文字遮罩、背景和前景（MRC分层），背景和前景按 image_quality 编码。
+    min_ssim 不为None时检查有损处理后各页的画质，低于该SSIM的页面改用更温和的设置
+    （按目标大小压缩时不检查）。
+    executor 为Ghostscript后端使用的执行器（只能在线程中共用，不能传给进程池）。
+    """
+    # 获取原始文件大小
+    original_size = os.path.getsize(input_path)
+
+    if target_size:
+        compressed_size, info = compress_to_target(input_path, output_path, target_size, image_format,
+                                                     convert_bilevel, mrc_layers)
+        if linearize:
+            compressed_size = _linearize_output(output_path, info)
+        return FileResult(input_path, output_path=output_path,
+                          original_size=original_size, output_size=compressed_size, info=info)
+
+    recompress = None
+    if optimize_images:
+        from engine import images
+
+        if image_dpi is None:
+            image_dpi = images.DEFAULT_DPI.get(level, 150)
+        recompress = (image_dpi, image_quality, image_format)
+    mrc_quality = image_quality if mrc_layers else None
+    settings = (algorithm, level, flate_level, convert_bilevel, mrc_quality, recompress)
+
+    final_path = output_path
+    guarded = min_ssim and (recompress is not None or convert_bilevel or mrc_layers)
+    if guarded and os.path.abspath(output_path) == os.path.abspath(input_path):
+        # 覆盖原文件时先写到临时文件，画质检查需要和原文件比较
+        fd, output_path = tempfile.mkstemp(suffix=".pdf", prefix=".guard_",
+                                           dir=os.path.dirname(os.path.abspath(final_path)))
+        os.close(fd)
+
+    try:
+        compressed_size, info = _compress_pass(input_path, output_path, *settings, executor=executor)
+        if guarded:
+            compressed_size, info = _guard_quality(input_path, output_path, settings, min_ssim,
+                                                   compressed_size, info, executor)
+        if output_path != final_path:
+            os.replace(output_path, final_path)
+    finally:
+        if output_path != final_path and os.path.exists(output_path):
+            os.remove(output_path)
+    output_path = final_path
+
+    if linearize:
+        compressed_size = _linearize_output(output_path, info)
+    return FileResult(input_path, output_path=output_path,
+                      original_size=original_size, output_size=compressed_size, info=info)
+
+
+def compress_pdfs(files, output_dir=None, algorithm="pikepdf", level="medium",
+                  output_suffix="_compressed", overwrite_original=False,
+                  progress=None, should_stop=None, optimize_images=False,
+                  image_quality=75, image_format="jpeg", image_dpi=None, target_size=None,
+                  linearize=False, flate_level=None, convert_bilevel=False, mrc_layers=False,
+                  min_ssim=None, skip_known=False, gs_workers=None, gs_timeout=ghostscript.DEFAULT_TIMEOUT,
+                  gs_memory_limit=ghostscript.DEFAULT_MEMORY_LIMIT, log=None):
+    """压缩PDF文件的核心功能，各文件在进程池中并行压缩
+
+    skip_known 为True时跳过指纹记录中已用相同设置处理过或已知无法变小的文件。
+    使用Ghostscript（包括自动模式下Ghostscript可用时）各文件改在主进程的线程中处理，
+    所有 gs 进程由同一个执行器启动，限制同时运行的 gs 进程数（gs_workers）
+    和每个文件的时间（gs_timeout，秒）和内存（gs_memory_limit，MB），gs 的输出逐行交给 log(message)。
+    """
+    executor = None
+    job_scheduler = scheduler.get_scheduler()
+    if algorithm == "ghostscript" or (algorithm == "auto" and "ghostscript" in available_backends()):
+        executor = ghostscript.GhostscriptExecutor(gs_workers, gs_timeout, gs_memory_limit, log, should_stop)
+        # 自动模式下其他后端也在这些线程中运行，线程数不受 gs 进程数限制
+        workers = executor.max_workers if algorithm == "ghostscript" else job_scheduler.max_workers
+        job_scheduler = scheduler.JobScheduler(workers, use_processes=False)
+
+    jobs = []
+    for file_path in files:
+        # 确定输出路径
+        if overwrite_original:
+            output_path = file_path
+        else:
+            output_path = suffixed_output_path(file_path, output_dir, output_suffix)
+        jobs.append((file_path, output_path,
+                     (file_path, output_path, algorithm, level, optimize_images,
+                      image_quality, image_format, image_dpi, target_size,
+                      linearize, flate_level, convert_bilevel, mrc_layers, min_ssim, executor)))
+
+    if skip_known:
+        # 输出路径由输入路径决定，不作为设置的一部分
+        settings = {"algorithm": algorithm, "level": level, "optimize_images": optimize_images,
+                    "image_quality": image_quality, "image_format": image_format,
+                    "image_dpi": image_dpi, "target_size": target_size, "linearize": linearize,
+                    "flate_level": flate_level, "convert_bilevel": convert_bilevel,
+                    "mrc_layers": mrc_layers, "min_ssim": min_ssim}
+        results = fingerprint.run_skipping(compress_file, jobs, "compress", settings,
+                                           progress, should_stop, job_scheduler=job_scheduler)
+    else:
+        results = job_scheduler.map_files(compress_file, [(path, args) for path, _, args in jobs],
+                                          progress, should_stop)
+    if executor is not None:
+        job_scheduler.shutdown()
+    if algorithm == "auto":
+        # 工作进程各自独立，胜出统计在主进程中汇总写入
+        try:
+            record_winners(results)
+        except OSError:
+            pass
+    return results
@@ -0,0 +1,135 @@
+"""重复流对象合并
+
+由多个来源拼合的文档经常把同一个徽标、字体或ICC配置文件嵌入几百次。
+这里找出字节完全相同（流字典也相同）的流对象，只保留一个，并把所有引用改为指向它；
+没有引用的副本在保存时不再写出。
+
+只有 /Length 和流字典都相同的流才会读取数据计算哈希。原始数据由qpdf读入一个缓冲区后
+直接计算哈希，不再复制为Python bytes，算完即释放，不会为比较而保留各个流的数据。
+"""
+import hashlib
+
+# 合并后引用它的流字典可能变得相同（例如带有相同 /SMask 的图片），最多重复的轮数
+MAX_ROUNDS = 4
+
+
+def is_available():
+    """是否安装了pikepdf"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _stream_key(stream):
+    """不读取数据的分组键：原始长度和除 /Length 以外的流字典"""
+    import pikepdf
+
+    entries = pikepdf.Dictionary(stream.stream_dict)
+    if "/Length" in entries:
+        del entries["/Length"]
+    try:
+        length = int(stream.get("/Length"))
+    except (TypeError, ValueError):
+        length = -1
+    # 间接引用序列化为 "n g R"，只有引用同一对象的字典才会相同
+    return length, entries.unparse()
+
+
+def _digest(stream):
+    """计算原始（未解码）数据的哈希，返回 (摘要, 字节数)"""
+    data = memoryview(stream.get_raw_stream_buffer())
+    return hashlib.blake2b(data, digest_size=20).digest(), data.nbytes
+
+
+def find_duplicates(pdf, removed=()):
+    """返回 ({副本objgen: 保留的对象}, 副本原始字节数合计, 参与哈希的流数量)
+
+    removed 中的对象是之前已合并掉的副本，不再参与比较。
+    """
+    import pikepdf
+
+    buckets = {}
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream) and obj.objgen not in removed:
+            buckets.setdefault(_stream_key(obj), []).append(obj)
+
+    replacements = {}
+    saved = 0
+    hashed = 0
+    for streams in buckets.values():
+        if len(streams) < 2:
+            continue
+        canonical = {}
+        for stream in streams:
+            digest, size = _digest(stream)
+            hashed += 1
+            kept = canonical.setdefault(digest, stream)
+            if kept is not stream:
+                replacements[stream.objgen] = kept
+                saved += size
+    return replacements, saved, hashed
+
+
+def _rewrite(container, replacements):
+    """把容器中指向副本的引用改为指向保留的对象，递归处理直接嵌套的字典和数组"""
+    import pikepdf
+
+    if isinstance(container, pikepdf.Array):
+        items = enumerate(container)
+    else:
+        items = ((key, container[key]) for key in list(container.keys()))
+
+    for key, value in items:
+        if not isinstance(value, pikepdf.Object):
+            # 数字、布尔值等标量会被转换为Python对象，不可能是引用
+            continue
+        if value.is_indirect:
+            kept = replacements.get(value.objgen)
+            if kept is not None:
+                container[key] = kept
+        elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+            _rewrite(value, replacements)
+
+
+def rewrite_references(pdf, replacements):
+    """更新文档中所有对象对副本的引用"""
+    import pikepdf
+
+    _rewrite(pdf.trailer, replacements)
+    for obj in pdf.objects:
+        if obj.objgen in replacements:
+            continue
+        if isinstance(obj, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+            _rewrite(obj, replacements)
+
+
+def dedupe_streams(pdf):
+    """合并 pdf（pikepdf.Pdf）中重复的流对象，返回统计信息
+
+    bytes_saved 为被合并的副本的原始数据字节数，副本在保存时不会再写出。
+    """
+    stats = {"streams": 0, "duplicates": 0, "bytes_saved": 0}
+    removed = set()
+    for _ in range(MAX_ROUNDS):
+        replacements, saved, hashed = find_duplicates(pdf, removed)
+        stats["streams"] += hashed
+        if not replacements:
+            break
+        rewrite_references(pdf, replacements)
+        removed.update(replacements)
+        stats["duplicates"] += len(replacements)
+        stats["bytes_saved"] += saved
+    return stats
+
+
+def dedupe_file(file_path):
+    """就地合并文件中的重复流对象，没有重复时不改写文件，返回统计信息"""
+    import pikepdf
+
+    with pikepdf.open(file_path, allow_overwriting_input=True) as pdf:
+        stats = dedupe_streams(pdf)
+        if stats["duplicates"]:
+            pdf.save(file_path)
+    return stats
@@ -0,0 +1,205 @@
+"""进程内共享的文档缓存
+
+同一个PDF会被文件信息、预览和实际操作反复打开。这里按 (绝对路径, 大小, 修改时间)
+缓存已解析的 PdfReader 和由它得到的页数、加密状态、书签、表单字段等信息；
+文件被修改后标识变化，旧条目自然失效。
+
+解析后的文档占用内存较多，按估算字节数做LRU淘汰；派生信息很小，单独按条目数淘汰，
+因此在文档被淘汰后仍然可以直接返回页数等信息。
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import PyPDF2
+
+# 已解析文档的默认内存上限
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 派生信息的默认条目上限
+DEFAULT_MAX_FACTS = 8192
+# PdfReader会把整个文件读入内存，再加上解析出的对象，按文件大小的倍数估算占用
+READER_OVERHEAD = 2
+
+
+def file_key(file_path):
+    """文件标识：路径、大小和修改时间任一变化都视为不同文件"""
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+class _ReaderEntry:
+    """缓存的已解析文档；PdfReader不是线程安全的，使用时需持有锁"""
+
+    def __init__(self, reader, cost):
+        self.reader = reader
+        self.cost = cost
+        self.lock = threading.RLock()
+
+
+class DocumentCache:
+    """按文件标识缓存已解析的PDF文档及其派生信息"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_facts=DEFAULT_MAX_FACTS):
+        self.max_bytes = max_bytes
+        self.max_facts = max_facts
+        self._readers = OrderedDict()
+        self._facts = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _parse(self, file_path):
+        """解析PDF；内存不足时清空缓存后重试一次"""
+        try:
+            return PyPDF2.PdfReader(file_path)
+        except MemoryError:
+            self.clear_readers()
+            return PyPDF2.PdfReader(file_path)
+
+    def _get_entry(self, file_path):
+        key = file_key(file_path)
+        with self._lock:
+            entry = self._readers.get(key)
+            if entry is not None:
+                self._readers.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # 解析放在锁外，避免大文件阻塞其他线程
+        reader = self._parse(file_path)
+        entry = _ReaderEntry(reader, key[1] * READER_OVERHEAD)
+
+        with self._lock:
+            existing = self._readers.get(key)
+            if existing is not None:
+                return existing
+            if entry.cost <= self.max_bytes:
+                self._readers[key] = entry
+                self._bytes += entry.cost
+                self._drop_stale(key)
+                self._evict()
+        return entry
+
+    def _drop_stale(self, key):
+        """同一路径的旧版本已经无效，直接移除"""
+        for old_key in [k for k in self._readers if k[0] == key[0] and k != key]:
+            self._bytes -= self._readers.pop(old_key).cost
+        for old_key in [k for k in self._facts if k[0] == key[0] and k != key]:
+            del self._facts[old_key]
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._readers:
+            _, entry = self._readers.popitem(last=False)
+            self._bytes -= entry.cost
+
+    @contextmanager
+    def reader(self, file_path):
+        """获取共享的PdfReader，在with块内独占使用
+
+        调用方不能修改读取到的页面对象，需要修改时先 add_page 到 PdfWriter 再修改副本。
+        """
+        entry = self._get_entry(file_path)
+        with entry.lock:
+            yield entry.reader
+
+    def fact(self, file_path, name, compute):
+        """获取派生信息，未缓存时调用 compute(file_path) 计算"""
+        key = file_key(file_path)
+        with self._lock:
+            facts = self._facts.get(key)
+            if facts is not None and name in facts:
+                self._facts.move_to_end(key)
+                return facts[name]
+
+        value = compute(file_path)
+
+        with self._lock:
+            facts = self._facts.setdefault(key, {})
+            facts[name] = value
+            self._facts.move_to_end(key)
+            self._drop_stale(key)
+            while len(self._facts) > self.max_facts:
+                self._facts.popitem(last=False)
+        return value
+
+    def invalidate(self, file_path):
+        """移除某个文件的所有缓存"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [k for k in self._readers if k[0] == path]:
+                self._bytes -= self._readers.pop(key).cost
+            for key in [k for k in self._facts if k[0] == path]:
+                del self._facts[key]
+
+    def clear_readers(self):
+        """释放所有已解析的文档，保留派生信息"""
+        with self._lock:
+            self._readers.clear()
+            self._bytes = 0
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._readers.clear()
+            self._facts.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                "documents": len(self._readers),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "facts": len(self._facts),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache = DocumentCache()
+
+
+def get_cache():
+    """获取进程内共享的文档缓存"""
+    return _cache
+
+
+def configure(max_bytes=None, max_facts=None):
+    """调整缓存上限，超出部分立即淘汰"""
+    with _cache._lock:
+        if max_bytes is not None:
+            _cache.max_bytes = max_bytes
+        if max_facts is not None:
+            _cache.max_facts = max_facts
+        _cache._evict()
+        while len(_cache._facts) > _cache.max_facts:
+            _cache._facts.popitem(last=False)
+
+
+def open_reader(file_path):
+    """获取共享的PdfReader（上下文管理器）"""
+    return _cache.reader(file_path)
+
+
+def cached_fact(file_path, name, compute):
+    """获取缓存的派生信息"""
+    return _cache.fact(file_path, name, compute)
+
+
+def invalidate(file_path):
+    """移除某个文件的缓存"""
+    _cache.invalidate(file_path)
+
+
+def _count_pages(file_path):
+    with open_reader(file_path) as reader:
+        return len(reader.pages)
+
+
+def page_count(file_path):
+    """缓存的页数"""
+    return cached_fact(file_path, "page_count", _count_pages)
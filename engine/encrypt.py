@@ -0,0 +1,114 @@
+from engine import scheduler
+from engine.common import FileResult, failed, suffixed_output_path
+
+PIKEPDF_MISSING = "未安装pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
+
+
+def check_dependency():
+    """检查pikepdf是否已安装，缺失时返回错误提示"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return PIKEPDF_MISSING
+    return None
+
+
+def validate_inputs(files, mode, password, confirm_password=""):
+    """验证输入，返回错误提示或None"""
+    if not files:
+        return "请先选择PDF文件"
+
+    password = password.strip()
+
+    if mode == "encrypt":
+        if not password:
+            return "请设置加密密码"
+
+        if len(password) < 4:
+            return "密码长度至少为4个字符"
+
+        if password != confirm_password.strip():
+            return "密码和确认密码不一致"
+
+    else:  # 解密模式
+        if not password:
+            return "请输入PDF文件的密码"
+
+    return None
+
+
+def build_permissions(allow_printing=True, allow_copying=True,
+                      allow_modification=False, allow_annotations=True):
+    """根据权限选项生成pikepdf权限对象"""
+    import pikepdf
+
+    # pikepdf.Permissions 默认允许所有操作，这里按选项逐项设置
+    return pikepdf.Permissions(
+        print_lowres=allow_printing,
+        print_highres=allow_printing,
+        extract=allow_copying,
+        accessibility=allow_copying,
+        modify_other=allow_modification,
+        modify_annotation=allow_annotations or allow_modification,
+        modify_form=allow_modification,
+        modify_assembly=allow_modification,
+    )
+
+
+def _output_path(file_path, output_dir, output_suffix, overwrite_original):
+    if overwrite_original:
+        return file_path
+    return suffixed_output_path(file_path, output_dir, output_suffix)
+
+
+def encrypt_pdf(input_path, output_path, password, algorithm="AES-256", permissions=None):
+    """加密单个PDF文件"""
+    import pikepdf
+
+    with pikepdf.open(input_path) as pdf:
+        encryption = pikepdf.Encryption(
+            owner=password,
+            user=password,
+            allow=permissions if permissions is not None else pikepdf.Permissions(),
+            # AES-256 对应 R6，AES-128 对应 R4
+            R=6 if algorithm == "AES-256" else 4,
+            aes=True,
+        )
+        pdf.save(output_path, encryption=encryption)
+
+    return FileResult(input_path, output_path=output_path)
+
+
+def decrypt_pdf(input_path, output_path, password):
+    """解密单个PDF文件"""
+    import pikepdf
+
+    try:
+        with pikepdf.open(input_path, password=password) as pdf:
+            # 保存未加密的文件
+            pdf.save(output_path)
+    except pikepdf.PasswordError:
+        return failed(input_path, "密码错误或文件未加密")
+
+    return FileResult(input_path, output_path=output_path)
+
+
+def encrypt_pdfs(files, output_dir, password, algorithm="AES-256", permissions=None,
+                 output_suffix="_encrypted", overwrite_original=False,
+                 progress=None, should_stop=None):
+    """加密PDF文件，各文件在进程池中并行处理"""
+    jobs = [(file_path, (file_path,
+                         _output_path(file_path, output_dir, output_suffix, overwrite_original),
+                         password, algorithm, permissions))
+            for file_path in files]
+    return scheduler.map_files(encrypt_pdf, jobs, progress, should_stop)
+
+
+def decrypt_pdfs(files, output_dir, password, output_suffix="_decrypted",
+                 overwrite_original=False, progress=None, should_stop=None):
+    """解密PDF文件，各文件在进程池中并行处理"""
+    jobs = [(file_path, (file_path,
+                         _output_path(file_path, output_dir, output_suffix, overwrite_original),
+                         password))
+            for file_path in files]
+    return scheduler.map_files(decrypt_pdf, jobs, progress, should_stop)
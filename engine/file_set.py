@@ -0,0 +1,101 @@
+"""有序、带索引的文件集合
+
+主窗口的文件列表可能有数万个文件。集合按添加顺序保存路径，同时维护 路径 → 位置 的索引，
+判断是否已添加、查找位置都是O(1)；批量移除只重建一次。各工具共用同一个集合对象。
+"""
+import os
+
+
+class FileSet:
+    """按添加顺序排列、不含重复路径的文件列表"""
+
+    def __init__(self, files=()):
+        self._files = []
+        self._index = {}
+        # 每次修改后递增，界面据此判断是否需要刷新
+        self.version = 0
+        self.extend(files)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __getitem__(self, index):
+        return self._files[index]
+
+    def __contains__(self, file_path):
+        return file_path in self._index
+
+    def __repr__(self):
+        return f"FileSet({len(self._files)} files)"
+
+    def index(self, file_path):
+        """文件的位置，不在集合中时抛出ValueError"""
+        try:
+            return self._index[file_path]
+        except KeyError:
+            raise ValueError(f"{file_path!r} 不在文件列表中") from None
+
+    def add(self, file_path):
+        """添加文件，已存在时返回False"""
+        if file_path in self._index:
+            return False
+        self._index[file_path] = len(self._files)
+        self._files.append(file_path)
+        self.version += 1
+        return True
+
+    def extend(self, files):
+        """批量添加文件，返回新添加的数量"""
+        added = 0
+        for file_path in files:
+            if file_path not in self._index:
+                self._index[file_path] = len(self._files)
+                self._files.append(file_path)
+                added += 1
+        if added:
+            self.version += 1
+        return added
+
+    def remove_indices(self, indices):
+        """按位置批量移除文件，返回移除的数量"""
+        removed = {index for index in indices if 0 <= index < len(self._files)}
+        if not removed:
+            return 0
+        self._files = [file_path for index, file_path in enumerate(self._files) if index not in removed]
+        self._index = {file_path: index for index, file_path in enumerate(self._files)}
+        self.version += 1
+        return len(removed)
+
+    def remove(self, file_path):
+        """移除一个文件，不在集合中时抛出ValueError"""
+        self.remove_indices([self.index(file_path)])
+
+    def move(self, indices, offset):
+        """把 indices 处的文件整体上移（offset=-1）或下移（offset=1）一位，返回移动后的位置
+
+        有文件已在最前（上移）或最后（下移）时不移动，返回原位置。
+        """
+        indices = sorted(indices)
+        if not indices or offset not in (-1, 1):
+            return indices
+        if (offset < 0 and indices[0] == 0) or (offset > 0 and indices[-1] == len(self._files) - 1):
+            return indices
+        for index in (indices if offset < 0 else reversed(indices)):
+            other = index + offset
+            self._files[index], self._files[other] = self._files[other], self._files[index]
+            self._index[self._files[index]] = index
+            self._index[self._files[other]] = other
+        self.version += 1
+        return [index + offset for index in indices]
+
+    def clear(self):
+        self._files = []
+        self._index = {}
+        self.version += 1
+
+    def name(self, index):
+        """第 index 个文件的文件名"""
+        return os.path.basename(self._files[index])
@@ -0,0 +1,189 @@
+"""已处理文件的指纹记录
+
+批量任务每晚重复运行时，大部分文件在前一晚已经用相同设置处理过。这里持久记录
+(文件内容哈希, 工具, 设置) → (输出哈希, 压缩比)，再次处理前据此跳过：
+
+  up_to_date   输出文件存在且与上次的输出相同
+  is_output    文件本身就是上次用相同设置得到的输出（例如覆盖原文件）
+  no_gain      上次处理后没有变小
+
+哈希分块流式计算，多个文件在线程池中并行（hashlib处理大块数据时释放GIL）；
+按 (路径, 大小, 修改时间) 缓存哈希，未修改的文件不需要重新读取。
+记录保存在 data_dir() 下的JSON文件中，只在主进程中读写。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import scheduler
+from engine.common import FileResult, data_dir
+
+STORE_FILE = "fingerprints.json"
+# 每次读取并计算哈希的字节数
+HASH_CHUNK = 1024 * 1024
+# 记录条目上限，超出时淘汰最早的记录
+MAX_ENTRIES = 100000
+
+SKIP_REASONS = {
+    "up_to_date": "输出已是最新",
+    "is_output": "已是处理结果",
+    "no_gain": "已知无法变小",
+}
+
+
+def hash_file(file_path):
+    """流式计算文件内容的哈希"""
+    digest = hashlib.blake2b(digest_size=20)
+    buffer = bytearray(HASH_CHUNK)
+    view = memoryview(buffer)
+    with open(file_path, "rb") as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+def settings_key(tool, settings):
+    """工具和设置的标识，设置为可JSON序列化的字典"""
+    text = json.dumps([tool, settings], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class FingerprintStore:
+    """指纹记录，load() 读取、save() 合并写回"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), STORE_FILE)
+        # "设置标识:内容哈希" -> {"output": 输出哈希, "ratio": 输出/输入大小, "time": 记录时间}
+        self.entries = {}
+        # 绝对路径 -> [大小, 修改时间, 哈希]
+        self.files = {}
+        self._outputs = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.entries = data.get("entries", {})
+        self.files = data.get("files", {})
+        self._outputs = {}
+        for key, entry in self.entries.items():
+            self._outputs.setdefault(key.split(":")[0], set()).add(entry["output"])
+        return self
+
+    def file_hash(self, file_path):
+        """文件内容哈希，大小和修改时间未变时使用缓存"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self.files.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hash_file(path)
+        with self._lock:
+            self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def hash_files(self, files, max_workers=4):
+        """并行计算多个文件的哈希，返回 {路径: 哈希}，无法读取的文件不在结果中"""
+        def safe_hash(file_path):
+            try:
+                return self.file_hash(file_path)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            digests = dict(zip(files, pool.map(safe_hash, files)))
+        return {path: digest for path, digest in digests.items() if digest is not None}
+
+    def skip_reason(self, settings_id, content_hash, output_path):
+        """文件可以跳过时返回原因（见 SKIP_REASONS），否则返回None"""
+        entry = self.entries.get(f"{settings_id}:{content_hash}")
+        if entry is not None:
+            if entry["ratio"] >= 1:
+                return "no_gain"
+            try:
+                if os.path.exists(output_path) and self.file_hash(output_path) == entry["output"]:
+                    return "up_to_date"
+            except OSError:
+                pass
+        if content_hash in self._outputs.get(settings_id, ()):
+            return "is_output"
+        return None
+
+    def record(self, settings_id, content_hash, output_hash, ratio):
+        self.entries[f"{settings_id}:{content_hash}"] = {"output": output_hash, "ratio": ratio,
+                                                         "time": time.time()}
+        self._outputs.setdefault(settings_id, set()).add(output_hash)
+
+    def save(self):
+        """与文件中现有的记录合并后写回（原子替换）"""
+        current = FingerprintStore(self.path).load()
+        current.entries.update(self.entries)
+        current.files.update(self.files)
+        entries = current.entries
+        if len(entries) > MAX_ENTRIES:
+            newest = sorted(entries, key=lambda key: entries[key]["time"], reverse=True)[:MAX_ENTRIES]
+            entries = {key: entries[key] for key in newest}
+        files = {path: value for path, value in current.files.items() if os.path.exists(path)}
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": entries, "files": files}, f)
+        os.replace(temp_path, self.path)
+
+
+def run_skipping(func, jobs, tool, settings, progress=None, should_stop=None, message_prefix="",
+                 job_scheduler=None):
+    """与 scheduler.map_files 相同，但跳过指纹记录表明无需处理的文件
+
+    jobs 为 (输入路径, 输出路径, 参数元组) 列表。跳过的文件返回成功结果，
+    info["skipped"] 为跳过原因；处理成功的文件在结束后记录指纹。
+    job_scheduler 未指定时使用全局调度器。
+    """
+    store = FingerprintStore().load()
+    settings_id = settings_key(tool, settings)
+    hashes = store.hash_files([input_path for input_path, _, _ in jobs])
+
+    results = [None] * len(jobs)
+    pending = []
+    for index, (input_path, output_path, args) in enumerate(jobs):
+        reason = hashes.get(input_path) and store.skip_reason(settings_id, hashes[input_path], output_path)
+        if reason:
+            size = os.path.getsize(input_path)
+            output_size = os.path.getsize(output_path) if reason == "up_to_date" else size
+            results[index] = FileResult(input_path, output_path=output_path if reason == "up_to_date" else "",
+                                        original_size=size, output_size=output_size,
+                                        info={"skipped": reason})
+        else:
+            pending.append(index)
+
+    job_scheduler = job_scheduler or scheduler.get_scheduler()
+    processed = job_scheduler.map_files(func, [(jobs[index][0], jobs[index][2]) for index in pending],
+                                        progress, should_stop, message_prefix)
+    # 停止后未执行的任务不在结果中，按输入路径对应回原来的位置
+    positions = {jobs[index][0]: index for index in pending}
+    for result in processed:
+        results[positions[result.input_path]] = result
+
+    finished = [result for result in processed
+                if result.success and result.output_path
+                and result.input_path in hashes and os.path.exists(result.output_path)]
+    output_hashes = store.hash_files([result.output_path for result in finished])
+    for result in finished:
+        if result.output_path in output_hashes and result.original_size:
+            store.record(settings_id, hashes[result.input_path], output_hashes[result.output_path],
+                         result.output_size / result.original_size)
+    try:
+        store.save()
+    except OSError:
+        pass
+    return [result for result in results if result is not None]
@@ -0,0 +1,189 @@
+"""Flate流重新压缩
+
+很多生成工具把流存成未压缩、低压缩级别（level 1）的Flate或LZW/ASCII编码。这里把这些
+无损编码的流解码后按指定的zlib级别重新压缩为Flate，可选地对8位图片尝试PNG预测器，只有结果更小时才替换。
+zlib压缩时会释放GIL，压缩在线程池中并行；解码和写回PDF对象在调用线程中进行。
+"""
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_LEVEL = 9
+# 对象流和交叉引用流由pikepdf在保存时重新生成
+SKIPPED_TYPES = ("/ObjStm", "/XRef")
+# 可以无损解码并改为Flate的过滤器，图片专用的编码（DCT、JBIG2、CCITT等）保持不变
+GENERALIZED_FILTERS = ("/FlateDecode", "/LZWDecode", "/ASCII85Decode", "/ASCIIHexDecode",
+                       "/RunLengthDecode")
+# 小于这个字节数的流重新压缩的收益可以忽略
+MIN_STREAM_BYTES = 64
+# 图片颜色空间对应的分量数
+COLOR_COMPONENTS = {"/DeviceGray": 1, "/CalGray": 1, "/Indexed": 1,
+                    "/DeviceRGB": 3, "/CalRGB": 3, "/Lab": 3, "/DeviceCMYK": 4}
+
+
+def check_dependency():
+    """检查重新压缩所需的依赖，缺失时返回错误提示"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return "重新压缩流需要pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
+    return None
+
+
+def _has_numpy():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _filters(stream):
+    import pikepdf
+
+    filters = stream.get("/Filter")
+    if filters is None:
+        return []
+    if isinstance(filters, pikepdf.Array):
+        return [str(f) for f in filters]
+    return [str(filters)]
+
+
+def _components(image):
+    """图片每个像素的分量数，无法确定时返回None"""
+    import pikepdf
+
+    color_space = image.get("/ColorSpace")
+    if isinstance(color_space, pikepdf.Array) and len(color_space):
+        family = str(color_space[0])
+        if family == "/ICCBased":
+            return int(color_space[1].get("/N", 0)) or None
+        return COLOR_COMPONENTS.get(family)
+    return COLOR_COMPONENTS.get(str(color_space)) if color_space is not None else None
+
+
+def _png_predict(data, width, components, row_filter):
+    """按PNG预测器编码8位图片数据：row_filter 1 为Sub，2 为Up，每行前加过滤类型字节"""
+    import numpy as np
+
+    row_bytes = width * components
+    rows = np.frombuffer(data, dtype=np.uint8)[:len(data) // row_bytes * row_bytes].reshape(-1, row_bytes)
+    if row_filter == 1:
+        predicted = rows.copy()
+        predicted[:, components:] -= rows[:, :-components]
+    else:
+        predicted = rows.copy()
+        predicted[1:] -= rows[:-1]
+    tagged = np.empty((rows.shape[0], row_bytes + 1), dtype=np.uint8)
+    tagged[:, 0] = row_filter
+    tagged[:, 1:] = predicted
+    return tagged.tobytes()
+
+
+def _compress(data, level, predictor):
+    """线程池中执行：压缩数据，predictor 为 (宽, 分量数) 时同时尝试PNG预测器
+
+    返回 (压缩数据, 解码参数)，解码参数为None表示不使用预测器。
+    """
+    best = zlib.compress(data, level), None
+    if predictor is not None:
+        width, components = predictor
+        for row_filter in (1, 2):
+            candidate = zlib.compress(_png_predict(data, width, components, row_filter), level)
+            if len(candidate) < len(best[0]):
+                best = candidate, (width, components)
+    return best
+
+
+def _predictor_for(stream, data):
+    """8位图片在数据完整时返回 (宽, 分量数)，否则返回None"""
+    if stream.get("/Subtype") != "/Image" or int(stream.get("/BitsPerComponent", 0)) != 8:
+        return None
+    components = _components(stream)
+    width = int(stream.get("/Width", 0))
+    height = int(stream.get("/Height", 0))
+    if not components or not width or len(data) != width * height * components:
+        return None
+    return width, components
+
+
+def _apply(stream, compressed, predictor):
+    import pikepdf
+
+    if predictor is None:
+        stream.write(compressed, filter=pikepdf.Name.FlateDecode)
+        return
+    width, components = predictor
+    stream.write(compressed, filter=pikepdf.Name.FlateDecode,
+                 decode_parms=pikepdf.Dictionary(Predictor=15, Colors=components,
+                                                 BitsPerComponent=8, Columns=width))
+
+
+def recompress_streams(pdf, level=DEFAULT_LEVEL, try_predictors=False, max_workers=4):
+    """重新压缩 pdf（pikepdf.Pdf）中无损编码和未压缩的流，返回统计信息
+
+    try_predictors 为 True 时对8位图片同时尝试PNG预测器（需要NumPy，未安装时跳过）。
+    统计信息包含检查的流数量、替换的数量、节省的字节数、处理的解码后字节数、
+    耗时（秒）和吞吐量（解码后字节/秒）。
+    """
+    import pikepdf
+
+    try_predictors = try_predictors and _has_numpy()
+
+    stats = {"streams": 0, "recompressed": 0, "bytes_saved": 0, "input_bytes": 0}
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def collect(done):
+            for future in done:
+                stream, original_length = futures.pop(future)
+                compressed, predictor = future.result()
+                if len(compressed) < original_length:
+                    _apply(stream, compressed, predictor)
+                    stats["recompressed"] += 1
+                    stats["bytes_saved"] += original_length - len(compressed)
+
+        for obj in pdf.objects:
+            if not isinstance(obj, pikepdf.Stream) or obj.get("/Type") in SKIPPED_TYPES:
+                continue
+            if any(name not in GENERALIZED_FILTERS for name in _filters(obj)):
+                continue
+            original_length = len(obj.read_raw_bytes())
+            if original_length < MIN_STREAM_BYTES:
+                continue
+            try:
+                data = obj.read_bytes()
+            except pikepdf.PdfError:
+                # 数据损坏的流保持原样
+                continue
+
+            stats["streams"] += 1
+            stats["input_bytes"] += len(data)
+            predictor = _predictor_for(obj, data) if try_predictors else None
+
+            # 解码后的数据可能很大，同时在途的流数量有上限
+            while len(futures) >= max_workers * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+            futures[pool.submit(_compress, data, level, predictor)] = (obj, original_length)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    stats["seconds"] = time.monotonic() - start
+    stats["throughput"] = int(stats["input_bytes"] / stats["seconds"]) if stats["seconds"] > 0 else 0
+    return stats
+
+
+def recompress_file(file_path, level=DEFAULT_LEVEL, try_predictors=False):
+    """就地重新压缩文件中的流，没有可替换的流时不改写文件，返回统计信息"""
+    import pikepdf
+
+    with pikepdf.open(file_path, allow_overwriting_input=True) as pdf:
+        stats = recompress_streams(pdf, level, try_predictors)
+        if stats["recompressed"]:
+            pdf.save(file_path)
+    return stats
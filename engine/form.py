@@ -0,0 +1,68 @@
+import os
+from PyPDF2 import PdfWriter
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+from engine.doc_cache import cached_fact, open_reader
+
+
+def _read_fields(pdf_file):
+    with open_reader(pdf_file) as reader:
+        if reader.is_encrypted:
+            raise ValueError("PDF文件已加密，无法读取表单字段")
+
+        fields = reader.get_fields() or {}
+        return [(field_name, field_info.get('/FT', 'Unknown'), field_info.get('/V', ''))
+                for field_name, field_info in fields.items()]
+
+
+def read_form_fields(pdf_file):
+    """读取PDF文件中的表单字段，返回 (名称, 类型, 值) 列表"""
+    return list(cached_fact(pdf_file, "fields", _read_fields))
+
+
+def write_form_info(form_info_path, form_fields):
+    """记录表单字段信息到外部文件"""
+    with open(form_info_path, 'w', encoding='utf-8') as form_file:
+        form_file.write("PDF表单字段信息\n")
+        form_file.write("=" * 50 + "\n")
+        for i, (field_name, field_type, field_value) in enumerate(form_fields, 1):
+            form_file.write(f"字段 {i}:\n")
+            form_file.write(f"  名称: {field_name}\n")
+            form_file.write(f"  类型: {field_type}\n")
+            form_file.write(f"  值: {field_value}\n")
+            form_file.write("\n")
+
+
+def save_form_to_pdf(pdf_file, output_dir, form_fields):
+    """将表单填写内容保存到PDF文件"""
+    file_name = os.path.basename(pdf_file)
+    name = base_name(pdf_file)
+    output_path = os.path.join(output_dir, f"{name}_filled_form.pdf")
+
+    try:
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            # 注意：PyPDF2的表单填写功能有限，这里只保存副本并把字段记录到外部文件
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+
+        write_form_info(os.path.join(output_dir, f"{name}_form_fields.txt"), form_fields)
+    except Exception as e:
+        raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+
+    return output_path
+
+
+def _save_form_to_pdf_job(pdf_file, output_dir, form_fields):
+    return FileResult(pdf_file, output_path=save_form_to_pdf(pdf_file, output_dir, form_fields))
+
+
+def save_form_to_pdfs(files, output_dir, form_fields, progress=None, should_stop=None):
+    """将表单填写内容保存到多个PDF文件，各文件在进程池中并行处理"""
+    jobs = [(pdf_file, (pdf_file, output_dir, form_fields)) for pdf_file in files]
+    return scheduler.map_files(_save_form_to_pdf_job, jobs, progress, should_stop)
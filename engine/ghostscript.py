@@ -0,0 +1,160 @@
+"""Ghostscript执行器
+
+每个文件启动一个 gs 进程。执行器限制同时运行的进程数，对每个进程限制运行时间和内存，
+超时或请求停止时终止进程，避免个别异常文件拖住整批任务；进程输出逐行转发到日志回调。
+gs 的路径和版本在每个进程中只检测一次。
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+# 环境变量可指定 gs 可执行文件的完整路径
+EXECUTABLE_ENV = "PDF_TOOLBOX_GHOSTSCRIPT"
+# 依次查找的可执行文件名（Windows上为控制台版本）
+EXECUTABLE_NAMES = ("gs", "gswin64c", "gswin32c")
+# 单个文件的默认时间（秒）和内存（MB）上限，0表示不限制
+DEFAULT_TIMEOUT = 600
+DEFAULT_MEMORY_LIMIT = 2048
+# 失败时错误信息中保留的最后几行输出
+ERROR_TAIL_LINES = 20
+# 检查超时和停止请求的间隔（秒）
+POLL_INTERVAL = 0.2
+# 设置内存上限后 exec gs 的shell
+POSIX_SHELL = "/bin/sh"
+
+GHOSTSCRIPT_MISSING = "未安装Ghostscript。\n\n请从以下网址下载并安装:\nhttps://www.ghostscript.com/"
+
+
+class GhostscriptTimeout(subprocess.TimeoutExpired):
+    """gs 进程超时，已被终止"""
+
+    def __str__(self):
+        return f"Ghostscript超时 ({self.timeout} 秒)，已终止"
+
+
+_detected = None
+_detect_lock = threading.Lock()
+
+
+def _detect():
+    """查找 gs 可执行文件并读取版本，返回 (路径, 版本) 或 None"""
+    candidates = [os.environ.get(EXECUTABLE_ENV)] + [shutil.which(name) for name in EXECUTABLE_NAMES]
+    for path in candidates:
+        if not path:
+            continue
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if result.returncode == 0:
+            return path, result.stdout.strip()
+    return None
+
+
+def find_executable():
+    """gs 的 (路径, 版本)，未安装时返回None；结果在进程内缓存"""
+    global _detected
+    with _detect_lock:
+        if _detected is None:
+            _detected = _detect() or ()
+        return _detected or None
+
+
+def check_dependency():
+    """检查Ghostscript是否可用，缺失时返回错误提示"""
+    return None if find_executable() else GHOSTSCRIPT_MISSING
+
+
+def _limited_command(command, memory_limit):
+    """在POSIX系统上通过 sh 的 ulimit -v 限制 gs 的地址空间（MB），返回实际执行的命令
+
+    限制在 exec gs 之前由 shell 设置，gs 无法先分配再被限制；fork 出的子进程中不运行Python代码，
+    多线程下也是安全的。其他系统、找不到 /bin/sh 或不限制时返回原命令。
+    """
+    if not memory_limit or os.name != "posix" or not os.path.exists(POSIX_SHELL):
+        return command
+    script = f'ulimit -v {int(memory_limit) * 1024} 2>/dev/null; exec "$@"'
+    return [POSIX_SHELL, "-c", script, command[0]] + list(command)
+
+
+class GhostscriptExecutor:
+    """运行 gs 进程的执行器，可在多个线程中共用
+
+    max_workers 为同时运行的 gs 进程数；timeout（秒）和 memory_limit（MB）为单个文件的上限；
+    log(message) 接收各进程的输出行；should_stop() 返回True时终止正在运行的进程。
+    """
+
+    def __init__(self, max_workers=None, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT,
+                 log=None, should_stop=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.log = log
+        self.should_stop = should_stop
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def _forward(self, stream, label, tail):
+        """读取进程输出，保留最后几行并转发到日志"""
+        for line in stream:
+            line = line.rstrip()
+            if not line:
+                continue
+            tail.append(line)
+            if self.log is not None:
+                self.log(f"{label}: {line}" if label else line)
+
+    def run(self, command, label="", timeout=None):
+        """运行一个 gs 命令并等待结束
+
+        timeout 不为None时覆盖执行器的默认时间上限。超时时终止进程并抛出
+        GhostscriptTimeout（subprocess.TimeoutExpired 的子类），请求停止时终止进程并抛出
+        InterruptedError，返回码非0时抛出 Exception（附带最后几行输出）。
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._slots:
+            start = time.monotonic()
+            process = subprocess.Popen(_limited_command(command, self.memory_limit), stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                       errors="replace")
+            tail = deque(maxlen=ERROR_TAIL_LINES)
+            reader = threading.Thread(target=self._forward, args=(process.stdout, label, tail), daemon=True)
+            reader.start()
+            try:
+                while True:
+                    try:
+                        process.wait(timeout=POLL_INTERVAL)
+                        break
+                    except subprocess.TimeoutExpired:
+                        pass
+                    if timeout and time.monotonic() - start > timeout:
+                        raise GhostscriptTimeout(command, timeout, output="\n".join(tail))
+                    if self.should_stop is not None and self.should_stop():
+                        raise InterruptedError("已停止")
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                reader.join(timeout=1)
+                process.stdout.close()
+
+        if process.returncode != 0:
+            output = "\n".join(tail)
+            if "VMerror" in output:
+                raise Exception(f"Ghostscript超出内存限制 ({self.memory_limit} MB)")
+            raise Exception(f"Ghostscript执行失败: {output}")
+        return process.returncode
+
+
+_default_executor = None
+
+
+def default_executor():
+    """未指定执行器时使用的默认执行器（每个进程一个，不转发日志）"""
+    global _default_executor
+    with _detect_lock:
+        if _default_executor is None:
+            _default_executor = GhostscriptExecutor()
+        return _default_executor
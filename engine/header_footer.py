@@ -0,0 +1,36 @@
+import PyPDF2
+
+from engine.doc_cache import open_reader
+
+SCOPES = ("all", "odd", "even", "except_first", "first_only")
+
+
+def should_apply_header_footer(page_num, total_pages, scope="all"):
+    """根据应用范围决定是否在当前页添加页眉页脚（page_num从1开始）"""
+    if scope == "odd":
+        return page_num % 2 == 1
+    if scope == "even":
+        return page_num % 2 == 0
+    if scope == "except_first":
+        return page_num > 1
+    if scope == "first_only":
+        return page_num == 1
+    return True
+
+
+def add_header_footer_to_pdf(input_path, output_path, scope="all"):
+    """添加页眉页脚到PDF的核心功能"""
+    with open_reader(input_path) as pdf_reader:
+        pdf_writer = PyPDF2.PdfWriter()
+        num_pages = len(pdf_reader.pages)
+
+        for page_num, page in enumerate(pdf_reader.pages, 1):
+            if should_apply_header_footer(page_num, num_pages, scope):
+                # 简化实现：完整的页眉页脚需要使用reportlab创建页眉页脚PDF再合并
+                pass
+            pdf_writer.add_page(page)
+
+        with open(output_path, 'wb') as out_file:
+            pdf_writer.write(out_file)
+
+    return output_path
@@ -0,0 +1,159 @@
+import os
+
+from engine import scheduler
+from engine.common import FileResult, failed, report_progress, stop_requested, base_name
+from engine.pagerange import PageSet
+
+MODES = ("pdf_to_image", "image_to_pdf")
+
+
+def check_dependency(mode):
+    """检查转换模式所需的依赖，缺失时返回错误提示"""
+    if mode == "pdf_to_image":
+        try:
+            import fitz  # noqa: F401
+        except ImportError:
+            return "未安装PyMuPDF库。\n\n请运行以下命令安装:\npip install PyMuPDF"
+    else:
+        try:
+            from reportlab.pdfgen import canvas  # noqa: F401
+        except ImportError:
+            return "未安装reportlab库。\n\n请运行以下命令安装:\npip install reportlab"
+
+    return None
+
+
+def parse_pages_range(range_str, total_pages):
+    """解析页面范围字符串，返回PageSet"""
+    if not range_str:
+        return PageSet.all(total_pages)
+
+    try:
+        return PageSet.parse(range_str, total_pages, strict=True)
+    except Exception as e:
+        raise ValueError(f"解析页面范围时出错: {str(e)}")
+
+
+def convert_pdf_to_images(file_path, output_dir, image_format="png", dpi=150,
+                          pages_range="", output_prefix="page_", single_folder=True):
+    """将单个PDF转换为图片，返回生成的图片数量"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(file_path)
+    try:
+        pages = parse_pages_range(pages_range.strip(), len(doc))
+
+        # 确定输出目录
+        if single_folder:
+            # 所有图片放在同一文件夹
+            target_dir = output_dir
+            file_prefix = f"{base_name(file_path)}_{output_prefix}"
+        else:
+            # 每个PDF创建单独文件夹
+            target_dir = os.path.join(output_dir, base_name(file_path))
+            os.makedirs(target_dir, exist_ok=True)
+            file_prefix = output_prefix
+
+        image_count = 0
+        zoom = dpi / 72
+        for page_num in pages:
+            if page_num < len(doc):
+                pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                output_path = os.path.join(target_dir,
+                                           f"{file_prefix}{page_num+1:04d}.{image_format}")
+                pix.save(output_path)
+                image_count += 1
+    finally:
+        doc.close()
+
+    return image_count
+
+
+def convert_file_to_images(file_path, output_dir, image_format="png", dpi=150, pages_range="",
+                           output_prefix="page_", single_folder=True):
+    """将单个PDF转换为图片，返回结果对象"""
+    image_count = convert_pdf_to_images(file_path, output_dir, image_format, dpi,
+                                        pages_range, output_prefix, single_folder)
+    return FileResult(file_path, output_path=output_dir, info={"images": image_count})
+
+
+def convert_pdfs_to_images(files, output_dir, image_format="png", dpi=150, pages_range="",
+                           output_prefix="page_", single_folder=True,
+                           progress=None, should_stop=None):
+    """将PDF转换为图片，各文件在进程池中并行转换"""
+    jobs = [(file_path, (file_path, output_dir, image_format, dpi, pages_range,
+                         output_prefix, single_folder))
+            for file_path in files]
+    results = scheduler.map_files(convert_file_to_images, jobs, progress, should_stop,
+                                  message_prefix="正在转换: ")
+
+    report_progress(progress, 100, "转换完成")
+    return results
+
+
+def convert_images_to_pdf(image_paths, output_path, page_size="A4", orientation="portrait",
+                          progress=None, should_stop=None):
+    """将图片转换为PDF"""
+    from reportlab.lib.pagesizes import letter, A4, A3, legal
+    from reportlab.pdfgen import canvas
+
+    results = []
+
+    try:
+        report_progress(progress, 0, "正在创建PDF文档...")
+
+        page_sizes = {
+            "A4": A4,
+            "A3": A3,
+            "letter": letter,
+            "legal": legal
+        }
+        size = page_sizes.get(page_size, A4)
+
+        c = canvas.Canvas(output_path, pagesize=size)
+
+        # 处理方向
+        if orientation == "landscape":
+            size = (size[1], size[0])  # 交换宽高
+
+        total_images = len(image_paths)
+        for i, image_path in enumerate(image_paths):
+            if stop_requested(should_stop):
+                break
+
+            try:
+                report_progress(progress, (i / total_images) * 100,
+                                f"正在添加: {os.path.basename(image_path)}")
+
+                from PIL import Image
+                with Image.open(image_path) as img:
+                    img_width, img_height = img.size
+                page_width, page_height = size
+
+                # 计算缩放比例，留出边距
+                scale = min(page_width / img_width, page_height / img_height) * 0.9
+
+                # 计算图片在页面中的位置（居中）
+                scaled_width = img_width * scale
+                scaled_height = img_height * scale
+                x = (page_width - scaled_width) / 2
+                y = (page_height - scaled_height) / 2
+
+                c.drawImage(image_path, x, y, scaled_width, scaled_height)
+
+                # 添加新页面（如果不是最后一张图片）
+                if i < total_images - 1:
+                    c.showPage()
+
+                results.append(FileResult(image_path, output_path=output_path))
+
+            except Exception as e:
+                results.append(failed(image_path, e))
+
+        c.save()
+        report_progress(progress, 100, "转换完成")
+
+    except Exception as e:
+        results.append(failed("", f"创建PDF时出错: {str(e)}"))
+
+    return results
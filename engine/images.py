@@ -0,0 +1,492 @@
+"""嵌入图片的降采样和重新编码
+
+扫描件的体积几乎全部来自图片。这里根据图片在页面上的实际显示尺寸计算有效分辨率，
+超过目标DPI的图片用NumPy按面积平均降采样，再检测灰度和少色图片，
+用Pillow重新编码为JPEG或调色板压缩；只有结果更小时才替换原图片。
+像素处理在线程池中并行，解码和写回PDF对象在调用线程中进行。
+"""
+import io
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+IMAGE_FORMATS = ("jpeg", "png")
+# 各压缩级别默认的目标分辨率
+DEFAULT_DPI = {"low": 200, "medium": 150, "high": 100}
+# 有效分辨率超过目标的这个倍数才降采样，避免为很小的收益重新编码
+RESAMPLE_THRESHOLD = 1.1
+# 小于这个像素数的图片（图标、线条等）不处理
+MIN_PIXELS = 64 * 64
+# 通道间差异不超过这个值视为灰度图片
+GRAY_TOLERANCE = 6
+# 颜色数不超过这个值时使用调色板
+MAX_PALETTE_COLORS = 256
+# 新数据至少要比原数据小这个比例才替换
+MIN_SAVING = 0.05
+# 按目标大小压缩时缓存解码像素的内存上限
+DECODED_CACHE_BYTES = 512 * 1024 * 1024
+# 解析表单XObject的最大嵌套深度
+MAX_FORM_DEPTH = 8
+
+# 这些编码的图片通常已经是最优的二值压缩，交给二值化专用的处理
+SKIPPED_FILTERS = ("/JBIG2Decode", "/CCITTFaxDecode")
+
+
+def check_dependency():
+    """检查图片处理所需的依赖，缺失时返回错误提示"""
+    missing = []
+    for module, package in (("numpy", "numpy"), ("pikepdf", "pikepdf"), ("PIL", "Pillow")):
+        try:
+            __import__(module)
+        except ImportError:
+            missing.append(package)
+    if missing:
+        return f"图片压缩需要以下库。\n\n请运行以下命令安装:\npip install {' '.join(missing)}"
+    return None
+
+
+def _multiply(m1, m2):
+    """PDF矩阵乘法 m1 × m2，矩阵为 (a, b, c, d, e, f)"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+            c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+            e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2)
+
+
+def _collect_placements(pdf, content, resources, ctm, placements, depth):
+    """遍历内容流，记录每个图片XObject的最大显示尺寸（点）"""
+    import pikepdf
+
+    if resources is None or "/XObject" not in resources:
+        return
+    xobjects = resources.XObject
+    stack = []
+    for operands, operator in pikepdf.parse_content_stream(content):
+        op = str(operator)
+        if op == "q":
+            stack.append(ctm)
+        elif op == "Q":
+            if stack:
+                ctm = stack.pop()
+        elif op == "cm" and len(operands) == 6:
+            ctm = _multiply(tuple(float(x) for x in operands), ctm)
+        elif op == "Do" and operands:
+            xobject = xobjects.get(operands[0])
+            if xobject is None or not isinstance(xobject, pikepdf.Stream):
+                continue
+            subtype = xobject.get("/Subtype")
+            if subtype == "/Image":
+                # 图片绘制在单位正方形中，CTM各列的长度即为显示宽高
+                width = (ctm[0] ** 2 + ctm[1] ** 2) ** 0.5
+                height = (ctm[2] ** 2 + ctm[3] ** 2) ** 0.5
+                key = xobject.objgen
+                old_width, old_height = placements.get(key, (0, 0))
+                placements[key] = (max(old_width, width), max(old_height, height))
+            elif subtype == "/Form" and depth < MAX_FORM_DEPTH:
+                matrix = tuple(float(x) for x in xobject.get("/Matrix", [1, 0, 0, 1, 0, 0]))
+                _collect_placements(pdf, xobject, xobject.get("/Resources", resources),
+                                    _multiply(matrix, ctm), placements, depth + 1)
+
+
+def image_placements(pdf):
+    """统计文档中每个图片的最大显示尺寸 {objgen: (宽, 高)}，单位为点"""
+    placements = {}
+    for page in pdf.pages:
+        try:
+            _collect_placements(pdf, page.obj, page.obj.get("/Resources"),
+                                (1, 0, 0, 1, 0, 0), placements, 0)
+        except Exception:
+            # 内容流损坏的页面跳过，不影响其他页面
+            continue
+    return placements
+
+
+def images_by_page(pdf):
+    """每一页上绘制的图片 objgen 集合列表（包括表单XObject中的图片）"""
+    pages = []
+    for page in pdf.pages:
+        placements = {}
+        try:
+            _collect_placements(pdf, page.obj, page.obj.get("/Resources"),
+                                (1, 0, 0, 1, 0, 0), placements, 0)
+        except Exception:
+            pass
+        pages.append(set(placements))
+    return pages
+
+
+def downsample(pixels, width, height):
+    """按面积平均把像素数组缩小到 width × height（盒式滤波）"""
+    import numpy as np
+
+    rows = np.linspace(0, pixels.shape[0], height + 1).astype(np.intp)[:-1]
+    cols = np.linspace(0, pixels.shape[1], width + 1).astype(np.intp)[:-1]
+    row_counts = np.diff(np.append(rows, pixels.shape[0]))
+    col_counts = np.diff(np.append(cols, pixels.shape[1]))
+
+    data = pixels.astype(np.uint32)
+    data = np.add.reduceat(data, rows, axis=0)
+    data = np.add.reduceat(data, cols, axis=1)
+    counts = np.outer(row_counts, col_counts)
+    if data.ndim == 3:
+        counts = counts[:, :, None]
+    return ((data + counts // 2) // counts).astype(np.uint8)
+
+
+def is_grayscale(pixels):
+    """彩色图片的各通道是否几乎相同"""
+    import numpy as np
+
+    if pixels.ndim == 2:
+        return True
+    channels = pixels.astype(np.int16)
+    spread = channels.max(axis=2) - channels.min(axis=2)
+    return int(spread.max()) <= GRAY_TOLERANCE
+
+
+def palette_of(pixels):
+    """颜色数不超过 MAX_PALETTE_COLORS 时返回 (调色板, 索引数组)，否则返回None"""
+    import numpy as np
+
+    if pixels.ndim == 2:
+        packed = pixels.astype(np.uint32)
+    else:
+        packed = (pixels[:, :, 0].astype(np.uint32) << 16) | (pixels[:, :, 1].astype(np.uint32) << 8) \
+            | pixels[:, :, 2].astype(np.uint32)
+
+    # 先在抽样上快速排除颜色很多的照片
+    sample = packed.ravel()[::max(1, packed.size // 65536)]
+    if len(np.unique(sample)) > MAX_PALETTE_COLORS:
+        return None
+    colors, indices = np.unique(packed, return_inverse=True)
+    if len(colors) > MAX_PALETTE_COLORS:
+        return None
+    return colors, indices.reshape(packed.shape).astype(np.uint8)
+
+
+def encode(pixels, quality=75, image_format="jpeg"):
+    """重新编码像素数组，返回 (数据, 过滤器, 颜色空间, 每分量位数)
+
+    颜色空间为 "/DeviceGray"、"/DeviceRGB" 或 (调色板字节, 颜色数, 基础颜色空间)。
+    """
+    import numpy as np
+    from PIL import Image
+
+    if pixels.ndim == 3 and is_grayscale(pixels):
+        pixels = pixels[:, :, 0].copy()
+    gray = pixels.ndim == 2
+    base = "/DeviceGray" if gray else "/DeviceRGB"
+
+    palette = palette_of(pixels)
+    if palette is not None:
+        # 少色图片（图表、印章、文字扫描）用调色板加Flate无损压缩，通常比JPEG更小也更清晰
+        colors, indices = palette
+        if gray:
+            table = colors.astype(np.uint8).tobytes()
+        else:
+            table = np.stack([(colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF],
+                             axis=1).astype(np.uint8).tobytes()
+        return zlib.compress(indices.tobytes(), 9), "/FlateDecode", (table, len(colors), base), 8
+
+    if image_format == "png":
+        return zlib.compress(np.ascontiguousarray(pixels).tobytes(), 9), "/FlateDecode", base, 8
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "L" if gray else "RGB").save(buffer, "JPEG", quality=int(quality), optimize=True)
+    return buffer.getvalue(), "/DCTDecode", base, 8
+
+
+def decode_image(image):
+    """把图片XObject解码为 uint8 像素数组（灰度或RGB），不支持的图片返回None"""
+    import numpy as np
+    import pikepdf
+    from pikepdf import PdfImage
+
+    if image.get("/ImageMask", False) or int(image.get("/BitsPerComponent", 8)) == 1:
+        return None
+    if "/Decode" in image:
+        return None
+    filters = image.get("/Filter")
+    filters = list(filters) if isinstance(filters, pikepdf.Array) else [filters]
+    if any(str(f) in SKIPPED_FILTERS for f in filters):
+        return None
+
+    pil_image = PdfImage(image).as_pil_image()
+    if pil_image.mode == "P":
+        pil_image = pil_image.convert("RGB")
+    if pil_image.mode not in ("L", "RGB"):
+        return None
+    return np.asarray(pil_image)
+
+
+def scaled_size(width, height, shown_width, shown_height, target_dpi):
+    """按显示尺寸计算降采样后的像素尺寸，有效分辨率未超过目标时返回None"""
+    if not target_dpi:
+        return None
+    # 有效分辨率 = 像素数 / 显示尺寸（英寸）
+    dpi = min(width / (shown_width / 72), height / (shown_height / 72))
+    if dpi <= target_dpi * RESAMPLE_THRESHOLD:
+        return None
+    scale = target_dpi / dpi
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _process(pixels, target_size, quality, image_format):
+    """线程池中执行的像素处理：降采样并重新编码"""
+    if target_size is not None:
+        pixels = downsample(pixels, *target_size)
+    return pixels.shape[1], pixels.shape[0], encode(pixels, quality, image_format)
+
+
+def color_space_object(color_space):
+    """把 encode 返回的颜色空间转换为PDF对象"""
+    import pikepdf
+
+    if isinstance(color_space, tuple):
+        table, count, base = color_space
+        return pikepdf.Array([pikepdf.Name.Indexed, pikepdf.Name(base), count - 1,
+                              pikepdf.String(table)])
+    return pikepdf.Name(color_space)
+
+
+def _apply(pdf, image, width, height, encoded, original_length):
+    """新数据更小时写回图片对象，返回节省的字节数"""
+    import pikepdf
+
+    data, filter_name, color_space, bits = encoded
+    if len(data) > original_length * (1 - MIN_SAVING):
+        return 0
+
+    image.write(data, filter=pikepdf.Name(filter_name))
+    image.Width = width
+    image.Height = height
+    image.ColorSpace = color_space_object(color_space)
+    image.BitsPerComponent = bits
+    for key in ("/DecodeParms", "/Interpolate"):
+        if key in image:
+            del image[key]
+    return original_length - len(data)
+
+
+def recompress_images(pdf, target_dpi=150, quality=75, image_format="jpeg", max_workers=4,
+                      overrides=None):
+    """降采样并重新编码文档中的图片，直接修改 pdf（pikepdf.Pdf），返回统计信息
+
+    target_dpi 为None时只重新编码不降采样。overrides 为 {objgen: (DPI, 质量)} 时
+    这些图片改用各自的设置，取值为None的图片保持不变。
+    """
+    overrides = overrides or {}
+    placements = image_placements(pdf)
+    stats = {"images": 0, "recompressed": 0, "downsampled": 0, "bytes_saved": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def collect(done):
+            for future in done:
+                image, original_length, resized = futures.pop(future)
+                try:
+                    width, height, encoded = future.result()
+                except Exception:
+                    continue
+                saved = _apply(pdf, image, width, height, encoded, original_length)
+                if saved:
+                    stats["recompressed"] += 1
+                    stats["downsampled"] += resized
+                    stats["bytes_saved"] += saved
+
+        for objgen, (shown_width, shown_height) in placements.items():
+            image = pdf.get_object(objgen)
+            width, height = int(image.get("/Width", 0)), int(image.get("/Height", 0))
+            if width * height < MIN_PIXELS or shown_width <= 0 or shown_height <= 0:
+                continue
+            stats["images"] += 1
+
+            image_dpi, image_quality = target_dpi, quality
+            if objgen in overrides:
+                if overrides[objgen] is None:
+                    continue
+                image_dpi, image_quality = overrides[objgen]
+            target_size = scaled_size(width, height, shown_width, shown_height, image_dpi)
+
+            try:
+                pixels = decode_image(image)
+            except Exception:
+                pixels = None
+            if pixels is None:
+                continue
+
+            # 解码后的图片较占内存，同时在途的图片数量有上限
+            while len(futures) >= max_workers * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            original_length = len(image.read_raw_bytes())
+            future = pool.submit(_process, pixels, target_size, image_quality, image_format)
+            futures[future] = (image, original_length, target_size is not None)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    return stats
+
+
+class DecodedImages:
+    """文档中可处理图片的解码缓存
+
+    按目标大小压缩时需要用不同的分辨率和质量反复尝试，解码后的像素和降采样结果
+    在各次尝试之间复用，每次尝试只需重新编码。解码像素超过 max_bytes 后不再缓存，
+    之后用到时重新解码。apply() 会改写图片对象，所以另外保留每张图片原始数据的副本，
+    重新解码和恢复原图都使用副本。解码或编码失败的图片保持原样。
+    """
+
+    def __init__(self, pdf, max_bytes=DECODED_CACHE_BYTES, max_workers=4):
+        import pikepdf
+
+        self.pdf = pdf
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        # (图片对象, 宽, 高, 显示宽, 显示高, 原始数据字节数)
+        self.entries = []
+        self._pixels = {}
+        self._scaled = {}
+        # objgen -> 原始图片数据的副本（不被页面引用，不会写出）
+        self._sources = {}
+        self._changed = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        for objgen, (shown_width, shown_height) in image_placements(pdf).items():
+            image = pdf.get_object(objgen)
+            width, height = int(image.get("/Width", 0)), int(image.get("/Height", 0))
+            if width * height < MIN_PIXELS or shown_width <= 0 or shown_height <= 0:
+                continue
+            try:
+                pixels = decode_image(image)
+            except Exception:
+                pixels = None
+            if pixels is None:
+                continue
+            raw = image.read_raw_bytes()
+            source = pikepdf.Stream(pdf, raw)
+            for key, value in image.items():
+                if key != "/Length":
+                    source[key] = value
+            self._sources[objgen] = source
+            self.entries.append((image, width, height, shown_width, shown_height, len(raw)))
+            self._keep(objgen, pixels, self._pixels)
+
+    @property
+    def original_bytes(self):
+        """可处理图片的原始数据总字节数"""
+        return sum(entry[5] for entry in self.entries)
+
+    def _keep(self, key, pixels, cache):
+        with self._lock:
+            if self._bytes + pixels.nbytes <= self.max_bytes:
+                cache[key] = pixels
+                self._bytes += pixels.nbytes
+
+    def _work(self, objgen, pixels, target_size, quality, image_format):
+        """线程池中执行：降采样（结果缓存）并编码"""
+        if target_size is not None:
+            pixels = downsample(pixels, *target_size)
+            self._keep((objgen, target_size), pixels, self._scaled)
+        return pixels.shape[1], pixels.shape[0], encode(pixels, quality, image_format)
+
+    def encode(self, target_dpi, quality, image_format="jpeg"):
+        """按给定参数重新编码所有图片，返回 {objgen: (宽, 高, 编码结果)}，不修改文档
+
+        解码或编码失败的图片不在结果中。
+        """
+        results = {}
+
+        def collect(future):
+            objgen = futures.pop(future)
+            try:
+                results[objgen] = future.result()
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for image, width, height, shown_width, shown_height, _ in self.entries:
+                objgen = image.objgen
+                target_size = scaled_size(width, height, shown_width, shown_height, target_dpi)
+                pixels = self._scaled.get((objgen, target_size)) if target_size else None
+                if pixels is not None:
+                    target_size = None
+                else:
+                    pixels = self._pixels.get(objgen)
+                    if pixels is None:
+                        # 未缓存的图片在当前线程从原始数据重新解码，pikepdf对象不能跨线程使用
+                        try:
+                            pixels = decode_image(self._sources[objgen])
+                        except Exception:
+                            pixels = None
+                        if pixels is None:
+                            continue
+
+                while len(futures) >= self.max_workers * 2:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                futures[pool.submit(self._work, objgen, pixels, target_size, quality, image_format)] = objgen
+
+            for future in list(futures):
+                collect(future)
+        return results
+
+    def estimate(self, encoded):
+        """按编码结果估算图片部分的总字节数（未变小或未能编码的图片保留原数据）"""
+        total = 0
+        for image, _, _, _, _, original_length in self.entries:
+            result = encoded.get(image.objgen)
+            data = result[2][0] if result is not None else b""
+            total += len(data) if result is not None and len(data) <= original_length * (1 - MIN_SAVING) \
+                else original_length
+        return total
+
+    def _restore(self, image):
+        """把之前 apply() 改写过的图片恢复为原始数据"""
+        source = self._sources[image.objgen]
+        image.write(source.read_raw_bytes(), filter=source.get("/Filter"),
+                    decode_parms=source.get("/DecodeParms"))
+        for key in ("/Width", "/Height", "/ColorSpace", "/BitsPerComponent", "/Interpolate"):
+            if key in source:
+                image[key] = source[key]
+            elif key in image:
+                del image[key]
+
+    def apply(self, encoded):
+        """把编码结果写回文档，返回统计信息
+
+        可以用不同的编码结果多次调用；本次没有变小或未能编码的图片恢复为原始数据。
+        """
+        stats = {"images": len(self.entries), "recompressed": 0, "bytes_saved": 0}
+        for image, _, _, _, _, original_length in self.entries:
+            objgen = image.objgen
+            saved = 0
+            if objgen in encoded:
+                width, height, result = encoded[objgen]
+                saved = _apply(self.pdf, image, width, height, result, original_length)
+            if saved:
+                self._changed.add(objgen)
+                stats["recompressed"] += 1
+                stats["bytes_saved"] += saved
+            elif objgen in self._changed:
+                self._restore(image)
+                self._changed.discard(objgen)
+        return stats
+
+
+def recompress_file(input_path, output_path, target_dpi=150, quality=75, image_format="jpeg"):
+    """对单个文件执行图片压缩并保存，返回统计信息"""
+    import pikepdf
+
+    with pikepdf.open(input_path) as pdf:
+        stats = recompress_images(pdf, target_dpi, quality, image_format)
+        pdf.save(output_path)
+    return stats
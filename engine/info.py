@@ -0,0 +1,94 @@
+from engine import doc_cache, probe
+from engine.doc_cache import cached_fact, open_reader
+
+
+def get_page_count(file_path):
+    """获取PDF文件的页数，只读取文件头尾（见 engine.probe）"""
+    pages = probe.probe(file_path)["pages"]
+    return pages if pages is not None else doc_cache.page_count(file_path)
+
+
+def get_page_count_or_unknown(file_path, unknown="未知"):
+    """获取PDF页数，读取失败时返回占位文本"""
+    try:
+        return get_page_count(file_path)
+    except Exception:
+        return unknown
+
+
+def _check_encryption(file_path):
+    try:
+        import pikepdf
+        with pikepdf.open(file_path) as pdf:
+            return "未加密" if not pdf.is_encrypted else "已加密"
+    except ImportError:
+        return "未知"
+    except pikepdf.PasswordError:
+        return "已加密 (需要密码)"
+    except Exception:
+        return "未知"
+
+
+def check_encryption(file_path):
+    """检查PDF文件是否已加密，返回状态文本
+
+    先只读取 trailer 判断；已加密的文件再完整打开，区分是否需要密码。
+    """
+    try:
+        encrypted = probe.probe(file_path)["encrypted"]
+    except OSError:
+        return "未知"
+    except Exception:
+        # 探测失败时由完整解析判断
+        encrypted = True
+    if not encrypted:
+        return "未加密"
+    try:
+        return cached_fact(file_path, "encryption", _check_encryption)
+    except OSError:
+        return "未知"
+
+
+def describe_pdf(file_path):
+    """文件列表中显示的简要信息，例如 "PDF 1.7, 12 页, 已线性化"
+
+    读取失败时返回 "未知"。
+    """
+    try:
+        result = probe.probe(file_path)
+    except Exception:
+        return "未知"
+    parts = [f"PDF {result['version']}" if result["version"] else "PDF"]
+    if result["pages"] is not None:
+        parts.append(f"{result['pages']} 页")
+    if result["encrypted"]:
+        parts.append("已加密")
+    if result["linearized"]:
+        parts.append("已线性化")
+    return ", ".join(parts)
+
+
+def get_image_info(file_path):
+    """获取图片文件信息"""
+    try:
+        from PIL import Image
+        with Image.open(file_path) as img:
+            return f"{img.width} × {img.height} 像素"
+    except Exception:
+        return "未知"
+
+
+def _read_preview(file_path, max_pages, max_chars):
+    with open_reader(file_path) as pdf_reader:
+        page_count = len(pdf_reader.pages)
+        snippets = []
+        for i in range(min(max_pages, page_count)):
+            text = pdf_reader.pages[i].extract_text()[:max_chars]
+            snippets.append((i, text))
+    return page_count, snippets
+
+
+def preview_pdf(file_path, max_pages=10, max_chars=100):
+    """读取页数和前几页的文本摘要"""
+    return cached_fact(file_path, f"preview:{max_pages}:{max_chars}",
+                       lambda path: _read_preview(path, max_pages, max_chars))
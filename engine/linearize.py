@@ -0,0 +1,68 @@
+"""线性化（快速网页查看）输出
+
+线性化的文件把第一页需要的对象放在文件开头，并带有提示表，浏览器通过HTTP范围请求
+只下载开头部分就能显示第一页。线性化由pikepdf（qpdf）完成，写出后用qpdf检查
+线性化参数字典和提示表。结果先写到同一目录下的临时文件，校验通过后才替换到目标路径，
+校验失败时删除临时文件并抛出异常，避免把损坏的提示表发布出去（也不会覆盖原文件）。
+"""
+import io
+import os
+import tempfile
+
+
+def check_dependency():
+    """检查线性化所需的依赖，缺失时返回错误提示"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return "线性化输出需要pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
+    return None
+
+
+def validate(file_path):
+    """检查文件的线性化参数和提示表，返回 (是否有效, 检查输出)"""
+    import pikepdf
+
+    with pikepdf.open(file_path) as pdf:
+        if not pdf.is_linearized:
+            return False, "文件未线性化"
+        output = io.StringIO()
+        try:
+            valid = pdf.check_linearization(output)
+        except Exception as e:
+            return False, str(e)
+        # qpdf把大部分问题作为警告记录，不一定写入输出
+        messages = [output.getvalue().strip()] + [warning.replace(f"{file_path}: ", "", 1)
+                                                  for warning in pdf.get_warnings()]
+        return valid, "\n".join(message for message in messages if message)
+
+
+def ensure_valid(file_path):
+    """校验线性化结果，无效时抛出异常"""
+    valid, message = validate(file_path)
+    if not valid:
+        raise Exception(f"线性化校验失败: {message}")
+
+
+def save_linearized(pdf, output_path, **save_options):
+    """把已打开的 pikepdf.Pdf 线性化保存并校验，校验通过后才写入 output_path"""
+    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix=".linearize_",
+                                     dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        pdf.save(temp_path, linearize=True, **save_options)
+        ensure_valid(temp_path)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def linearize_file(file_path, output_path=None):
+    """线性化已有的文件并校验，output_path 为None时就地替换"""
+    import pikepdf
+
+    with pikepdf.open(file_path, allow_overwriting_input=True) as pdf:
+        save_linearized(pdf, output_path or file_path)
+    return output_path or file_path
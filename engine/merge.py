@@ -0,0 +1,132 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import PyPDF2
+
+from engine.common import report_progress, stop_requested
+from engine.doc_cache import open_reader
+from engine.linearize import linearize_file
+from engine.pagerange import PageSet
+from engine.stream_writer import StreamingPdfWriter
+
+# 超过这个文件数时自动使用流式合并
+STREAMING_THRESHOLD = 200
+# 流式合并时同时解析的输入文件数上限
+DEFAULT_MAX_OPEN = 4
+
+
+def parse_page_range(range_str):
+    """解析页面范围字符串"""
+    # 例如 "1,3-5,7-" 解析为第1页、第3到5页和第7页到最后一页
+    try:
+        return PageSet.parse(range_str)
+    except Exception:
+        # 如果解析失败，返回None表示使用所有页面
+        return None
+
+
+def merge_pdfs(input_paths, output_path, page_range="", streaming=None, max_open=DEFAULT_MAX_OPEN,
+               linearize=False):
+    """合并PDF文件的核心功能
+
+    streaming 为None时按文件数自动选择：文件很多时使用流式合并，节省内存和文件句柄。
+    linearize 为 True 时合并后线性化输出（快速网页查看）。
+    """
+    if streaming is None:
+        streaming = len(input_paths) > STREAMING_THRESHOLD
+    if streaming:
+        stream_merge_pdfs(input_paths, output_path, page_range, max_open)
+        if linearize:
+            linearize_file(output_path)
+        return output_path
+
+    pdf_writer = PyPDF2.PdfWriter()
+
+    page_range = page_range.strip()
+    pages = parse_page_range(page_range) if page_range else None
+
+    # 添加所有PDF文件；直接传入缓存的PdfReader，避免重复解析
+    for pdf_file in input_paths:
+        with open_reader(pdf_file) as reader:
+            # 如果有指定页面范围，则使用页面范围；各文件页数不同，超出的部分忽略
+            if pages is not None:
+                pdf_writer.append(reader, pages=list(pages.clip(len(reader.pages))))
+            else:
+                pdf_writer.append(reader)
+
+    # 写入输出文件
+    with open(output_path, 'wb') as output_file:
+        pdf_writer.write(output_file)
+
+    if linearize:
+        linearize_file(output_path)
+
+    return output_path
+
+
+def _load_reader(file_path):
+    """读取并解析输入文件；PdfReader会把文件读入内存，文件句柄随即关闭"""
+    reader = PyPDF2.PdfReader(file_path)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ValueError(f"文件已加密: {os.path.basename(file_path)}")
+    len(reader.pages)
+    return reader
+
+
+def stream_merge_pdfs(input_paths, output_path, page_range="", max_open=DEFAULT_MAX_OPEN,
+                      progress=None, should_stop=None):
+    """流式合并PDF文件，返回合并统计信息
+
+    页面逐个文件写入输出，同时最多只有 max_open 个输入文件被解析并保留在内存中；
+    字体、图片等内容完全相同的对象只写出一次。不保留书签和表单等文档级结构。
+    """
+    page_range = page_range.strip()
+    pages = parse_page_range(page_range) if page_range else None
+    max_open = max(1, max_open)
+    total = len(input_paths)
+
+    try:
+        with open(output_path, 'wb') as output_file, ThreadPoolExecutor(max_workers=1) as loader:
+            writer = StreamingPdfWriter(output_file)
+            remaining = iter(input_paths)
+            # 在后台预先解析后续文件，与写出重叠进行
+            pending = deque()
+
+            for index in range(total):
+                while len(pending) < max_open:
+                    file_path = next(remaining, None)
+                    if file_path is None:
+                        break
+                    pending.append((file_path, loader.submit(_load_reader, file_path)))
+
+                if stop_requested(should_stop):
+                    for _, future in pending:
+                        future.cancel()
+                    raise InterruptedError("合并已取消")
+
+                file_path, future = pending.popleft()
+                reader = future.result()
+                page_count = len(reader.pages)
+                selected = pages.clip(page_count) if pages is not None else PageSet.all(page_count)
+                writer.copy_pages(reader, selected)
+                del reader
+
+                report_progress(progress, (index + 1) / total * 100,
+                                f"正在合并: {os.path.basename(file_path)}")
+
+            writer.close()
+    except BaseException:
+        # 不留下写了一半的输出文件
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+    return {
+        "files": total,
+        "pages": len(writer.page_numbers),
+        "objects": writer.next_number - 1,
+        "duplicate_objects": writer.duplicate_objects,
+        "duplicate_bytes": writer.duplicate_bytes,
+        "output_size": os.path.getsize(output_path),
+    }
@@ -0,0 +1,45 @@
+import PyPDF2
+
+from engine.doc_cache import cached_fact, open_reader
+
+METADATA_FIELDS = ("Title", "Author", "Subject", "Keywords",
+                   "Creator", "Producer", "CreationDate", "ModDate")
+
+
+def _read_metadata(input_path):
+    with open_reader(input_path) as reader:
+        metadata = reader.metadata
+
+        values = {}
+        for field_name in METADATA_FIELDS:
+            value = getattr(metadata, field_name.lower(), None) if metadata else None
+            values[field_name] = str(value) if value else ""
+        return values
+
+
+def read_metadata(input_path):
+    """读取PDF文件的元数据，返回 {字段名: 值}"""
+    return dict(cached_fact(input_path, "metadata", _read_metadata))
+
+
+def update_metadata(input_path, output_path, metadata):
+    """更新PDF元数据的核心功能"""
+    with open_reader(input_path) as pdf_reader:
+        pdf_writer = PyPDF2.PdfWriter()
+
+        for page in pdf_reader.pages:
+            pdf_writer.add_page(page)
+
+        # 只写入非空字段
+        new_metadata = {}
+        for field_name, value in metadata.items():
+            value = value.strip()
+            if value:
+                new_metadata[f"/{field_name.lstrip('/')}"] = value
+
+        pdf_writer.add_metadata(new_metadata)
+
+        with open(output_path, 'wb') as out_file:
+            pdf_writer.write(out_file)
+
+    return output_path
@@ -0,0 +1,265 @@
+"""彩色扫描页的混合光栅内容（MRC）分层
+
+彩色扫描的文字页整张编码为JPEG时，要么文字边缘模糊，要么体积很大。这里把页面图片拆成：
+
+  文字遮罩  全分辨率的1位图片（CCITT G4），决定哪些像素属于文字
+  背景层    去掉文字后的低分辨率彩色图片（JPEG）
+  前景层    文字颜色的低分辨率图片，文字颜色基本一致时改为单一颜色
+
+并用一个表单XObject按 背景 → 以遮罩绘制的前景 的顺序重建页面，替换原来的图片。
+分割全部是NumPy的分块向量运算，各页面图片在线程池中并行处理。
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from engine.bilevel import encode_g4, luminance
+from engine.images import MIN_SAVING, color_space_object, decode_image, encode, image_placements
+
+# 小于这个像素数的图片不是整页扫描，不分层
+MIN_PIXELS = 800 * 800
+# 估计局部背景亮度时的小块边长，以及取最亮小块的窗口（以小块计）
+CELL_SIZE = 4
+WINDOW_CELLS = 4
+# 比局部背景暗这么多的像素视为文字
+TEXT_CONTRAST = 64
+# 窗口内"文字"超过这个比例时是深色色块（或深色底上的浅色字），不作为文字
+MAX_WINDOW_TEXT = 0.65
+# 文字像素比例的有效范围，超出时（空白页、照片）不分层
+MIN_TEXT_FRACTION = 0.002
+MAX_TEXT_FRACTION = 0.4
+# 背景层和前景层相对原图的缩小倍数
+BACKGROUND_SCALE = 3
+FOREGROUND_SCALE = 8
+# 文字颜色在各通道上的分布（5%～95%分位）不超过这个范围时使用单一颜色
+UNIFORM_COLOR_RANGE = 48
+DEFAULT_QUALITY = 50
+
+
+def check_dependency():
+    """检查MRC分层所需的依赖，缺失时返回错误提示"""
+    from engine import bilevel
+
+    error = bilevel.check_dependency()
+    return error.replace("黑白扫描压缩", "MRC分层压缩") if error else None
+
+
+def _block_sums(data, size):
+    """按 size × size 的块求和（最后不足一块的部分单独成块）"""
+    import numpy as np
+
+    data = np.add.reduceat(data, np.arange(0, data.shape[0], size), axis=0)
+    return np.add.reduceat(data, np.arange(0, data.shape[1], size), axis=1)
+
+
+def _block_means(pixels, weights, size):
+    """按块计算 weights 为 True 的像素的平均值，块内没有这种像素时为0"""
+    import numpy as np
+
+    weights = weights.astype(np.uint32)
+    counts = _block_sums(weights, size)
+    if pixels.ndim == 3:
+        sums = _block_sums(pixels.astype(np.uint32) * weights[:, :, None], size)
+        counts = counts[:, :, None]
+    else:
+        sums = _block_sums(pixels.astype(np.uint32) * weights, size)
+    return ((sums + counts // 2) // np.maximum(counts, 1)).astype(np.uint8)
+
+
+def _expand(blocks, size, shape):
+    """把按块的数组放大回像素尺寸"""
+    import numpy as np
+
+    return np.repeat(np.repeat(blocks, size, axis=0), size, axis=1)[:shape[0], :shape[1]]
+
+
+def text_mask(pixels):
+    """文字遮罩：比局部背景暗 TEXT_CONTRAST 以上的像素为True
+
+    局部背景取每个窗口内最亮的小块平均亮度，对有底色的区域同样适用。
+    """
+    import numpy as np
+
+    window = CELL_SIZE * WINDOW_CELLS
+    gray = luminance(pixels)
+    cell_means = _block_means(gray, np.ones(gray.shape, dtype=bool), CELL_SIZE)
+    background = np.maximum.reduceat(
+        np.maximum.reduceat(cell_means, np.arange(0, cell_means.shape[0], WINDOW_CELLS), axis=0),
+        np.arange(0, cell_means.shape[1], WINDOW_CELLS), axis=1)
+    background = _expand(background, window, gray.shape)
+    mask = gray.astype(np.int16) < background.astype(np.int16) - TEXT_CONTRAST
+
+    density = _block_means(mask.astype(np.uint8) * 255, np.ones(mask.shape, dtype=bool), window)
+    return mask & ~_expand(density > MAX_WINDOW_TEXT * 255, window, mask.shape)
+
+
+def split_layers(pixels, mask):
+    """按遮罩拆分出 (背景层, 前景层) 像素数组
+
+    文字颜色一致时第二项返回该颜色 (r, g, b) 或 (灰度,)。
+    """
+    import numpy as np
+
+    # 文字像素先用所在窗口的背景颜色填充，再整体缩小
+    window = CELL_SIZE * WINDOW_CELLS
+    coarse = _expand(_block_means(pixels, ~mask, window), window, mask.shape)
+    filled = np.where(mask[:, :, None] if pixels.ndim == 3 else mask, coarse, pixels)
+    background = _block_means(filled, np.ones(mask.shape, dtype=bool), BACKGROUND_SCALE)
+
+    text = pixels[mask]
+    low, high = np.percentile(text, [5, 95], axis=0)
+    median = np.median(text, axis=0).astype(np.uint8)
+    if np.all(np.asarray(high) - np.asarray(low) <= UNIFORM_COLOR_RANGE):
+        return background, tuple(int(v) for v in np.atleast_1d(median))
+
+    # 没有文字的块不会显示，填为文字的中间颜色，避免JPEG在文字边缘产生振铃
+    foreground = _block_means(pixels, mask, FOREGROUND_SCALE)
+    empty = _block_sums(mask.astype(np.uint32), FOREGROUND_SCALE) == 0
+    foreground[empty] = median
+    return background, foreground
+
+
+def _segment(pixels, quality):
+    """线程池中执行：分割并编码各层，不适合分层时返回None
+
+    返回 (遮罩G4数据, 背景编码结果和尺寸, 前景编码结果和尺寸或单一颜色)。
+    """
+    mask = text_mask(pixels)
+    fraction = mask.mean()
+    if not MIN_TEXT_FRACTION <= fraction <= MAX_TEXT_FRACTION:
+        return None
+
+    background, foreground = split_layers(pixels, mask)
+    layers = [encode_g4(mask),
+              (background.shape[1], background.shape[0], encode(background, quality, "jpeg"))]
+    if isinstance(foreground, tuple):
+        layers.append(foreground)
+    else:
+        layers.append((foreground.shape[1], foreground.shape[0], encode(foreground, quality, "jpeg")))
+    return layers
+
+
+def _layers_size(layers):
+    mask, (_, _, background), foreground = layers
+    size = len(mask) + len(background[0])
+    if not isinstance(foreground[-1], int):
+        size += len(foreground[2][0])
+    return size
+
+
+def _image(pdf, width, height, encoded):
+    import pikepdf
+
+    data, filter_name, color_space, bits = encoded
+    image = pikepdf.Stream(pdf, data)
+    image.Type = pikepdf.Name.XObject
+    image.Subtype = pikepdf.Name.Image
+    image.Width = width
+    image.Height = height
+    image.ColorSpace = color_space_object(color_space)
+    image.BitsPerComponent = bits
+    image.Filter = pikepdf.Name(filter_name)
+    return pdf.make_indirect(image)
+
+
+def _build_form(pdf, width, height, layers):
+    """用各层构造替换原图片的表单XObject（在单位正方形中绘制，与图片一致）"""
+    import pikepdf
+
+    mask_data, (bg_width, bg_height, background), foreground = layers
+    mask = pikepdf.Stream(pdf, mask_data)
+    mask.Type = pikepdf.Name.XObject
+    mask.Subtype = pikepdf.Name.Image
+    mask.Width = width
+    mask.Height = height
+    mask.ImageMask = True
+    mask.BitsPerComponent = 1
+    mask.Filter = pikepdf.Name.CCITTFaxDecode
+    # 遮罩中文字为0，图片遮罩中0表示绘制
+    mask.DecodeParms = pikepdf.Dictionary(K=-1, Columns=width, Rows=height)
+    mask = pdf.make_indirect(mask)
+
+    xobjects = pikepdf.Dictionary(BG=_image(pdf, bg_width, bg_height, background))
+    if isinstance(foreground[-1], int):
+        # 单一文字颜色：遮罩作为模板，用该颜色填充
+        color = " ".join(f"{value / 255:.3f}" for value in foreground)
+        operator = "rg" if len(foreground) == 3 else "g"
+        xobjects.FG = mask
+        content = f"q /BG Do Q q {color} {operator} /FG Do Q".encode()
+    else:
+        fg_width, fg_height, encoded = foreground
+        fg = _image(pdf, fg_width, fg_height, encoded)
+        fg.Mask = mask
+        xobjects.FG = fg
+        content = b"q /BG Do Q q /FG Do Q"
+
+    form = pikepdf.Stream(pdf, content)
+    form.Type = pikepdf.Name.XObject
+    form.Subtype = pikepdf.Name.Form
+    form.BBox = pikepdf.Array([0, 0, 1, 1])
+    form.Resources = pikepdf.Dictionary(XObject=xobjects)
+    return pdf.make_indirect(form)
+
+
+def _candidate(image):
+    import pikepdf
+
+    if int(image.get("/Width", 0)) * int(image.get("/Height", 0)) < MIN_PIXELS:
+        return False
+    # 带透明遮罩的图片分层后无法保持原有的透明效果
+    return isinstance(image, pikepdf.Stream) and "/SMask" not in image and "/Mask" not in image
+
+
+def layer_images(pdf, quality=DEFAULT_QUALITY, max_workers=4, skip=()):
+    """把 pdf（pikepdf.Pdf）中的整页扫描图片改为MRC分层表单，返回统计信息
+
+    skip 中的图片（objgen）保持不变。
+    """
+    from engine import dedup
+
+    stats = {"images": 0, "layered": 0, "bytes_saved": 0}
+    replacements = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def collect(done):
+            for future in done:
+                image, original_length = futures.pop(future)
+                try:
+                    layers = future.result()
+                except Exception:
+                    continue
+                if layers is None:
+                    continue
+                size = _layers_size(layers)
+                if size > original_length * (1 - MIN_SAVING):
+                    continue
+                replacements[image.objgen] = _build_form(pdf, int(image.Width), int(image.Height), layers)
+                stats["layered"] += 1
+                stats["bytes_saved"] += original_length - size
+
+        for objgen in image_placements(pdf):
+            image = pdf.get_object(objgen)
+            if objgen in skip or not _candidate(image):
+                continue
+            try:
+                pixels = decode_image(image)
+            except Exception:
+                pixels = None
+            if pixels is None:
+                continue
+            stats["images"] += 1
+
+            # 每页一张的整页扫描，同时在途的页面数量有上限
+            while len(futures) >= max_workers * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+            futures[pool.submit(_segment, pixels, quality)] = (image, len(image.read_raw_bytes()))
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    if replacements:
+        # 页面资源中对原图片的引用改为指向分层表单，原图片在保存时不再写出
+        dedup.rewrite_references(pdf, replacements)
+    return stats
@@ -0,0 +1,41 @@
+import os
+
+from engine import scheduler
+from engine.doc_cache import open_reader
+
+
+def extract_file_text(pdf_file):
+    """提取单个文件每一页的文本，返回报告文本"""
+    lines = [f"文件: {os.path.basename(pdf_file)}\n", "-" * 30 + "\n"]
+
+    try:
+        with open_reader(pdf_file) as reader:
+            for page_num, page in enumerate(reader.pages, 1):
+                lines.append(f"第 {page_num} 页:\n")
+
+                # 尝试直接提取文本（对于非扫描PDF）
+                text = page.extract_text()
+                if text:
+                    lines.append(text + "\n\n")
+                else:
+                    lines.append("(无法直接提取文本，该PDF可能是扫描件)\n")
+                    lines.append("注意: 完整的OCR功能需要安装Tesseract OCR引擎\n\n")
+    except Exception as e:
+        lines.append(f"处理文件时出错: {str(e)}\n\n")
+
+    return "".join(lines)
+
+
+def perform_ocr(files, lang="chi_sim", progress=None, should_stop=None):
+    """执行OCR识别的核心功能，返回识别结果文本"""
+    # 注意：完整的OCR功能需要pytesseract和Tesseract OCR引擎，
+    # 这里只提取PDF中已有的文本内容
+    lines = ["OCR识别结果\n", "=" * 50 + "\n\n"]
+
+    # 各文件在进程池中并行提取，按原顺序拼接
+    jobs = [(pdf_file, (pdf_file,)) for pdf_file in files]
+    lines.extend(scheduler.map_files(extract_file_text, jobs, progress, should_stop))
+
+    lines.append("=" * 50 + "\n")
+    lines.append("OCR识别完成\n")
+    return "".join(lines)
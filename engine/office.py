@@ -0,0 +1,42 @@
+import os
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+
+# 占位PDF内容：实际转换需要调用Office的COM接口或LibreOffice命令行
+PLACEHOLDER_PDF = (
+    "%PDF-1.4\n1 0 obj<< /Type /Catalog /Pages 2 0 R >>endobj\n"
+    "2 0 obj<< /Type /Pages /Kids [3 0 R] /Count 1 >>endobj\n"
+    "3 0 obj<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>endobj\n"
+    "xref\n0 4\n0000000000 65535 f \n0000000010 00000 n \n0000000053 00000 n \n"
+    "0000000101 00000 n \ntrailer<< /Size 4 /Root 1 0 R >>\nstartxref\n150\n%%EOF"
+)
+
+
+def convert_office_file(office_file, output_dir):
+    """将单个Office文档转换为PDF（目前生成占位文件）"""
+    pdf_path = os.path.join(output_dir, f"{base_name(office_file)}.pdf")
+    with open(pdf_path, 'w') as f:
+        f.write(PLACEHOLDER_PDF)
+    return FileResult(office_file, output_path=pdf_path)
+
+
+def convert_office_files(files, output_dir, progress=None, should_stop=None):
+    """将Office文档转换为PDF，各文件在进程池中并行转换"""
+    jobs = [(office_file, (office_file, output_dir)) for office_file in files]
+    return scheduler.map_files(convert_office_file, jobs, progress, should_stop)
+
+
+def convert_word_to_pdf(files, output_dir, progress=None, should_stop=None):
+    """将Word文件转换为PDF"""
+    return convert_office_files(files, output_dir, progress, should_stop)
+
+
+def convert_excel_to_pdf(files, output_dir, progress=None, should_stop=None):
+    """将Excel文件转换为PDF"""
+    return convert_office_files(files, output_dir, progress, should_stop)
+
+
+def convert_ppt_to_pdf(files, output_dir, progress=None, should_stop=None):
+    """将PPT文件转换为PDF"""
+    return convert_office_files(files, output_dir, progress, should_stop)
@@ -0,0 +1,391 @@
+"""PDF结构优化
+
+优化由若干可单独选择的步骤组成，每个步骤统计自己节省的字节数：
+
+  gc              清理无引用的对象
+  dedup           合并完全相同的流对象
+  inheritance     所有页面相同的可继承属性提升到页面树根节点
+  empty_streams   删除页面内容数组中的空内容流
+  procset         多个资源字典中相同的 /ProcSet 合并为一个共享对象
+  thumbnails      删除页面缩略图
+  minify          精简内容流中的空白和数字格式并重新压缩
+  flate           按指定的zlib级别并行重新压缩无损编码和未压缩的流
+  object_streams  把对象打包进对象流，使用交叉引用流
+
+文档只打开和保存一次，所有步骤在内存中完成。未安装pikepdf时退回到逐页复制。
+"""
+import os
+import zlib
+from decimal import Decimal, InvalidOperation
+
+from PyPDF2 import PdfWriter
+
+from engine import dedup, fingerprint, flate, scheduler
+from engine.common import FileResult, failed, base_name
+from engine.doc_cache import open_reader
+from engine.linearize import check_dependency, save_linearized
+from engine.stream_writer import INHERITABLE_PAGE_KEYS, OBJECT_OVERHEAD
+
+LEVELS = ("low", "medium", "high")
+
+PASSES = ("gc", "dedup", "inheritance", "empty_streams", "procset", "thumbnails", "minify",
+          "flate", "object_streams")
+# 各优化级别默认启用的步骤
+LEVEL_PASSES = {
+    "low": ("gc", "dedup", "object_streams"),
+    "medium": ("gc", "dedup", "inheritance", "empty_streams", "procset", "thumbnails",
+               "object_streams"),
+    "high": PASSES,
+}
+PASS_NAMES = {
+    "gc": "清理无用对象",
+    "dedup": "合并重复流",
+    "inheritance": "合并页面继承属性",
+    "empty_streams": "删除空内容流",
+    "procset": "合并ProcSet",
+    "thumbnails": "删除缩略图",
+    "minify": "精简内容流",
+    "flate": "重新压缩Flate流",
+    "object_streams": "对象流打包",
+}
+
+# 内容流中实数保留的小数位数；按位数而不是有效数字截取，坐标越大精度不会越差
+DECIMAL_PLACES = 5
+# 原始数据不超过这个字节数的内容流才检查是否为空
+EMPTY_STREAM_CHECK = 64
+
+
+def _unparse(value):
+    """对象的序列化结果，用于比较是否相同"""
+    import pikepdf
+
+    if isinstance(value, pikepdf.Object):
+        return value.unparse()
+    return str(value).encode()
+
+
+def _object_size(obj):
+    """间接对象写出后的大致字节数"""
+    import pikepdf
+
+    if isinstance(obj, pikepdf.Stream):
+        return len(obj.stream_dict.unparse()) + int(obj.get("/Length", 0)) + OBJECT_OVERHEAD
+    return len(obj.unparse()) + OBJECT_OVERHEAD
+
+
+def _content_streams(page):
+    import pikepdf
+
+    contents = page.get("/Contents")
+    if isinstance(contents, pikepdf.Array):
+        return list(contents)
+    return [contents] if contents is not None else []
+
+
+def pass_gc(pdf):
+    """统计无引用的对象；pikepdf保存时本来就只写出可达对象，这里负责计数"""
+    from engine.analyze import reachable_objects
+    import pikepdf
+
+    reachable = reachable_objects(pdf)
+    count = saved = 0
+    for obj in pdf.objects:
+        if not isinstance(obj, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+            continue
+        if obj.objgen in reachable:
+            continue
+        if not isinstance(obj, pikepdf.Array) and obj.get("/Type") in ("/ObjStm", "/XRef"):
+            continue
+        count += 1
+        saved += _object_size(obj)
+    return count, saved
+
+
+def pass_dedup(pdf):
+    stats = dedup.dedupe_streams(pdf)
+    return stats["duplicates"], stats["bytes_saved"]
+
+
+def pass_inheritance(pdf):
+    """把所有页面取值相同的可继承属性提升到页面树根节点，只保存一份
+
+    pikepdf（qpdf）打开文档时会把继承属性下放到每个页面并从中间节点删除，
+    因此写出的文件里每页都带着完全相同的 /MediaBox、/Resources 等。
+    """
+    pages = [page.obj for page in pdf.pages]
+    if len(pages) < 2:
+        return 0, 0
+
+    root = pdf.Root.Pages
+    count = saved = 0
+    for key in INHERITABLE_PAGE_KEYS:
+        if not all(key in page for page in pages):
+            continue
+        values = {_unparse(page[key]) for page in pages}
+        if len(values) != 1:
+            continue
+        root[key] = pages[0][key]
+        for page in pages:
+            del page[key]
+        count += len(pages) - 1
+        saved += (len(pages) - 1) * (len(key) + len(values.pop()) + 2)
+    return count, saved
+
+
+def pass_empty_streams(pdf):
+    import pikepdf
+
+    count = saved = 0
+    for page in pdf.pages:
+        contents = page.obj.get("/Contents")
+        # 单个内容流即使为空也保留，删除后页面缺少 /Contents 的写法兼容性较差
+        if not isinstance(contents, pikepdf.Array) or len(contents) < 2:
+            continue
+        kept = []
+        for stream in contents:
+            if (isinstance(stream, pikepdf.Stream) and int(stream.get("/Length", 0)) <= EMPTY_STREAM_CHECK
+                    and not stream.read_bytes().strip()):
+                count += 1
+                saved += _object_size(stream) + 8
+            else:
+                kept.append(stream)
+        if len(kept) != len(contents):
+            page.obj.Contents = pikepdf.Array(kept)
+    return count, saved
+
+
+def _resource_dicts(pdf):
+    """页面（含继承）和表单XObject实际使用的资源字典"""
+    import pikepdf
+
+    seen = set()
+
+    def unseen(resources):
+        if not isinstance(resources, pikepdf.Dictionary):
+            return False
+        if resources.is_indirect:
+            if resources.objgen in seen:
+                return False
+            seen.add(resources.objgen)
+        return True
+
+    for page in pdf.pages:
+        node = page.obj
+        while isinstance(node, pikepdf.Dictionary) and "/Resources" not in node:
+            node = node.get("/Parent")
+        if isinstance(node, pikepdf.Dictionary) and unseen(node.Resources):
+            yield node.Resources
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Form":
+            if unseen(obj.get("/Resources")):
+                yield obj.Resources
+
+
+def pass_procset(pdf):
+    import pikepdf
+
+    shared = {}
+    count = saved = 0
+    for resources in _resource_dicts(pdf):
+        procset = resources.get("/ProcSet")
+        if not isinstance(procset, pikepdf.Array):
+            continue
+        key = bytes(procset.unparse(resolved=True))
+        kept = shared.get(key)
+        if kept is None:
+            shared[key] = procset if procset.is_indirect else pdf.make_indirect(pikepdf.Array(procset))
+            resources.ProcSet = shared[key]
+            continue
+        if procset.is_indirect and procset.objgen == kept.objgen:
+            continue
+        count += 1
+        # 直接数组换成引用，或另一个相同的间接对象不再写出
+        saved += len(key) + (OBJECT_OVERHEAD if procset.is_indirect else -len(b"0 0 R"))
+        resources.ProcSet = kept
+    return count, saved
+
+
+def pass_thumbnails(pdf):
+    count = saved = 0
+    for page in pdf.pages:
+        thumb = page.obj.get("/Thumb")
+        if thumb is not None:
+            count += 1
+            saved += _object_size(thumb) + len(b"/Thumb 0 0 R")
+            del page.obj["/Thumb"]
+    return count, saved
+
+
+def _compact_number(value):
+    """实数最多保留 DECIMAL_PLACES 位小数并去掉末尾的0，整数值写为整数"""
+    if not isinstance(value, Decimal):
+        return value
+    if value.as_tuple().exponent < -DECIMAL_PLACES:
+        try:
+            value = value.quantize(Decimal(1).scaleb(-DECIMAL_PLACES))
+        except InvalidOperation:
+            return value
+    if value == value.to_integral_value():
+        # 超出PDF整数范围的值保持实数
+        return int(value) if abs(value) < 2 ** 31 else value
+    return value.normalize()
+
+
+def pass_minify(pdf):
+    import pikepdf
+
+    streams = {}
+    for page in pdf.pages:
+        for stream in _content_streams(page.obj):
+            if isinstance(stream, pikepdf.Stream):
+                streams[stream.objgen] = stream
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Form":
+            streams[obj.objgen] = obj
+
+    count = saved = 0
+    for stream in streams.values():
+        try:
+            instructions = pikepdf.parse_content_stream(stream)
+        except Exception:
+            # 无法解析的内容流保持原样
+            continue
+        instructions = [pikepdf.ContentStreamInstruction([_compact_number(value) for value in item.operands],
+                                                         item.operator)
+                        if isinstance(item, pikepdf.ContentStreamInstruction) else item
+                        for item in instructions]
+        data = zlib.compress(pikepdf.unparse_content_stream(instructions), 9)
+
+        original_length = len(stream.read_raw_bytes())
+        if len(data) < original_length:
+            stream.write(data, filter=pikepdf.Name.FlateDecode)
+            count += 1
+            saved += original_length - len(data)
+    return count, saved
+
+
+def pass_flate(pdf, level=flate.DEFAULT_LEVEL):
+    """重新压缩流，返回 (数量, 节省字节数, 吞吐量)"""
+    stats = flate.recompress_streams(pdf, level, try_predictors=True)
+    return stats["recompressed"], stats["bytes_saved"], stats["throughput"]
+
+
+PASS_FUNCTIONS = {
+    "gc": pass_gc,
+    "dedup": pass_dedup,
+    "inheritance": pass_inheritance,
+    "empty_streams": pass_empty_streams,
+    "procset": pass_procset,
+    "thumbnails": pass_thumbnails,
+    "minify": pass_minify,
+}
+
+
+def optimize_document(input_path, output_path, passes, linearize=False, flate_level=flate.DEFAULT_LEVEL):
+    """对文档依次执行所选步骤并保存，返回 {步骤: {"count": 数量, "bytes_saved": 字节数}}
+
+    linearize 为 True 时线性化保存并校验提示表，此时跳过 inheritance 步骤。
+    flate 步骤按 flate_level 压缩，统计中另外包含吞吐量 "throughput"（解码后字节/秒）。
+    """
+    import pikepdf
+
+    stats = {}
+    input_size = os.path.getsize(input_path)
+    with pikepdf.open(input_path) as pdf:
+        for name in PASSES:
+            # 线性化时qpdf会把继承属性重新下放到各页面，提升到根节点后生成的提示表无法通过校验
+            if linearize and name == "inheritance":
+                continue
+            if name in passes and name in PASS_FUNCTIONS:
+                count, saved = PASS_FUNCTIONS[name](pdf)
+                stats[name] = {"count": count, "bytes_saved": max(0, saved)}
+        if "flate" in passes:
+            count, saved, throughput = pass_flate(pdf, flate_level)
+            stats["flate"] = {"count": count, "bytes_saved": saved, "throughput": throughput}
+
+        mode = pikepdf.ObjectStreamMode.generate if "object_streams" in passes \
+            else pikepdf.ObjectStreamMode.preserve
+        if linearize:
+            save_linearized(pdf, output_path, compress_streams=True, object_stream_mode=mode)
+        else:
+            pdf.save(output_path, compress_streams=True, object_stream_mode=mode)
+
+    if "object_streams" in passes:
+        # 对象流的效果只能在写出后得到，按总节省减去其他步骤的节省计算
+        others = sum(item["bytes_saved"] for item in stats.values())
+        residual = input_size - os.path.getsize(output_path) - others
+        stats["object_streams"] = {"count": 0, "bytes_saved": max(0, residual)}
+    return stats
+
+
+def optimize_single_pdf(pdf_file, output_dir, level="medium", passes=None, stats=None,
+                        linearize=False, flate_level=flate.DEFAULT_LEVEL):
+    """优化单个PDF文件，返回输出路径
+
+    passes 为要执行的步骤（见 PASSES），未指定时按 level 取 LEVEL_PASSES 中的组合；
+    传入 stats 字典时写入各步骤的统计信息。linearize 为 True 时线性化输出，
+    flate_level 为 flate 步骤使用的zlib级别。
+    """
+    output_path = os.path.join(output_dir, f"{base_name(pdf_file)}_optimized.pdf")
+    if passes is None:
+        passes = LEVEL_PASSES.get(level, LEVEL_PASSES["medium"])
+
+    try:
+        if dedup.is_available():
+            pass_stats = optimize_document(pdf_file, output_path, passes, linearize, flate_level)
+            if stats is not None:
+                stats.update(pass_stats)
+            return output_path
+
+        if linearize:
+            raise Exception(check_dependency())
+
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            # 复制所有页面，这本身就是一种简单的优化
+            for page in reader.pages:
+                writer.add_page(page)
+
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+
+        return output_path
+    except Exception as e:
+        raise Exception(f"优化文件时出错: {str(e)}")
+
+
+def optimize_pdf(pdf_file, output_dir, level="medium", passes=None, linearize=False,
+                 flate_level=flate.DEFAULT_LEVEL):
+    """优化单个PDF文件并返回结果对象"""
+    original_size = os.path.getsize(pdf_file) if os.path.exists(pdf_file) else 0
+    pass_stats = {}
+    try:
+        output_path = optimize_single_pdf(pdf_file, output_dir, level, passes, pass_stats, linearize,
+                                          flate_level)
+    except Exception as e:
+        result = failed(pdf_file, e)
+        result.original_size = original_size
+        return result
+    return FileResult(pdf_file, output_path=output_path, original_size=original_size,
+                      output_size=os.path.getsize(output_path),
+                      info={"passes": pass_stats, "linearized": linearize})
+
+
+def optimize_pdfs(files, output_dir, level="medium", progress=None, should_stop=None, passes=None,
+                  linearize=False, flate_level=flate.DEFAULT_LEVEL, skip_known=False):
+    """优化PDF文件，各文件在进程池中并行优化
+
+    skip_known 为True时跳过指纹记录中已用相同设置优化过或已知无法变小的文件。
+    """
+    if not skip_known:
+        jobs = [(pdf_file, (pdf_file, output_dir, level, passes, linearize, flate_level))
+                for pdf_file in files]
+        return scheduler.map_files(optimize_pdf, jobs, progress, should_stop)
+
+    jobs = [(pdf_file, os.path.join(output_dir, f"{base_name(pdf_file)}_optimized.pdf"),
+             (pdf_file, output_dir, level, passes, linearize, flate_level))
+            for pdf_file in files]
+    settings = {"level": level, "passes": list(passes) if passes is not None else None,
+                "linearize": linearize, "flate_level": flate_level}
+    return fingerprint.run_skipping(optimize_pdf, jobs, "optimize", settings, progress, should_stop)
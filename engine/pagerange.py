@@ -0,0 +1,360 @@
+"""页面集合：按游程压缩存储的页码集合，供所有工具解析和选择页面
+
+页码在内部统一使用0-based索引，集合由若干等差游程 (start, stop, step) 组成，
+例如 "1-3,10-" 只保存两个游程，"除第3页外的所有页" 也只需要两个游程，
+而不会为五万页的文档生成五万个整数。跨度重叠的游程归为一组，同组游程步长相同、
+余数互不相同（例如 "每3页中的后两页" 是两个交错的跨步游程），各组的跨度互不重叠。
+成员判断先二分查找所在的组，复杂度为 O(log 组数 + 组内游程数)。
+"""
+import sys
+from bisect import bisect_right
+from functools import reduce
+from heapq import merge
+from itertools import chain
+from math import gcd
+
+# 开放结尾（如 "10-"）在确定总页数之前使用的上限
+OPEN_END = sys.maxsize
+
+
+def _run(start, stop, step=1):
+    """规范化单个游程：stop 收紧到最后一页之后，空游程返回None"""
+    if start < 0:
+        # 对齐到第一个非负页码
+        start += -(start // step) * step
+    pages = range(start, stop, step)
+    if not pages:
+        return None
+    if len(pages) == 1:
+        return (start, start + 1, 1)
+    if stop == OPEN_END:
+        # 保留开放结尾的标记
+        return (start, stop, step)
+    return (start, pages[-1] + 1, step)
+
+
+def _first_at(page, residue, step):
+    """不小于 page、且除以 step 余 residue 的第一个页码"""
+    return page + (residue - page) % step
+
+
+def _merge_same_step(group, step):
+    """合并同一步长（单页游程视为任意步长）、同一余数且首尾相接的游程；余数仍有重复（中间有空缺）时返回None"""
+    by_residue = {}
+    for start, stop, _ in group:
+        runs = by_residue.setdefault(start % step, [])
+        # 下一页是 stop - 1 + step，不晚于它开始的同余游程可以接上
+        if runs and start <= runs[-1][1] - 1 + step:
+            runs[-1] = (runs[-1][0], max(runs[-1][1], stop), step)
+        else:
+            runs.append((start, stop, step))
+    if any(len(runs) > 1 for runs in by_residue.values()):
+        return None
+    return sorted(_run(*runs[0]) for runs in by_residue.values())
+
+
+def _components(runs):
+    """把已排序的游程按跨度是否重叠拆分为若干组"""
+    groups = []
+    stop = None
+    for run in runs:
+        if groups and run[0] < stop:
+            groups[-1].append(run)
+            stop = max(stop, run[1])
+        else:
+            groups.append([run])
+            stop = run[1]
+    return groups
+
+
+def _join(first, second):
+    """两个前后相接的游程能连成一个游程时返回合并结果，否则返回None"""
+    if first[2] == second[2] == 1:
+        return (first[0], second[1], 1) if first[1] == second[0] else None
+    step = max(first[2], second[2])
+    if any(run[2] != step and run[1] - run[0] != 1 for run in (first, second)):
+        return None
+    return (first[0], second[1], step) if second[0] == first[1] - 1 + step else None
+
+
+def _split_group(group):
+    """把步长不同或余数重叠的一组游程按边界切段，每段换算为统一步长（各步长的最小公倍数）的交错游程"""
+    bounds = sorted({start for start, _, _ in group} | {stop for _, stop, _ in group})
+    segments = []
+    active = []
+    position = 0
+    for x, y in zip(bounds, bounds[1:]):
+        while position < len(group) and group[position][0] <= x:
+            active.append(group[position])
+            position += 1
+        active = [run for run in active if run[1] > x]
+        if not active:
+            continue
+
+        step = reduce(lambda a, b: a * b // gcd(a, b), (run[2] for run in active))
+        residues = set()
+        for start, _, run_step in active:
+            first = _first_at(x, start % run_step, run_step)
+            residues.update((first + i * run_step) % step for i in range(step // run_step))
+        residues = frozenset(residues)
+        if segments and segments[-1][1] == x and segments[-1][2:] == (step, residues):
+            segments[-1][1] = y
+        else:
+            segments.append([x, y, step, residues])
+
+    groups = []
+    for x, y, step, residues in segments:
+        if len(residues) == step:
+            runs = [(x, y, 1)]
+        else:
+            runs = sorted(filter(None, (_run(_first_at(x, residue, step), y, step) for residue in residues)))
+        if runs:
+            groups.append(runs)
+    return groups
+
+
+def _normalize(runs):
+    """排序并合并游程，返回游程组列表，保证各组的跨度互不重叠"""
+    items = sorted(filter(None, (_run(*run) for run in runs)))
+
+    result = []
+    for group in _components(items):
+        steps = {step for start, stop, step in group if stop - start > 1}
+        if len(group) == 1:
+            merged = [group]
+        elif steps <= {1}:
+            merged = [[(group[0][0], max(stop for _, stop, _ in group), 1)]]
+        else:
+            same_step = _merge_same_step(group, steps.pop()) if len(steps) == 1 else None
+            merged = [same_step] if same_step else _split_group(group)
+
+        # 切段后的游程可能不再重叠，重新分组；首尾相接的单个游程合并为一个
+        for runs in chain.from_iterable(_components(runs) for runs in merged):
+            joined = _join(result[-1][0], runs[0]) if result and len(result[-1]) == len(runs) == 1 else None
+            if joined:
+                result[-1] = [joined]
+            else:
+                result.append(runs)
+    return result
+
+
+class PageSet:
+    """不可变的页码集合（0-based），按游程压缩存储"""
+
+    def __init__(self, runs=()):
+        self._groups = tuple(tuple(group) for group in _normalize(runs))
+        self._runs = tuple(chain.from_iterable(self._groups))
+        self._starts = [group[0][0] for group in self._groups]
+
+    @classmethod
+    def all(cls, total_pages):
+        """全部页面"""
+        return cls([(0, total_pages)])
+
+    @classmethod
+    def every(cls, step, total_pages, start=0):
+        """从 start 开始每隔 step 页选一页"""
+        if step <= 0:
+            raise ValueError("步长必须大于0")
+        return cls([(start, total_pages, step)])
+
+    @classmethod
+    def odd(cls, total_pages):
+        """奇数页（按1开始的页码计算）"""
+        return cls.every(2, total_pages, 0)
+
+    @classmethod
+    def even(cls, total_pages):
+        """偶数页（按1开始的页码计算）"""
+        return cls.every(2, total_pages, 1)
+
+    @classmethod
+    def parse(cls, range_str, total_pages=None, strict=False):
+        """解析页面范围字符串，各项用逗号分隔
+
+        支持 "3"、"1-5"、"10-"、"-5"，"1-20/2"（第1到20页中每2页选一页）、"odd"/"even"（奇偶页），
+        以及 "!" 开头的排除项：只有排除项时从全部页面中排除（"!3" 为除第3页外的所有页），
+        否则从其余各项的并集中排除（"1-10,!5"）。
+        """
+        end_of_doc = OPEN_END if total_pages is None else total_pages
+        included, excluded = [], []
+        for part in range_str.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if part.startswith('!'):
+                excluded.append(_parse_term(part[1:].strip(), end_of_doc, strict))
+            else:
+                included.append(_parse_term(part, end_of_doc, strict))
+
+        if included or not excluded:
+            pages = cls(included)
+        else:
+            pages = cls.all(end_of_doc)
+        if excluded:
+            pages -= cls(excluded)
+        return pages
+
+    @property
+    def runs(self):
+        """游程列表 (start, stop, step)"""
+        return self._runs
+
+    @property
+    def is_bounded(self):
+        """是否已确定上限（不含开放结尾）"""
+        return not self._groups or all(stop != OPEN_END for _, stop, _ in self._groups[-1])
+
+    def clip(self, total_pages):
+        """截取到文档的实际页数内"""
+        return PageSet((start, min(stop, total_pages), step) for start, stop, step in self._runs)
+
+    def complement(self, total_pages):
+        """补集：文档中不在本集合内的页面，total_pages 可以是 OPEN_END"""
+        runs = []
+        position = 0
+        for group in self.clip(total_pages)._groups:
+            group_start = group[0][0]
+            group_stop = max(stop for _, stop, _ in group)
+            runs.append((position, group_start))
+            step = max(step for _, _, step in group)
+            # 组内按余数逐个补齐：缺少的余数整段补上，已有的余数补上游程前后的空缺
+            present = {start % step: (start, stop) for start, stop, _ in group}
+            for residue in range(step):
+                first = _first_at(group_start, residue, step)
+                if residue not in present:
+                    runs.append((first, group_stop, step))
+                    continue
+                start, stop = present[residue]
+                runs.append((first, start, step))
+                runs.append((stop - 1 + step, group_stop, step))
+            position = group_stop
+        runs.append((position, total_pages))
+        return PageSet(runs)
+
+    def union(self, other):
+        """并集"""
+        return PageSet(self._runs + other.runs)
+
+    def difference(self, other):
+        """差集：在本集合中但不在 other 中的页面"""
+        return self.complement(OPEN_END).union(other).complement(OPEN_END)
+
+    __or__ = union
+    __sub__ = difference
+
+    def format(self):
+        """格式化为1开始的页面范围字符串，与 parse 互逆"""
+        parts = []
+        for start, stop, step in self._runs:
+            end = "" if stop == OPEN_END else str(stop)
+            if step > 1:
+                parts.append(f"{start + 1}-{end}/{step}")
+            elif stop - start == 1:
+                parts.append(str(start + 1))
+            else:
+                parts.append(f"{start + 1}-{end}")
+        return ",".join(parts)
+
+    def __contains__(self, page):
+        index = bisect_right(self._starts, page) - 1
+        if index < 0:
+            return False
+        return any(start <= page < stop and (page - start) % step == 0
+                   for start, stop, step in self._groups[index])
+
+    def __iter__(self):
+        if not self.is_bounded:
+            raise ValueError("页面范围没有上限，请先使用 clip() 截取到文档页数")
+        return chain.from_iterable(
+            range(*group[0]) if len(group) == 1 else merge(*(range(*run) for run in group))
+            for group in self._groups
+        )
+
+    def __len__(self):
+        return sum(len(range(*run)) for run in self._runs)
+
+    def __bool__(self):
+        return bool(self._runs)
+
+    def __eq__(self, other):
+        if not isinstance(other, PageSet):
+            return NotImplemented
+        if self._runs == other.runs:
+            return True
+        # 同一集合可能有不同的游程表示（例如跨步游程与逐页游程）
+        if self.is_bounded != other.is_bounded or len(self) != len(other):
+            return False
+        if not self.is_bounded:
+            # 最后一个有限端点之后两者都是周期为各步长最小公倍数的开放游程，比较到多出一个周期为止
+            runs = self._runs + other.runs
+            end = max(value for run in runs for value in run[:2] if value != OPEN_END)
+            period = reduce(lambda a, b: a * b // gcd(a, b), (run[2] for run in runs))
+            return self.clip(end + period) == other.clip(end + period)
+        return all(a == b for a, b in zip(self, other))
+
+    def __hash__(self):
+        return hash((len(self), self._starts[0] if self._starts else -1))
+
+    def __repr__(self):
+        return f"PageSet({self.format()!r})"
+
+
+def _parse_term(part, end_of_doc, strict):
+    """解析 PageSet.parse 中的一项（不含 "!"），返回游程 (start, stop, step)"""
+    keyword = part.lower()
+    if keyword in ("odd", "奇数"):
+        return (0, end_of_doc, 2)
+    if keyword in ("even", "偶数"):
+        return (1, end_of_doc, 2)
+
+    step = 1
+    if '/' in part:
+        part, step_text = part.split('/', 1)
+        step = int(step_text)
+        if step <= 0:
+            raise ValueError(f"步长必须大于0: {part}/{step_text}")
+    if not part.strip():
+        raise ValueError("无效的范围格式: 缺少页码")
+    ranges = parse_ranges(part, None if end_of_doc == OPEN_END else end_of_doc, strict)
+    if not ranges:
+        return (0, 0, step)
+    return ranges[0] + (step,)
+
+
+def parse_ranges(range_str, total_pages=None, strict=False):
+    """按输入顺序解析页面范围，返回 (start, stop) 列表（0-based，不含stop）
+
+    "10-" 表示第10页到最后一页，"-5" 表示第1页到第5页；未给出 total_pages 时结尾保持开放。
+    strict 为 True 时超出文档范围的页面会抛出ValueError，否则自动截取。
+    """
+    end_of_doc = OPEN_END if total_pages is None else total_pages
+    ranges = []
+
+    for part in range_str.split(','):
+        part = part.strip()
+        if not part:
+            continue
+
+        if '-' in part:
+            start_end = part.split('-')
+            if len(start_end) != 2:
+                raise ValueError(f"无效的范围格式: {part}")
+            start_text, end_text = (text.strip() for text in start_end)
+            start = int(start_text) - 1 if start_text else 0
+            stop = int(end_text) if end_text else end_of_doc
+
+            if strict and (start < 0 or stop > end_of_doc or start >= stop):
+                raise ValueError(f"页面范围超出有效范围: {part}")
+        else:
+            start = int(part) - 1
+            stop = start + 1
+
+            if strict and (start < 0 or stop > end_of_doc):
+                raise ValueError(f"页面超出有效范围: {part}")
+
+        start, stop = max(0, start), min(stop, end_of_doc)
+        if start < stop:
+            ranges.append((start, stop))
+
+    return ranges
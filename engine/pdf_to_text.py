@@ -0,0 +1,37 @@
+from engine.doc_cache import open_reader
+from engine.pagerange import PageSet
+
+
+def parse_page_range(range_str, total_pages):
+    """解析页面范围字符串，返回PageSet，格式错误时抛出ValueError"""
+    if not range_str.strip():
+        return PageSet.all(total_pages)
+
+    try:
+        return PageSet.parse(range_str, total_pages)
+    except Exception as e:
+        raise ValueError(f"页面范围格式错误: {range_str}") from e
+
+
+def extract_text(input_path, page_range=""):
+    """提取指定页面的文本"""
+    with open_reader(input_path) as pdf_reader:
+        page_indices = parse_page_range(page_range, len(pdf_reader.pages))
+
+        text_content = ""
+        for page_num in page_indices:
+            text_content += f"--- 第 {page_num + 1} 页 ---\n"
+            text_content += pdf_reader.pages[page_num].extract_text()
+            text_content += "\n\n"
+
+    return text_content
+
+
+def convert_pdf_to_text(input_path, output_path, page_range=""):
+    """将PDF转换为文本的核心功能"""
+    text_content = extract_text(input_path, page_range)
+
+    with open(output_path, 'w', encoding='utf-8') as out_file:
+        out_file.write(text_content)
+
+    return output_path
@@ -0,0 +1,122 @@
+from engine import scheduler
+from engine.common import FileResult, failed, report_progress, suffixed_output_path
+from engine.doc_cache import page_count
+from engine.pagerange import PageSet
+
+ENGINES = ("pdf2docx", "pymupdf")
+
+
+def check_dependency(engine):
+    """检查转换引擎所需的依赖，缺失时返回错误提示"""
+    if engine == "pdf2docx":
+        try:
+            from pdf2docx import Converter  # noqa: F401
+        except ImportError:
+            return "未安装pdf2docx库。\n\n请运行以下命令安装:\npip install pdf2docx"
+
+    elif engine == "pymupdf":
+        try:
+            import fitz  # noqa: F401
+        except ImportError:
+            return "未安装PyMuPDF库。\n\n请运行以下命令安装:\npip install PyMuPDF"
+
+    return None
+
+
+def parse_pages_range(range_str):
+    """解析页面范围字符串，返回PageSet；"10-" 这样的开放范围需再按文档页数截取"""
+    try:
+        return PageSet.parse(range_str)
+    except Exception as e:
+        raise ValueError(f"解析页面范围时出错: {str(e)}")
+
+
+def convert_with_pdf2docx(input_path, output_path, pages_range="", quality="balanced"):
+    """使用pdf2docx转换PDF"""
+    from pdf2docx import Converter
+
+    try:
+        cv = Converter(input_path)
+
+        # 设置转换选项
+        convert_args = {}
+
+        # 设置页面范围
+        pages_range = pages_range.strip()
+        if pages_range:
+            pages = parse_pages_range(pages_range).clip(page_count(input_path))
+            convert_args['pages'] = list(pages)
+
+        # 根据质量设置转换参数
+        if quality == "high":
+            convert_args['layout_analysis'] = True
+        elif quality == "fast":
+            convert_args['layout_analysis'] = False
+
+        cv.convert(output_path, **convert_args)
+        cv.close()
+
+        return True
+    except Exception as e:
+        print(f"pdf2docx转换错误: {e}")
+        return False
+
+
+def convert_with_pymupdf(input_path, output_path, pages_range=""):
+    """使用PyMuPDF转换PDF"""
+    try:
+        import fitz  # PyMuPDF
+
+        doc = fitz.open(input_path)
+
+        # 获取文本内容
+        text = ""
+        pages_range = pages_range.strip()
+
+        if pages_range:
+            # 转换指定页面
+            for page_num in parse_pages_range(pages_range).clip(len(doc)):
+                text += doc[page_num].get_text()
+        else:
+            # 转换所有页面
+            for page in doc:
+                text += page.get_text()
+
+        doc.close()
+
+        # 保存为文本文件（PyMuPDF本身不支持直接转换为Word）
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        return True
+    except Exception as e:
+        print(f"PyMuPDF转换错误: {e}")
+        return False
+
+
+def convert_pdf(input_path, output_path, engine="pdf2docx", quality="balanced", pages_range=""):
+    """转换单个PDF文件"""
+    if engine == "pdf2docx":
+        success = convert_with_pdf2docx(input_path, output_path, pages_range, quality)
+    elif engine == "pymupdf":
+        success = convert_with_pymupdf(input_path, output_path, pages_range)
+    else:
+        raise ValueError(f"不支持的转换引擎: {engine}")
+
+    if not success:
+        return failed(input_path, "转换失败")
+    return FileResult(input_path, output_path=output_path)
+
+
+def convert_pdfs(files, output_dir, engine="pdf2docx", quality="balanced", pages_range="",
+                 output_format="docx", output_suffix="_converted",
+                 progress=None, should_stop=None):
+    """转换PDF文件的核心功能，各文件在进程池中并行转换"""
+    jobs = [(file_path, (file_path,
+                         suffixed_output_path(file_path, output_dir, output_suffix, f".{output_format}"),
+                         engine, quality, pages_range))
+            for file_path in files]
+    results = scheduler.map_files(convert_pdf, jobs, progress, should_stop, message_prefix="正在转换: ")
+
+    report_progress(progress, 100, "转换完成")
+    return results
@@ -0,0 +1,578 @@
+"""PDF文件的快速探测
+
+文件列表只需要版本、页数、加密和线性化状态、生成程序这几项信息，完整解析一个大文件
+却要读入全部对象。这里把文件映射到内存，只读取：
+
+  文件头        版本号和线性化参数字典
+  文件尾        startxref 指向的交叉引用表（或交叉引用流）和 trailer
+  少数几个对象  Root 的 /Pages /Count、/Info 的 /Producer
+
+每次读取都有长度上限。交叉引用损坏、对象位置不符或遇到不支持的结构（例如加密的对象流）时，
+退回到完整解析：优先使用pikepdf（qpdf自带各种加密算法），未安装时用 PyPDF2（通过 doc_cache 共享）。
+完整解析也失败时，保留文件尾中已经读到的版本和加密状态，页数为None。
+"""
+import mmap
+import re
+import zlib
+
+from engine import doc_cache
+
+# 查找版本号和线性化参数字典的文件头长度
+HEADER_BYTES = 1024
+# 在文件末尾查找 startxref 的范围（规范要求在最后1024字节内，留出尾部垃圾数据的余量）
+TAIL_BYTES = 4096
+# 从对象位置开始读取的字节数；对象不完整时（例如很长的 /Kids 数组）改用较大的上限重读一次
+OBJECT_WINDOW = 16 * 1024
+MAX_OBJECT_BYTES = 2 * 1024 * 1024
+# 交叉引用流和对象流解压后的大小上限
+MAX_STREAM_BYTES = 8 * 1024 * 1024
+# 最多跟随的增量更新（/Prev）层数
+MAX_XREF_SECTIONS = 64
+
+_WHITESPACE = b"\x00\t\n\x0c\r "
+_DELIMITERS = b"()<>[]{}/%"
+_HEADER = re.compile(rb"%PDF-(\d\.\d)")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_OBJECT_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+_REFERENCE = re.compile(rb"\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])")
+# 数组中连续的间接引用（例如页面树的 /Kids）一次匹配
+_REFERENCE_RUN = re.compile(rb"(?:[\x00\t\n\x0c\r ]*\d+\s+\d+\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%]))+")
+_SUBSECTION = re.compile(rb"\s*(\d+)\s+(\d+)\s*")
+_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+
+
+class _Unsupported(Exception):
+    """无法只靠文件头尾确定的情况，需要完整解析"""
+
+
+class _Truncated(_Unsupported):
+    """对象超出了读取范围"""
+
+
+class _Reference:
+    def __init__(self, number, generation):
+        self.number = number
+        self.generation = generation
+
+
+class _Name(str):
+    """PDF名称（与字符串值区分）"""
+
+
+class _ReferenceRun(bytes):
+    """数组中连续间接引用的原始数据，探测用不到这些值，不逐个解析"""
+
+
+def _parse_value(data, pos):
+    """解析 data[pos:] 处的一个PDF对象，返回 (值, 结束位置)
+
+    字典为 {名称: 值}，名称为去掉斜杠的 str，字符串为 bytes，间接引用为 _Reference，
+    数组中连续的间接引用合并为一个 _ReferenceRun。
+    """
+    pos = _skip(data, pos)
+    if pos >= len(data):
+        raise _Truncated("对象超出读取范围")
+    char = data[pos:pos + 1]
+    if data.startswith(b"<<", pos):
+        pos += 2
+        result = {}
+        while True:
+            pos = _skip(data, pos)
+            if data.startswith(b">>", pos):
+                return result, pos + 2
+            key, pos = _parse_value(data, pos)
+            if not isinstance(key, _Name):
+                raise _Unsupported("字典键不是名称")
+            result[str(key)], pos = _parse_value(data, pos)
+    if char == b"[":
+        pos += 1
+        items = []
+        while True:
+            pos = _skip(data, pos)
+            if data.startswith(b"]", pos):
+                return items, pos + 1
+            run = _REFERENCE_RUN.match(data, pos)
+            if run:
+                items.append(_ReferenceRun(run.group()))
+                pos = run.end()
+                continue
+            item, pos = _parse_value(data, pos)
+            items.append(item)
+    if char == b"(":
+        return _parse_literal(data, pos)
+    if char == b"<":
+        end = data.find(b">", pos)
+        if end < 0:
+            raise _Truncated("十六进制字符串未结束")
+        digits = re.sub(rb"\s", b"", data[pos + 1:end])
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii")), end + 1
+    if char == b"/":
+        end = pos + 1
+        while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+            end += 1
+        return _Name(data[pos + 1:end].decode("latin-1")), end
+
+    end = pos
+    while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+        end += 1
+    token = data[pos:end]
+    if not token:
+        raise _Unsupported("无法识别的对象")
+    if token.isdigit():
+        reference = _REFERENCE.match(data, end)
+        if reference:
+            return _Reference(int(token), int(reference.group(1))), reference.end()
+        return int(token), end
+    if token in (b"true", b"false"):
+        return token == b"true", end
+    if token == b"null":
+        return None, end
+    try:
+        return float(token), end
+    except ValueError:
+        return token.decode("latin-1"), end
+
+
+def _skip(data, pos):
+    """跳过空白和注释"""
+    while pos < len(data):
+        if data[pos] in _WHITESPACE:
+            pos += 1
+        elif data[pos:pos + 1] == b"%":
+            while pos < len(data) and data[pos] not in b"\r\n":
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _parse_literal(data, pos):
+    """解析 (...) 字符串，处理嵌套括号和转义"""
+    escapes = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+    result = bytearray()
+    depth = 1
+    pos += 1
+    while pos < len(data):
+        byte = data[pos]
+        if byte == 0x5C:  # 反斜杠
+            pos += 1
+            if pos >= len(data):
+                break
+            byte = data[pos]
+            if byte in escapes:
+                result += escapes[byte]
+            elif 0x30 <= byte <= 0x37:
+                digits = re.match(rb"[0-7]{1,3}", data[pos:pos + 3]).group()
+                result.append(int(digits, 8) & 0xFF)
+                pos += len(digits) - 1
+            elif byte == 0x0D:
+                if data[pos + 1:pos + 2] == b"\n":
+                    pos += 1
+            elif byte != 0x0A:
+                result.append(byte)
+        elif byte == 0x28:
+            depth += 1
+            result.append(byte)
+        elif byte == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(result), pos + 1
+            result.append(byte)
+        else:
+            result.append(byte)
+        pos += 1
+    raise _Truncated("字符串未结束")
+
+
+def _decode_text(value):
+    """PDF文本字符串转为 str（UTF-16BE带BOM，或按Latin-1近似PDFDocEncoding）"""
+    if value.startswith(b"\xfe\xff"):
+        return value[2:].decode("utf-16-be", errors="replace")
+    if value.startswith(b"\xef\xbb\xbf"):
+        return value[3:].decode("utf-8", errors="replace")
+    return value.decode("latin-1")
+
+
+def _png_unpredict(data, columns):
+    """还原PNG预测（交叉引用流只用到逐行的预测），返回去掉预测字节的数据"""
+    row_size = columns + 1
+    if len(data) % row_size:
+        raise _Unsupported("预测数据长度不符")
+    previous = bytearray(columns)
+    output = bytearray()
+    for start in range(0, len(data), row_size):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + row_size])
+        if kind == 2:
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+        elif kind == 1:
+            for i in range(1, columns):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif kind != 0:
+            # 平均和Paeth预测需要按像素宽度计算，交叉引用流中极少出现
+            raise _Unsupported("不支持的预测方式")
+        output += row
+        previous = row
+    return bytes(output)
+
+
+class _Document:
+    """只按需读取对象的PDF视图"""
+
+    def __init__(self, data):
+        self.data = data
+        self.sections = []
+        self._object_streams = {}
+
+    def window(self, offset, size=OBJECT_WINDOW):
+        if not 0 <= offset < len(self.data):
+            raise _Unsupported("偏移超出文件范围")
+        return self.data[offset:offset + size]
+
+    def object_at(self, offset, number=None):
+        """解析 offset 处的 "n g obj" 对象，返回 (读取的数据, 值, 值的结束位置)
+
+        number 不为None时检查对象号是否一致。
+        """
+        for size in (OBJECT_WINDOW, MAX_OBJECT_BYTES):
+            chunk = self.window(offset, size)
+            header = _OBJECT_HEADER.match(chunk)
+            if not header or (number is not None and int(header.group(1)) != number):
+                raise _Unsupported("对象位置不符")
+            try:
+                value, end = _parse_value(chunk, header.end())
+            except _Truncated:
+                if len(chunk) < size:
+                    raise
+                continue
+            return chunk, value, end
+        raise _Unsupported("对象过大")
+
+    def read_xref(self, offset):
+        """读取从 offset 开始的交叉引用链，返回最新的 trailer"""
+        trailer = None
+        seen = set()
+        while offset is not None:
+            if offset in seen or len(seen) >= MAX_XREF_SECTIONS:
+                raise _Unsupported("交叉引用链过长或循环")
+            seen.add(offset)
+            chunk = self.window(offset)
+            if chunk.startswith(b"xref"):
+                section, section_trailer = self._table_section(offset)
+                self.sections.append(section)
+                if isinstance(section_trailer.get("XRefStm"), int):
+                    # 混合引用文件：表中没有的对象在交叉引用流中
+                    stream_section, _ = self._stream_section(section_trailer["XRefStm"])
+                    self.sections.append(stream_section)
+            else:
+                section, section_trailer = self._stream_section(offset)
+                self.sections.append(section)
+            if trailer is None:
+                trailer = section_trailer
+            previous = section_trailer.get("Prev")
+            offset = int(previous) if isinstance(previous, (int, float)) else None
+        return trailer
+
+    def _table_section(self, offset):
+        """经典交叉引用表：记录各子段位置，按对象号直接计算条目位置"""
+        data = self.data
+        pos = offset + 4
+        subsections = []
+        while True:
+            match = _SUBSECTION.match(data, pos, pos + 64)
+            if not match:
+                break
+            start, count = int(match.group(1)), int(match.group(2))
+            subsections.append((start, count, match.end()))
+            pos = match.end() + count * 20
+        pos = _skip(data, pos)
+        if data[pos:pos + 7] != b"trailer":
+            raise _Unsupported("找不到trailer")
+        trailer, _ = _parse_value(self.window(pos + 7), 0)
+        return ("table", subsections), trailer
+
+    def _stream_section(self, offset):
+        """交叉引用流：解压后按 /W 解析全部条目"""
+        dictionary, data = self._stream_at(offset)
+        if dictionary.get("Type") != "XRef":
+            raise _Unsupported("不是交叉引用流")
+        widths = dictionary.get("W")
+        if not isinstance(widths, list) or len(widths) != 3:
+            raise _Unsupported("交叉引用流缺少/W")
+        widths = [int(width) for width in widths]
+        index = dictionary.get("Index") or [0, int(dictionary["Size"])]
+        entry_size = sum(widths)
+        entries = {}
+        pos = 0
+        for start, count in zip(index[::2], index[1::2]):
+            for number in range(int(start), int(start) + int(count)):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos:pos + width], "big") if width else None)
+                    pos += width
+                if pos > len(data):
+                    raise _Unsupported("交叉引用流数据不完整")
+                kind = 1 if fields[0] is None else fields[0]
+                entries[number] = (kind, fields[1], fields[2] or 0)
+        if entry_size == 0:
+            raise _Unsupported("交叉引用流宽度为0")
+        return ("stream", entries), dictionary
+
+    def _stream_at(self, offset):
+        """读取 offset 处的流对象，返回 (字典, 解码后的数据)"""
+        chunk, dictionary, pos = self.object_at(offset)
+        pos = _skip(chunk, pos)
+        if not chunk.startswith(b"stream", pos):
+            raise _Unsupported("不是流对象")
+        pos += 6
+        if chunk[pos:pos + 2] == b"\r\n":
+            pos += 2
+        elif chunk[pos:pos + 1] in (b"\n", b"\r"):
+            pos += 1
+        length = self.resolve(dictionary.get("Length"))
+        if not isinstance(length, int) or length > MAX_STREAM_BYTES:
+            raise _Unsupported("流长度无效")
+        start = offset + pos
+        raw = bytes(self.data[start:start + length])
+
+        filters = dictionary.get("Filter")
+        filters = filters if isinstance(filters, list) else [filters] if filters else []
+        if any(name != "FlateDecode" for name in filters) or len(filters) > 1:
+            raise _Unsupported("不支持的流过滤器")
+        data = raw
+        if filters:
+            decompressor = zlib.decompressobj()
+            data = decompressor.decompress(raw, MAX_STREAM_BYTES)
+            if decompressor.unconsumed_tail:
+                raise _Unsupported("流解压后过大")
+            params = dictionary.get("DecodeParms") or {}
+            if isinstance(params, list):
+                params = params[0] or {}
+            predictor = int(params.get("Predictor", 1))
+            if predictor >= 10:
+                data = _png_unpredict(data, int(params.get("Columns", 1)))
+            elif predictor != 1:
+                raise _Unsupported("不支持的预测方式")
+        return dictionary, data
+
+    def _locate(self, number):
+        """在交叉引用链中查找对象：返回 ("offset", 偏移) 或 ("stream", 对象流号, 序号)"""
+        for kind, section in self.sections:
+            if kind == "table":
+                for start, count, pos in section:
+                    if start <= number < start + count:
+                        entry = _ENTRY.match(self.data, pos + (number - start) * 20)
+                        if not entry:
+                            raise _Unsupported("交叉引用条目格式错误")
+                        if entry.group(3) == b"f":
+                            return None
+                        return ("offset", int(entry.group(1)))
+            elif number in section:
+                entry_kind, first, second = section[number]
+                if entry_kind == 1:
+                    return ("offset", first)
+                if entry_kind == 2:
+                    return ("stream", first, second)
+                return None
+        return None
+
+    def get(self, number):
+        """按对象号读取对象的值"""
+        location = self._locate(number)
+        if location is None:
+            return None
+        if location[0] == "offset":
+            return self.object_at(location[1], number)[1]
+
+        stream_number = location[1]
+        if stream_number not in self._object_streams:
+            stream_location = self._locate(stream_number)
+            if stream_location is None or stream_location[0] != "offset":
+                raise _Unsupported("找不到对象流")
+            self._object_streams[stream_number] = self._stream_at(stream_location[1])
+        dictionary, data = self._object_streams[stream_number]
+        first = int(dictionary["First"])
+        header = data[:first].split()
+        offsets = dict(zip((int(value) for value in header[::2]), (int(value) for value in header[1::2])))
+        if number not in offsets:
+            raise _Unsupported("对象不在对象流中")
+        return _parse_value(data, first + offsets[number])[0]
+
+    def resolve(self, value, depth=0):
+        """解析间接引用"""
+        while isinstance(value, _Reference):
+            if depth > 8:
+                raise _Unsupported("间接引用层数过多")
+            value = self.get(value.number)
+            depth += 1
+        return value
+
+
+def _linearization(header, size):
+    """文件头中的线性化参数字典，对应的是当前文件（长度为 size）时返回该字典"""
+    match = _OBJECT_HEADER.search(header)
+    if not match:
+        return None
+    try:
+        dictionary, _ = _parse_value(header, match.end())
+    except _Unsupported:
+        return None
+    if not isinstance(dictionary, dict) or "Linearized" not in dictionary:
+        return None
+    # 线性化之后又做过增量更新的文件，/L 与文件长度不再一致
+    return dictionary if dictionary.get("L") == size else None
+
+
+def _probe_trailer(data, known):
+    """只读文件头、文件尾和少数对象；已确定的版本、加密和线性化状态随时写入 known"""
+    header = _HEADER.search(data[:HEADER_BYTES])
+    if not header:
+        raise _Unsupported("缺少PDF文件头")
+    version = header.group(1).decode("ascii")
+
+    tail_start = max(0, len(data) - TAIL_BYTES)
+    matches = list(_STARTXREF.finditer(data[tail_start:]))
+    if not matches:
+        raise _Unsupported("找不到startxref")
+
+    document = _Document(data)
+    trailer = document.read_xref(int(matches[-1].group(1)))
+    encrypted = "Encrypt" in trailer
+    linearized = _linearization(data[:HEADER_BYTES], len(data)) is not None
+    known.update(version=version, encrypted=encrypted, linearized=linearized)
+
+    root = document.resolve(trailer.get("Root"))
+    if not isinstance(root, dict):
+        raise _Unsupported("找不到文档目录")
+    # 文档目录中的 /Version 可以覆盖文件头中的版本
+    if isinstance(root.get("Version"), str) and root["Version"] > version:
+        version = str(root["Version"])
+    pages = document.resolve(root.get("Pages"))
+    count = document.resolve(pages.get("Count")) if isinstance(pages, dict) else None
+    if not isinstance(count, int):
+        raise _Unsupported("找不到页数")
+
+    producer = None
+    if not encrypted:
+        # 加密文件的字符串也是加密的，不读取
+        info = document.resolve(trailer.get("Info"))
+        if isinstance(info, dict) and isinstance(info.get("Producer"), bytes):
+            producer = _decode_text(info["Producer"])
+
+    return {
+        "version": version,
+        "pages": count,
+        "encrypted": encrypted,
+        "linearized": linearized,
+        "producer": producer,
+        "full_parse": False,
+    }
+
+
+def _header_facts(file_path):
+    """文件头中的版本号和线性化状态"""
+    with open(file_path, "rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        data = f.read(HEADER_BYTES)
+    header = _HEADER.search(data)
+    return header.group(1).decode("ascii") if header else None, _linearization(data, size) is not None
+
+
+def _probe_pikepdf(file_path):
+    import pikepdf
+
+    version, linearized = _header_facts(file_path)
+    try:
+        pdf = pikepdf.open(file_path)
+    except pikepdf.PasswordError:
+        # 需要密码才能读取页面树
+        return {"version": version, "pages": None, "encrypted": True, "linearized": linearized,
+                "producer": None, "full_parse": True}
+    with pdf:
+        encrypted = pdf.is_encrypted
+        producer = None
+        if not encrypted:
+            value = pdf.docinfo.get("/Producer") if pdf.trailer.get("/Info") is not None else None
+            producer = str(value) if isinstance(value, pikepdf.String) else None
+        return {
+            "version": pdf.pdf_version,
+            "pages": len(pdf.pages),
+            "encrypted": encrypted,
+            "linearized": linearized,
+            "producer": producer,
+            "full_parse": True,
+        }
+
+
+def _probe_pypdf2(file_path):
+    with doc_cache.open_reader(file_path) as reader:
+        encrypted = reader.is_encrypted
+        try:
+            pages = len(reader.pages)
+        except Exception:
+            # 需要密码才能读取页面树
+            pages = None
+        producer = None
+        if not encrypted:
+            try:
+                producer = reader.metadata.producer if reader.metadata else None
+            except Exception:
+                producer = None
+    version, linearized = _header_facts(file_path)
+    return {
+        "version": version,
+        "pages": pages,
+        "encrypted": encrypted,
+        "linearized": linearized,
+        "producer": producer,
+        "full_parse": True,
+    }
+
+
+def _probe_full(file_path):
+    """完整解析：交叉引用损坏或结构不受支持时使用"""
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return _probe_pypdf2(file_path)
+    return _probe_pikepdf(file_path)
+
+
+def probe_file(file_path):
+    """探测PDF文件，返回 {"version", "pages", "encrypted", "linearized", "producer", "full_parse"}
+
+    pages 在加密文件需要密码或无法解密时为None；full_parse 表示是否退回了完整解析。
+    文件无法读取时抛出 OSError，完整解析也失败且文件尾中没有读到加密信息时抛出解析异常。
+    """
+    known = {}
+    with open(file_path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            data = None
+        if data is not None:
+            try:
+                return _probe_trailer(data, known)
+            except (_Unsupported, ValueError, KeyError, TypeError, IndexError, AttributeError,
+                    RecursionError, zlib.error):
+                pass
+            finally:
+                data.close()
+    try:
+        return _probe_full(file_path)
+    except OSError:
+        raise
+    except Exception:
+        if not known.get("encrypted"):
+            raise
+        # 例如 PyPDF2 缺少AES所需的库：已知文件加密，只是页数未知
+        return dict(known, pages=None, producer=None, full_parse=True)
+
+
+def probe(file_path):
+    """缓存的探测结果（按文件路径、大小和修改时间），返回的字典不要修改"""
+    return doc_cache.cached_fact(file_path, "probe", probe_file)
@@ -0,0 +1,141 @@
+"""有损压缩的画质检查
+
+把原文件和压缩结果的页面以较低分辨率渲染为灰度图，用NumPy计算SSIM和PSNR。
+SSIM低于阈值的页面由调用方对该页的图片改用更温和的设置重新压缩。
+渲染使用PyMuPDF。PyMuPDF不支持多线程，渲染时也不释放GIL，所以不在线程中并行：
+在主进程中调用时各页面分组交给共享进程池渲染和评分，每个子进程打开自己的文档；
+已在进程池的子进程中（各文件已经并行处理）时直接依次渲染。
+"""
+import math
+import multiprocessing
+
+# 评分时的渲染分辨率，足以发现文字模糊和块状失真
+GUARD_DPI = 50
+# 默认的SSIM下限
+DEFAULT_MIN_SSIM = 0.9
+# SSIM的滑动窗口边长和稳定常数（按8位亮度）
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+# 页面未达标时依次尝试的更温和设置 (DPI倍数, 质量增加值)，全部用完后保留该页的原图片
+FALLBACK_STEPS = ((1.5, 10), (2.0, 20))
+MAX_QUALITY = 95
+
+
+def check_dependency():
+    """检查画质检查所需的依赖，缺失时返回错误提示"""
+    missing = []
+    for module, package in (("numpy", "numpy"), ("fitz", "PyMuPDF")):
+        try:
+            __import__(module)
+        except ImportError:
+            missing.append(package)
+    if missing:
+        return f"画质检查需要以下库。\n\n请运行以下命令安装:\npip install {' '.join(missing)}"
+    return None
+
+
+def _box_mean(data, size):
+    """size × size 窗口的平均值（只取完整窗口），用积分图计算"""
+    import numpy as np
+
+    integral = np.pad(data, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    total = (integral[size:, size:] - integral[:-size, size:]
+             - integral[size:, :-size] + integral[:-size, :-size])
+    return total / (size * size)
+
+
+def ssim(first, second):
+    """两张相同尺寸灰度图的平均SSIM"""
+    import numpy as np
+
+    a = first.astype(np.float64)
+    b = second.astype(np.float64)
+    if min(a.shape) < SSIM_WINDOW:
+        return 1.0 if np.array_equal(a, b) else 0.0
+
+    mean_a = _box_mean(a, SSIM_WINDOW)
+    mean_b = _box_mean(b, SSIM_WINDOW)
+    var_a = _box_mean(a * a, SSIM_WINDOW) - mean_a ** 2
+    var_b = _box_mean(b * b, SSIM_WINDOW) - mean_b ** 2
+    covariance = _box_mean(a * b, SSIM_WINDOW) - mean_a * mean_b
+    index = ((2 * mean_a * mean_b + SSIM_C1) * (2 * covariance + SSIM_C2)) \
+        / ((mean_a ** 2 + mean_b ** 2 + SSIM_C1) * (var_a + var_b + SSIM_C2))
+    return float(index.mean())
+
+
+def psnr(first, second):
+    """两张相同尺寸灰度图的PSNR（dB），完全相同时为无穷大"""
+    import numpy as np
+
+    error = np.mean((first.astype(np.float64) - second.astype(np.float64)) ** 2)
+    return math.inf if error == 0 else float(10 * np.log10(255 ** 2 / error))
+
+
+def _render(page, dpi):
+    import fitz
+    import numpy as np
+
+    zoom = dpi / 72
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    rows = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)
+    return rows[:, :pixmap.width]
+
+
+def _score_group(original_path, compressed_path, pages, dpi):
+    """进程池中执行：渲染并评分一组页面，返回 {页码: (SSIM, PSNR)}"""
+    import fitz
+
+    scores = {}
+    with fitz.open(original_path) as original, fitz.open(compressed_path) as compressed:
+        for index in pages:
+            first = _render(original[index], dpi)
+            second = _render(compressed[index], dpi)
+            # 页面尺寸相同时渲染结果只可能因取整相差一个像素
+            height = min(first.shape[0], second.shape[0])
+            width = min(first.shape[1], second.shape[1])
+            first, second = first[:height, :width], second[:height, :width]
+            scores[index] = (ssim(first, second), psnr(first, second))
+    return scores
+
+
+def score_pages(original_path, compressed_path, pages=None, dpi=GUARD_DPI, max_workers=4):
+    """比较两个文件对应页面的画质，返回 {页码（从0开始）: (SSIM, PSNR)}
+
+    pages 为None时比较两个文件共有的全部页面。max_workers 为在主进程中调用时分成的组数。
+    """
+    from engine import info, scheduler
+
+    if pages is None:
+        pages = range(min(info.get_page_count(original_path), info.get_page_count(compressed_path)))
+    pages = list(pages)
+    if not pages:
+        return {}
+
+    groups = [pages[i::max_workers] for i in range(min(max_workers, len(pages)))]
+    job_scheduler = scheduler.get_scheduler()
+    if len(groups) == 1 or multiprocessing.parent_process() is not None or not job_scheduler.use_processes:
+        return _score_group(original_path, compressed_path, pages, dpi)
+
+    futures = [job_scheduler.submit(_score_group, original_path, compressed_path, group, dpi)
+               for group in groups]
+    scores = {}
+    for future in futures:
+        scores.update(future.result())
+    return scores
+
+
+def fallback_settings(steps, target_dpi, quality):
+    """把各图片的回退级别 {objgen: 级别} 换算为 {objgen: (DPI, 质量)}
+
+    级别超出 FALLBACK_STEPS 的图片取值为None，表示保留原图片。
+    """
+    settings = {}
+    for objgen, step in steps.items():
+        if step >= len(FALLBACK_STEPS):
+            settings[objgen] = None
+            continue
+        scale, increase = FALLBACK_STEPS[step]
+        settings[objgen] = (round(target_dpi * scale) if target_dpi else None,
+                            min(MAX_QUALITY, quality + increase))
+    return settings
@@ -0,0 +1,50 @@
+import PyPDF2
+
+from engine.doc_cache import open_reader
+from engine.pagerange import PageSet
+
+SCOPES = ("all", "odd", "even", "custom")
+
+
+def parse_page_range(range_str, total_pages):
+    """解析页面范围字符串，返回PageSet，格式错误时抛出ValueError"""
+    if not range_str.strip():
+        return PageSet.all(total_pages)
+
+    try:
+        return PageSet.parse(range_str, total_pages)
+    except Exception as e:
+        raise ValueError(f"页面范围格式错误: {range_str}") from e
+
+
+def get_pages_to_rotate(total_pages, scope="all", custom_range=""):
+    """获取要旋转的页面集合"""
+    if scope == "all":
+        return PageSet.all(total_pages)
+    if scope == "odd":
+        return PageSet.odd(total_pages)
+    if scope == "even":
+        return PageSet.even(total_pages)
+    if scope == "custom":
+        return parse_page_range(custom_range, total_pages)
+    return PageSet()
+
+
+def rotate_pdf(input_path, output_path, angle=90, scope="all", custom_range=""):
+    """旋转PDF页面的核心功能"""
+    with open_reader(input_path) as pdf_reader:
+        pdf_writer = PyPDF2.PdfWriter()
+        num_pages = len(pdf_reader.pages)
+
+        pages_to_rotate = get_pages_to_rotate(num_pages, scope, custom_range)
+
+        for page_num in range(num_pages):
+            # 旋转写入后的副本，不修改缓存中共享的原始页面
+            page = pdf_writer.add_page(pdf_reader.pages[page_num])
+            if page_num in pages_to_rotate:
+                page.rotate(angle)
+
+        with open(output_path, 'wb') as out_file:
+            pdf_writer.write(out_file)
+
+    return output_path
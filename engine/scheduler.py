@@ -0,0 +1,180 @@
+"""任务调度器：所有工具共用的进程池，带有有界队列和结果收集"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, CancelledError, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from engine.common import failed, report_progress, stop_requested
+
+# 环境变量可覆盖默认配置，例如在瘦客户端上限制进程数
+WORKERS_ENV = "PDF_TOOLBOX_WORKERS"
+PENDING_ENV = "PDF_TOOLBOX_MAX_PENDING"
+
+
+def _env_int(name, default):
+    """读取正整数环境变量"""
+    try:
+        value = int(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class JobScheduler:
+    """共享的进程池调度器
+
+    submit() 返回 Future；正在执行和排队的任务总数超过上限时会阻塞，
+    避免一次性把成百上千个文件全部塞进进程池。
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, use_processes=True):
+        self.max_workers = max_workers or _env_int(WORKERS_ENV, os.cpu_count() or 1)
+        self.max_pending = max_pending or _env_int(PENDING_ENV, self.max_workers * 2)
+        self.use_processes = use_processes
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+
+    def _get_executor(self):
+        """首次提交任务时才创建进程池"""
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    # 统一使用spawn：Tk主进程里有多个线程，fork出的子进程可能死锁
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _reset_executor(self):
+        """丢弃已损坏的进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, func, *args, **kwargs):
+        """提交任务，返回Future；队列已满时等待空位"""
+        self._slots.acquire()
+        try:
+            try:
+                future = self._get_executor().submit(func, *args, **kwargs)
+            except BrokenProcessPool:
+                # 某个子进程异常退出（例如底层库崩溃）后进程池不可再用，重建后重试一次
+                self._reset_executor()
+                future = self._get_executor().submit(func, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """在进程池中执行任务并等待结果"""
+        return self.submit(func, *args, **kwargs).result()
+
+    def map_files(self, func, jobs, progress=None, should_stop=None, message_prefix=""):
+        """并行处理多个文件
+
+        jobs 为 (输入路径, 参数元组) 列表，func(*参数) 通常返回 FileResult。
+        结果按输入顺序返回；单个文件出错时记录为失败结果，
+        请求停止后不再提交新任务并取消尚未开始的任务。
+        """
+        total = len(jobs)
+        futures = {}
+        results = [None] * total
+        done_count = 0
+
+        def collect(done):
+            nonlocal done_count
+            for future in done:
+                index = futures.pop(future)
+                input_path = jobs[index][0]
+                try:
+                    results[index] = future.result()
+                except CancelledError:
+                    continue
+                except Exception as e:
+                    results[index] = failed(input_path, e)
+                done_count += 1
+                report_progress(progress, done_count / total * 100,
+                                f"{message_prefix}{os.path.basename(input_path)}")
+
+        for index, (input_path, args) in enumerate(jobs):
+            if stop_requested(should_stop):
+                break
+
+            # 控制同时在途的任务数量，同时收集已完成的结果
+            while len(futures) >= self.max_workers + self.max_pending:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            report_progress(progress, done_count / total * 100,
+                            f"{message_prefix}{os.path.basename(input_path)}")
+            futures[self.submit(func, *args)] = index
+
+        while futures:
+            if stop_requested(should_stop):
+                for future in futures:
+                    future.cancel()
+            done, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+            collect(done)
+
+        report_progress(progress, 100)
+        return [result for result in results if result is not None]
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """关闭进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """获取全局调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
+
+
+def configure(max_workers=None, max_pending=None, use_processes=True):
+    """重新配置全局调度器，已有的进程池会在当前任务完成后关闭"""
+    global _scheduler
+    with _scheduler_lock:
+        old, _scheduler = _scheduler, JobScheduler(max_workers, max_pending, use_processes)
+    if old is not None:
+        old.shutdown(wait=False)
+    return _scheduler
+
+
+def shutdown(wait=True):
+    """关闭全局调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        old, _scheduler = _scheduler, None
+    if old is not None:
+        old.shutdown(wait=wait, cancel_pending=True)
+
+
+def submit(func, *args, **kwargs):
+    """向全局调度器提交任务"""
+    return get_scheduler().submit(func, *args, **kwargs)
+
+
+def run(func, *args, **kwargs):
+    """在全局调度器中执行任务并等待结果"""
+    return get_scheduler().run(func, *args, **kwargs)
+
+
+def map_files(func, jobs, progress=None, should_stop=None, message_prefix=""):
+    """使用全局调度器并行处理多个文件"""
+    return get_scheduler().map_files(func, jobs, progress, should_stop, message_prefix)
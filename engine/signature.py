@@ -0,0 +1,76 @@
+import os
+from PyPDF2 import PdfWriter
+
+from engine import scheduler
+from engine.common import FileResult, base_name
+from engine.doc_cache import open_reader
+
+
+class SignatureSettings:
+    """签名设置"""
+
+    def __init__(self, signature_type="text", text="签名", font_size=20, image_path="",
+                 page_number=1, x=100, y=100):
+        self.signature_type = signature_type
+        self.text = text
+        self.font_size = font_size
+        self.image_path = image_path
+        self.page_number = page_number
+        self.x = x
+        self.y = y
+
+    def validate(self):
+        """验证签名设置，返回错误提示或None"""
+        if self.signature_type == "text":
+            if not self.text.strip():
+                return "请输入签名文本"
+        elif not self.image_path:
+            return "请选择签名图片"
+        return None
+
+
+def write_signature_info(sign_info_path, pdf_file, output_path, settings):
+    """记录签名信息到外部文件"""
+    with open(sign_info_path, 'w', encoding='utf-8') as sign_file:
+        sign_file.write("PDF签名信息\n")
+        sign_file.write("=" * 50 + "\n")
+        sign_file.write(f"源文件: {os.path.basename(pdf_file)}\n")
+        sign_file.write(f"签名类型: {settings.signature_type}\n")
+        if settings.signature_type == "text":
+            sign_file.write(f"签名文本: {settings.text}\n")
+            sign_file.write(f"字体大小: {settings.font_size}\n")
+        else:
+            sign_file.write(f"签名图片: {settings.image_path}\n")
+        sign_file.write(f"签名位置: 第 {settings.page_number} 页, X={settings.x}, Y={settings.y}\n")
+        sign_file.write(f"输出文件: {os.path.basename(output_path)}\n")
+
+
+def sign_single_pdf(pdf_file, output_dir, settings):
+    """为单个PDF文件添加签名"""
+    file_name = os.path.basename(pdf_file)
+    name = base_name(pdf_file)
+    output_path = os.path.join(output_dir, f"{name}_signed.pdf")
+
+    try:
+        with open_reader(pdf_file) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            # 注意：完整的数字签名需要证书和专业的签名库，这里只保存副本
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+
+        write_signature_info(os.path.join(output_dir, f"{name}_signature_info.txt"),
+                             pdf_file, output_path, settings)
+    except Exception as e:
+        raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+
+    return FileResult(pdf_file, output_path=output_path)
+
+
+def sign_pdfs(files, output_dir, settings, progress=None, should_stop=None):
+    """为PDF文件添加签名，各文件在进程池中并行处理"""
+    jobs = [(pdf_file, (pdf_file, output_dir, settings)) for pdf_file in files]
+    return scheduler.map_files(sign_single_pdf, jobs, progress, should_stop)
@@ -0,0 +1,196 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from engine.common import FileResult
+from engine.doc_cache import open_reader
+from engine.linearize import linearize_file
+from engine.pagerange import parse_ranges
+from engine.stream_writer import SerializationCache, StreamingPdfWriter
+
+SPLIT_MODES = ("every_page", "page_range", "fixed_pages", "max_bytes")
+# 同时写出分割文件的线程数
+DEFAULT_WRITERS = 4
+# 每个输出文件的固定开销：文件头、页面树、文档目录、交叉引用表和trailer
+PART_OVERHEAD = 300
+# 页面树中每页的引用和交叉引用表条目
+PAGE_ENTRY_BYTES = 10
+# 按大小分割时，写出后核对大小并重新分组的最多次数
+SIZE_ATTEMPTS = 3
+
+
+def parse_page_ranges(range_str, total_pages):
+    """解析页面范围字符串，按输入顺序返回 (start, stop) 列表（0-based，不含stop）
+
+    每个范围对应一个输出文件，超出文档页数时抛出ValueError。
+    """
+    return parse_ranges(range_str, total_pages, strict=True)
+
+
+def plan_parts(mode, total_pages, page_range="", pages_per_split=1):
+    """根据分割模式计算每个输出文件包含的页面（0-based页码列表）"""
+    if mode == "every_page":
+        return [[page_num] for page_num in range(total_pages)]
+
+    if mode == "page_range":
+        range_str = page_range.strip()
+        if not range_str:
+            raise ValueError("请输入页面范围")
+        return [list(range(start, stop))
+                for start, stop in parse_page_ranges(range_str, total_pages)]
+
+    if mode == "fixed_pages":
+        try:
+            pages_per_split = int(pages_per_split)
+        except (TypeError, ValueError):
+            raise ValueError("请输入有效的页数")
+        if pages_per_split <= 0:
+            raise ValueError("每份页数必须大于0")
+        return [list(range(i, min(i + pages_per_split, total_pages)))
+                for i in range(0, total_pages, pages_per_split)]
+
+    raise ValueError(f"不支持的分割模式: {mode}")
+
+
+def parse_max_bytes(max_bytes):
+    """检查按大小分割的上限（字节）"""
+    try:
+        max_bytes = int(max_bytes)
+    except (TypeError, ValueError):
+        raise ValueError("请输入有效的文件大小")
+    if max_bytes <= 0:
+        raise ValueError("最大文件大小必须大于0")
+    return max_bytes
+
+
+def plan_by_size(cache, total_pages, max_bytes, scale=1.0):
+    """按对象图估算的大小依次分组，使每组写出后不超过 max_bytes
+
+    同一组内多个页面共用的字体、图片只计算一次；单页已超过上限时单独成组。
+    scale 用于按实际写出结果校正估算。返回 (分组列表, 各组估算大小)。
+    """
+    parts, estimates = [], []
+    current, seen, size = [], set(), PART_OVERHEAD
+
+    for index in range(total_pages):
+        page_size, objects = cache.page_closure(index)
+        added = page_size + PAGE_ENTRY_BYTES + sum(cost for number, cost in objects.items()
+                                                   if number not in seen)
+        if current and (size + added) * scale > max_bytes:
+            parts.append(current)
+            estimates.append(size)
+            current, seen, size = [], set(), PART_OVERHEAD
+            added = page_size + PAGE_ENTRY_BYTES + sum(objects.values())
+
+        current.append(index)
+        seen.update(objects)
+        size += added
+
+    if current:
+        parts.append(current)
+        estimates.append(size)
+    return parts, estimates
+
+
+def write_part(source, page_numbers, output_path, prune_resources=True, linearize=False):
+    """把指定页面写入一个新的PDF文件，返回 (不裁剪资源时的估算大小, 实际大小)
+
+    source 为PdfReader或共享的SerializationCache（此时按缓存的裁剪设置）；
+    开启资源裁剪时，每个文件只保留其页面实际用到的字体、图片等资源。
+    linearize 为 True 时写出后再线性化并校验。
+    """
+    with open(output_path, 'wb') as output_file:
+        # 同一文档内很少有重复对象，分割时不做内容去重，省去哈希计算
+        writer = StreamingPdfWriter(output_file, dedupe=False, prune_resources=prune_resources)
+        writer.copy_pages(source, page_numbers)
+        writer.close()
+
+    if linearize:
+        linearize_file(output_path)
+
+    output_size = os.path.getsize(output_path)
+    return output_size + writer.pruned_bytes, output_size
+
+
+def output_paths_for(mode, parts, output_dir, output_prefix):
+    """每个分割文件的输出路径：每页一个文件时使用页码命名，其余模式使用序号命名"""
+    paths = []
+    for i, page_numbers in enumerate(parts):
+        index = page_numbers[0] + 1 if mode == "every_page" else i + 1
+        paths.append(os.path.join(output_dir, f"{output_prefix}{index}.pdf"))
+    return paths
+
+
+def write_parts(cache, parts, output_paths, writers=DEFAULT_WRITERS, linearize=False):
+    """用多个线程同时写出分割文件，返回各文件的 (估算原始大小, 实际大小)"""
+    # 先在单线程中读取所有用到的对象，之后写出时只读缓存，不再访问PdfReader
+    cache.warm(chain.from_iterable(parts))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(writers, len(parts)))) as pool:
+        return list(pool.map(lambda job: write_part(cache, *job, linearize=linearize),
+                             zip(parts, output_paths)))
+
+
+def split_by_size(cache, total_pages, max_bytes, output_dir, output_prefix, writers=DEFAULT_WRITERS,
+                  linearize=False):
+    """按大小上限分割，写出后核对实际大小；估算偏小导致超限时按实际比例校正后重新分组
+
+    返回 (分组, 输出路径, 各文件大小, 各组估算大小)。
+    """
+    scale = 1.0
+    previous_paths = []
+    for _ in range(SIZE_ATTEMPTS):
+        parts, estimates = plan_by_size(cache, total_pages, max_bytes, scale)
+        output_paths = output_paths_for("max_bytes", parts, output_dir, output_prefix)
+
+        # 重新分组后不再使用的旧文件需要删除
+        for path in set(previous_paths) - set(output_paths):
+            if os.path.exists(path):
+                os.remove(path)
+        previous_paths = output_paths
+
+        sizes = write_parts(cache, parts, output_paths, writers, linearize)
+        ratios = [output_size / estimate
+                  for page_numbers, (_, output_size), estimate in zip(parts, sizes, estimates)
+                  if output_size > max_bytes and len(page_numbers) > 1]
+        if not ratios:
+            break
+        scale *= max(ratios) * 1.02
+
+    return parts, output_paths, sizes, estimates
+
+
+def split_pdf(input_path, output_dir, mode="every_page", page_range="",
+              pages_per_split=1, output_prefix="分割文档_", prune_resources=True,
+              writers=DEFAULT_WRITERS, max_bytes=None, linearize=False):
+    """分割PDF文件的核心功能，返回每个输出文件的结果
+
+    源文档只解析一次，所有对象序列化到共享缓存后，由多个线程同时写出各个分割文件。
+    结果的 original_size 为不裁剪资源时的估算大小，output_size 为实际写出的大小。
+    max_bytes 模式下单页已超过上限的文件在 info["over_limit"] 中标记。
+    linearize 为 True 时每个分割文件都线性化输出（快速网页查看）。
+    """
+    with open_reader(input_path) as pdf_reader:
+        total_pages = len(pdf_reader.pages)
+        cache = SerializationCache(pdf_reader, prune_resources)
+
+        if mode == "max_bytes":
+            max_bytes = parse_max_bytes(max_bytes)
+            parts, output_paths, sizes, estimates = split_by_size(cache, total_pages, max_bytes,
+                                                                  output_dir, output_prefix, writers,
+                                                                  linearize)
+        else:
+            parts = plan_parts(mode, total_pages, page_range, pages_per_split)
+            output_paths = output_paths_for(mode, parts, output_dir, output_prefix)
+            sizes = write_parts(cache, parts, output_paths, writers, linearize)
+            estimates = None
+
+    results = []
+    for i, (page_numbers, output_path, (original_size, output_size)) in enumerate(zip(parts, output_paths, sizes)):
+        info = {"pages": len(page_numbers), "linearized": linearize}
+        if estimates is not None:
+            info["estimated_size"] = estimates[i]
+            info["over_limit"] = output_size > max_bytes
+        results.append(FileResult(input_path, output_path=output_path,
+                                  original_size=original_size, output_size=output_size, info=info))
+    return results
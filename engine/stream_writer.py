@@ -0,0 +1,464 @@
+"""流式PDF写入器：逐页把对象直接写入输出文件，按内容哈希去除重复对象
+
+PdfWriter 会把所有来源的页面都保存在内存里直到 write()；这里每复制完一个对象就立即
+写出，内存中只保留对象偏移量和内容哈希。来源文档处理完即可释放，字体、图片等
+完全相同的对象（包括跨文件）只写出一次。
+
+来源对象先序列化为与编号无关的片段并缓存（SerializationCache），同一来源写出多个文件时
+（例如分割）共用这份缓存，每个输出只需按自己的编号拼接片段。
+
+开启资源裁剪时，页面的资源字典只保留内容流中实际用到的字体、图片等，
+避免拆出的单页文件带上整个文档共享的全部资源。
+"""
+import hashlib
+import re
+import threading
+from io import BytesIO
+
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            NullObject, StreamObject)
+
+# 页面对象复制时丢弃的键：/Parent 指向原文档的页面树，/B 指向原文档的文章线索
+SKIPPED_PAGE_KEYS = ("/Parent", "/B")
+# 需要从父节点继承的页面属性
+INHERITABLE_PAGE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+# 按名称引用、可以裁剪的资源类别
+RESOURCE_CATEGORIES = ("/Font", "/XObject", "/ExtGState", "/ColorSpace", "/Pattern", "/Shading", "/Properties")
+# 每个间接对象在 "n 0 obj"、"endobj" 和交叉引用表上的额外开销
+OBJECT_OVERHEAD = 40
+
+# 序列化片段中代表新页面树的占位符
+PAGES_ROOT = object()
+
+_NAME_PATTERN = re.compile(rb"/([^\s/\[\]<>(){}%]+)")
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+
+def _digest(parts):
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        digest.update(part)
+    return digest.digest()
+
+
+def _content_data(contents):
+    """读取内容流（单个流或流数组）解码后的数据"""
+    if contents is None:
+        return b""
+    contents = contents.get_object()
+    if isinstance(contents, ArrayObject):
+        return b"\n".join(item.get_object().get_data() for item in contents)
+    return contents.get_data()
+
+
+def content_names(contents):
+    """内容流中出现的所有名称
+
+    不逐条解析操作符，只收集名称记号；偶尔多保留一个资源，但不会漏掉用到的资源。
+    """
+    names = set()
+    for match in _NAME_PATTERN.finditer(_content_data(contents)):
+        raw = _NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), match.group(1))
+        names.add("/" + raw.decode("utf-8", "ignore"))
+        names.add("/" + raw.decode("latin-1"))
+    return names
+
+
+def _serialize_direct(obj):
+    """序列化不含间接引用的对象"""
+    buffer = BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _coalesce(fragments):
+    """合并相邻的字节片段"""
+    result = []
+    for fragment in fragments:
+        if isinstance(fragment, bytes) and result and isinstance(result[-1], bytes):
+            result[-1] += fragment
+        else:
+            result.append(fragment)
+    return tuple(result)
+
+
+def fragment_size(fragments):
+    """片段中字节数据的长度（引用按固定长度估算）"""
+    return sum(len(fragment) if isinstance(fragment, bytes) else 8 for fragment in fragments)
+
+
+class CachedPage:
+    """缓存的页面：序列化片段和被裁剪掉的资源引用"""
+
+    def __init__(self, idnum, fragments, dropped):
+        self.idnum = idnum
+        self.fragments = fragments
+        self.dropped = dropped
+
+
+class SerializationCache:
+    """来源文档对象的序列化缓存
+
+    对象被序列化为字节片段和间接引用组成的元组，引用在写出时才替换为输出中的编号，
+    因此同一份缓存可以被多个输出同时使用。读取PdfReader时持有锁；
+    warm() 预先序列化所需对象后，多个线程可以只读地并发使用缓存。
+    """
+
+    def __init__(self, reader, prune_resources=False):
+        self.reader = reader
+        self.prune_resources = prune_resources
+        self._objects = {}
+        self._pages = {}
+        self._lock = threading.RLock()
+        self._page_ids = None
+
+    @property
+    def page_ids(self):
+        """来源文档中所有页面对象的编号"""
+        if self._page_ids is None:
+            with self._lock:
+                self._page_ids = {page.indirect_reference.idnum for page in self.reader.pages
+                                  if page.indirect_reference is not None}
+        return self._page_ids
+
+    def page(self, index):
+        """获取页面的缓存"""
+        page = self._pages.get(index)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(index)
+                if page is None:
+                    page = self._build_page(index)
+                    self._pages[index] = page
+        return page
+
+    def object(self, ref):
+        """获取间接对象的序列化片段；页面、页面树和空对象返回None"""
+        try:
+            return self._objects[ref.idnum]
+        except KeyError:
+            pass
+        with self._lock:
+            if ref.idnum not in self._objects:
+                self._objects[ref.idnum] = self._build_object(ref)
+            return self._objects[ref.idnum]
+
+    def warm(self, page_indices):
+        """预先序列化页面及其引用的全部对象"""
+        stack = []
+        for index in page_indices:
+            page = self.page(index)
+            stack.extend(page.fragments)
+            stack.extend(page.dropped)
+        # 页面编号集合也提前算好，写出线程只读取缓存
+        _ = self.page_ids
+        seen = set()
+        while stack:
+            fragment = stack.pop()
+            if isinstance(fragment, IndirectObject) and fragment.idnum not in seen:
+                seen.add(fragment.idnum)
+                stack.extend(self.object(fragment) or ())
+
+    def page_closure(self, index):
+        """页面自身的估算大小，以及它引用的所有对象 {编号: 估算大小}（不含其他页面）"""
+        page = self.page(index)
+        objects = {}
+        stack = list(page.fragments)
+        while stack:
+            ref = stack.pop()
+            if not isinstance(ref, IndirectObject) or ref.idnum in objects or ref.idnum in self.page_ids:
+                continue
+            fragments = self.object(ref)
+            if fragments is None:
+                continue
+            objects[ref.idnum] = fragment_size(fragments) + OBJECT_OVERHEAD
+            stack.extend(fragments)
+        return fragment_size(page.fragments) + OBJECT_OVERHEAD, objects
+
+    def _build_object(self, ref):
+        target = ref.get_object()
+        if target is None or isinstance(target, NullObject):
+            return None
+        if isinstance(target, DictionaryObject) and target.get("/Type") in ("/Page", "/Pages"):
+            # 页面由写入器单独处理，原文档的页面树不复制
+            return None
+        fragments = []
+        if isinstance(target, StreamObject):
+            # 流数据保持原有编码，片段直接引用原数据，不复制
+            data = target._data
+            fragments.append(b"<<")
+            for key in target:
+                if key != "/Length":
+                    fragments.append(b" " + _serialize_direct(NameObject(key)) + b" ")
+                    self._fragments(target.raw_get(key), fragments)
+            fragments.append(b" /Length %d >>\nstream\n" % len(data))
+            fragments = list(_coalesce(fragments))
+            fragments.append(data)
+            fragments.append(b"\nendstream")
+            return tuple(fragments)
+        self._fragments(target, fragments)
+        return _coalesce(fragments)
+
+    def _build_page(self, index):
+        """序列化页面字典：指向新的页面树，并补上从父节点继承的属性"""
+        page = self.reader.pages[index]
+        entries = [(key, page.raw_get(key)) for key in page if key not in SKIPPED_PAGE_KEYS]
+        for key in INHERITABLE_PAGE_KEYS:
+            if key not in page:
+                value = self._inherited(page, key)
+                if value is not None:
+                    entries.append((NameObject(key), value))
+
+        dropped = []
+        fragments = [b"<< /Parent ", PAGES_ROOT]
+        for key, value in entries:
+            if key == "/Resources" and self.prune_resources:
+                value = self._prune_resources(page, value, dropped)
+            fragments.append(b"\n" + _serialize_direct(NameObject(key)) + b" ")
+            self._fragments(value, fragments)
+        fragments.append(b">>")
+
+        ref = page.indirect_reference
+        return CachedPage(ref.idnum if ref is not None else None, _coalesce(fragments), dropped)
+
+    @staticmethod
+    def _inherited(page, key):
+        node = page.get("/Parent")
+        while node is not None:
+            node = node.get_object()
+            if key in node:
+                return node.raw_get(key)
+            node = node.get("/Parent")
+        return None
+
+    @staticmethod
+    def _prune_resources(page, resources, dropped):
+        """只保留页面内容中用到的资源；内容无法解析时保留全部资源"""
+        resources = resources.get_object()
+        try:
+            names = content_names(page.raw_get("/Contents"))
+            xobjects = resources.get("/XObject")
+            if xobjects is not None:
+                # 没有自己资源字典的表单XObject使用页面的资源，需要把它用到的名称也算上
+                pending = list(names)
+                while pending:
+                    xobject = xobjects.get(pending.pop())
+                    if xobject is None:
+                        continue
+                    xobject = xobject.get_object()
+                    if xobject.get("/Subtype") == "/Form" and "/Resources" not in xobject:
+                        new_names = content_names(xobject) - names
+                        names |= new_names
+                        pending.extend(new_names)
+        except Exception:
+            return resources
+
+        pruned = DictionaryObject()
+        for key in resources:
+            value = resources.raw_get(key)
+            category = value.get_object() if key in RESOURCE_CATEGORIES else None
+            if not isinstance(category, DictionaryObject):
+                pruned[key] = value
+                continue
+            kept = DictionaryObject()
+            for name in category:
+                if name in names:
+                    kept[name] = category.raw_get(name)
+                else:
+                    dropped.append(category.raw_get(name))
+            if kept:
+                pruned[key] = kept
+        return pruned
+
+    def _fragments(self, obj, fragments):
+        """把对象序列化为片段，间接引用保留为引用"""
+        if isinstance(obj, IndirectObject):
+            fragments.append(obj)
+        elif isinstance(obj, DictionaryObject):
+            fragments.append(b"<<")
+            for key in obj:
+                fragments.append(b" " + _serialize_direct(NameObject(key)) + b" ")
+                self._fragments(obj.raw_get(key), fragments)
+            fragments.append(b" >>")
+        elif isinstance(obj, ArrayObject):
+            fragments.append(b"[")
+            for item in obj:
+                self._fragments(item, fragments)
+                fragments.append(b" ")
+            fragments.append(b"]")
+        elif obj is None:
+            fragments.append(b"null")
+        else:
+            fragments.append(_serialize_direct(obj))
+
+
+class StreamingPdfWriter:
+    """把对象按顺序写入输出文件，最后写出页面树、交叉引用表和trailer
+
+    dedupe 为 True 时内容完全相同的对象只写出一次；
+    prune_resources 为 True 时只保留页面实际用到的资源。
+    """
+
+    def __init__(self, output_file, dedupe=True, prune_resources=False):
+        self.output = output_file
+        self.dedupe = dedupe
+        self.prune_resources = prune_resources
+        self.offsets = {}
+        self.next_number = 1
+        self.page_numbers = []
+        # 内容哈希 -> 已写出的对象编号
+        self.written = {}
+        self.duplicate_objects = 0
+        self.duplicate_bytes = 0
+        # 裁剪掉的资源对象的估算字节数
+        self.pruned_bytes = 0
+
+        self.output.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self.pages_number = self.reserve()
+        self.root_number = self.reserve()
+
+    def reserve(self):
+        """预留一个对象编号"""
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def write_object(self, number, parts):
+        """写出一个间接对象，parts 为字节片段列表"""
+        self.offsets[number] = self.output.tell()
+        self.output.write(b"%d 0 obj\n" % number)
+        for part in parts:
+            self.output.write(part)
+        self.output.write(b"\nendobj\n")
+
+    def write_shared(self, parts):
+        """写出可共享的对象；内容完全相同的对象已写出时直接返回其编号"""
+        key = _digest(parts)
+        number = self.written.get(key)
+        if number is not None:
+            self.duplicate_objects += 1
+            self.duplicate_bytes += sum(len(part) for part in parts)
+            return number
+        number = self.reserve()
+        self.write_object(number, parts)
+        self.written[key] = number
+        return number
+
+    def copy_pages(self, source, page_indices):
+        """复制来源文档中的指定页面；source 可以是PdfReader或共享的SerializationCache"""
+        if not isinstance(source, SerializationCache):
+            source = SerializationCache(source, self.prune_resources)
+        _PageCopier(self, source, page_indices).copy()
+
+    def close(self):
+        """写出页面树、文档目录、交叉引用表和trailer"""
+        kids = b" ".join(b"%d 0 R" % number for number in self.page_numbers)
+        self.write_object(self.pages_number,
+                          [b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_numbers))])
+        self.write_object(self.root_number, [b"<< /Type /Catalog /Pages %d 0 R >>" % self.pages_number])
+
+        xref_offset = self.output.tell()
+        self.output.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_number)
+        for number in range(1, self.next_number):
+            self.output.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.output.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                          % (self.next_number, self.root_number, xref_offset))
+
+
+class _PageCopier:
+    """把来源文档中的页面及其引用的对象按新编号写出"""
+
+    def __init__(self, writer, cache, page_indices):
+        self.writer = writer
+        self.cache = cache
+        self.page_indices = list(page_indices)
+        # 原文档对象编号 -> 新编号；去重模式下正在复制的对象记为None
+        self.mapped = {}
+        # 复制过程中被自身子对象引用的对象需要预留编号，不能再参与去重
+        self.reserved = {}
+        self.page_refs = {}
+
+    def copy(self):
+        pages = [self.cache.page(index) for index in self.page_indices]
+        # 先为所有选中的页面预留编号，链接注释等对其他页面的引用可以直接指向新页面
+        numbers = []
+        for page in pages:
+            number = self.writer.reserve()
+            if page.idnum is not None:
+                self.page_refs[page.idnum] = number
+            numbers.append(number)
+        self.writer.page_numbers.extend(numbers)
+
+        dropped = []
+        for page, number in zip(pages, numbers):
+            self.writer.write_object(number, self._render(page.fragments))
+            dropped.extend(page.dropped)
+
+        if dropped:
+            self.writer.pruned_bytes += self._unwritten_bytes(dropped)
+
+    def _render(self, fragments):
+        """把片段中的引用替换为新编号"""
+        parts = []
+        for fragment in fragments:
+            if isinstance(fragment, bytes):
+                parts.append(fragment)
+            elif fragment is PAGES_ROOT:
+                parts.append(b"%d 0 R" % self.writer.pages_number)
+            else:
+                number = self._resolve(fragment)
+                parts.append(b"null" if number is None else b"%d 0 R" % number)
+        return parts
+
+    def _resolve(self, ref):
+        """复制间接对象，返回新编号；不应复制的对象（其他页面、页面树）返回None"""
+        idnum = ref.idnum
+        if idnum in self.page_refs:
+            return self.page_refs[idnum]
+
+        if idnum in self.mapped:
+            number = self.mapped[idnum]
+            if number is None:
+                # 引用了正在复制的祖先对象，为它预留编号
+                number = self.reserved.get(idnum) or self.writer.reserve()
+                self.reserved[idnum] = number
+            return number
+
+        fragments = self.cache.object(ref)
+        if fragments is None:
+            return None
+
+        if not self.writer.dedupe:
+            number = self.mapped[idnum] = self.writer.reserve()
+            self.writer.write_object(number, self._render(fragments))
+            return number
+
+        self.mapped[idnum] = None
+        parts = self._render(fragments)
+        number = self.reserved.pop(idnum, None)
+        if number is not None:
+            self.writer.write_object(number, parts)
+        else:
+            number = self.writer.write_shared(parts)
+        self.mapped[idnum] = number
+        return number
+
+    def _unwritten_bytes(self, refs):
+        """估算从这些引用出发可达、但没有被写出的对象的字节数"""
+        total = 0
+        seen = set()
+        stack = list(refs)
+        while stack:
+            ref = stack.pop()
+            if not isinstance(ref, IndirectObject):
+                continue
+            idnum = ref.idnum
+            if idnum in seen or idnum in self.mapped or idnum in self.cache.page_ids:
+                continue
+            seen.add(idnum)
+            fragments = self.cache.object(ref)
+            if fragments is None:
+                continue
+            total += fragment_size(fragments) + OBJECT_OVERHEAD
+            stack.extend(fragments)
+        return total
@@ -1,112 +1,69 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import os
 import sys
 from pathlib import Path
 
-# 导入合并工具模块
-try:
-    from tools.pdf_merge_tool import PDFMergeTool
-    from tools.pdf_split_tool import PDFSplitTool
-    from tools.pdf_compress_tool import PDFCompressTool
-    from tools.pdf_encrypt_decrypt_tool import PDFEncryptDecryptTool
-    from tools.pdf_to_word_tool import PDFToWordTool
-    from tools.pdf_image_converter_tool import PDFImageConverterTool
-    from tools.pdf_to_text_tool import PDFToTextTool
-    from tools.pdf_rotate_tool import PDFRotateTool
-    from tools.pdf_metadata_tool import PDFMetadataTool
-    from tools.pdf_watermark_tool import PDFWatermarkTool
-    from tools.pdf_header_footer_tool import PDFHeaderFooterTool
-    from tools.word_to_pdf_tool import WordToPDFTool
-    from tools.excel_to_pdf_tool import ExcelToPDFTool
-    from tools.ppt_to_pdf_tool import PPTToPDFTool
-    from tools.pdf_bookmark_tool import PDFBookmarkTool
-    from tools.pdf_annotation_tool import PDFAnnotationTool
-    from tools.pdf_form_tool import PDFFormTool
-    from tools.pdf_batch_tool import PDFBatchTool
-    from tools.pdf_compare_tool import PDFCompareTool
-    from tools.pdf_ocr_tool import PDFOCRTool
-    from tools.pdf_optimize_tool import PDFOptimizeTool
-    from tools.pdf_signature_tool import PDFSignatureTool
-except ImportError:
-    # 如果导入失败，创建一个占位符类
-    class PDFMergeTool:
-        def __init__(self, parent_frame, file_list=None):
-            self.parent = parent_frame
-            self.create_placeholder_interface("PDF合并工具", "将多个PDF文件合并为一个PDF文件")
-            self.create_placeholder_interface("PDF分割工具", "将多个PDF文件分割为多个PDF文件")
-            self.create_placeholder_interface("PDF压缩工具", "使用多种算法减小PDF文件大小，优化存储和传输")
-            self.create_placeholder_interface("PDF加密/解密工具", "为PDF文件添加密码保护或移除密码保护")
-            self.create_placeholder_interface("PDF转Word工具", "将PDF文件转换为可编辑的Word文档")
-            self.create_placeholder_interface("PDF与图片互转工具", "PDF转图片或将多张图片合并为PDF")
-            self.create_placeholder_interface("PDF转文本工具", "从PDF文件中提取文本内容")
-            self.create_placeholder_interface("PDF旋转工具", "旋转PDF页面方向")
-        
-        def create_placeholder_interface(self, title, description):
-            for widget in self.parent.winfo_children():
-                widget.destroy()
-            
-            title_label = ttk.Label(self.parent, text=title, font=('Arial', 16, 'bold'))
-            title_label.pack(pady=(10, 5))
-            
-            desc_label = ttk.Label(self.parent, text=description, font=('Arial', 12))
-            desc_label.pack(pady=(0, 20))
-            
-            content_frame = ttk.LabelFrame(self.parent, text="功能区域")
-            content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            
-            placeholder = ttk.Label(content_frame, text="此功能正在开发中...\n\n请等待后续更新", 
-                                   justify=tk.CENTER, font=('Arial', 12))
-            placeholder.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
-    
-    # 为其他未导入的工具创建占位符类
-    class PDFToTextTool(PDFMergeTool):
-        pass
-    
-    class PDFRotateTool(PDFMergeTool):
-        pass
-    
-    class PDFMetadataTool(PDFMergeTool):
-        pass
-    
-    class PDFWatermarkTool(PDFMergeTool):
-        pass
-    
-    class PDFHeaderFooterTool(PDFMergeTool):
-        pass
-    
-    class WordToPDFTool(PDFMergeTool):
-        pass
-    
-    class ExcelToPDFTool(PDFMergeTool):
-        pass
-    
-    class PPTToPDFTool(PDFMergeTool):
-        pass
-    
-    class PDFBookmarkTool(PDFMergeTool):
-        pass
-    
-    class PDFAnnotationTool(PDFMergeTool):
-        pass
-    
-    class PDFFormTool(PDFMergeTool):
-        pass
-    
-    class PDFBatchTool(PDFMergeTool):
-        pass
-    
-    class PDFCompareTool(PDFMergeTool):
-        pass
-    
-    class PDFOCRTool(PDFMergeTool):
-        pass
-    
-    class PDFOptimizeTool(PDFMergeTool):
-        pass
-    
-    class PDFSignatureTool(PDFMergeTool):
-        pass
+from engine import scheduler
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.registry import ToolRegistry
+
+
+class PlaceholderTool:
+    """工具模块无法导入时显示的占位界面"""
+    def __init__(self, parent_frame, title, description, error="", details="", on_retry=None):
+        self.parent = parent_frame
+        self.title = title
+        self.details = details
+        self.on_retry = on_retry
+        self.create_placeholder_interface(title, description, error)
+    
+    def create_placeholder_interface(self, title, description, error=""):
+        for widget in self.parent.winfo_children():
+            widget.destroy()
+        
+        title_label = ttk.Label(self.parent, text=title, font=('Arial', 16, 'bold'))
+        title_label.pack(pady=(10, 5))
+        
+        desc_label = ttk.Label(self.parent, text=description, font=('Arial', 12))
+        desc_label.pack(pady=(0, 20))
+        
+        content_frame = ttk.LabelFrame(self.parent, text="功能区域")
+        content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        text = "此功能正在开发中...\n\n请等待后续更新"
+        if error:
+            text = f"此功能暂时无法加载\n\n{error}"
+        placeholder = ttk.Label(content_frame, text=text, 
+                               justify=tk.CENTER, font=('Arial', 12), wraplength=500)
+        placeholder.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
+        
+        if not self.details and not self.on_retry:
+            return
+        buttons_frame = ttk.Frame(content_frame)
+        buttons_frame.pack(pady=(0, 20))
+        if self.details:
+            ttk.Button(buttons_frame, text="查看详细信息",
+                       command=self.show_details).pack(side=tk.LEFT, padx=5)
+        if self.on_retry:
+            ttk.Button(buttons_frame, text="重新加载",
+                       command=self.on_retry).pack(side=tk.LEFT, padx=5)
+    
+    def show_details(self):
+        """在新窗口中显示导入失败的完整错误信息"""
+        window = tk.Toplevel(self.parent)
+        window.title(f"{self.title} - 错误详情")
+        window.geometry("700x400")
+        
+        text_widget = tk.Text(window, wrap=tk.NONE, font=('Courier', 10))
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+        text_widget.insert(tk.END, self.details)
+        text_widget.config(state=tk.DISABLED)
+        
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text_widget.pack(fill=tk.BOTH, expand=True)
 
 class PDFToolbox:
     def __init__(self, root):
@@ -118,8 +75,11 @@ class PDFToolbox:
         # 确保主窗口占满整个屏幕空间
         self.root.pack_propagate(False)
         
-        # 存储选中的文件
-        self.current_files = []
+        # 存储选中的文件，各工具共用同一个集合
+        self.current_files = FileSet()
+        
+        # 工具模块在首次打开时才导入
+        self.tool_registry = ToolRegistry()
         
         # 设置样式
         self.setup_styles()
@@ -202,14 +162,8 @@ class PDFToolbox:
         list_frame = ttk.Frame(file_container)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=6)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 创建文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.current_files, height=6)
     
     def create_scrollable_function_menu(self, parent):
         """创建可滚动的功能菜单"""
@@ -319,6 +273,14 @@ class PDFToolbox:
         for text, command in functions_advanced:
             btn = ttk.Button(advanced_frame, text=text, command=command, style='Function.TButton')
             btn.pack(fill=tk.X, padx=5, pady=2)
+        
+        # 帮助
+        help_frame = ttk.LabelFrame(function_frame, text="帮助")
+        help_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        btn = ttk.Button(help_frame, text="工具加载情况", command=self.show_tool_status,
+                         style='Function.TButton')
+        btn.pack(fill=tk.X, padx=5, pady=2)
     
     def setup_function_frames(self):
         """初始化所有功能模块的框架"""
@@ -470,26 +432,21 @@ class PDFToolbox:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.current_files:
-                self.current_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """从文件列表中移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.current_files.pop(index)
+        removed = self.file_list_view.remove_selected()
         
-        messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
+        messagebox.showinfo("成功", f"已移除 {removed} 个文件")
     
     def clear_files(self):
         """清除文件列表"""
@@ -499,7 +456,8 @@ class PDFToolbox:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.current_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.clear_selection()
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清除所有文件")
     
     def function_not_implemented(self, function_name):
@@ -508,179 +466,128 @@ class PDFToolbox:
     
     def show_merge_tool(self):
         """显示PDF合并工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建合并工具实例
-        self.merge_tool = PDFMergeTool(self.right_frame, self.current_files)
+        self.merge_tool = self.open_tool("merge")
     
     def show_split_tool(self):
         """显示PDF分割工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-    
-        # 创建分割工具实例
-        self.split_tool = PDFSplitTool(self.right_frame, self.current_files)
+        self.split_tool = self.open_tool("split")
     
     def show_compress_tool(self):
         """显示PDF压缩工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-    
-        # 创建压缩工具实例
-        self.compress_tool = PDFCompressTool(self.right_frame, self.current_files)
+        self.compress_tool = self.open_tool("compress")
     
     def show_encrypt_tool(self):
         """显示PDF加密/解密工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-    
-        # 创建加密解密工具实例
-        self.encrypt_decrypt_tool = PDFEncryptDecryptTool(self.right_frame, self.current_files)
+        self.encrypt_decrypt_tool = self.open_tool("encrypt")
 
     def show_pdf_to_word_tool(self):
         """显示PDF转Word工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-    
-        # 创建PDF转Word工具实例
-        self.pdf_to_word_tool = PDFToWordTool(self.right_frame, self.current_files)
+        self.pdf_to_word_tool = self.open_tool("pdf_to_word")
     
     def show_pdf_to_image_tool(self):
         """显示PDF转图片工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-    
-        # 创建PDF与图片互转工具实例
-        self.pdf_image_converter = PDFImageConverterTool(self.right_frame, self.current_files)
+        self.pdf_image_converter = self.open_tool("pdf_to_image")
     
     def show_pdf_to_text_tool(self):
         """显示PDF转文本工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF转文本工具实例
-        self.pdf_to_text_tool = PDFToTextTool(self.right_frame, self.current_files)
+        self.pdf_to_text_tool = self.open_tool("pdf_to_text")
     
     def show_word_to_pdf_tool(self):
         """显示Word转PDF工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建Word转PDF工具实例
-        self.word_to_pdf_tool = WordToPDFTool(self.right_frame, self.current_files)
+        self.word_to_pdf_tool = self.open_tool("word_to_pdf")
     
     def show_excel_to_pdf_tool(self):
         """显示Excel转PDF工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建Excel转PDF工具实例
-        self.excel_to_pdf_tool = ExcelToPDFTool(self.right_frame, self.current_files)
+        self.excel_to_pdf_tool = self.open_tool("excel_to_pdf")
     
     def show_ppt_to_pdf_tool(self):
         """显示PPT转PDF工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PPT转PDF工具实例
-        self.ppt_to_pdf_tool = PPTToPDFTool(self.right_frame, self.current_files)
+        self.ppt_to_pdf_tool = self.open_tool("ppt_to_pdf")
     
     def show_watermark_tool(self):
         """显示PDF水印工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF水印工具实例
-        self.watermark_tool = PDFWatermarkTool(self.right_frame, self.current_files)
+        self.watermark_tool = self.open_tool("watermark")
     
     def show_rotate_tool(self):
         """显示PDF旋转工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF旋转工具实例
-        self.rotate_tool = PDFRotateTool(self.right_frame, self.current_files)
+        self.rotate_tool = self.open_tool("rotate")
     
     def show_header_footer_tool(self):
         """显示PDF页眉页脚工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF页眉页脚工具实例
-        self.header_footer_tool = PDFHeaderFooterTool(self.right_frame, self.current_files)
+        self.header_footer_tool = self.open_tool("header_footer")
     
     def show_bookmark_tool(self):
         """显示PDF书签工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF书签工具实例
-        self.bookmark_tool = PDFBookmarkTool(self.right_frame, self.current_files)
+        self.bookmark_tool = self.open_tool("bookmark")
     
     def show_annotation_tool(self):
         """显示PDF注释工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF注释工具实例
-        self.annotation_tool = PDFAnnotationTool(self.right_frame, self.current_files)
+        self.annotation_tool = self.open_tool("annotation")
     
     def show_form_tool(self):
         """显示PDF表单工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF表单工具实例
-        self.form_tool = PDFFormTool(self.right_frame, self.current_files)
+        self.form_tool = self.open_tool("form")
     
     def show_compare_tool(self):
         """显示PDF比较工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF比较工具实例
-        self.compare_tool = PDFCompareTool(self.right_frame, self.current_files)
+        self.compare_tool = self.open_tool("compare")
     
     def show_ocr_tool(self):
         """显示OCR识别工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建OCR识别工具实例
-        self.ocr_tool = PDFOCRTool(self.right_frame, self.current_files)
+        self.ocr_tool = self.open_tool("ocr")
     
     def show_batch_tool(self):
         """显示批量处理工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建批量处理工具实例
-        self.batch_tool = PDFBatchTool(self.right_frame, self.current_files)
+        self.batch_tool = self.open_tool("batch")
     
     def show_optimize_tool(self):
         """显示PDF优化工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF优化工具实例
-        self.optimize_tool = PDFOptimizeTool(self.right_frame, self.current_files)
+        self.optimize_tool = self.open_tool("optimize")
     
     def show_signature_tool(self):
         """显示PDF签名工具"""
-        # 清除右侧区域
-        self.clear_right_frame()
-        
-        # 创建PDF签名工具实例
-        self.signature_tool = PDFSignatureTool(self.right_frame, self.current_files)
+        self.signature_tool = self.open_tool("signature")
     
     def show_metadata_tool(self):
         """显示元数据编辑工具"""
+        self.metadata_tool = self.open_tool("metadata")
+    
+    def open_tool(self, key):
+        """在右侧区域打开工具，首次打开时才导入对应模块"""
         # 清除右侧区域
         self.clear_right_frame()
         
-        # 创建元数据编辑工具实例
-        self.metadata_tool = PDFMetadataTool(self.right_frame, self.current_files)
+        tool_class = self.tool_registry.load(key)
+        if tool_class is None:
+            return PlaceholderTool(self.right_frame, self.tool_registry.title(key),
+                                   self.tool_registry.description(key),
+                                   self.tool_registry.get_error(key),
+                                   self.tool_registry.error_details.get(key, ""),
+                                   lambda: self.retry_tool(key))
+        
+        return tool_class(self.right_frame, self.current_files)
+    
+    def retry_tool(self, key):
+        """清除导入失败记录后重新打开工具（例如安装缺少的库之后）"""
+        self.tool_registry.retry(key)
+        self.open_tool(key)
+    
+    def show_tool_status(self):
+        """导入全部工具，显示各工具的导入耗时和导入失败的工具"""
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            errors = self.tool_registry.preload()
+        finally:
+            self.root.config(cursor="")
+        
+        message = f"导入耗时:\n{self.tool_registry.timing_report()}"
+        if errors:
+            failed = "\n".join(f"{self.tool_registry.title(key)}: {error}" for key, error in errors.items())
+            message += f"\n\n以下工具无法加载（打开工具可查看详细信息）:\n{failed}"
+            messagebox.showwarning("工具加载情况", message)
+        else:
+            messagebox.showinfo("工具加载情况", message)
     
     def clear_right_frame(self):
         """清除右侧区域的所有内容"""
@@ -731,9 +638,12 @@ class PDFToolbox:
             self.function_frames[frame_key].pack(fill=tk.BOTH, expand=True)
 
 def main():
+    # 打包为可执行文件时，进程池的子进程需要这一步
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = PDFToolbox(root)
     root.mainloop()
+    scheduler.shutdown(wait=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
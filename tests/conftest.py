@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_pdf(path, pages=5, text="Page", size=(612, 792), **save_options):
+    """生成每页带一行文字的测试PDF，返回路径"""
+    pikepdf = pytest.importorskip("pikepdf")
+
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                                                BaseFont=pikepdf.Name.Helvetica))
+    for number in range(pages):
+        page = pdf.add_blank_page(page_size=size)
+        page.obj.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        content = f"BT /F1 24 Tf 72 700 Td ({text} {number + 1}) Tj ET".encode()
+        page.obj.Contents = pdf.make_stream(content)
+    pdf.save(path, **save_options)
+    return str(path)
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    return make_pdf(tmp_path / "sample.pdf")
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """持久化数据（指纹记录等）写到临时目录"""
+    monkeypatch.setenv("PDF_TOOLBOX_HOME", str(tmp_path / "home"))
+
+
+def make_image_pdf(path, pages=3, size=(800, 600), seed=0):
+    """生成每页一张带细节的RGB照片式图片的测试PDF，返回路径"""
+    np = pytest.importorskip("numpy")
+    pikepdf = pytest.importorskip("pikepdf")
+
+    rng = np.random.default_rng(seed)
+    pdf = pikepdf.new()
+    for number in range(pages):
+        y, x = np.mgrid[0:size[1], 0:size[0]]
+        base = np.stack([(x * 255 // size[0]), (y * 255 // size[1]), ((x + y + number * 40) % 256)], axis=2)
+        noise = rng.integers(0, 64, size=(size[1], size[0], 3))
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        image = pikepdf.Stream(pdf, pixels.tobytes())
+        image.Type = pikepdf.Name.XObject
+        image.Subtype = pikepdf.Name.Image
+        image.Width, image.Height = size
+        image.ColorSpace = pikepdf.Name.DeviceRGB
+        image.BitsPerComponent = 8
+        page = pdf.add_blank_page(page_size=(size[0] * 72 / 150, size[1] * 72 / 150))
+        page.obj.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=pdf.make_indirect(image)))
+        page.obj.Contents = pdf.make_stream(
+            f"q {size[0] * 72 / 150} 0 0 {size[1] * 72 / 150} 0 0 cm /Im0 Do Q".encode())
+    pdf.save(path, compress_streams=True)
+    return str(path)
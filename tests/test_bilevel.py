@@ -0,0 +1,83 @@
+import zlib
+
+import pytest
+
+from engine import bilevel
+
+pikepdf = pytest.importorskip("pikepdf")
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def g4_support():
+    missing = bilevel.check_dependency()
+    if missing:
+        pytest.skip(missing)
+
+
+def scanned_page(width=400, height=300, seed=0):
+    """白底黑字的灰度“扫描”：只有接近0和255的亮度，带少量噪声"""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width), 255, dtype=np.int16)
+    for top in range(20, height - 20, 30):
+        for left in range(20, width - 40, 50):
+            page[top:top + 12, left:left + 30] = 0
+    page += rng.integers(-12, 13, size=page.shape)
+    return page.clip(0, 255).astype(np.uint8)
+
+
+def add_image(pdf, pixels):
+    height, width = pixels.shape[:2]
+    color_space = pikepdf.Name.DeviceGray if pixels.ndim == 2 else pikepdf.Name.DeviceRGB
+    image = pikepdf.Stream(pdf, zlib.compress(pixels.tobytes()))
+    image.Type = pikepdf.Name.XObject
+    image.Subtype = pikepdf.Name.Image
+    image.Width, image.Height = width, height
+    image.BitsPerComponent = 8
+    image.ColorSpace = color_space
+    image.Filter = pikepdf.Name.FlateDecode
+    return image
+
+
+def decoded_white(image):
+    return np.array(pikepdf.PdfImage(image).as_pil_image().convert("L")) > 0
+
+
+@pytest.mark.parametrize("rgb", [False, True])
+def test_near_bilevel_image_becomes_g4(rgb):
+    gray = scanned_page()
+    pixels = np.repeat(gray[:, :, None], 3, axis=2) if rgb else gray
+    threshold = bilevel.bilevel_threshold(pixels)
+    assert threshold is not None
+    with pikepdf.new() as pdf:
+        image = add_image(pdf, pixels)
+        original_length = len(image.read_raw_bytes())
+        stats = bilevel.convert_images(pdf)
+        assert stats["converted"] == 1
+        assert stats["bytes_saved"] == original_length - len(image.read_raw_bytes())
+        assert image.Filter == pikepdf.Name.CCITTFaxDecode
+        assert int(image.BitsPerComponent) == 1
+        assert image.ColorSpace == pikepdf.Name.DeviceGray
+        assert (decoded_white(image) == (bilevel.luminance(pixels) > threshold)).all()
+
+
+def test_continuous_tone_image_unchanged():
+    y, x = np.mgrid[0:300, 0:400]
+    pixels = ((x + y) * 255 // 700).astype(np.uint8)
+    assert bilevel.bilevel_threshold(pixels) is None
+    with pikepdf.new() as pdf:
+        image = add_image(pdf, pixels)
+        raw = image.read_raw_bytes()
+        stats = bilevel.convert_images(pdf)
+        assert stats == {"images": 1, "converted": 0, "bytes_saved": 0}
+        assert image.read_raw_bytes() == raw
+        assert image.Filter == pikepdf.Name.FlateDecode
+        assert int(image.BitsPerComponent) == 8
+
+
+def test_skipped_images_unchanged():
+    with pikepdf.new() as pdf:
+        image = add_image(pdf, scanned_page())
+        stats = bilevel.convert_images(pdf, skip={image.objgen})
+        assert stats["images"] == 0
+        assert image.Filter == pikepdf.Name.FlateDecode
@@ -0,0 +1,134 @@
+import os
+
+import PyPDF2
+import pytest
+
+from engine import doc_cache, info, metadata, probe
+
+
+def write_pdf(path, pages=3, title=None):
+    """用PyPDF2生成空白页PDF，返回路径"""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    if title:
+        writer.add_metadata({"/Title": title})
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """每个测试使用独立的全局缓存"""
+    fresh = doc_cache.DocumentCache()
+    monkeypatch.setattr(doc_cache, "_cache", fresh)
+    return fresh
+
+
+def counting(func, calls):
+    def wrapper(file_path):
+        calls.append(file_path)
+        return func(file_path)
+    return wrapper
+
+
+def test_reader_is_reused_until_file_changes(tmp_path, cache):
+    path = write_pdf(tmp_path / "doc.pdf", pages=3)
+    with cache.reader(path) as first:
+        assert len(first.pages) == 3
+    with cache.reader(path) as second:
+        assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # 大小变化
+    write_pdf(path, pages=5)
+    with cache.reader(path) as reader:
+        assert reader is not first and len(reader.pages) == 5
+    assert cache.stats()["documents"] == 1
+
+
+def test_mtime_change_invalidates_same_size_file(tmp_path, cache):
+    path = write_pdf(tmp_path / "doc.pdf")
+    calls = []
+    compute = counting(lambda file_path: os.path.getsize(file_path), calls)
+    cache.fact(path, "size", compute)
+    cache.fact(path, "size", compute)
+    assert len(calls) == 1
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    cache.fact(path, "size", compute)
+    assert len(calls) == 2
+    # 旧版本的条目已被移除
+    assert cache.stats()["facts"] == 1
+
+
+def test_readers_are_evicted_lru_by_bytes(tmp_path):
+    paths = [write_pdf(tmp_path / f"doc{index}.pdf") for index in range(4)]
+    cost = os.path.getsize(paths[0]) * doc_cache.READER_OVERHEAD
+    cache = doc_cache.DocumentCache(max_bytes=int(cost * 2.5))
+
+    for path in paths[:3]:
+        with cache.reader(path):
+            pass
+    # 最早的文档已被淘汰
+    assert cache.stats()["documents"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    # 访问 doc1 后它变为最近使用，再加入 doc3 时淘汰的是 doc2
+    with cache.reader(paths[1]):
+        pass
+    with cache.reader(paths[3]):
+        pass
+    misses = cache.misses
+    with cache.reader(paths[1]):
+        pass
+    assert cache.misses == misses
+    with cache.reader(paths[2]):
+        pass
+    assert cache.misses == misses + 1
+
+
+def test_oversized_document_is_not_cached(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf")
+    cache = doc_cache.DocumentCache(max_bytes=10)
+    with cache.reader(path) as reader:
+        assert len(reader.pages) == 3
+    assert cache.stats()["documents"] == 0
+
+
+def test_facts_survive_reader_eviction_and_are_bounded(tmp_path):
+    paths = [write_pdf(tmp_path / f"doc{index}.pdf", pages=index + 1) for index in range(3)]
+    cache = doc_cache.DocumentCache(max_facts=2)
+
+    def pages(file_path):
+        with cache.reader(file_path) as reader:
+            return len(reader.pages)
+
+    assert [cache.fact(path, "pages", pages) for path in paths] == [1, 2, 3]
+    assert cache.stats()["facts"] == 2
+    cache.clear_readers()
+    misses = cache.misses
+    assert cache.fact(paths[2], "pages", pages) == 3
+    assert cache.misses == misses
+
+
+def test_facts_are_shared_across_tools(tmp_path, cache, monkeypatch):
+    path = write_pdf(tmp_path / "doc.pdf", pages=4, title="标题")
+    probes = []
+    monkeypatch.setattr(probe, "probe_file", counting(probe.probe_file, probes))
+
+    # 文件列表、页数和加密状态都来自同一次探测
+    assert info.get_page_count(path) == 4
+    assert info.describe_pdf(path).startswith("PDF ")
+    assert info.check_encryption(path) == "未加密"
+    assert len(probes) == 1
+
+    # 元数据读取两次，只解析一次文档
+    assert metadata.read_metadata(path) == metadata.read_metadata(path)
+    assert cache.misses == 1
+
+    doc_cache.invalidate(path)
+    info.get_page_count(path)
+    assert len(probes) == 2
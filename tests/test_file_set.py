@@ -0,0 +1,37 @@
+from engine.file_set import FileSet
+
+
+def test_extend_skips_duplicates_and_keeps_order():
+    files = FileSet(["/a.pdf", "/b.pdf"])
+    assert files.extend(["/b.pdf", "/c.pdf", "/a.pdf", "/c.pdf"]) == 1
+    assert list(files) == ["/a.pdf", "/b.pdf", "/c.pdf"]
+    assert "/c.pdf" in files and files.index("/c.pdf") == 2
+    assert files.name(1) == "b.pdf"
+
+
+def test_remove_indices_reindexes():
+    files = FileSet(f"/{i}.pdf" for i in range(6))
+    assert files.remove_indices([0, 3, 3, 99]) == 2
+    assert list(files) == ["/1.pdf", "/2.pdf", "/4.pdf", "/5.pdf"]
+    assert [files.index(path) for path in files] == [0, 1, 2, 3]
+    assert "/3.pdf" not in files
+    assert files.add("/3.pdf") and files.index("/3.pdf") == 4
+
+
+def test_move_blocks_up_and_down():
+    files = FileSet(["a", "b", "c", "d", "e"])
+    assert files.move([1, 2], -1) == [0, 1]
+    assert list(files) == ["b", "c", "a", "d", "e"]
+    # 已在最前时不移动
+    assert files.move([0, 3], -1) == [0, 3]
+    assert files.move([2, 3], 1) == [3, 4]
+    assert list(files) == ["b", "c", "e", "a", "d"]
+    assert [files.index(path) for path in files] == [0, 1, 2, 3, 4]
+
+
+def test_large_list():
+    files = FileSet()
+    paths = [f"/data/{i:06d}.pdf" for i in range(60000)]
+    assert files.extend(paths + paths) == 60000
+    assert files.remove_indices(range(0, 60000, 2)) == 30000
+    assert files[0] == "/data/000001.pdf" and files.index("/data/059999.pdf") == 29999
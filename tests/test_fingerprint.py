@@ -0,0 +1,127 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import make_pdf
+from engine import compress, fingerprint, scheduler
+from engine.common import FileResult
+
+
+def shrink(input_path, output_path):
+    """去掉文件末尾的一半内容，模拟压缩"""
+    with open(input_path, "rb") as f:
+        data = f.read()
+    with open(output_path, "wb") as f:
+        f.write(data[:len(data) // 2])
+    return FileResult(input_path, output_path=output_path, original_size=len(data),
+                      output_size=len(data) // 2)
+
+
+def copy(input_path, output_path):
+    """原样复制，模拟无法变小的文件"""
+    shutil.copy(input_path, output_path)
+    size = os.path.getsize(input_path)
+    return FileResult(input_path, output_path=output_path, original_size=size, output_size=size)
+
+
+@pytest.fixture
+def job_scheduler():
+    pool = scheduler.JobScheduler(2, use_processes=False)
+    yield pool
+    pool.shutdown()
+
+
+def run(func, files, job_scheduler, settings=None, outputs=None):
+    outputs = outputs or [path + ".out" for path in files]
+    jobs = [(path, output, (path, output)) for path, output in zip(files, outputs)]
+    return fingerprint.run_skipping(func, jobs, "test", settings or {"level": 1}, job_scheduler=job_scheduler)
+
+
+@pytest.fixture
+def files(tmp_path):
+    return [make_pdf(tmp_path / f"doc{index}.pdf", pages=index + 1) for index in range(3)]
+
+
+def test_second_run_skips_up_to_date_outputs(files, job_scheduler):
+    first = run(shrink, files, job_scheduler)
+    assert all(result.success and "skipped" not in result.info for result in first)
+
+    second = run(shrink, files, job_scheduler)
+    assert [result.info.get("skipped") for result in second] == ["up_to_date"] * 3
+    assert [result.output_size for result in second] == [result.output_size for result in first]
+
+
+def test_changed_input_settings_or_output_are_reprocessed(files, job_scheduler):
+    run(shrink, files, job_scheduler)
+
+    make_pdf(files[0], pages=9)
+    os.remove(files[1] + ".out")
+    with open(files[2] + ".out", "ab") as f:
+        f.write(b"edited")
+    reasons = [result.info.get("skipped") for result in run(shrink, files, job_scheduler)]
+    assert reasons == [None, None, None]
+
+    reasons = [result.info.get("skipped") for result in run(shrink, files, job_scheduler, {"level": 2})]
+    assert reasons == [None, None, None]
+    reasons = [result.info.get("skipped") for result in run(shrink, files, job_scheduler, {"level": 2})]
+    assert reasons == ["up_to_date"] * 3
+
+
+def test_files_that_did_not_shrink_are_skipped(files, job_scheduler):
+    run(copy, files, job_scheduler)
+
+    results = run(copy, files, job_scheduler)
+
+    assert [result.info.get("skipped") for result in results] == ["no_gain"] * 3
+    assert all(result.output_path == "" for result in results)
+
+
+def test_previous_output_is_recognized_as_input(files, job_scheduler):
+    results = run(shrink, files[:1], job_scheduler)
+
+    output = results[0].output_path
+    again = run(shrink, [output], job_scheduler)
+
+    assert again[0].info.get("skipped") == "is_output"
+
+
+def test_file_hash_cache_follows_modification(tmp_path):
+    path = make_pdf(tmp_path / "doc.pdf")
+    store = fingerprint.FingerprintStore().load()
+    digest = store.file_hash(path)
+    assert store.file_hash(path) == digest == fingerprint.hash_file(path)
+
+    make_pdf(path, pages=2)
+    assert store.file_hash(path) == fingerprint.hash_file(path) != digest
+
+
+def test_save_merges_with_other_stores(tmp_path):
+    first = fingerprint.FingerprintStore().load()
+    second = fingerprint.FingerprintStore().load()
+    first.record("settings", "a", "out-a", 0.5)
+    second.record("settings", "b", "out-b", 0.5)
+    first.save()
+    second.save()
+
+    store = fingerprint.FingerprintStore().load()
+    assert store.skip_reason("settings", "out-a", "") == "is_output"
+    assert set(store.entries) == {"settings:a", "settings:b"}
+
+
+def test_compress_pdfs_skips_known_files(tmp_path):
+    # 未压缩的内容流，压缩后一定变小
+    files = [make_pdf(tmp_path / f"plain{index}.pdf", pages=5, text="Lorem ipsum " * 50, compress_streams=False)
+             for index in range(3)]
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    first = compress.compress_pdfs(files, str(output_dir), skip_known=True)
+    assert all(result.success and "skipped" not in result.info for result in first)
+    mtimes = [os.stat(result.output_path).st_mtime_ns for result in first]
+
+    second = compress.compress_pdfs(files, str(output_dir), skip_known=True)
+
+    assert [result.info.get("skipped") for result in second] == ["up_to_date"] * 3
+    assert [os.stat(result.output_path).st_mtime_ns for result in second] == mtimes
+    third = compress.compress_pdfs(files, str(output_dir), level="high", skip_known=True)
+    assert all("skipped" not in result.info for result in third)
@@ -0,0 +1,90 @@
+import random
+import zlib
+
+import pytest
+
+from engine import flate
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+def add_stream(pdf, data, **keys):
+    stream = pikepdf.Stream(pdf, data)
+    for key, value in keys.items():
+        stream[f"/{key}"] = value
+    return stream
+
+
+def gradient(width, height, components):
+    return bytes((x * 3 + y) % 256 for y in range(height) for x in range(width) for _ in range(components))
+
+
+def test_uncompressed_stream_is_replaced_with_same_data():
+    data = b"0 0 m 100 100 l S\n" * 200
+    with pikepdf.new() as pdf:
+        stream = add_stream(pdf, data)
+        stats = flate.recompress_streams(pdf)
+        assert stats["recompressed"] == 1
+        assert stats["bytes_saved"] == len(data) - len(stream.read_raw_bytes())
+        assert stream.Filter == pikepdf.Name.FlateDecode
+        assert stream.read_bytes() == data
+
+
+def test_stream_not_replaced_unless_smaller():
+    rng = random.Random(0)
+    noise = bytes(rng.getrandbits(8) for _ in range(4096))
+    text = b"".join(b"BT %d %d Td (Line %d) Tj ET\n" % (i, i * 7 % 500, i) for i in range(300))
+    best = zlib.compress(text, flate.DEFAULT_LEVEL)
+    with pikepdf.new() as pdf:
+        # 随机数据压缩后只会变大，已是最高级别的Flate流重新压缩后不会更小
+        raw = add_stream(pdf, noise)
+        compressed = pikepdf.Stream(pdf, best)
+        compressed.Filter = pikepdf.Name.FlateDecode
+        stats = flate.recompress_streams(pdf)
+        assert stats["streams"] == 2
+        assert stats["recompressed"] == 0
+        assert "/Filter" not in raw
+        assert raw.read_raw_bytes() == noise
+        assert compressed.read_raw_bytes() == best
+
+
+def test_predictor_trials_decode_to_same_pixels():
+    pytest.importorskip("numpy")
+    width, height = 120, 80
+    for color_space, components in (("/DeviceGray", 1), ("/DeviceRGB", 3)):
+        pixels = gradient(width, height, components)
+        with pikepdf.new() as pdf:
+            image = add_stream(pdf, pixels, Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image,
+                               Width=width, Height=height, BitsPerComponent=8,
+                               ColorSpace=pikepdf.Name(color_space))
+            stats = flate.recompress_streams(pdf, try_predictors=True)
+            assert stats["recompressed"] == 1
+            parms = image.DecodeParms
+            assert (int(parms.Predictor), int(parms.Colors), int(parms.Columns)) == (15, components, width)
+            assert len(image.read_raw_bytes()) < len(zlib.compress(pixels, flate.DEFAULT_LEVEL))
+            assert image.read_bytes() == pixels
+
+
+def test_png_predict_round_trips_through_zlib_decoder():
+    pytest.importorskip("numpy")
+    width, components = 50, 3
+    pixels = gradient(width, 10, components)
+    for row_filter in (1, 2):
+        compressed = zlib.compress(flate._png_predict(pixels, width, components, row_filter))
+        with pikepdf.new() as pdf:
+            stream = pikepdf.Stream(pdf, compressed)
+            stream.Filter = pikepdf.Name.FlateDecode
+            stream.DecodeParms = pikepdf.Dictionary(Predictor=15, Colors=components,
+                                                    BitsPerComponent=8, Columns=width)
+            assert stream.read_bytes() == pixels
+
+
+def test_recompress_file_leaves_file_untouched_without_gain(tmp_path):
+    path = tmp_path / "flate.pdf"
+    with pikepdf.new() as pdf:
+        pdf.add_blank_page()
+        pdf.save(path)
+    before = path.read_bytes()
+    stats = flate.recompress_file(path)
+    assert stats["recompressed"] == 0
+    assert path.read_bytes() == before
@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from engine import compress, ghostscript
+
+FAKE_GS = """#!{python}
+import shutil, sys
+if sys.argv[1:] == ["--version"]:
+    print("10.0 (fake)")
+    sys.exit(0)
+output = [arg for arg in sys.argv if arg.startswith("-sOutputFile=")][0].split("=", 1)[1]
+print("Processing", sys.argv[-1], flush=True)
+shutil.copy(sys.argv[-1], output)
+"""
+
+
+def python_command(code):
+    return [sys.executable, "-c", code]
+
+
+def test_memory_limit_applies_before_start():
+    resource = pytest.importorskip("resource")
+    lines = []
+    executor = ghostscript.GhostscriptExecutor(max_workers=1, memory_limit=1024, log=lines.append)
+    executor.run(python_command("import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])"))
+    assert lines == [str(1024 * 1024 * 1024)]
+    assert resource.getrlimit(resource.RLIMIT_AS)[0] != 1024 * 1024 * 1024
+
+
+@pytest.mark.skipif(os.name != "posix", reason="内存上限只在POSIX系统上设置")
+def test_limited_command_keeps_arguments():
+    lines = []
+    executor = ghostscript.GhostscriptExecutor(max_workers=1, memory_limit=1024, log=lines.append)
+    arguments = ["a b", "$HOME", "'quoted'", '"double"', "-sOutputFile=x y.pdf"]
+    executor.run(python_command("import sys; print(repr(sys.argv[1:]))") + arguments)
+    assert lines == [repr(arguments)]
+
+
+def test_no_memory_limit_runs_command_directly():
+    command = ["gs", "-v"]
+    assert ghostscript._limited_command(command, 0) == command
+
+
+def test_timeout_kills_process():
+    executor = ghostscript.GhostscriptExecutor(max_workers=1, timeout=0.5)
+    with pytest.raises(ghostscript.GhostscriptTimeout):
+        executor.run(python_command("import time; time.sleep(30)"))
+
+
+def test_failure_reports_output_tail():
+    executor = ghostscript.GhostscriptExecutor(max_workers=1)
+    with pytest.raises(Exception, match="bad input"):
+        executor.run(python_command("print('bad input'); raise SystemExit(1)"))
+
+
+def test_workers_limit_concurrent_processes():
+    executor = ghostscript.GhostscriptExecutor(max_workers=2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+    original = executor._forward
+
+    def counting_forward(stream, label, tail):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        original(stream, label, tail)
+        with lock:
+            running.pop()
+
+    executor._forward = counting_forward
+    threads = [threading.Thread(target=executor.run, args=(python_command("import time; time.sleep(0.3)"),))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
+
+
+@pytest.fixture
+def fake_gs(tmp_path, monkeypatch):
+    path = tmp_path / "gs"
+    path.write_text(FAKE_GS.format(python=sys.executable))
+    path.chmod(0o755)
+    monkeypatch.setenv(ghostscript.EXECUTABLE_ENV, str(path))
+    monkeypatch.setattr(ghostscript, "_detected", None)
+    monkeypatch.setattr(compress, "_available_backends", None)
+    return str(path)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="fake gs is a shebang script")
+def test_auto_mode_runs_ghostscript_through_shared_executor(tmp_path, fake_gs, sample_pdf):
+    lines = []
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    results = compress.compress_pdfs([sample_pdf], str(output_dir), algorithm="auto", gs_workers=1,
+                                     log=lines.append)
+    assert results[0].success, results[0].error
+    assert isinstance(results[0].info["candidates"]["ghostscript"], int)
+    # gs 在主进程中通过执行器运行，输出转发到了 log
+    assert any(line.startswith("sample.pdf: Processing") for line in lines)
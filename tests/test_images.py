@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from conftest import make_image_pdf
+from engine import compress, images
+
+pikepdf = pytest.importorskip("pikepdf")
+pytest.importorskip("numpy")
+
+
+def image_objects(pdf):
+    return [pdf.get_object(objgen) for objgen in images.image_placements(pdf)]
+
+
+def test_uncached_images_decode_from_original_after_apply(tmp_path):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=2)
+    with pikepdf.open(path) as pdf:
+        # 不缓存任何像素，每次尝试都要重新解码
+        decoded = images.DecodedImages(pdf, max_bytes=0)
+        assert len(decoded.entries) == 2
+        decoded.apply(decoded.encode(72, 30))
+        encoded = decoded.encode(150, 60)
+        assert len(encoded) == 2
+        for width, height, _ in encoded.values():
+            assert (width, height) == (800, 600)
+
+
+def test_failed_images_are_skipped(tmp_path, monkeypatch):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=2)
+    original_encode = images.encode
+    calls = []
+
+    def flaky_encode(pixels, quality, image_format):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("broken image")
+        return original_encode(pixels, quality, image_format)
+
+    monkeypatch.setattr(images, "encode", flaky_encode)
+    with pikepdf.open(path) as pdf:
+        decoded = images.DecodedImages(pdf, max_bytes=0)
+        encoded = decoded.encode(72, 30)
+        assert len(encoded) == 1
+        assert decoded.estimate(encoded) < decoded.original_bytes
+        assert decoded.apply(encoded)["recompressed"] == 1
+
+
+def test_apply_restores_images_not_recompressed(tmp_path):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=1)
+    with pikepdf.open(path) as pdf:
+        image = image_objects(pdf)[0]
+        original = (image.read_raw_bytes(), int(image.Width), str(image.Filter))
+        decoded = images.DecodedImages(pdf)
+        decoded.apply(decoded.encode(72, 30))
+        assert image.read_raw_bytes() != original[0]
+        decoded.apply({})
+        assert (image.read_raw_bytes(), int(image.Width), str(image.Filter)) == original
+
+
+def test_compress_to_target_without_pixel_cache(tmp_path, monkeypatch):
+    class Uncached(images.DecodedImages):
+        def __init__(self, pdf):
+            super().__init__(pdf, max_bytes=0)
+
+    monkeypatch.setattr(images, "DecodedImages", Uncached)
+    path = make_image_pdf(tmp_path / "img.pdf", pages=3)
+    output_path = str(tmp_path / "out.pdf")
+    size, info = compress.compress_to_target(path, output_path, 400 * 1024)
+    assert info["target_met"], info
+    assert size <= 400 * 1024
+    with pikepdf.open(output_path) as pdf:
+        assert len(pdf.pages) == 3
+
+
+def test_compress_to_target_overwrites_input(tmp_path):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=3)
+
+    result = compress.compress_file(path, path, target_size=400 * 1024)
+
+    assert result.success and result.info["target_met"], result.info
+    assert result.output_size == os.path.getsize(path) <= 400 * 1024
+    with pikepdf.open(path) as pdf:
+        assert len(pdf.pages) == 3
+    # 临时文件都已删除
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".target_")]
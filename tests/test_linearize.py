@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from conftest import make_pdf
+from engine import compress, linearize, merge, optimize, split
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+def assert_linearized(path):
+    valid, message = linearize.validate(path)
+    assert valid, message
+
+
+def leftover_temp_files(directory):
+    return [name for name in os.listdir(directory) if name.startswith(".linearize_")]
+
+
+@pytest.mark.parametrize("level", sorted(optimize.LEVEL_PASSES))
+def test_optimize_levels(tmp_path, sample_pdf, level):
+    result = optimize.optimize_pdf(sample_pdf, str(tmp_path), level, linearize=True)
+    assert result.success, result.error
+    assert_linearized(result.output_path)
+    assert not leftover_temp_files(tmp_path)
+
+
+def test_compress(tmp_path, sample_pdf):
+    output_path = str(tmp_path / "compressed.pdf")
+    result = compress.compress_file(sample_pdf, output_path, algorithm="pikepdf", linearize=True)
+    assert result.info["linearized"]
+    assert_linearized(output_path)
+
+
+def test_merge(tmp_path):
+    inputs = [make_pdf(tmp_path / f"in{i}.pdf", pages=3, text=f"File {i}") for i in range(3)]
+    for streaming in (False, True):
+        output_path = str(tmp_path / f"merged_{streaming}.pdf")
+        merge.merge_pdfs(inputs, output_path, streaming=streaming, linearize=True)
+        assert_linearized(output_path)
+        with pikepdf.open(output_path) as pdf:
+            assert len(pdf.pages) == 9
+
+
+def test_split(tmp_path, sample_pdf):
+    results = split.split_pdf(sample_pdf, str(tmp_path), mode="fixed_pages", pages_per_split=2,
+                              linearize=True)
+    assert [result.info["pages"] for result in results] == [2, 2, 1]
+    for result in results:
+        assert_linearized(result.output_path)
+
+
+def test_failed_check_publishes_nothing(tmp_path, sample_pdf, monkeypatch):
+    """校验失败时不写出目标文件，也不覆盖原文件"""
+    monkeypatch.setattr(linearize, "validate", lambda path: (False, "bad hint table"))
+    original = open(sample_pdf, "rb").read()
+
+    output_path = tmp_path / "out.pdf"
+    with pytest.raises(Exception, match="bad hint table"):
+        linearize.linearize_file(sample_pdf, str(output_path))
+    assert not output_path.exists()
+
+    with pytest.raises(Exception):
+        linearize.linearize_file(sample_pdf)
+    assert open(sample_pdf, "rb").read() == original
+    assert not leftover_temp_files(tmp_path)
+
+
+def test_error_includes_qpdf_warnings(tmp_path, sample_pdf):
+    with pikepdf.open(sample_pdf) as pdf:
+        optimize.pass_inheritance(pdf)
+        with pytest.raises(Exception) as error:
+            linearize.save_linearized(pdf, str(tmp_path / "out.pdf"))
+    assert "hint table" in str(error.value)
+    assert not (tmp_path / "out.pdf").exists()
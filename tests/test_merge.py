@@ -0,0 +1,69 @@
+import pytest
+
+from conftest import make_image_pdf, make_pdf
+from engine.merge import merge_pdfs, stream_merge_pdfs
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+def page_texts(path):
+    with pikepdf.open(path) as pdf:
+        assert pdf.check_pdf_syntax() == []
+        return [page.Contents.read_bytes().decode() for page in pdf.pages]
+
+
+@pytest.mark.parametrize("max_open", [1, 4])
+def test_stream_merge_keeps_page_order(tmp_path, max_open):
+    inputs = [make_pdf(tmp_path / f"in{index}.pdf", pages=index + 2, text=f"File{index}") for index in range(4)]
+    output = tmp_path / "merged.pdf"
+
+    stats = stream_merge_pdfs(inputs, str(output), max_open=max_open)
+
+    assert stats["files"] == 4 and stats["pages"] == 2 + 3 + 4 + 5
+    expected = [f"(File{index} {number + 1})" for index in range(4) for number in range(index + 2)]
+    texts = page_texts(output)
+    assert len(texts) == len(expected)
+    assert all(name in text for name, text in zip(expected, texts))
+
+
+def test_stream_merge_dedupes_identical_objects(tmp_path):
+    pytest.importorskip("numpy")
+    first = make_image_pdf(tmp_path / "a.pdf", pages=2, seed=1)
+    second = make_image_pdf(tmp_path / "b.pdf", pages=2, seed=1)
+    output = tmp_path / "merged.pdf"
+
+    stats = stream_merge_pdfs([first, second], str(output))
+
+    # 第二个文件的图片与第一个完全相同，只写出一次
+    assert stats["duplicate_objects"] >= 2
+    with pikepdf.open(first) as pdf:
+        image_bytes = sum(len(page.Resources.XObject.Im0.read_raw_bytes()) for page in pdf.pages)
+    assert stats["duplicate_bytes"] >= image_bytes
+    with pikepdf.open(output) as pdf:
+        assert pdf.check_pdf_syntax() == []
+        assert len(pdf.pages) == 4
+        images = {page.Resources.XObject.Im0.objgen for page in pdf.pages}
+        assert len(images) == 2
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_merge_page_range(tmp_path, streaming):
+    inputs = [make_pdf(tmp_path / "a.pdf", pages=6, text="A"), make_pdf(tmp_path / "b.pdf", pages=3, text="B")]
+    output = tmp_path / "merged.pdf"
+
+    merge_pdfs(inputs, str(output), page_range="odd,!5", streaming=streaming)
+
+    texts = page_texts(output)
+    expected = ["(A 1)", "(A 3)", "(B 1)", "(B 3)"]
+    assert len(texts) == len(expected)
+    assert all(name in text for name, text in zip(expected, texts))
+
+
+def test_stream_merge_removes_partial_output(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    output = tmp_path / "merged.pdf"
+
+    with pytest.raises(Exception):
+        stream_merge_pdfs([make_pdf(tmp_path / "a.pdf"), str(broken)], str(output))
+    assert not output.exists()
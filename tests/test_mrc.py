@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from engine import compress
+
+pikepdf = pytest.importorskip("pikepdf")
+np = pytest.importorskip("numpy")
+
+
+def make_scan_pdf(path):
+    """一页带文字的彩色扫描：渐变背景加噪声，上面是深色文字"""
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:1650, 0:1275]
+    base = np.stack([200 + 40 * np.sin(x / 90), 210 + 30 * np.cos(y / 70), 190 + 50 * np.sin((x + y) / 120)], -1)
+    image = Image.fromarray(np.clip(base + rng.normal(0, 6, base.shape), 0, 255).astype("uint8"))
+    draw = ImageDraw.Draw(image)
+    for row in range(40):
+        draw.text((80, 60 + row * 38), "Lorem ipsum dolor sit amet 0123456789 " * 2, fill=(20, 20, 30))
+    data = io.BytesIO()
+    image.save(data, "JPEG", quality=92)
+
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(612, 792))
+    page = pdf.pages[0]
+    page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=pikepdf.Stream(
+        pdf, data.getvalue(), Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image, Width=1275, Height=1650,
+        ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8, Filter=pikepdf.Name.DCTDecode)))
+    page.Contents = pdf.make_stream(b"q 612 0 0 792 0 0 cm /Im0 Do Q")
+    pdf.save(path)
+
+
+def test_mrc_layers_use_image_quality(tmp_path):
+    source = tmp_path / "scan.pdf"
+    make_scan_pdf(source)
+
+    sizes = {}
+    for image_quality in (20, 90):
+        result = compress.compress_file(str(source), str(tmp_path / f"out_{image_quality}.pdf"),
+                                        mrc_layers=True, image_quality=image_quality)
+        assert result.info["mrc"]["layered"] == 1
+        sizes[image_quality] = result.output_size
+    assert sizes[20] < sizes[90]
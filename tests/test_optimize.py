@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+import pytest
+
+from engine.optimize import _compact_number, pass_minify
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12345.678912", Decimal("12345.67891")),
+    ("0.000123456", Decimal("0.00012")),
+    ("0.50000", Decimal("0.5")),
+    ("612.0000001", 612),
+    ("-0.000001", 0),
+])
+def test_compact_number_keeps_fixed_decimal_places(text, expected):
+    result = _compact_number(Decimal(text))
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_minify_keeps_large_coordinates(tmp_path):
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(14400, 14400))
+    content = b"q 1 0 0 1 12000.123456 13999.987654 cm 0 0 m 12345.678912 0.25 l S Q\n" * 20
+    pdf.pages[0].obj.Contents = pdf.make_stream(content)
+
+    assert pass_minify(pdf)[0] == 1
+    operands = [item.operands for item in pikepdf.parse_content_stream(pdf.pages[0])]
+    assert [float(value) for value in operands[1]] == [1, 0, 0, 1, 12000.12346, 13999.98765]
+    assert [float(value) for value in operands[3]] == [12345.67891, 0.25]
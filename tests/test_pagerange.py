@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from engine.pagerange import OPEN_END, PageSet, parse_ranges
+
+
+@pytest.mark.parametrize("text, pages", [
+    ("1,3-5", [0, 2, 3, 4]),
+    ("8-", [7, 8, 9]),
+    ("-2", [0, 1]),
+    ("1-7/3", [0, 3, 6]),
+    ("2-/4", [1, 5, 9]),
+    ("odd", [0, 2, 4, 6, 8]),
+    ("even", [1, 3, 5, 7, 9]),
+    ("!3", [0, 1, 3, 4, 5, 6, 7, 8, 9]),
+    ("!1-8", [8, 9]),
+    ("1-6,!2-3", [0, 3, 4, 5]),
+    ("odd,!5", [0, 2, 6, 8]),
+    ("!odd,!10", [1, 3, 5, 7]),
+    ("!1-/3", [1, 2, 4, 5, 7, 8]),
+])
+def test_parse(text, pages):
+    assert list(PageSet.parse(text, 10)) == pages
+    assert list(PageSet.parse(text).clip(10)) == pages
+
+
+@pytest.mark.parametrize("text", ["1-/0", "1-3-5", "abc", "!"])
+def test_parse_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        PageSet.parse(text, 10)
+
+
+def test_strict_parse_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        PageSet.parse("!12", 10, strict=True)
+    with pytest.raises(ValueError):
+        PageSet.parse("5-20/2", 10, strict=True)
+
+
+def test_parse_ranges_keeps_input_order():
+    assert parse_ranges("5-6,1", 10) == [(4, 6), (0, 1)]
+
+
+def test_complement_of_stepped_set_stays_compact():
+    pages = PageSet.every(3, 30000)
+    complement = pages.complement(30000)
+    assert len(complement.runs) <= 3
+    assert len(complement) == 20000
+    assert 0 not in complement and 1 in complement and 2 in complement
+    assert complement.complement(30000) == pages
+
+
+def test_open_ended_sets():
+    pages = PageSet.parse("!3")
+    assert not pages.is_bounded
+    assert 1000 in pages and 2 not in pages
+    with pytest.raises(ValueError):
+        list(pages)
+    assert pages.format() == "1-2,4-"
+    assert PageSet.parse("3-/2").runs == ((2, OPEN_END, 2),)
+
+
+def random_set(rng, total):
+    runs = [(rng.randint(0, total), rng.randint(0, total), rng.randint(1, 5)) for _ in range(rng.randint(0, 5))]
+    return PageSet(runs), {page for run in runs for page in range(*run)}
+
+
+def test_set_operations_match_python_sets():
+    rng = random.Random(0)
+    for _ in range(500):
+        total = rng.randint(1, 60)
+        a, a_pages = random_set(rng, total)
+        b, b_pages = random_set(rng, total)
+        assert list(a) == sorted(a_pages)
+        assert all((page in a) == (page in a_pages) for page in range(total + 2))
+        assert len(a) == len(a_pages)
+        assert list(a.complement(total)) == sorted(set(range(total)) - a_pages)
+        assert list(a | b) == sorted(a_pages | b_pages)
+        assert list(a - b) == sorted(a_pages - b_pages)
+
+
+def test_format_round_trip():
+    rng = random.Random(1)
+    for _ in range(500):
+        total = rng.randint(1, 60)
+        pages, _ = random_set(rng, total)
+        for candidate in (pages, pages.complement(total), pages.complement(OPEN_END)):
+            assert PageSet.parse(candidate.format()) == candidate
+
+
+def test_open_ended_stepped_runs_stay_open():
+    for step in (2, 3, 5):
+        pages = PageSet.parse(f"2-/{step}")
+        assert not pages.is_bounded
+        assert pages.format() == f"2-/{step}"
+        assert list(pages.clip(12)) == list(range(1, 12, step))
@@ -0,0 +1,126 @@
+import sys
+
+import pytest
+
+from conftest import make_pdf
+from engine import probe
+from engine.probe import probe_file
+
+pikepdf = pytest.importorskip("pikepdf")
+
+VARIANTS = {
+    "xref_table": {},
+    "xref_stream": {"object_stream_mode": pikepdf.ObjectStreamMode.generate},
+    "linearized": {"linearize": True},
+    "linearized_xref_stream": {"linearize": True, "object_stream_mode": pikepdf.ObjectStreamMode.generate},
+    "encrypted": {"encryption": pikepdf.Encryption(owner="owner", user="")},
+    "encrypted_user_password": {"encryption": pikepdf.Encryption(owner="owner", user="user")},
+    # 对象流本身被加密，无法只读文件尾，退回完整解析
+    "encrypted_object_streams": {"encryption": pikepdf.Encryption(owner="owner", user=""),
+                                 "object_stream_mode": pikepdf.ObjectStreamMode.generate},
+    "encrypted_object_streams_user_password": {"encryption": pikepdf.Encryption(owner="owner", user="user"),
+                                               "object_stream_mode": pikepdf.ObjectStreamMode.generate},
+    "version_1_7": {"force_version": "1.7"},
+}
+
+
+def full_parse(path, password=""):
+    with pikepdf.open(path, password=password) as pdf:
+        return {"version": pdf.pdf_version, "pages": len(pdf.pages), "encrypted": pdf.is_encrypted,
+                "linearized": pdf.is_linearized}
+
+
+@pytest.mark.parametrize("name", VARIANTS)
+def test_probe_matches_full_parse(tmp_path, name):
+    path = make_pdf(tmp_path / f"{name}.pdf", pages=7, **VARIANTS[name])
+
+    result = probe_file(path)
+
+    expected = full_parse(path, "user" if "user_password" in name else "")
+    if name == "encrypted_object_streams_user_password":
+        # 没有密码时无法读取页面树
+        expected["pages"] = None
+    assert {key: result[key] for key in expected} == expected
+    assert result["full_parse"] == name.startswith("encrypted_object_streams")
+
+
+def test_failed_full_parse_keeps_encryption_from_trailer(tmp_path, monkeypatch):
+    path = make_pdf(tmp_path / "encrypted.pdf", pages=3, encryption=pikepdf.Encryption(owner="owner", user=""),
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+    def unavailable(file_path):
+        raise RuntimeError("缺少解密所需的库")
+
+    monkeypatch.setattr(probe, "_probe_full", unavailable)
+    result = probe.probe_file(path)
+
+    assert result["encrypted"] is True and result["pages"] is None
+    assert result["version"] == full_parse(path)["version"]
+
+    plain = make_pdf(tmp_path / "plain.pdf", pages=3)
+    with open(plain, "rb") as f:
+        data = f.read()
+    with open(plain, "wb") as f:
+        f.write(data[:data.rindex(b"startxref")])
+    with pytest.raises(RuntimeError):
+        probe.probe_file(plain)
+
+
+def test_pypdf2_fallback_without_pikepdf(tmp_path, monkeypatch):
+    path = make_pdf(tmp_path / "broken.pdf", pages=4)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:data.rindex(b"startxref")] + b"startxref\n12\n%%EOF\n")
+    monkeypatch.setitem(sys.modules, "pikepdf", None)
+
+    result = probe.probe_file(path)
+
+    assert result["pages"] == 4 and result["encrypted"] is False and result["full_parse"] is True
+
+
+def test_probe_reads_producer(tmp_path):
+    path = tmp_path / "producer.pdf"
+    with pikepdf.open(make_pdf(tmp_path / "source.pdf")) as pdf:
+        pdf.docinfo["/Producer"] = "测试程序 1.0"
+        pdf.save(path)
+
+    assert probe_file(str(path))["producer"] == "测试程序 1.0"
+
+
+def test_probe_detects_update_after_linearization(tmp_path):
+    path = make_pdf(tmp_path / "linearized.pdf", pages=3, linearize=True)
+    with open(path, "rb") as f:
+        data = f.read()
+    # 增量更新：追加一个新的Info对象和交叉引用段，/L 不再等于文件长度
+    with pikepdf.open(path) as pdf:
+        size = int(pdf.trailer.Size)
+        root = pdf.trailer.Root.objgen[0]
+    start = data.rindex(b"startxref")
+    previous = int(data[start:].split()[1])
+    update = b"%d 0 obj\n<< /Producer (update) >>\nendobj\n" % size
+    xref_offset = len(data) + len(update)
+    update += (b"xref\n%d 1\n%010d 00000 n \ntrailer\n<< /Size %d /Root %d 0 R /Info %d 0 R /Prev %d >>\n"
+               b"startxref\n%d\n%%%%EOF\n" % (size, len(data), size + 1, root, size, previous, xref_offset))
+    with open(path, "ab") as f:
+        f.write(update)
+
+    result = probe_file(path)
+
+    assert result["linearized"] is False
+    assert result["pages"] == 3 and result["producer"] == "update"
+    assert result["full_parse"] is False
+
+
+def test_probe_falls_back_on_broken_xref(tmp_path):
+    path = make_pdf(tmp_path / "broken.pdf", pages=4)
+    with open(path, "rb") as f:
+        data = f.read()
+    start = data.rindex(b"startxref")
+    with open(path, "wb") as f:
+        f.write(data[:start] + b"startxref\n12\n%%EOF\n")
+
+    result = probe_file(path)
+
+    assert result["pages"] == 4
+    assert result["full_parse"] is True
@@ -0,0 +1,24 @@
+import pytest
+
+from conftest import make_image_pdf
+from engine import compress, quality
+
+pytest.importorskip("numpy")
+pytest.importorskip("fitz")
+
+
+def test_identical_files_score_perfectly(tmp_path):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=3)
+    scores = quality.score_pages(path, path)
+    assert sorted(scores) == [0, 1, 2]
+    assert all(value == 1.0 for value, _ in scores.values())
+
+
+def test_guard_keeps_pages_above_threshold(tmp_path):
+    path = make_image_pdf(tmp_path / "img.pdf", pages=2, size=(400, 300))
+    result = compress.compress_file(path, str(tmp_path / "out.pdf"), optimize_images=True,
+                                    image_quality=10, image_dpi=40, min_ssim=0.95)
+    report = result.info["quality"]
+    assert report["pages"] == 2
+    assert report["failed_pages"] == []
+    assert report["min_ssim"] >= 0.95
@@ -0,0 +1,34 @@
+from tools.registry import ToolRegistry
+
+SPECS = {
+    "ok": ("json", "JSONDecoder", "可用工具", ""),
+    "broken": ("tools.no_such_tool", "NoSuchTool", "损坏工具", ""),
+}
+
+
+def test_preload_reports_failures_with_details():
+    registry = ToolRegistry(SPECS)
+    errors = registry.preload()
+    assert list(errors) == ["broken"]
+    assert errors["broken"].startswith("ModuleNotFoundError")
+    assert "Traceback" in registry.error_details["broken"]
+    assert registry.is_loaded("ok")
+
+
+def test_timing_report_lists_every_loaded_tool():
+    registry = ToolRegistry(SPECS)
+    registry.preload()
+    lines = registry.timing_report().splitlines()
+    assert len(lines) == 2
+    assert any(line.startswith("可用工具") and line.endswith("(成功)") for line in lines)
+    assert any(line.startswith("损坏工具") and line.endswith("(失败)") for line in lines)
+
+
+def test_retry_clears_failure():
+    registry = ToolRegistry(SPECS)
+    assert registry.load("broken") is None
+    registry.retry("broken")
+    assert registry.get_error("broken") is None
+    assert "broken" not in registry.error_details
+    assert registry.load("broken") is None
+    assert registry.get_error("broken")
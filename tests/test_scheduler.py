@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from engine import scheduler
+from engine.common import FileResult
+
+
+def process(input_path, delay=0.0, error=None):
+    time.sleep(delay)
+    if error:
+        raise ValueError(error)
+    return FileResult(input_path, output_path=input_path + ".out")
+
+
+@pytest.fixture
+def threads():
+    pool = scheduler.JobScheduler(4, max_pending=2, use_processes=False)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def global_scheduler(monkeypatch):
+    monkeypatch.setattr(scheduler, "_scheduler", None)
+    yield
+    scheduler.shutdown()
+
+
+def test_map_files_keeps_input_order(threads):
+    # 前面的文件处理得更慢，完成顺序与输入顺序相反
+    jobs = [(f"{index}.pdf", (f"{index}.pdf", (10 - index) * 0.01)) for index in range(10)]
+    progress = []
+
+    results = threads.map_files(process, jobs, progress=lambda percent, message: progress.append(percent))
+
+    assert [result.input_path for result in results] == [path for path, _ in jobs]
+    assert progress[-1] == 100
+    assert progress == sorted(progress)
+
+
+def test_map_files_turns_errors_into_failed_results(threads):
+    jobs = [("a.pdf", ("a.pdf",)), ("b.pdf", ("b.pdf", 0, "损坏的文件")), ("c.pdf", ("c.pdf",))]
+
+    results = threads.map_files(process, jobs)
+
+    assert [result.success for result in results] == [True, False, True]
+    assert results[1].input_path == "b.pdf" and "损坏的文件" in results[1].error
+
+
+def test_run_raises_task_errors(threads):
+    with pytest.raises(ValueError, match="失败"):
+        threads.run(process, "a.pdf", 0, "失败")
+
+
+def test_submit_blocks_when_queue_is_full():
+    pool = scheduler.JobScheduler(1, max_pending=1, use_processes=False)
+    release = threading.Event()
+    futures = [pool.submit(release.wait) for _ in range(2)]
+
+    submitted = threading.Event()
+    blocked = threading.Thread(target=lambda: (pool.submit(release.wait), submitted.set()))
+    blocked.start()
+    # 一个在执行、一个在排队，第三个要等待空位
+    assert not submitted.wait(0.3)
+
+    release.set()
+    assert submitted.wait(5)
+    blocked.join()
+    assert all(future.result() for future in futures)
+    pool.shutdown()
+
+
+def test_map_files_bounds_jobs_in_flight():
+    pool = scheduler.JobScheduler(2, max_pending=1, use_processes=False)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def counted(input_path):
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(input_path)
+        return FileResult(input_path)
+
+    original_submit = pool.submit
+
+    def submit(func, input_path):
+        with lock:
+            in_flight.append(input_path)
+            peak.append(len(in_flight))
+        return original_submit(func, input_path)
+
+    pool.submit = submit
+    results = pool.map_files(counted, [(f"{index}.pdf", (f"{index}.pdf",)) for index in range(12)])
+
+    assert len(results) == 12
+    assert max(peak) <= 3
+    pool.shutdown()
+
+
+def test_map_files_stops_submitting(threads):
+    started = []
+
+    def tracked(input_path):
+        started.append(input_path)
+        return process(input_path, 0.05)
+
+    results = threads.map_files(tracked, [(f"{index}.pdf", (f"{index}.pdf",)) for index in range(50)],
+                                should_stop=lambda: len(started) >= 3)
+
+    assert 3 <= len(results) < 50
+    assert [result.input_path for result in results] == [f"{index}.pdf" for index in range(len(results))]
+
+
+def test_process_pool_runs_tasks():
+    pool = scheduler.JobScheduler(1)
+    try:
+        assert pool.run(pow, 2, 10) == 1024
+        results = pool.map_files(process, [("a.pdf", ("a.pdf",)), ("b.pdf", ("b.pdf", 0, "错误"))])
+        assert [result.success for result in results] == [True, False]
+    finally:
+        pool.shutdown()
+
+
+def test_environment_overrides_defaults(monkeypatch):
+    monkeypatch.setenv(scheduler.WORKERS_ENV, "3")
+    monkeypatch.setenv(scheduler.PENDING_ENV, "invalid")
+    pool = scheduler.JobScheduler()
+    assert (pool.max_workers, pool.max_pending) == (3, 6)
+
+
+def test_configure_replaces_global_scheduler(global_scheduler):
+    first = scheduler.configure(2, 5, use_processes=False)
+    assert scheduler.get_scheduler() is first
+    assert (first.max_workers, first.max_pending, first.use_processes) == (2, 5, False)
+    assert scheduler.run(pow, 3, 2) == 9
+    assert first._executor is not None
+
+    second = scheduler.configure(1, use_processes=False)
+    assert scheduler.get_scheduler() is second
+    # 旧的执行器已关闭
+    assert first._executor is None
+    assert [result.input_path for result in scheduler.map_files(process, [("a.pdf", ("a.pdf",))])] == ["a.pdf"]
+
+
+def test_shutdown_global_scheduler(global_scheduler):
+    configured = scheduler.configure(1, use_processes=False)
+    scheduler.run(pow, 2, 2)
+
+    scheduler.shutdown()
+
+    assert configured._executor is None
+    assert scheduler.get_scheduler() is not configured
+    scheduler.shutdown()
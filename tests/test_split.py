@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from conftest import make_image_pdf, make_pdf
+from engine.split import split_pdf
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+@pytest.fixture
+def image_pdf(tmp_path):
+    pytest.importorskip("numpy")
+    return make_image_pdf(tmp_path / "images.pdf", pages=8, size=(400, 300))
+
+
+@pytest.mark.parametrize("pages_per_part", [1, 2, 3])
+def test_max_bytes_parts_stay_under_limit(tmp_path, image_pdf, pages_per_part):
+    with pikepdf.open(image_pdf) as pdf:
+        page_bytes = max(len(page.Resources.XObject.Im0.read_raw_bytes()) for page in pdf.pages)
+    max_bytes = int(page_bytes * (pages_per_part + 0.5))
+    output_dir = tmp_path / "parts"
+    output_dir.mkdir()
+
+    results = split_pdf(image_pdf, str(output_dir), mode="max_bytes", max_bytes=max_bytes)
+
+    assert sum(result.info["pages"] for result in results) == 8
+    # 各页大小相近，除最后一份外每份都应装满
+    assert all(result.info["pages"] == pages_per_part for result in results[:-1])
+    for result in results:
+        assert not result.info["over_limit"]
+        assert result.output_size == os.path.getsize(result.output_path) <= max_bytes
+        with pikepdf.open(result.output_path) as pdf:
+            assert pdf.check_pdf_syntax() == []
+            assert len(pdf.pages) == result.info["pages"]
+
+
+def test_max_bytes_marks_single_oversized_page(tmp_path, image_pdf):
+    output_dir = tmp_path / "parts"
+    output_dir.mkdir()
+
+    results = split_pdf(image_pdf, str(output_dir), mode="max_bytes", max_bytes=1000)
+
+    assert len(results) == 8
+    assert all(result.info["pages"] == 1 and result.info["over_limit"] for result in results)
+
+
+def test_max_bytes_shares_fonts_within_part(tmp_path):
+    source = make_pdf(tmp_path / "text.pdf", pages=40)
+    output_dir = tmp_path / "parts"
+    output_dir.mkdir()
+
+    results = split_pdf(source, str(output_dir), mode="max_bytes", max_bytes=2000)
+
+    assert sum(result.info["pages"] for result in results) == 40
+    assert all(result.output_size <= 2000 for result in results)
+    # 同一文件中的页面共用一个字体对象
+    for result in results:
+        with pikepdf.open(result.output_path) as pdf:
+            fonts = {page.Resources.Font.F1.objgen for page in pdf.pages}
+            assert len(fonts) == 1
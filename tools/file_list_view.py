@@ -0,0 +1,136 @@
+"""虚拟化的文件列表视图
+
+Listbox 中只放当前可见的几行，滚动时按偏移量重新填充；滚动条按集合总数计算位置。
+选中状态按集合中的位置保存，所以滚出可见区域的选中项不会丢失。
+"""
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+
+class VirtualFileList:
+    """显示 engine.file_set.FileSet 的列表框和滚动条，放在 parent 中
+
+    command 不为None时在选中项改变后调用（无参数）。
+    """
+
+    def __init__(self, parent, files, height=6, command=None):
+        self.files = files
+        self.command = command
+        self.offset = 0
+        self.rows = height
+        # 选中文件在集合中的位置
+        self.selected = set()
+
+        self.listbox = tk.Listbox(parent, selectmode=tk.EXTENDED, height=height, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", self.on_mousewheel)
+        self.listbox.bind("<Button-5>", self.on_mousewheel)
+        self.render()
+
+    def selected_indices(self):
+        """选中文件的位置，按顺序排列"""
+        return sorted(self.selected)
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.listbox.selection_clear(0, tk.END)
+
+    def set_selection(self, indices):
+        """选中 indices 处的文件，并滚动到第一个选中项"""
+        self.selected = set(indices)
+        if self.selected:
+            first = min(self.selected)
+            if not self.offset <= first < self.offset + self.rows:
+                self.offset = first
+        self.render()
+
+    def add(self, files):
+        """把文件添加到集合并刷新，返回新添加的数量"""
+        added = self.files.extend(files)
+        self.refresh()
+        return added
+
+    def remove_selected(self):
+        """从集合中移除选中的文件并刷新，返回移除的数量"""
+        removed = self.files.remove_indices(self.selected)
+        self.clear_selection()
+        self.refresh()
+        return removed
+
+    def move_selected(self, offset):
+        """选中的文件整体上移（-1）或下移（1）一位"""
+        self.set_selection(self.files.move(self.selected, offset))
+
+    def refresh(self):
+        """文件集合修改后调用，重新显示当前可见的行"""
+        count = len(self.files)
+        self.selected = {index for index in self.selected if index < count}
+        self.render()
+
+    def render(self):
+        count = len(self.files)
+        self.offset = max(0, min(self.offset, count - self.rows))
+        end = min(count, self.offset + self.rows)
+
+        self.listbox.delete(0, tk.END)
+        names = [self.files.name(index) for index in range(self.offset, end)]
+        if names:
+            self.listbox.insert(tk.END, *names)
+        for index in range(self.offset, end):
+            if index in self.selected:
+                self.listbox.selection_set(index - self.offset)
+
+        if count:
+            self.scrollbar.set(self.offset / count, end / count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, offset):
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        """滚动条回调：moveto 分数，或 scroll 数量 units/pages"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.files)))
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_mousewheel(self, event):
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = int(-1 * (event.delta / 120))
+        self.scroll_to(self.offset + delta * 3)
+        # 列表框中只有可见行，不使用它自带的滚动
+        return "break"
+
+    def on_select(self, event=None):
+        """把可见行的选中状态同步到按位置保存的选中集合"""
+        visible = self.listbox.size()
+        for row in range(visible):
+            self.selected.discard(self.offset + row)
+        self.selected.update(self.offset + row for row in self.listbox.curselection())
+        if self.command is not None:
+            self.command()
+
+    def on_resize(self, event):
+        """按列表框的高度计算可见行数"""
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1 \
+            + 2 * int(self.listbox.cget("selectborderwidth"))
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        rows = max(1, (event.height - border) // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
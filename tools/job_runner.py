@@ -0,0 +1,181 @@
+"""在后台执行引擎任务，并把结果交回Tk主线程"""
+import os
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+from engine import scheduler
+from engine.common import format_file_size
+
+
+def call_in_main_thread(widget, func, *args):
+    """通过after把回调交给Tk主线程；界面已关闭时忽略"""
+    try:
+        widget.after(0, func, *args)
+    except (tk.TclError, RuntimeError):
+        pass
+
+
+def run_in_background(widget, func, *args, on_done=None, on_error=None, in_pool=True, **kwargs):
+    """在后台执行任务，完成后在主线程中调用 on_done(result) 或 on_error(exception)
+
+    in_pool 为 True 时任务提交到共享进程池执行（func 需可被pickle），
+    否则直接在后台线程中执行，适用于内部自行调度多个文件的批量函数。
+    """
+    def worker():
+        try:
+            if in_pool:
+                result = scheduler.run(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except Exception as e:
+            if on_error is not None:
+                call_in_main_thread(widget, on_error, e)
+        else:
+            if on_done is not None:
+                call_in_main_thread(widget, on_done, result)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+
+def progress_callback(widget, variable, status_variable=None):
+    """生成进度回调，在主线程中更新进度条和状态文字"""
+    def progress(percent, message=""):
+        call_in_main_thread(widget, variable.set, percent)
+        if status_variable is not None and message:
+            call_in_main_thread(widget, status_variable.set, message)
+    return progress
+
+
+def failure_summary(results):
+    """汇总失败的文件，全部成功时返回空字符串"""
+    return "\n".join(f"{result.file_name}: {result.error}" for result in results if not result.success)
+
+
+def show_results(results, success_message, error_prefix):
+    """显示批量任务结果：全部成功时提示成功，否则列出失败的文件"""
+    failures = failure_summary(results)
+    if failures:
+        messagebox.showerror("错误", f"{error_prefix}:\n{failures}")
+    else:
+        messagebox.showinfo("成功", success_message)
+
+
+# 读取文件信息的线程数（所有工具共用）
+INFO_WORKERS = 4
+# 文件信息尚未读取完成时显示的占位文字
+LOADING = "读取中..."
+
+_info_pool = None
+_info_pool_lock = threading.Lock()
+
+
+def _get_info_pool():
+    global _info_pool
+    with _info_pool_lock:
+        if _info_pool is None:
+            _info_pool = ThreadPoolExecutor(max_workers=INFO_WORKERS, thread_name_prefix="file-info")
+        return _info_pool
+
+
+def file_size_stage(file_path):
+    """文件信息的第一阶段：文件大小，无法读取时为None"""
+    try:
+        return {"size": os.path.getsize(file_path)}
+    except OSError:
+        return {"size": None}
+
+
+def size_text(fields):
+    """文件信息中大小字段的显示文字"""
+    if "size" not in fields:
+        return LOADING
+    return "未知" if fields["size"] is None else format_file_size(fields["size"])
+
+
+class FileInfoLoader:
+    """在后台逐步读取文件信息，并合并刷新到界面
+
+    stages 为按顺序执行的读取函数列表，每个函数 stage(file) 返回字段字典，
+    所有文件的前一阶段（例如文件大小）都提交后才提交下一阶段（例如页数、加密状态）。
+    已读取的字段由 render(files, details) 在主线程中显示，details 为 {文件: 字段字典}，
+    两次刷新之间至少间隔 flush_interval 毫秒。再次调用 start() 或 cancel() 时丢弃尚未完成的读取。
+    """
+
+    def __init__(self, widget, stages, render, flush_interval=100):
+        self.widget = widget
+        self.stages = stages
+        self.render = render
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = []
+        self._files = []
+        self._details = {}
+        self._flush_scheduled = False
+
+    def start(self, files, stages=None):
+        """开始读取 files 的信息，立即显示一次（只有文件名等不需要读取的内容）
+
+        stages 不为None时本次改用这些读取函数。
+        """
+        self.cancel()
+        with self._lock:
+            generation = self._generation
+            self._files = list(files)
+            self._details = {}
+        pool = _get_info_pool()
+        for stage in stages or self.stages:
+            for file in self._files:
+                self._futures.append(pool.submit(self._load, generation, stage, file))
+        self.render(self._files, {})
+
+    def cancel(self):
+        """丢弃尚未完成的读取"""
+        with self._lock:
+            self._generation += 1
+            # 旧的刷新会因代数不符而跳过，新的读取需要重新安排刷新
+            self._flush_scheduled = False
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def _load(self, generation, stage, file):
+        """线程池中执行：读取一个文件的一组字段"""
+        if generation != self._generation:
+            return
+        try:
+            fields = stage(file)
+        except Exception:
+            fields = {}
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._details.setdefault(file, {}).update(fields)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        call_in_main_thread(self.widget, self._schedule_flush, generation)
+
+    def _schedule_flush(self, generation):
+        try:
+            self.widget.after(self.flush_interval, self._flush, generation)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _flush(self, generation):
+        """主线程中执行：显示到目前为止读取到的信息"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._flush_scheduled = False
+            details = {file: dict(fields) for file, fields in self._details.items()}
+            files = self._files
+        try:
+            self.render(files, details)
+        except tk.TclError:
+            # 界面已关闭
+            self.cancel()
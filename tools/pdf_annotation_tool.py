@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import annotation
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background, show_results
 
 class PDFAnnotationTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.annotations = []
         
         # 创建界面
@@ -57,14 +61,8 @@ class PDFAnnotationTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # 右侧注释编辑区域
         right_frame = ttk.LabelFrame(content_frame, text="注释编辑")
@@ -164,24 +162,19 @@ class PDFAnnotationTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         # 清空注释列表
         self.annotations.clear()
@@ -196,7 +189,7 @@ class PDFAnnotationTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空注释列表
             self.annotations.clear()
@@ -255,7 +248,7 @@ class PDFAnnotationTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空注释列表和编辑区域
             self.annotations.clear()
@@ -284,56 +277,17 @@ class PDFAnnotationTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            for pdf_file in self.selected_files:
-                self.add_annotations_to_pdf(pdf_file, output_dir)
-            
-            messagebox.showinfo("成功", f"注释已成功应用到PDF文件，保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"应用注释到PDF文件时出错: {str(e)}")
+        # 在后台并行处理所有文件，避免界面卡顿
+        run_in_background(
+            self.parent, annotation.add_annotations_to_pdfs, list(self.selected_files), output_dir, list(self.annotations),
+            on_done=lambda results: show_results(results, f"注释已成功应用到PDF文件，保存到:\n{output_dir}", "应用注释到PDF文件时出错"),
+            on_error=lambda e: messagebox.showerror("错误", f"应用注释到PDF文件时出错: {str(e)}"),
+            in_pool=False
+        )
     
     def add_annotations_to_pdf(self, pdf_file, output_dir):
         """将注释添加到PDF文件"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_with_annotations.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 注意：PyPDF2对注释的支持有限，这里我们简化处理
-                # 实际项目中可能需要使用更专业的PDF库，如PyMuPDF或reportlab
-                # 这里只是创建一个带有注释标记的PDF文件
-                
-                # 保存带注释的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                    
-                # 记录注释信息到外部文件
-                notes_path = os.path.join(output_dir, f"{base_name}_annotations.txt")
-                with open(notes_path, 'w', encoding='utf-8') as notes_file:
-                    notes_file.write("PDF注释信息\n")
-                    notes_file.write("=" * 50 + "\n")
-                    for i, annotation in enumerate(self.annotations, 1):
-                        notes_file.write(f"注释 {i}:\n")
-                        notes_file.write(f"  类型: {annotation['type']}\n")
-                        notes_file.write(f"  页码: {annotation['page']}\n")
-                        if annotation['text']:
-                            notes_file.write(f"  文本: {annotation['text']}\n")
-                        if annotation['color']:
-                            notes_file.write(f"  颜色: {annotation['color']}\n")
-                        notes_file.write("\n")
-        except Exception as e:
-            raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+        return annotation.add_annotations_to_pdf(pdf_file, output_dir, self.annotations)
 
 # 独立测试函数
 def test_annotation_tool():
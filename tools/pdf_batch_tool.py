@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import batch
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background
 
 class PDFBatchTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.batch_operations = []
         
         # 创建界面
@@ -61,14 +65,8 @@ class PDFBatchTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # 右侧操作选择区域
         right_frame = ttk.LabelFrame(content_frame, text="操作选择")
@@ -133,15 +131,7 @@ class PDFBatchTool:
         
     def get_operation_name(self, operation):
         """获取操作的中文名称"""
-        operation_names = {
-            "compress": "PDF压缩",
-            "encrypt": "PDF加密",
-            "decrypt": "PDF解密",
-            "rotate": "PDF旋转",
-            "add_watermark": "添加水印",
-            "add_header_footer": "添加页眉页脚"
-        }
-        return operation_names.get(operation, operation)
+        return batch.get_operation_name(operation)
     
     def on_operation_select(self):
         """当选择操作时，显示对应的参数设置"""
@@ -232,13 +222,10 @@ class PDFBatchTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def add_folder(self):
         """添加文件夹中的所有PDF文件"""
@@ -248,12 +235,7 @@ class PDFBatchTool:
             pdf_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) 
                         if f.lower().endswith('.pdf')]
             
-            added_count = 0
-            for file in pdf_files:
-                if file not in self.selected_files:
-                    self.selected_files.append(file)
-                    self.file_listbox.insert(tk.END, os.path.basename(file))
-                    added_count += 1
+            added_count = self.file_list_view.add(pdf_files)
             
             if added_count > 0:
                 messagebox.showinfo("成功", f"已从文件夹添加 {added_count} 个PDF文件")
@@ -262,14 +244,12 @@ class PDFBatchTool:
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
     
@@ -281,7 +261,7 @@ class PDFBatchTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清空所有文件")
     
     def browse_output_dir(self):
@@ -295,7 +275,7 @@ class PDFBatchTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 重置操作选择
             for var in self.operations.values():
@@ -326,64 +306,29 @@ class PDFBatchTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            # 执行批量处理
-            self.process_batch_files(selected_operations, output_dir)
-            messagebox.showinfo("成功", f"批量处理已完成，结果保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"批量处理时出错: {str(e)}")
+        # 在后台并行处理所有文件，避免界面卡顿
+        self.process_batch_files(
+            selected_operations, output_dir,
+            on_done=lambda results: self.batch_complete(results, output_dir),
+            on_error=lambda e: messagebox.showerror("错误", f"批量处理时出错: {str(e)}")
+        )
     
-    def process_batch_files(self, operations, output_dir):
-        """批量处理PDF文件"""
-        for pdf_file in self.selected_files:
-            try:
-                # 复制原始文件到临时文件，然后依次应用操作
-                temp_file = pdf_file
-                
-                # 执行每个操作
-                for operation in operations:
-                    output_file = self.apply_operation(temp_file, operation, output_dir)
-                    temp_file = output_file
-                
-                # 最终输出文件
-                file_name = os.path.basename(pdf_file)
-                base_name = os.path.splitext(file_name)[0]
-                final_output = os.path.join(output_dir, f"{base_name}_processed.pdf")
-                
-                # 复制最终结果
-                os.replace(temp_file, final_output)
-                
-            except Exception as e:
-                messagebox.showwarning("警告", f"处理文件 {os.path.basename(pdf_file)} 时出错: {str(e)}")
+    def batch_complete(self, results, output_dir):
+        """批量处理完成后的回调"""
+        for result in results:
+            if not result.success:
+                messagebox.showwarning("警告", f"处理文件 {result.file_name} 时出错: {result.error}")
+        messagebox.showinfo("成功", f"批量处理已完成，结果保存到:\n{output_dir}")
+    
+    def process_batch_files(self, operations, output_dir, on_done=None, on_error=None):
+        """批量处理PDF文件，各文件在共享进程池中并行处理"""
+        return run_in_background(self.parent, batch.process_batch_files, list(self.selected_files),
+                                 operations, output_dir, on_done=on_done, on_error=on_error,
+                                 in_pool=False)
     
     def apply_operation(self, pdf_file, operation, output_dir):
         """应用单个操作到PDF文件"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_{operation}.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 根据操作类型执行不同的处理
-                # 注意：这里只是简化的实现，实际项目中需要调用对应的工具模块
-                
-                # 保存处理后的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                    
-            return output_path
-        except Exception as e:
-            raise Exception(f"执行 {operation} 操作时出错: {str(e)}")
+        return batch.apply_operation(pdf_file, operation, output_dir)
 
 # 独立测试函数
 def test_batch_tool():
@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import bookmark
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background, show_results
 
 class PDFBookmarkTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.bookmarks = []
         
         # 创建界面
@@ -57,17 +61,8 @@ class PDFBookmarkTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
-        
-        # 绑定列表框选择事件
-        self.file_listbox.bind('<<ListboxSelect>>', self.on_file_select)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, command=self.on_file_select)
         
         # 右侧书签编辑区域
         right_frame = ttk.LabelFrame(content_frame, text="书签编辑")
@@ -156,24 +151,19 @@ class PDFBookmarkTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         # 清空书签列表
         self.bookmark_listbox.delete(0, tk.END)
@@ -191,7 +181,7 @@ class PDFBookmarkTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空书签列表
             self.bookmark_listbox.delete(0, tk.END)
@@ -201,9 +191,9 @@ class PDFBookmarkTool:
             
             messagebox.showinfo("成功", "已清空所有文件")
     
-    def on_file_select(self, event):
+    def on_file_select(self, event=None):
         """当选择PDF文件时，加载其书签"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             return
         
@@ -216,31 +206,12 @@ class PDFBookmarkTool:
         
         try:
             # 读取PDF文件中的书签
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                
-                # 注意：PyPDF2的书签读取功能有限，这里我们简化处理
-                # 实际项目中可能需要更复杂的逻辑来处理嵌套书签
-                if reader.outline:
-                    # 处理大纲（书签）
-                    self.load_outline(reader.outline)
+            for title, page_number, level in bookmark.read_bookmarks(pdf_file):
+                self.bookmarks.append((title, page_number, level))
+                self.bookmark_listbox.insert(tk.END, f"{'  ' * level}{title} (页 {page_number})")
         except Exception as e:
             messagebox.showerror("错误", f"读取PDF文件书签时出错: {str(e)}")
     
-    def load_outline(self, outline, level=0):
-        """递归加载PDF大纲（书签）"""
-        for item in outline:
-            if isinstance(item, list):
-                # 嵌套书签
-                self.load_outline(item, level + 1)
-            else:
-                # 单个书签
-                title = item.title
-                page_number = item.page_number + 1  # PyPDF2返回的是0-based页码，转为1-based
-                indent = "  " * level
-                self.bookmarks.append((title, page_number, level))
-                self.bookmark_listbox.insert(tk.END, f"{indent}{title} (页 {page_number})")
-    
     def on_bookmark_select(self, event):
         """当选择书签时，加载其信息到编辑区域"""
         selected_indices = self.bookmark_listbox.curselection()
@@ -329,7 +300,7 @@ class PDFBookmarkTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空书签列表和编辑区域
             self.bookmark_listbox.delete(0, tk.END)
@@ -357,42 +328,17 @@ class PDFBookmarkTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            for pdf_file in self.selected_files:
-                self.add_bookmarks_to_pdf(pdf_file, output_dir)
-            
-            messagebox.showinfo("成功", f"书签已成功应用到PDF文件，保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"应用书签到PDF文件时出错: {str(e)}")
+        # 在后台并行处理所有文件，避免界面卡顿
+        run_in_background(
+            self.parent, bookmark.add_bookmarks_to_pdfs, list(self.selected_files), output_dir, list(self.bookmarks),
+            on_done=lambda results: show_results(results, f"书签已成功应用到PDF文件，保存到:\n{output_dir}", "应用书签到PDF文件时出错"),
+            on_error=lambda e: messagebox.showerror("错误", f"应用书签到PDF文件时出错: {str(e)}"),
+            in_pool=False
+        )
     
     def add_bookmarks_to_pdf(self, pdf_file, output_dir):
         """将书签添加到PDF文件"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_with_bookmarks.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 添加书签
-                for title, page_number, level in self.bookmarks:
-                    # PyPDF2需要0-based页码
-                    writer.add_outline_item(title, page_number - 1)
-                
-                # 保存带书签的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-        except Exception as e:
-            raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+        return bookmark.add_bookmarks_to_pdf(pdf_file, output_dir, self.bookmarks)
 
 # 独立测试函数
 def test_bookmark_tool():
@@ -2,12 +2,14 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader
+
+from engine import compare
+from tools.job_runner import run_in_background
 
 class PDFCompareTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.pdf_file1 = ""
         self.pdf_file2 = ""
         
@@ -140,84 +142,30 @@ class PDFCompareTool:
             messagebox.showwarning("警告", "请选择两个PDF文件")
             return
         
-        try:
-            # 执行比较
-            self.compare_pdfs()
-        except Exception as e:
-            messagebox.showerror("错误", f"比较PDF文件时出错: {str(e)}")
+        # 在后台执行比较，避免界面卡顿
+        self.compare_pdfs()
     
     def compare_pdfs(self):
-        """比较两个PDF文件"""
+        """比较两个PDF文件，提交到共享进程池执行"""
         self.result_text.delete(1.0, tk.END)
-        
-        try:
-            # 读取两个PDF文件
-            with open(self.pdf_file1, 'rb') as f1, open(self.pdf_file2, 'rb') as f2:
-                reader1 = PdfReader(f1)
-                reader2 = PdfReader(f2)
-                
-                self.result_text.insert(tk.END, "PDF比较结果\n")
-                self.result_text.insert(tk.END, "=" * 50 + "\n\n")
-                
-                # 比较页数
-                if self.compare_pages.get():
-                    pages1 = len(reader1.pages)
-                    pages2 = len(reader2.pages)
-                    self.result_text.insert(tk.END, f"页数比较: {pages1} 页 vs {pages2} 页")
-                    if pages1 != pages2:
-                        self.result_text.insert(tk.END, " → 页数不同\n")
-                    else:
-                        self.result_text.insert(tk.END, " → 页数相同\n")
-                
-                # 比较元数据
-                if self.compare_metadata.get():
-                    metadata1 = reader1.metadata
-                    metadata2 = reader2.metadata
-                    
-                    self.result_text.insert(tk.END, "\n元数据比较:\n")
-                    
-                    # 获取所有元数据键
-                    keys = set()
-                    if metadata1:
-                        keys.update(metadata1.keys())
-                    if metadata2:
-                        keys.update(metadata2.keys())
-                    
-                    for key in keys:
-                        value1 = metadata1.get(key, "") if metadata1 else ""
-                        value2 = metadata2.get(key, "") if metadata2 else ""
-                        
-                        self.result_text.insert(tk.END, f"  {key}: {value1} vs {value2}")
-                        if value1 != value2:
-                            self.result_text.insert(tk.END, " → 不同\n")
-                        else:
-                            self.result_text.insert(tk.END, " → 相同\n")
-                
-                # 比较文本内容
-                if self.compare_text.get():
-                    self.result_text.insert(tk.END, "\n文本内容比较:\n")
-                    
-                    # 比较每一页的文本
-                    min_pages = min(len(reader1.pages), len(reader2.pages))
-                    for i in range(min_pages):
-                        page1 = reader1.pages[i]
-                        page2 = reader2.pages[i]
-                        
-                        text1 = page1.extract_text() or ""
-                        text2 = page2.extract_text() or ""
-                        
-                        if text1 != text2:
-                            self.result_text.insert(tk.END, f"  第 {i+1} 页: 文本内容不同\n")
-                    
-                    # 如果页数不同，提示剩余页面
-                    if len(reader1.pages) != len(reader2.pages):
-                        self.result_text.insert(tk.END, f"  注意: 由于页数不同，只比较了前 {min_pages} 页\n")
-                
-                self.result_text.insert(tk.END, "\n" + "=" * 50 + "\n")
-                self.result_text.insert(tk.END, "比较完成\n")
-                
-        except Exception as e:
-            raise Exception(f"比较PDF文件时出错: {str(e)}")
+        self.result_text.insert(tk.END, "正在比较...\n")
+        
+        return run_in_background(self.parent, compare.compare_pdfs, self.pdf_file1, self.pdf_file2,
+                                 compare_pages=self.compare_pages.get(),
+                                 compare_metadata=self.compare_metadata.get(),
+                                 compare_text=self.compare_text.get(),
+                                 on_done=self.show_compare_report,
+                                 on_error=self.compare_failed)
+    
+    def show_compare_report(self, report):
+        """显示比较报告"""
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, report)
+    
+    def compare_failed(self, error):
+        """比较出错时的回调"""
+        self.result_text.delete(1.0, tk.END)
+        messagebox.showerror("错误", f"比较PDF文件时出错: {str(error)}")
 
 # 独立测试函数
 def test_compare_tool():
@@ -3,16 +3,23 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import threading
 from pathlib import Path
-import tempfile
-import shutil
+
+from engine import analyze, bilevel, compress, fingerprint, flate, ghostscript, images, info, linearize, mrc, quality
+from engine.common import format_file_size
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import LOADING, FileInfoLoader, call_in_main_thread, failure_summary, file_size_stage, progress_callback, run_in_background, size_text
 
 class PDFCompressTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.compression_thread = None
         self.stop_compression = False
+        self.target_size = None
+        # 文件路径 -> 体积构成分析结果
+        self.analysis = {}
         
         # 创建界面
         self.create_compress_interface()
@@ -56,13 +63,8 @@ class PDFCompressTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.files_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=8)
-        files_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                       command=self.files_listbox.yview)
-        self.files_listbox.configure(yscrollcommand=files_scrollbar.set)
-        
-        self.files_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        files_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, height=8)
         
         # 文件信息显示
         info_frame = ttk.Frame(left_frame)
@@ -71,6 +73,7 @@ class PDFCompressTool:
         self.file_info_text = scrolledtext.ScrolledText(info_frame, height=8, wrap=tk.WORD)
         self.file_info_text.pack(fill=tk.BOTH, expand=True)
         self.file_info_text.config(state=tk.DISABLED)
+        self.file_info_loader = FileInfoLoader(self.parent, [file_size_stage, lambda file: {"summary": info.describe_pdf(file)}], self.render_file_info)
         
         # 右侧压缩选项区域 - 使用Canvas添加滚动条
         right_container = ttk.Frame(content_frame)
@@ -114,7 +117,8 @@ class PDFCompressTool:
         algorithms = [
             ("pikepdf (推荐)", "pikepdf", "使用QPDF引擎，压缩效果好"),
             ("pypdfium2 (快速)", "pypdfium2", "基于Google PDFium，处理速度快"),
-            ("Ghostscript (强力)", "ghostscript", "使用Ghostscript，压缩率最高")
+            ("Ghostscript (强力)", "ghostscript", "使用Ghostscript，压缩率最高"),
+            ("自动 (最佳)", "auto", "同时运行所有可用算法，保留最小的结果")
         ]
         
         for name, value, description in algorithms:
@@ -140,6 +144,13 @@ class PDFCompressTool:
         ttk.Radiobutton(level_frame, text="强力压缩 (大小优先)", 
                        variable=self.compression_level, value="high").pack(anchor=tk.W, pady=2)
         
+        # 目标大小：自动搜索满足大小要求的最高图片质量
+        self.use_target_size = tk.BooleanVar(value=False)
+        ttk.Checkbutton(level_frame, text="压缩到目标大小 (MB):",
+                        variable=self.use_target_size).pack(anchor=tk.W, pady=(8, 2))
+        self.target_size_mb = tk.StringVar(value="2")
+        ttk.Entry(level_frame, textvariable=self.target_size_mb).pack(fill=tk.X, padx=5, pady=2)
+        
         # 图像压缩选项
         image_frame = ttk.LabelFrame(right_frame, text="图像压缩")
         image_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -168,6 +179,30 @@ class PDFCompressTool:
         ttk.Radiobutton(format_frame, text="PNG", 
                        variable=self.image_format, value="png").pack(side=tk.LEFT)
         
+        # 目标分辨率：显示分辨率高于此值的图片会被降采样
+        ttk.Label(image_frame, text="目标分辨率 (DPI):").pack(anchor=tk.W, pady=(10, 0))
+        self.image_dpi = tk.IntVar(value=150)
+        ttk.Spinbox(image_frame, from_=50, to=600, increment=10,
+                    textvariable=self.image_dpi).pack(fill=tk.X, padx=5, pady=5)
+        
+        # 黑白扫描页：检测只有黑白两种亮度的图片，改为1位CCITT G4编码
+        self.convert_bilevel = tk.BooleanVar(value=False)
+        ttk.Checkbutton(image_frame, text="黑白扫描页使用CCITT G4压缩",
+                        variable=self.convert_bilevel).pack(anchor=tk.W, pady=2)
+        
+        # 彩色扫描页：拆分为全分辨率文字遮罩和低分辨率背景/前景（MRC分层）
+        self.mrc_layers = tk.BooleanVar(value=False)
+        ttk.Checkbutton(image_frame, text="彩色扫描页MRC分层 (文字保持清晰)",
+                        variable=self.mrc_layers).pack(anchor=tk.W, pady=2)
+        
+        # 画质保护：有损处理后按页比较SSIM，不达标的页面改用更温和的设置
+        self.use_quality_guard = tk.BooleanVar(value=False)
+        ttk.Checkbutton(image_frame, text="画质保护 (最低SSIM):",
+                        variable=self.use_quality_guard).pack(anchor=tk.W, pady=(8, 2))
+        self.min_ssim = tk.DoubleVar(value=quality.DEFAULT_MIN_SSIM)
+        ttk.Spinbox(image_frame, from_=0.5, to=0.99, increment=0.01,
+                    textvariable=self.min_ssim).pack(fill=tk.X, padx=5, pady=2)
+        
         # 高级选项
         advanced_frame = ttk.LabelFrame(right_frame, text="高级选项")
         advanced_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -182,11 +217,41 @@ class PDFCompressTool:
                                       variable=self.optimize_images)
         images_check.pack(anchor=tk.W, pady=2)
         
+        # 按指定的zlib级别并行重新压缩无损编码的流，只保留变小的结果
+        self.recompress_streams = tk.BooleanVar(value=False)
+        ttk.Checkbutton(advanced_frame, text="重新压缩流 (Flate级别):",
+                        variable=self.recompress_streams).pack(anchor=tk.W, pady=2)
+        self.flate_level = tk.IntVar(value=9)
+        ttk.Spinbox(advanced_frame, from_=1, to=9, increment=1,
+                    textvariable=self.flate_level).pack(fill=tk.X, padx=5, pady=2)
+        
         self.remove_bookmarks = tk.BooleanVar(value=False)
         bookmarks_check = ttk.Checkbutton(advanced_frame, text="删除书签", 
                                          variable=self.remove_bookmarks)
         bookmarks_check.pack(anchor=tk.W, pady=2)
         
+        # Ghostscript执行设置：同时运行的进程数，单个文件的时间和内存上限
+        gs_frame = ttk.LabelFrame(right_frame, text="Ghostscript")
+        gs_frame.pack(fill=tk.X, padx=5, pady=10)
+        
+        ttk.Label(gs_frame, text="同时运行的进程数:").pack(anchor=tk.W)
+        self.gs_workers = tk.IntVar(value=os.cpu_count() or 1)
+        ttk.Spinbox(gs_frame, from_=1, to=64, increment=1,
+                    textvariable=self.gs_workers).pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(gs_frame, text="单个文件超时 (秒，0为不限):").pack(anchor=tk.W)
+        self.gs_timeout = tk.IntVar(value=ghostscript.DEFAULT_TIMEOUT)
+        ttk.Spinbox(gs_frame, from_=0, to=86400, increment=60,
+                    textvariable=self.gs_timeout).pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(gs_frame, text="单个文件内存上限 (MB，0为不限):").pack(anchor=tk.W)
+        self.gs_memory_limit = tk.IntVar(value=ghostscript.DEFAULT_MEMORY_LIMIT)
+        ttk.Spinbox(gs_frame, from_=0, to=65536, increment=256,
+                    textvariable=self.gs_memory_limit).pack(fill=tk.X, padx=5, pady=2)
+        
+        ttk.Label(gs_frame, text="Ghostscript输出:").pack(anchor=tk.W)
+        self.gs_log = scrolledtext.ScrolledText(gs_frame, height=6, wrap=tk.WORD)
+        self.gs_log.pack(fill=tk.X, padx=5, pady=2)
+        self.gs_log.config(state=tk.DISABLED)
+        
         # 输出选项
         output_frame = ttk.LabelFrame(right_frame, text="输出选项")
         output_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -201,6 +266,14 @@ class PDFCompressTool:
                                          variable=self.overwrite_original)
         overwrite_check.pack(anchor=tk.W, pady=2)
         
+        self.linearize_output = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="快速网页查看 (线性化)",
+                        variable=self.linearize_output).pack(anchor=tk.W, pady=2)
+
+        self.skip_known = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="跳过已处理的文件",
+                        variable=self.skip_known).pack(anchor=tk.W, pady=2)
+        
         # 底部按钮区域
         button_frame = ttk.Frame(self.parent)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -243,10 +316,7 @@ class PDFCompressTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.files_listbox.insert(tk.END, os.path.basename(file))
+        self.file_list_view.add(files)
         
         if files:
             self.update_file_info()
@@ -258,80 +328,145 @@ class PDFCompressTool:
             
         if messagebox.askyesno("确认", "确定要清空文件列表吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.analysis.clear()
+            self.file_list_view.refresh()
             self.clear_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和文档信息在后台读取"""
+        self.file_info_loader.start(self.selected_files)
+    
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         
-        if not self.selected_files:
+        if not files:
             self.file_info_text.insert(tk.END, "请先选择PDF文件")
             self.file_info_text.config(state=tk.DISABLED)
             return
         
         total_size = 0
+        pending = 0
         file_info = "已选文件信息:\n\n"
         
-        for file in self.selected_files:
-            file_name = os.path.basename(file)
-            file_size = os.path.getsize(file)
-            total_size += file_size
+        for file in files:
+            fields = details.get(file, {})
+            total_size += fields.get("size") or 0
+            if "summary" not in fields:
+                pending += 1
             
-            file_info += f"• {file_name}\n"
-            file_info += f"  大小: {self.format_file_size(file_size)}\n\n"
+            file_info += f"• {os.path.basename(file)}\n"
+            file_info += f"  大小: {size_text(fields)}\n"
+            file_info += f"  信息: {fields.get('summary', LOADING)}\n"
+            if file in self.analysis:
+                file_info += self.format_analysis(self.analysis[file])
+            file_info += "\n"
         
-        file_info += f"总计: {len(self.selected_files)} 个文件, {self.format_file_size(total_size)}"
+        file_info += f"总计: {len(files)} 个文件, {self.format_file_size(total_size)}"
+        if pending:
+            file_info += f" (还有 {pending} 个文件在读取中)"
         
         self.file_info_text.insert(tk.END, file_info)
         self.file_info_text.config(state=tk.DISABLED)
     
     def clear_file_info(self):
         """清空文件信息"""
+        self.file_info_loader.cancel()
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         self.file_info_text.config(state=tk.DISABLED)
     
     def format_file_size(self, size_bytes):
         """格式化文件大小显示"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.2f} {size_names[i]}"
+        return format_file_size(size_bytes)
     
     def analyze_files(self):
-        """分析文件"""
+        """分析文件的体积构成并给出压缩建议"""
         if not self.selected_files:
             messagebox.showwarning("警告", "请先选择要分析的PDF文件")
             return
         
-        # 这里可以实现更复杂的PDF分析功能
-        # 目前只是简单显示文件信息
-        self.update_file_info()
-        messagebox.showinfo("分析完成", "文件分析完成，请查看文件信息区域")
+        error = analyze.check_dependency()
+        if error:
+            messagebox.showerror("缺少依赖", error)
+            return
+        
+        def done(results):
+            for result in results:
+                self.analysis[result.input_path] = result
+            self.update_file_info()
+            failures = failure_summary(results)
+            if failures:
+                messagebox.showwarning("分析完成", f"部分文件分析失败:\n{failures}")
+            else:
+                messagebox.showinfo("分析完成", "文件分析完成，请查看文件信息区域")
+        
+        # 各文件在共享进程池中并行分析
+        run_in_background(self.parent, analyze.analyze_files, list(self.selected_files),
+                          on_done=done, in_pool=False,
+                          on_error=lambda e: messagebox.showerror("错误", f"分析文件时出错: {str(e)}"))
+    
+    def format_analysis(self, result):
+        """格式化单个文件的体积构成"""
+        if not result.success:
+            return f"  分析失败: {result.error}\n"
+        
+        info = result.info
+        labels = {"images": "图片", "fonts": "字体", "content": "内容流",
+                  "metadata": "元数据", "other": "其他流", "structure": "对象结构"}
+        text = f"  页数: {info['pages']}\n"
+        for key, label in labels.items():
+            size = info["categories"][key]
+            if size:
+                text += f"  {label}: {self.format_file_size(size)} ({size / max(1, result.original_size) * 100:.1f}%)\n"
+        for name, (count, size) in sorted(info["images"].items(), key=lambda item: -item[1][1]):
+            text += f"    图片 {name}: {count} 个, {self.format_file_size(size)}\n"
+        for key, label in (("subset", "子集字体"), ("full", "完整嵌入字体")):
+            if key in info["fonts"]:
+                count, size = info["fonts"][key]
+                text += f"    {label}: {count} 个, {self.format_file_size(size)}\n"
+        unused_count, unused_bytes = info["unused"]
+        if unused_count:
+            text += f"  无引用对象: {unused_count} 个, {self.format_file_size(unused_bytes)}\n"
+        if info["suggestions"]:
+            text += "  建议: " + "; ".join(f"{name} (约 {self.format_file_size(size)})"
+                                           for name, size in info["suggestions"]) + "\n"
+        else:
+            text += "  建议: 压缩空间有限\n"
+        return text
     
     def reset_compress_tool(self):
         """重置压缩工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.analysis.clear()
+            self.file_list_view.refresh()
             self.clear_file_info()
             self.compression_algorithm.set("pikepdf")
             self.compression_level.set("medium")
             self.image_quality.set(75)
             self.image_format.set("jpeg")
+            self.image_dpi.set(150)
+            self.convert_bilevel.set(False)
+            self.mrc_layers.set(False)
+            self.use_quality_guard.set(False)
+            self.min_ssim.set(quality.DEFAULT_MIN_SSIM)
+            self.use_target_size.set(False)
+            self.target_size_mb.set("2")
             self.remove_metadata.set(True)
             self.optimize_images.set(True)
+            self.recompress_streams.set(False)
+            self.flate_level.set(9)
             self.remove_bookmarks.set(False)
             self.output_suffix.set("_compressed")
             self.overwrite_original.set(False)
+            self.linearize_output.set(False)
+            self.skip_known.set(False)
+            self.gs_workers.set(os.cpu_count() or 1)
+            self.gs_timeout.set(ghostscript.DEFAULT_TIMEOUT)
+            self.gs_memory_limit.set(ghostscript.DEFAULT_MEMORY_LIMIT)
+            self.clear_gs_log()
     
     def start_compression(self):
         """开始压缩PDF文件"""
@@ -343,6 +478,17 @@ class PDFCompressTool:
         if not self.check_dependencies():
             return
         
+        # 检查目标大小
+        self.target_size = None
+        if self.use_target_size.get():
+            try:
+                self.target_size = int(float(self.target_size_mb.get()) * 1024 * 1024)
+            except ValueError:
+                self.target_size = 0
+            if self.target_size <= 0:
+                messagebox.showerror("错误", "请输入有效的目标大小")
+                return
+        
         # 选择输出目录（如果不覆盖原文件）
         output_dir = None
         if not self.overwrite_original.get():
@@ -356,6 +502,7 @@ class PDFCompressTool:
         self.progress_bar.pack(fill=tk.X, pady=(0, 10))  # 显示进度条
         
         # 在后台线程中执行压缩
+        self.clear_gs_log()
         self.stop_compression = False
         self.compression_thread = threading.Thread(
             target=self.compress_pdfs_thread,
@@ -389,20 +536,55 @@ class PDFCompressTool:
         self.reset_ui_after_compression()
         
         # 显示压缩结果
-        success_count = len([r for r in results if r[0]])
+        success_count = len([r for r in results if r.success])
         total_count = len(results)
         
         # 构建结果消息
         result_message = f"压缩完成:\n成功: {success_count}/{total_count} 个文件\n\n"
         
         # 添加每个文件的详细结果
-        for success, file_path, original_size, compressed_size, error in results:
-            file_name = os.path.basename(file_path)
-            if success:
-                compression_ratio = (1 - compressed_size / original_size) * 100
-                result_message += f"✓ {file_name}: {self.format_file_size(original_size)} → {self.format_file_size(compressed_size)} (减少 {compression_ratio:.1f}%)\n"
+        for result in results:
+            if "skipped" in result.info:
+                result_message += f"- {result.file_name}: 已跳过 ({fingerprint.SKIP_REASONS[result.info['skipped']]})\n"
+            elif result.success:
+                result_message += f"✓ {result.file_name}: {self.format_file_size(result.original_size)} → {self.format_file_size(result.output_size)} (减少 {result.reduction:.1f}%)"
+                if "target_size" in result.info:
+                    # 目标大小模式下显示选定的图片参数
+                    if result.info["dpi"]:
+                        result_message += f" [{result.info['dpi']} DPI, 质量 {result.info['quality']}]"
+                    if not result.info["target_met"]:
+                        result_message += " (未达到目标大小)"
+                if "profile" in result.info:
+                    # 自动模式下显示胜出的算法
+                    result_message += f" [{result.info['algorithm']}]"
+                if result.info.get("images", {}).get("recompressed"):
+                    image_stats = result.info["images"]
+                    result_message += f" 图片 {image_stats['recompressed']}/{image_stats['images']}"
+                if result.info.get("bilevel", {}).get("converted"):
+                    bilevel_stats = result.info["bilevel"]
+                    result_message += f" 黑白图片 {bilevel_stats['converted']}/{bilevel_stats['images']} 转为G4"
+                if result.info.get("mrc", {}).get("layered"):
+                    mrc_stats = result.info["mrc"]
+                    result_message += f" MRC分层 {mrc_stats['layered']}/{mrc_stats['images']} 页"
+                if "quality" in result.info:
+                    quality_stats = result.info["quality"]
+                    result_message += f" 最低SSIM {quality_stats['min_ssim']:.3f}"
+                    if quality_stats["fallback_pages"]:
+                        pages = ", ".join(str(page) for page in quality_stats["fallback_pages"])
+                        result_message += f" (第 {pages} 页已回退)"
+                    if quality_stats["failed_pages"]:
+                        result_message += f" ({len(quality_stats['failed_pages'])} 页仍低于阈值)"
+                if result.info.get("dedup", {}).get("duplicates"):
+                    dedup_stats = result.info["dedup"]
+                    result_message += f" 合并重复对象 {dedup_stats['duplicates']} 个 (回收 {self.format_file_size(dedup_stats['bytes_saved'])})"
+                if result.info.get("flate", {}).get("recompressed"):
+                    flate_stats = result.info["flate"]
+                    result_message += (f" 重新压缩流 {flate_stats['recompressed']}/{flate_stats['streams']} 个"
+                                       f" (节省 {self.format_file_size(flate_stats['bytes_saved'])},"
+                                       f" {self.format_file_size(flate_stats['throughput'])}/秒)")
+                result_message += "\n"
             else:
-                result_message += f"✗ {file_name}: {error}\n"
+                result_message += f"✗ {result.file_name}: {result.error}\n"
         
         # 显示结果
         self.show_compression_results(result_message)
@@ -435,195 +617,75 @@ class PDFCompressTool:
     
     def compress_pdfs(self, output_dir):
         """压缩PDF文件的核心功能"""
-        results = []
-        total_files = len(self.selected_files)
-        
-        for i, file_path in enumerate(self.selected_files):
-            if self.stop_compression:
-                break
-                
-            try:
-                # 更新进度
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                
-                # 确定输出路径
-                if self.overwrite_original.get():
-                    output_path = file_path
-                else:
-                    file_name = os.path.basename(file_path)
-                    name, ext = os.path.splitext(file_name)
-                    output_name = f"{name}{self.output_suffix.get()}{ext}"
-                    output_path = os.path.join(output_dir, output_name)
-                
-                # 获取原始文件大小
-                original_size = os.path.getsize(file_path)
-                
-                # 根据选择的算法执行压缩
-                algorithm = self.compression_algorithm.get()
-                if algorithm == "pikepdf":
-                    compressed_size = self.compress_with_pikepdf(file_path, output_path)
-                elif algorithm == "pypdfium2":
-                    compressed_size = self.compress_with_pypdfium2(file_path, output_path)
-                elif algorithm == "ghostscript":
-                    compressed_size = self.compress_with_ghostscript(file_path, output_path)
-                else:
-                    raise ValueError(f"不支持的压缩算法: {algorithm}")
-                
-                # 检查压缩结果
-                if compressed_size < 0:
-                    raise Exception("压缩失败")
-                
-                results.append((True, file_path, original_size, compressed_size, ""))
-                
-            except Exception as e:
-                results.append((False, file_path, 0, 0, str(e)))
-        
-        # 完成进度
-        self.progress_var.set(100)
-        
-        return results
+        return compress.compress_pdfs(
+            list(self.selected_files), output_dir,
+            algorithm=self.compression_algorithm.get(),
+            level=self.compression_level.get(),
+            output_suffix=self.output_suffix.get(),
+            overwrite_original=self.overwrite_original.get(),
+            progress=progress_callback(self.parent, self.progress_var),
+            should_stop=lambda: self.stop_compression,
+            optimize_images=self.optimize_images.get(),
+            image_quality=self.image_quality.get(),
+            image_format=self.image_format.get(),
+            image_dpi=self.image_dpi.get(),
+            target_size=self.target_size,
+            linearize=self.linearize_output.get(),
+            flate_level=self.flate_level.get() if self.recompress_streams.get() else None,
+            convert_bilevel=self.convert_bilevel.get(),
+            mrc_layers=self.mrc_layers.get(),
+            min_ssim=self.min_ssim.get() if self.use_quality_guard.get() else None,
+            skip_known=self.skip_known.get(),
+            gs_workers=self.gs_workers.get(),
+            gs_timeout=self.gs_timeout.get(),
+            gs_memory_limit=self.gs_memory_limit.get(),
+            log=lambda message: call_in_main_thread(self.parent, self.append_gs_log, message)
+        )
+    
+    def append_gs_log(self, message):
+        """在Ghostscript输出框末尾追加一行"""
+        self.gs_log.config(state=tk.NORMAL)
+        self.gs_log.insert(tk.END, message + "\n")
+        self.gs_log.see(tk.END)
+        self.gs_log.config(state=tk.DISABLED)
+    
+    def clear_gs_log(self):
+        """清空Ghostscript输出框"""
+        self.gs_log.config(state=tk.NORMAL)
+        self.gs_log.delete(1.0, tk.END)
+        self.gs_log.config(state=tk.DISABLED)
     
     def check_dependencies(self):
         """检查必要的依赖库是否已安装"""
-        algorithm = self.compression_algorithm.get()
-        
-        if algorithm == "pikepdf":
-            try:
-                import pikepdf
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
-                )
-                return False
-        
-        elif algorithm == "pypdfium2":
-            try:
-                import pypdfium2
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装pypdfium2库。\n\n请运行以下命令安装:\npip install pypdfium2"
-                )
-                return False
-        
-        elif algorithm == "ghostscript":
-            try:
-                import subprocess
-                # 检查Ghostscript是否在系统路径中
-                result = subprocess.run(["gs", "--version"], capture_output=True, text=True)
-                if result.returncode == 0:
-                    return True
-                else:
-                    messagebox.showerror(
-                        "缺少依赖", 
-                        "未安装Ghostscript。\n\n请从以下网址下载并安装:\nhttps://www.ghostscript.com/"
-                    )
-                    return False
-            except:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装Ghostscript。\n\n请从以下网址下载并安装:\nhttps://www.ghostscript.com/"
-                )
-                return False
-        
+        error = compress.check_dependency(self.compression_algorithm.get())
+        if not error and (self.optimize_images.get() or self.use_target_size.get()):
+            error = images.check_dependency()
+        if not error and self.convert_bilevel.get():
+            error = bilevel.check_dependency()
+        if not error and self.mrc_layers.get():
+            error = mrc.check_dependency()
+        if not error and self.use_quality_guard.get():
+            error = quality.check_dependency()
+        if not error and self.recompress_streams.get():
+            error = flate.check_dependency()
+        if not error and self.linearize_output.get():
+            error = linearize.check_dependency()
+        if error:
+            messagebox.showerror("缺少依赖", error)
+            return False
         return True
     
     def compress_with_pikepdf(self, input_path, output_path):
         """使用pikepdf压缩PDF"""
-        import pikepdf
-        
-        with pikepdf.open(input_path) as pdf:
-            # 根据压缩级别设置选项
-            level = self.compression_level.get()
-            
-            # 设置压缩选项
-            if level == "high":
-                # 强力压缩
-                pdf.save(output_path, 
-                        compress_streams=True,
-                        object_stream_mode=pikepdf.ObjectStreamMode.generate,
-                        stream_decode_level=pikepdf.StreamDecodeLevel.generalized)
-            elif level == "medium":
-                # 中等压缩
-                pdf.save(output_path, 
-                        compress_streams=True,
-                        object_stream_mode=pikepdf.ObjectStreamMode.preserve,
-                        stream_decode_level=pikepdf.StreamDecodeLevel.specialized)
-            else:
-                # 轻度压缩
-                pdf.save(output_path, 
-                        compress_streams=True,
-                        object_stream_mode=pikepdf.ObjectStreamMode.preserve)
-        
-        return os.path.getsize(output_path)
+        return compress.compress_with_pikepdf(input_path, output_path, self.compression_level.get())
     
     def compress_with_pypdfium2(self, input_path, output_path):
         """使用pypdfium2压缩PDF"""
-        import pypdfium2 as pdfium
-        
-        # 打开PDF
-        pdf = pdfium.PdfDocument(input_path)
-        
-        # 根据压缩级别设置选项
-        level = self.compression_level.get()
-        
-        # 设置保存选项
-        save_args = {}
-        if level == "high":
-            save_args["compress"] = pdfium.PdfCompressMode.ALL
-        elif level == "medium":
-            save_args["compress"] = pdfium.PdfCompressMode.IMAGE
-        else:
-            save_args["compress"] = pdfium.PdfCompressMode.NONE
-        
-        # 保存PDF
-        pdf.save(output_path, **save_args)
-        
-        # 关闭PDF
-        pdf.close()
-        
-        return os.path.getsize(output_path)
+        return compress.compress_with_pypdfium2(input_path, output_path, self.compression_level.get())
     
     def compress_with_ghostscript(self, input_path, output_path):
         """使用Ghostscript压缩PDF"""
-        import subprocess
-        
-        # 根据压缩级别设置Ghostscript参数
-        level = self.compression_level.get()
-        
-        if level == "high":
-            # 强力压缩
-            gs_args = [
-                "gs", "-sDEVICE=pdfwrite", "-dCompatibilityLevel=1.4",
-                "-dPDFSETTINGS=/screen", "-dNOPAUSE", "-dQUIET", "-dBATCH",
-                f"-sOutputFile={output_path}", input_path
-            ]
-        elif level == "medium":
-            # 中等压缩
-            gs_args = [
-                "gs", "-sDEVICE=pdfwrite", "-dCompatibilityLevel=1.4",
-                "-dPDFSETTINGS=/ebook", "-dNOPAUSE", "-dQUIET", "-dBATCH",
-                f"-sOutputFile={output_path}", input_path
-            ]
-        else:
-            # 轻度压缩
-            gs_args = [
-                "gs", "-sDEVICE=pdfwrite", "-dCompatibilityLevel=1.4",
-                "-dPDFSETTINGS=/printer", "-dNOPAUSE", "-dQUIET", "-dBATCH",
-                f"-sOutputFile={output_path}", input_path
-            ]
-        
-        # 执行Ghostscript命令
-        result = subprocess.run(gs_args, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise Exception(f"Ghostscript执行失败: {result.stderr}")
-        
-        return os.path.getsize(output_path)
+        return compress.compress_with_ghostscript(input_path, output_path, self.compression_level.get())
 
 # 独立测试函数
 def test_compress_tool():
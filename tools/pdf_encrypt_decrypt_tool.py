@@ -4,11 +4,17 @@ import os
 import threading
 from pathlib import Path
 
+from engine import encrypt, info
+from engine.common import format_file_size
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, progress_callback, size_text
+
 class PDFEncryptDecryptTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.process_thread = None
         self.stop_process = False
         
@@ -54,13 +60,8 @@ class PDFEncryptDecryptTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.files_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=8)
-        files_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                       command=self.files_listbox.yview)
-        self.files_listbox.configure(yscrollcommand=files_scrollbar.set)
-        
-        self.files_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        files_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, height=8)
         
         # 文件信息显示
         info_frame = ttk.Frame(left_frame)
@@ -69,6 +70,7 @@ class PDFEncryptDecryptTool:
         self.file_info_text = scrolledtext.ScrolledText(info_frame, height=8, wrap=tk.WORD)
         self.file_info_text.pack(fill=tk.BOTH, expand=True)
         self.file_info_text.config(state=tk.DISABLED)
+        self.file_info_loader = FileInfoLoader(self.parent, [file_size_stage, lambda file: {"encryption": self.check_file_encryption(file)}], self.render_file_info)
         
         # 右侧选项区域 - 使用Canvas添加滚动条
         right_container = ttk.Frame(content_frame)
@@ -278,10 +280,7 @@ class PDFEncryptDecryptTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.files_listbox.insert(tk.END, os.path.basename(file))
+        self.file_list_view.add(files)
         
         if files:
             self.update_file_info()
@@ -293,68 +292,58 @@ class PDFEncryptDecryptTool:
             
         if messagebox.askyesno("确认", "确定要清空文件列表吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和加密状态在后台读取"""
+        self.file_info_loader.start(self.selected_files)
+    
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         
-        if not self.selected_files:
+        if not files:
             self.file_info_text.insert(tk.END, "请先选择PDF文件")
             self.file_info_text.config(state=tk.DISABLED)
             return
         
         total_size = 0
+        pending = 0
         file_info = "已选文件信息:\n\n"
         
-        for file in self.selected_files:
-            file_name = os.path.basename(file)
-            file_size = os.path.getsize(file)
-            total_size += file_size
-            
-            # 尝试检测文件是否已加密
-            encryption_status = self.check_file_encryption(file)
+        for file in files:
+            fields = details.get(file, {})
+            total_size += fields.get("size") or 0
+            if "encryption" not in fields:
+                pending += 1
             
-            file_info += f"• {file_name}\n"
-            file_info += f"  大小: {self.format_file_size(file_size)}\n"
-            file_info += f"  加密状态: {encryption_status}\n\n"
+            file_info += f"• {os.path.basename(file)}\n"
+            file_info += f"  大小: {size_text(fields)}\n"
+            file_info += f"  加密状态: {fields.get('encryption', LOADING)}\n\n"
         
-        file_info += f"总计: {len(self.selected_files)} 个文件, {self.format_file_size(total_size)}"
+        file_info += f"总计: {len(files)} 个文件, {self.format_file_size(total_size)}"
+        if pending:
+            file_info += f" (还有 {pending} 个文件在读取中)"
         
         self.file_info_text.insert(tk.END, file_info)
         self.file_info_text.config(state=tk.DISABLED)
     
     def check_file_encryption(self, file_path):
         """检查PDF文件是否已加密"""
-        try:
-            import pikepdf
-            with pikepdf.open(file_path) as pdf:
-                return "未加密" if not pdf.is_encrypted else "已加密"
-        except pikepdf.PasswordError:
-            return "已加密 (需要密码)"
-        except Exception:
-            return "未知"
+        return info.check_encryption(file_path)
     
     def clear_file_info(self):
         """清空文件信息"""
+        self.file_info_loader.cancel()
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         self.file_info_text.config(state=tk.DISABLED)
     
     def format_file_size(self, size_bytes):
         """格式化文件大小显示"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.2f} {size_names[i]}"
+        return format_file_size(size_bytes)
     
     def analyze_files(self):
         """分析文件"""
@@ -369,7 +358,7 @@ class PDFEncryptDecryptTool:
         """重置工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
             self.operation_mode.set("encrypt")
             self.password_var.set("")
@@ -387,28 +376,12 @@ class PDFEncryptDecryptTool:
     
     def validate_inputs(self):
         """验证输入"""
-        if not self.selected_files:
-            return "请先选择PDF文件"
-        
-        mode = self.operation_mode.get()
-        password = self.password_var.get().strip()
-        
-        if mode == "encrypt":
-            if not password:
-                return "请设置加密密码"
-            
-            if len(password) < 4:
-                return "密码长度至少为4个字符"
-            
-            confirm_password = self.confirm_password_var.get().strip()
-            if password != confirm_password:
-                return "密码和确认密码不一致"
-        
-        else:  # 解密模式
-            if not password:
-                return "请输入PDF文件的密码"
-        
-        return None
+        return encrypt.validate_inputs(
+            list(self.selected_files),
+            self.operation_mode.get(),
+            self.password_var.get(),
+            self.confirm_password_var.get()
+        )
     
     def start_process(self):
         """开始加密或解密过程"""
@@ -474,7 +447,7 @@ class PDFEncryptDecryptTool:
         self.reset_ui_after_process()
         
         # 显示处理结果
-        success_count = len([r for r in results if r[0]])
+        success_count = len([r for r in results if r.success])
         total_count = len(results)
         
         # 构建结果消息
@@ -482,12 +455,11 @@ class PDFEncryptDecryptTool:
         result_message = f"{operation}完成:\n成功: {success_count}/{total_count} 个文件\n\n"
         
         # 添加每个文件的详细结果
-        for success, file_path, error in results:
-            file_name = os.path.basename(file_path)
-            if success:
-                result_message += f"✓ {file_name}: {operation}成功\n"
+        for result in results:
+            if result.success:
+                result_message += f"✓ {result.file_name}: {operation}成功\n"
             else:
-                result_message += f"✗ {file_name}: {error}\n"
+                result_message += f"✗ {result.file_name}: {result.error}\n"
         
         # 显示结果
         self.show_process_results(result_message)
@@ -520,145 +492,42 @@ class PDFEncryptDecryptTool:
     
     def encrypt_pdfs(self, output_dir, password):
         """加密PDF文件"""
-        import pikepdf
-        
-        results = []
-        total_files = len(self.selected_files)
-        
-        for i, file_path in enumerate(self.selected_files):
-            if self.stop_process:
-                break
-                
-            try:
-                # 更新进度
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                
-                # 确定输出路径
-                if self.overwrite_original.get():
-                    output_path = file_path
-                else:
-                    file_name = os.path.basename(file_path)
-                    name, ext = os.path.splitext(file_name)
-                    output_name = f"{name}{self.output_suffix.get()}{ext}"
-                    output_path = os.path.join(output_dir, output_name)
-                
-                # 打开PDF文件
-                with pikepdf.open(file_path) as pdf:
-                    # 设置加密选项
-                    encryption_args = {
-                        'owner': password,
-                        'user': password,
-                        'allow': self.get_permissions_flags()
-                    }
-                    
-                    # 根据选择的算法设置加密
-                    if self.encryption_algorithm.get() == "AES-256":
-                        encryption_args['aes'] = True
-                    
-                    # 保存加密文件
-                    pdf.save(output_path, encryption=encryption_args)
-                
-                results.append((True, file_path, ""))
-                
-            except Exception as e:
-                results.append((False, file_path, str(e)))
-        
-        # 完成进度
-        self.progress_var.set(100)
-        
-        return results
+        return encrypt.encrypt_pdfs(
+            list(self.selected_files), output_dir, password,
+            algorithm=self.encryption_algorithm.get(),
+            permissions=self.get_permissions_flags(),
+            output_suffix=self.output_suffix.get(),
+            overwrite_original=self.overwrite_original.get(),
+            progress=progress_callback(self.parent, self.progress_var),
+            should_stop=lambda: self.stop_process
+        )
     
     def decrypt_pdfs(self, output_dir, password):
         """解密PDF文件"""
-        import pikepdf
-        
-        results = []
-        total_files = len(self.selected_files)
-        
-        for i, file_path in enumerate(self.selected_files):
-            if self.stop_process:
-                break
-                
-            try:
-                # 更新进度
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                
-                # 确定输出路径
-                if self.overwrite_original.get():
-                    output_path = file_path
-                else:
-                    file_name = os.path.basename(file_path)
-                    name, ext = os.path.splitext(file_name)
-                    output_name = f"{name}{self.output_suffix.get()}{ext}"
-                    output_path = os.path.join(output_dir, output_name)
-                
-                # 尝试使用密码打开加密的PDF
-                try:
-                    with pikepdf.open(file_path, password=password) as pdf:
-                        # 保存未加密的文件
-                        pdf.save(output_path)
-                    
-                    results.append((True, file_path, ""))
-                    
-                except pikepdf.PasswordError:
-                    results.append((False, file_path, "密码错误或文件未加密"))
-                except Exception as e:
-                    results.append((False, file_path, str(e)))
-                
-            except Exception as e:
-                results.append((False, file_path, str(e)))
-        
-        # 完成进度
-        self.progress_var.set(100)
-        
-        return results
+        return encrypt.decrypt_pdfs(
+            list(self.selected_files), output_dir, password,
+            output_suffix=self.output_suffix.get(),
+            overwrite_original=self.overwrite_original.get(),
+            progress=progress_callback(self.parent, self.progress_var),
+            should_stop=lambda: self.stop_process
+        )
     
     def get_permissions_flags(self):
         """获取权限标志"""
-        import pikepdf
-        
-        permissions = []
-        
-        if self.allow_printing.get():
-            permissions.append(pikepdf.Permissions.print_lowres)
-            permissions.append(pikepdf.Permissions.print_highres)
-        
-        if self.allow_copying.get():
-            permissions.append(pikepdf.Permissions.extract)
-        
-        if self.allow_modification.get():
-            permissions.append(pikepdf.Permissions.modify)
-            permissions.append(pikepdf.Permissions.modify_annotations)
-            permissions.append(pikepdf.Permissions.modify_forms)
-            permissions.append(pikepdf.Permissions.modify_assembly)
-        
-        if self.allow_annotations.get():
-            permissions.append(pikepdf.Permissions.annotate)
-        
-        # 如果没有选择任何权限，则返回空权限
-        if not permissions:
-            return pikepdf.Permissions()
-        
-        # 合并权限
-        result = permissions[0]
-        for perm in permissions[1:]:
-            result |= perm
-        
-        return result
+        return encrypt.build_permissions(
+            allow_printing=self.allow_printing.get(),
+            allow_copying=self.allow_copying.get(),
+            allow_modification=self.allow_modification.get(),
+            allow_annotations=self.allow_annotations.get()
+        )
     
     def check_dependencies(self):
         """检查必要的依赖库是否已安装"""
-        try:
-            import pikepdf
-            return True
-        except ImportError:
-            messagebox.showerror(
-                "缺少依赖", 
-                "未安装pikepdf库。\n\n请运行以下命令安装:\npip install pikepdf"
-            )
+        error = encrypt.check_dependency()
+        if error:
+            messagebox.showerror("缺少依赖", error)
             return False
+        return True
 
 # 独立测试函数
 def test_encrypt_decrypt_tool():
@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import form
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background, show_results
 
 class PDFFormTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.form_fields = []
         
         # 创建界面
@@ -57,17 +61,8 @@ class PDFFormTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
-        
-        # 绑定列表框选择事件
-        self.file_listbox.bind('<<ListboxSelect>>', self.on_file_select)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, command=self.on_file_select)
         
         # 右侧表单编辑区域
         right_frame = ttk.LabelFrame(content_frame, text="表单编辑")
@@ -163,24 +158,19 @@ class PDFFormTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         # 清空表单字段
         self.fields_listbox.delete(0, tk.END)
@@ -196,7 +186,7 @@ class PDFFormTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空表单字段
             self.fields_listbox.delete(0, tk.END)
@@ -204,9 +194,9 @@ class PDFFormTool:
             
             messagebox.showinfo("成功", "已清空所有文件")
     
-    def on_file_select(self, event):
+    def on_file_select(self, event=None):
         """当选择PDF文件时，加载其表单字段"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             return
         
@@ -219,26 +209,15 @@ class PDFFormTool:
         
         try:
             # 读取PDF文件中的表单字段
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                
-                # 注意：PyPDF2的表单字段读取功能有限，这里我们简化处理
-                # 实际项目中可能需要更复杂的逻辑来处理表单字段
-                if reader.is_encrypted:
-                    messagebox.showwarning("警告", "PDF文件已加密，无法读取表单字段")
-                    return
-                
-                # 尝试获取表单字段
-                if hasattr(reader, 'get_fields'):
-                    fields = reader.get_fields()
-                    if fields:
-                        for field_name, field_info in fields.items():
-                            field_type = field_info.get('/FT', 'Unknown')
-                            field_value = field_info.get('/V', '')
-                            self.form_fields.append((field_name, field_type, field_value))
-                            self.fields_listbox.insert(tk.END, f"{field_name} ({field_type})")
-                    else:
-                        self.fields_listbox.insert(tk.END, "该PDF文件不包含表单字段")
+            fields = form.read_form_fields(pdf_file)
+            if fields:
+                for field_name, field_type, field_value in fields:
+                    self.form_fields.append((field_name, field_type, field_value))
+                    self.fields_listbox.insert(tk.END, f"{field_name} ({field_type})")
+            else:
+                self.fields_listbox.insert(tk.END, "该PDF文件不包含表单字段")
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
         except Exception as e:
             messagebox.showerror("错误", f"读取PDF文件表单字段时出错: {str(e)}")
     
@@ -327,7 +306,7 @@ class PDFFormTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空表单字段和编辑区域
             self.fields_listbox.delete(0, tk.END)
@@ -352,53 +331,17 @@ class PDFFormTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            for pdf_file in self.selected_files:
-                self.save_form_to_pdf(pdf_file, output_dir)
-            
-            messagebox.showinfo("成功", f"表单已成功保存到PDF文件，保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"保存表单到PDF文件时出错: {str(e)}")
+        # 在后台并行处理所有文件，避免界面卡顿
+        run_in_background(
+            self.parent, form.save_form_to_pdfs, list(self.selected_files), output_dir, list(self.form_fields),
+            on_done=lambda results: show_results(results, f"表单已成功保存到PDF文件，保存到:\n{output_dir}", "保存表单到PDF文件时出错"),
+            on_error=lambda e: messagebox.showerror("错误", f"保存表单到PDF文件时出错: {str(e)}"),
+            in_pool=False
+        )
     
     def save_form_to_pdf(self, pdf_file, output_dir):
         """将表单填写内容保存到PDF文件"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_filled_form.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 注意：PyPDF2的表单字段填写功能有限，这里我们简化处理
-                # 实际项目中可能需要使用更专业的PDF库，如PyMuPDF或reportlab
-                # 这里只是创建一个带有表单字段信息的PDF文件
-                
-                # 保存带表单的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                    
-                # 记录表单字段信息到外部文件
-                form_info_path = os.path.join(output_dir, f"{base_name}_form_fields.txt")
-                with open(form_info_path, 'w', encoding='utf-8') as form_file:
-                    form_file.write("PDF表单字段信息\n")
-                    form_file.write("=" * 50 + "\n")
-                    for i, (field_name, field_type, field_value) in enumerate(self.form_fields, 1):
-                        form_file.write(f"字段 {i}:\n")
-                        form_file.write(f"  名称: {field_name}\n")
-                        form_file.write(f"  类型: {field_type}\n")
-                        form_file.write(f"  值: {field_value}\n")
-                        form_file.write("\n")
-        except Exception as e:
-            raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+        return form.save_form_to_pdf(pdf_file, output_dir, self.form_fields)
 
 # 独立测试函数
 def test_form_tool():
@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import header_footer, info
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, run_in_background
+
 class PDFHeaderFooterTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         
         # 创建界面
@@ -47,6 +49,10 @@ class PDFHeaderFooterTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(
+            self.parent,
+            [file_size_stage, lambda file: {"pages": info.get_page_count_or_unknown(file, "无法读取")}],
+            self.render_file_info)
         
         # 右侧页眉页脚设置区域
         right_frame = ttk.LabelFrame(content_frame, text="页眉页脚设置")
@@ -187,22 +193,25 @@ class PDFHeaderFooterTool:
         self.update_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
         if self.selected_file:
-            file_name = os.path.basename(self.selected_file)
-            file_size = os.path.getsize(self.selected_file) / (1024 * 1024)  # MB
-            
-            # 获取PDF页数
-            try:
-                with open(self.selected_file, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: {num_pages}")
-            except Exception as e:
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: 无法读取")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        if "size" not in fields:
+            file_size = LOADING
+        elif fields["size"] is None:
+            file_size = "无法读取"
+        else:
+            file_size = f"{fields['size'] / (1024 * 1024):.2f} MB"
+        num_pages = fields.get("pages", LOADING)
+        self.file_info_label.config(text=f"文件: {os.path.basename(files[0])}\n大小: {file_size}\n页数: {num_pages}")
+    
     def reset_header_footer_tool(self):
         """重置PDF页眉页脚工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
@@ -237,49 +246,24 @@ class PDFHeaderFooterTool:
             if not messagebox.askyesno("确认", f"文件 {os.path.basename(output_path)} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行添加页眉页脚
-            self.add_header_footer_to_pdf(output_path)
-            messagebox.showinfo("成功", f"PDF页眉页脚已成功添加，保存到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"添加PDF页眉页脚时出错: {str(e)}")
+        # 在后台执行添加页眉页脚，避免界面卡顿
+        self.add_header_footer_to_pdf(
+            output_path,
+            on_done=lambda result: messagebox.showinfo("成功", f"PDF页眉页脚已成功添加，保存到:\n{output_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"添加PDF页眉页脚时出错: {str(e)}")
+        )
     
-    def add_header_footer_to_pdf(self, output_path):
-        """添加页眉页脚到PDF的核心功能"""
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            pdf_writer = PyPDF2.PdfWriter()
-            num_pages = len(pdf_reader.pages)
-            
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                # 根据应用范围决定是否添加页眉页脚
-                if self.should_apply_header_footer(page_num + 1, num_pages):
-                    # 简化实现：添加页眉页脚到PDF
-                    # 注意：完整的页眉页脚功能需要使用reportlab或其他库创建页眉页脚PDF
-                    # 这里我们只实现基本框架
-                    pass
-                pdf_writer.add_page(page)
-            
-            # 写入输出文件
-            with open(output_path, 'wb') as out_file:
-                pdf_writer.write(out_file)
+    def add_header_footer_to_pdf(self, output_path, on_done=None, on_error=None):
+        """添加页眉页脚到PDF的核心功能，提交到共享进程池执行"""
+        return run_in_background(self.parent, header_footer.add_header_footer_to_pdf,
+                                 self.selected_file, output_path,
+                                 scope=self.apply_scope.get(),
+                                 on_done=on_done, on_error=on_error)
     
     def should_apply_header_footer(self, page_num, total_pages):
         """根据应用范围决定是否在当前页添加页眉页脚"""
-        scope = self.apply_scope.get()
-        if scope == "all":
-            return True
-        elif scope == "odd":
-            return page_num % 2 == 1
-        elif scope == "even":
-            return page_num % 2 == 0
-        elif scope == "except_first":
-            return page_num > 1
-        elif scope == "first_only":
-            return page_num == 1
-        return True
+        return header_footer.should_apply_header_footer(page_num, total_pages,
+                                                        self.apply_scope.get())
 
 # 独立测试函数
 def test_header_footer_tool():
@@ -3,14 +3,18 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import threading
 from pathlib import Path
-import tempfile
-from PIL import Image
+
+from engine import image_converter, info
+from engine.common import format_file_size
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import LOADING, FileInfoLoader, call_in_main_thread, file_size_stage, size_text
 
 class PDFImageConverterTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.conversion_thread = None
         self.stop_conversion = False
         
@@ -69,13 +73,8 @@ class PDFImageConverterTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.files_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=8)
-        files_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                       command=self.files_listbox.yview)
-        self.files_listbox.configure(yscrollcommand=files_scrollbar.set)
-        
-        self.files_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        files_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, height=8)
         
         # 文件信息显示
         info_frame = ttk.Frame(left_frame)
@@ -84,6 +83,7 @@ class PDFImageConverterTool:
         self.file_info_text = scrolledtext.ScrolledText(info_frame, height=8, wrap=tk.WORD)
         self.file_info_text.pack(fill=tk.BOTH, expand=True)
         self.file_info_text.config(state=tk.DISABLED)
+        self.file_info_loader = FileInfoLoader(self.parent, [file_size_stage, self.load_pdf_detail], self.render_file_info)
         
         # 右侧转换选项区域 - 使用Canvas添加滚动条
         right_container = ttk.Frame(content_frame)
@@ -149,7 +149,7 @@ class PDFImageConverterTool:
         dpi_label.pack(side=tk.RIGHT, padx=(5, 0))
         
         # 页面范围
-        ttk.Label(self.pdf_to_image_frame, text="页面范围 (例如: 1-5, 8, 11-13):").pack(anchor=tk.W, pady=(10, 0))
+        ttk.Label(self.pdf_to_image_frame, text="页面范围 (例如: 1-5, 8, 11-, 1-20/2, odd, !3):").pack(anchor=tk.W, pady=(10, 0))
         self.pages_range = tk.StringVar()
         pages_entry = ttk.Entry(self.pdf_to_image_frame, textvariable=self.pages_range)
         pages_entry.pack(fill=tk.X, padx=5, pady=5)
@@ -310,10 +310,7 @@ class PDFImageConverterTool:
                 ]
             )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.files_listbox.insert(tk.END, os.path.basename(file))
+        self.file_list_view.add(files)
         
         if files:
             self.update_file_info()
@@ -325,7 +322,7 @@ class PDFImageConverterTool:
             
         if messagebox.askyesno("确认", "确定要清空文件列表吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
     
     def move_up(self):
@@ -333,116 +330,84 @@ class PDFImageConverterTool:
         if self.conversion_mode.get() != "image_to_pdf":
             return
             
-        selected_indices = self.files_listbox.curselection()
-        if not selected_indices or selected_indices[0] == 0:
-            return
-        
-        for index in selected_indices:
-            if index > 0:
-                # 交换列表中的元素
-                self.selected_files[index], self.selected_files[index-1] = self.selected_files[index-1], self.selected_files[index]
-                # 更新列表框
-                self.files_listbox.delete(index)
-                self.files_listbox.insert(index-1, os.path.basename(self.selected_files[index-1]))
-        
-        # 重新选择移动后的项目
-        for i in range(len(selected_indices)):
-            self.files_listbox.selection_set(selected_indices[0] - 1 + i)
+        self.file_list_view.move_selected(-1)
     
     def move_down(self):
         """下移选中的文件（图片转PDF时使用）"""
         if self.conversion_mode.get() != "image_to_pdf":
             return
             
-        selected_indices = self.files_listbox.curselection()
-        if not selected_indices or selected_indices[-1] == len(self.selected_files) - 1:
-            return
-        
-        for index in reversed(selected_indices):
-            if index < len(self.selected_files) - 1:
-                # 交换列表中的元素
-                self.selected_files[index], self.selected_files[index+1] = self.selected_files[index+1], self.selected_files[index]
-                # 更新列表框
-                self.files_listbox.delete(index)
-                self.files_listbox.insert(index+1, os.path.basename(self.selected_files[index+1]))
-        
-        # 重新选择移动后的项目
-        for i in range(len(selected_indices)):
-            self.files_listbox.selection_set(selected_indices[0] + 1 + i)
+        self.file_list_view.move_selected(1)
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小、页数或尺寸在后台读取"""
+        if self.conversion_mode.get() == "pdf_to_image":
+            detail_stage = self.load_pdf_detail
+        else:
+            detail_stage = self.load_image_detail
+        self.file_info_loader.start(self.selected_files, [file_size_stage, detail_stage])
+    
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         
-        if not self.selected_files:
+        if not files:
             mode_text = "PDF" if self.conversion_mode.get() == "pdf_to_image" else "图片"
             self.file_info_text.insert(tk.END, f"请先选择{mode_text}文件")
             self.file_info_text.config(state=tk.DISABLED)
             return
         
         total_size = 0
+        pending = 0
         file_info = "已选文件信息:\n\n"
         
-        for file in self.selected_files:
-            file_name = os.path.basename(file)
-            file_size = os.path.getsize(file)
-            total_size += file_size
+        for file in files:
+            fields = details.get(file, {})
+            total_size += fields.get("size") or 0
+            if "detail" not in fields:
+                pending += 1
             
+            file_info += f"• {os.path.basename(file)}\n"
+            file_info += f"  大小: {size_text(fields)}\n"
             if self.conversion_mode.get() == "pdf_to_image":
-                # PDF文件信息
-                page_count = self.get_pdf_page_count(file)
-                file_info += f"• {file_name}\n"
-                file_info += f"  大小: {self.format_file_size(file_size)}\n"
-                file_info += f"  页数: {page_count}\n\n"
+                file_info += f"  页数: {fields.get('detail', LOADING)}\n\n"
             else:
-                # 图片文件信息
-                image_info = self.get_image_info(file)
-                file_info += f"• {file_name}\n"
-                file_info += f"  大小: {self.format_file_size(file_size)}\n"
-                file_info += f"  尺寸: {image_info}\n\n"
+                file_info += f"  尺寸: {fields.get('detail', LOADING)}\n\n"
         
-        file_info += f"总计: {len(self.selected_files)} 个文件, {self.format_file_size(total_size)}"
+        file_info += f"总计: {len(files)} 个文件, {self.format_file_size(total_size)}"
+        if pending:
+            file_info += f" (还有 {pending} 个文件在读取中)"
         
         self.file_info_text.insert(tk.END, file_info)
         self.file_info_text.config(state=tk.DISABLED)
     
+    def load_pdf_detail(self, file_path):
+        """后台读取PDF页数"""
+        return {"detail": self.get_pdf_page_count(file_path)}
+    
+    def load_image_detail(self, file_path):
+        """后台读取图片尺寸"""
+        return {"detail": self.get_image_info(file_path)}
+    
     def get_pdf_page_count(self, file_path):
         """获取PDF文件的页数"""
-        try:
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                return len(pdf_reader.pages)
-        except:
-            return "未知"
+        return info.get_page_count_or_unknown(file_path)
     
     def get_image_info(self, file_path):
         """获取图片文件信息"""
-        try:
-            with Image.open(file_path) as img:
-                return f"{img.width} × {img.height} 像素"
-        except:
-            return "未知"
+        return info.get_image_info(file_path)
     
     def clear_file_info(self):
         """清空文件信息"""
+        self.file_info_loader.cancel()
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         self.file_info_text.config(state=tk.DISABLED)
     
     def format_file_size(self, size_bytes):
         """格式化文件大小显示"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.2f} {size_names[i]}"
+        return format_file_size(size_bytes)
     
     def preview_files(self):
         """预览文件"""
@@ -460,7 +425,7 @@ class PDFImageConverterTool:
         """重置工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
             self.conversion_mode.set("pdf_to_image")
             self.image_format.set("png")
@@ -544,7 +509,7 @@ class PDFImageConverterTool:
         self.reset_ui_after_conversion()
         
         # 显示转换结果
-        success_count = len([r for r in results if r[0]])
+        success_count = len([r for r in results if r.success])
         total_count = len(results)
         
         # 构建结果消息
@@ -552,15 +517,14 @@ class PDFImageConverterTool:
         result_message = f"{operation}完成:\n成功: {success_count}/{total_count} 个文件\n\n"
         
         # 添加每个文件的详细结果
-        for success, file_path, output_info, error in results:
-            file_name = os.path.basename(file_path)
-            if success:
+        for result in results:
+            if result.success:
                 if mode == "pdf_to_image":
-                    result_message += f"✓ {file_name}: 转换成功 ({output_info} 张图片)\n"
+                    result_message += f"✓ {result.file_name}: 转换成功 ({result.info.get('images', 0)} 张图片)\n"
                 else:
-                    result_message += f"✓ {file_name}: 已添加到PDF\n"
+                    result_message += f"✓ {result.file_name}: 已添加到PDF\n"
             else:
-                result_message += f"✗ {file_name}: {error}\n"
+                result_message += f"✗ {result.file_name}: {result.error}\n"
         
         # 显示结果
         self.show_conversion_results(result_message)
@@ -593,228 +557,51 @@ class PDFImageConverterTool:
                               command=result_window.destroy)
         close_btn.pack(pady=10)
     
+    def update_progress(self, percent, message=""):
+        """更新进度条和进度标签"""
+        self.progress_var.set(percent)
+        if message:
+            self.progress_label.config(text=message)
+    
+    def report_progress(self, percent, message=""):
+        """后台线程的进度回调，转交主线程更新界面"""
+        call_in_main_thread(self.parent, self.update_progress, percent, message)
+    
     def convert_pdfs_to_images(self, output_dir):
         """将PDF转换为图片"""
-        try:
-            import fitz  # PyMuPDF
-        except ImportError:
-            messagebox.showerror("错误", "未安装PyMuPDF库")
-            return []
-        
-        results = []
-        total_files = len(self.selected_files)
-        
-        for i, file_path in enumerate(self.selected_files):
-            if self.stop_conversion:
-                break
-                
-            try:
-                # 更新进度
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                self.progress_label.config(text=f"正在转换: {os.path.basename(file_path)}")
-                
-                # 打开PDF文档
-                doc = fitz.open(file_path)
-                
-                # 解析页面范围
-                pages = self.parse_pages_range(self.pages_range.get().strip(), len(doc))
-                
-                # 确定输出目录
-                if self.single_folder.get():
-                    # 所有图片放在同一文件夹
-                    base_output_dir = output_dir
-                    file_prefix = f"{os.path.splitext(os.path.basename(file_path))[0]}_{self.output_prefix.get()}"
-                else:
-                    # 每个PDF创建单独文件夹
-                    base_name = os.path.splitext(os.path.basename(file_path))[0]
-                    base_output_dir = os.path.join(output_dir, base_name)
-                    os.makedirs(base_output_dir, exist_ok=True)
-                    file_prefix = self.output_prefix.get()
-                
-                # 转换页面
-                image_count = 0
-                for page_num in pages:
-                    if page_num < len(doc):
-                        page = doc[page_num]
-                        
-                        # 将页面转换为图片
-                        pix = page.get_pixmap(matrix=fitz.Matrix(self.dpi_value.get()/72, self.dpi_value.get()/72))
-                        
-                        # 确定输出路径
-                        output_path = os.path.join(
-                            base_output_dir, 
-                            f"{file_prefix}{page_num+1:04d}.{self.image_format.get()}"
-                        )
-                        
-                        # 保存图片
-                        pix.save(output_path)
-                        image_count += 1
-                
-                # 关闭文档
-                doc.close()
-                
-                results.append((True, file_path, image_count, ""))
-                
-            except Exception as e:
-                results.append((False, file_path, 0, str(e)))
-        
-        # 完成进度
-        self.progress_var.set(100)
-        self.progress_label.config(text="转换完成")
-        
-        return results
+        return image_converter.convert_pdfs_to_images(
+            list(self.selected_files), output_dir,
+            image_format=self.image_format.get(),
+            dpi=self.dpi_value.get(),
+            pages_range=self.pages_range.get(),
+            output_prefix=self.output_prefix.get(),
+            single_folder=self.single_folder.get(),
+            progress=self.report_progress,
+            should_stop=lambda: self.stop_conversion
+        )
     
     def convert_images_to_pdf(self, output_dir):
         """将图片转换为PDF"""
-        try:
-            from reportlab.lib.pagesizes import letter, A4, A3, legal
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.utils import ImageReader
-        except ImportError:
-            messagebox.showerror("错误", "未安装reportlab库")
-            return []
-        
-        results = []
-        
-        try:
-            # 更新进度
-            self.progress_label.config(text="正在创建PDF文档...")
-            
-            # 确定页面大小
-            page_sizes = {
-                "A4": A4,
-                "A3": A3,
-                "letter": letter,
-                "legal": legal
-            }
-            page_size = page_sizes.get(self.page_size.get(), A4)
-            
-            # 确定输出路径
-            output_path = os.path.join(output_dir, self.pdf_output_name.get())
-            
-            # 创建PDF文档
-            c = canvas.Canvas(output_path, pagesize=page_size)
-            
-            # 处理方向
-            if self.page_orientation.get() == "landscape":
-                page_size = (page_size[1], page_size[0])  # 交换宽高
-            
-            # 添加图片到PDF
-            total_images = len(self.selected_files)
-            for i, image_path in enumerate(self.selected_files):
-                if self.stop_conversion:
-                    break
-                    
-                try:
-                    # 更新进度
-                    progress = (i / total_images) * 100
-                    self.progress_var.set(progress)
-                    self.progress_label.config(text=f"正在添加: {os.path.basename(image_path)}")
-                    
-                    # 打开图片
-                    img = Image.open(image_path)
-                    
-                    # 调整图片大小以适应页面
-                    img_width, img_height = img.size
-                    page_width, page_height = page_size
-                    
-                    # 计算缩放比例
-                    scale_x = page_width / img_width
-                    scale_y = page_height / img_height
-                    scale = min(scale_x, scale_y) * 0.9  # 留出边距
-                    
-                    # 计算图片在页面中的位置（居中）
-                    scaled_width = img_width * scale
-                    scaled_height = img_height * scale
-                    x = (page_width - scaled_width) / 2
-                    y = (page_height - scaled_height) / 2
-                    
-                    # 添加图片到PDF
-                    c.drawImage(image_path, x, y, scaled_width, scaled_height)
-                    
-                    # 添加新页面（如果不是最后一张图片）
-                    if i < total_images - 1:
-                        c.showPage()
-                    
-                    results.append((True, image_path, "", ""))
-                    
-                except Exception as e:
-                    results.append((False, image_path, "", str(e)))
-            
-            # 保存PDF
-            c.save()
-            
-            # 完成进度
-            self.progress_var.set(100)
-            self.progress_label.config(text="转换完成")
-            
-        except Exception as e:
-            results.append((False, "", "", f"创建PDF时出错: {str(e)}"))
-        
-        return results
+        output_path = os.path.join(output_dir, self.pdf_output_name.get())
+        return image_converter.convert_images_to_pdf(
+            list(self.selected_files), output_path,
+            page_size=self.page_size.get(),
+            orientation=self.page_orientation.get(),
+            progress=self.report_progress,
+            should_stop=lambda: self.stop_conversion
+        )
     
     def parse_pages_range(self, range_str, total_pages):
         """解析页面范围字符串"""
-        if not range_str:
-            return list(range(total_pages))
-        
-        try:
-            pages = []
-            parts = range_str.split(',')
-            
-            for part in parts:
-                part = part.strip()
-                if '-' in part:
-                    start_end = part.split('-')
-                    if len(start_end) != 2:
-                        raise ValueError(f"无效的范围格式: {part}")
-                    
-                    start = int(start_end[0].strip()) - 1  # 转换为0-based索引
-                    end = int(start_end[1].strip()) - 1   # 转换为0-based索引
-                    
-                    # 验证范围
-                    if start < 0 or end >= total_pages or start > end:
-                        raise ValueError(f"页面范围超出有效范围: {part}")
-                    
-                    pages.extend(range(start, end + 1))
-                else:
-                    # 单个页面
-                    page = int(part) - 1  # 转换为0-based索引
-                    if page < 0 or page >= total_pages:
-                        raise ValueError(f"页面超出有效范围: {part}")
-                    
-                    pages.append(page)
-            
-            return pages
-        except Exception as e:
-            raise ValueError(f"解析页面范围时出错: {str(e)}")
+        return image_converter.parse_pages_range(range_str, total_pages)
     
     def check_dependencies(self):
         """检查必要的依赖库是否已安装"""
-        mode = self.conversion_mode.get()
-        
-        if mode == "pdf_to_image":
-            try:
-                import fitz  # PyMuPDF
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装PyMuPDF库。\n\n请运行以下命令安装:\npip install PyMuPDF"
-                )
-                return False
-        else:
-            try:
-                from reportlab.lib.pagesizes import letter, A4
-                from reportlab.pdfgen import canvas
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装reportlab库。\n\n请运行以下命令安装:\npip install reportlab"
-                )
-                return False
+        error = image_converter.check_dependency(self.conversion_mode.get())
+        if error:
+            messagebox.showerror("缺少依赖", error)
+            return False
+        return True
 
 # 独立测试函数
 def test_pdf_image_converter():
@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import linearize, merge
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background
+
 class PDFMergeTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.merge_files = []  # 专门用于合并的文件列表
+        self.file_list = file_list if file_list is not None else []
+        self.merge_files = FileSet()  # 专门用于合并的文件列表
         
         # 创建界面
         self.create_merge_interface()
@@ -59,15 +63,8 @@ class PDFMergeTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 文件列表框
-        self.merge_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.merge_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 列表滚动条
-        list_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.merge_listbox.yview)
-        list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.merge_listbox.configure(yscrollcommand=list_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.merge_files)
         
         # 顺序调整按钮
         order_frame = ttk.Frame(left_frame)
@@ -96,7 +93,7 @@ class PDFMergeTool:
         range_frame = ttk.LabelFrame(right_frame, text="页面范围 (可选)")
         range_frame.pack(fill=tk.X, padx=5, pady=10)
         
-        ttk.Label(range_frame, text="格式: 1,3-5,7").pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(range_frame, text="格式: 1,3-5,7-,1-20/2,odd,!3").pack(anchor=tk.W, pady=(5, 0))
         self.page_range = tk.StringVar()
         range_entry = ttk.Entry(range_frame, textvariable=self.page_range)
         range_entry.pack(fill=tk.X, padx=5, pady=5)
@@ -115,6 +112,17 @@ class PDFMergeTool:
                                         variable=self.preserve_metadata)
         metadata_check.pack(anchor=tk.W, pady=2)
         
+        # 流式合并：逐个文件写出并去除重复资源，适合成百上千个文件；文件很多时会自动启用
+        self.streaming_merge = tk.BooleanVar(value=False)
+        streaming_check = ttk.Checkbutton(options_frame, text="流式合并 (大量文件，不保留书签)", 
+                                         variable=self.streaming_merge)
+        streaming_check.pack(anchor=tk.W, pady=2)
+        
+        # 线性化：浏览器通过范围请求只下载开头部分即可显示第一页
+        self.linearize_output = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="快速网页查看 (线性化)",
+                        variable=self.linearize_output).pack(anchor=tk.W, pady=2)
+        
         # 底部按钮区域
         button_frame = ttk.Frame(self.parent)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -138,25 +146,19 @@ class PDFMergeTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.merge_files:
-                self.merge_files.append(file)
-        
-        self.update_merge_list()
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件到合并列表")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件到合并列表")
     
     def remove_selected_files(self):
         """从合并列表中移除选中的文件"""
-        selected_indices = self.merge_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.merge_listbox.delete(index)
-            self.merge_files.pop(index)
+        self.file_list_view.remove_selected()
     
     def clear_merge_list(self):
         """清空合并列表"""
@@ -165,49 +167,19 @@ class PDFMergeTool:
             
         if messagebox.askyesno("确认", "确定要清空文件列表吗？"):
             self.merge_files.clear()
-            self.merge_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
     
     def update_merge_list(self):
         """更新合并列表显示"""
-        self.merge_listbox.delete(0, tk.END)
-        for file in self.merge_files:
-            self.merge_listbox.insert(tk.END, os.path.basename(file))
+        self.file_list_view.refresh()
     
     def move_up(self):
         """上移选中的文件"""
-        selected_indices = self.merge_listbox.curselection()
-        if not selected_indices or selected_indices[0] == 0:
-            return
-        
-        for index in selected_indices:
-            if index > 0:
-                # 交换列表中的元素
-                self.merge_files[index], self.merge_files[index-1] = self.merge_files[index-1], self.merge_files[index]
-                # 更新列表框
-                self.merge_listbox.delete(index)
-                self.merge_listbox.insert(index-1, os.path.basename(self.merge_files[index-1]))
-        
-        # 重新选择移动后的项目
-        for i in range(len(selected_indices)):
-            self.merge_listbox.selection_set(selected_indices[0] - 1 + i)
+        self.file_list_view.move_selected(-1)
     
     def move_down(self):
         """下移选中的文件"""
-        selected_indices = self.merge_listbox.curselection()
-        if not selected_indices or selected_indices[-1] == len(self.merge_files) - 1:
-            return
-        
-        for index in reversed(selected_indices):
-            if index < len(self.merge_files) - 1:
-                # 交换列表中的元素
-                self.merge_files[index], self.merge_files[index+1] = self.merge_files[index+1], self.merge_files[index]
-                # 更新列表框
-                self.merge_listbox.delete(index)
-                self.merge_listbox.insert(index+1, os.path.basename(self.merge_files[index+1]))
-        
-        # 重新选择移动后的项目
-        for i in range(len(selected_indices)):
-            self.merge_listbox.selection_set(selected_indices[0] + 1 + i)
+        self.file_list_view.move_selected(1)
     
     def reset_merge_tool(self):
         """重置合并工具"""
@@ -218,6 +190,8 @@ class PDFMergeTool:
             self.page_range.set("")
             self.add_bookmarks.set(True)
             self.preserve_metadata.set(True)
+            self.streaming_merge.set(False)
+            self.linearize_output.set(False)
     
     def start_merge(self):
         """开始合并PDF文件"""
@@ -225,6 +199,12 @@ class PDFMergeTool:
             messagebox.showwarning("警告", "请至少选择两个PDF文件进行合并")
             return
         
+        if self.linearize_output.get():
+            error = linearize.check_dependency()
+            if error:
+                messagebox.showerror("缺少依赖", error)
+                return
+        
         # 选择输出目录
         output_dir = filedialog.askdirectory(title="选择保存位置")
         if not output_dir:
@@ -237,50 +217,23 @@ class PDFMergeTool:
             if not messagebox.askyesno("确认", f"文件 {self.output_name.get()} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行合并
-            self.merge_pdfs(output_path)
-            messagebox.showinfo("成功", f"PDF文件已成功合并到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"合并PDF时出错: {str(e)}")
+        # 在后台执行合并，避免界面卡顿
+        self.merge_pdfs(
+            output_path,
+            on_done=lambda result: messagebox.showinfo("成功", f"PDF文件已成功合并到:\n{output_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"合并PDF时出错: {str(e)}")
+        )
     
-    def merge_pdfs(self, output_path):
-        """合并PDF文件的核心功能"""
-        pdf_merger = PyPDF2.PdfMerger()
-        
-        # 添加所有PDF文件
-        for pdf_file in self.merge_files:
-            # 如果有指定页面范围，则使用页面范围
-            page_range = self.page_range.get().strip()
-            if page_range:
-                pdf_merger.append(pdf_file, pages=self.parse_page_range(page_range))
-            else:
-                pdf_merger.append(pdf_file)
-        
-        # 写入输出文件
-        with open(output_path, 'wb') as output_file:
-            pdf_merger.write(output_file)
-        
-        pdf_merger.close()
+    def merge_pdfs(self, output_path, on_done=None, on_error=None):
+        """合并PDF文件的核心功能，提交到共享进程池执行"""
+        return run_in_background(self.parent, merge.merge_pdfs, list(self.merge_files), output_path,
+                                 self.page_range.get(), streaming=self.streaming_merge.get() or None,
+                                 linearize=self.linearize_output.get(),
+                                 on_done=on_done, on_error=on_error)
     
     def parse_page_range(self, range_str):
         """解析页面范围字符串"""
-        # 这里简化处理，实际应用中需要更复杂的解析逻辑
-        # 例如 "1,3-5,7" 应该解析为 [0, 2, 3, 4, 6] (0-based索引)
-        try:
-            pages = []
-            parts = range_str.split(',')
-            for part in parts:
-                if '-' in part:
-                    start, end = part.split('-')
-                    pages.extend(range(int(start)-1, int(end)))
-                else:
-                    pages.append(int(part)-1)
-            return pages
-        except:
-            # 如果解析失败，返回None表示使用所有页面
-            return None
+        return merge.parse_page_range(range_str)
 
 # 独立测试函数
 def test_merge_tool():
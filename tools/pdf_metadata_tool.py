@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import info, metadata
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, run_in_background
+
 class PDFMetadataTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         
         # 创建界面
@@ -47,6 +49,10 @@ class PDFMetadataTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(
+            self.parent,
+            [file_size_stage, lambda file: {"pages": info.get_page_count_or_unknown(file, "无法读取")}],
+            self.render_file_info)
         
         # 右侧元数据编辑区域
         right_frame = ttk.LabelFrame(content_frame, text="元数据编辑")
@@ -118,34 +124,33 @@ class PDFMetadataTool:
         self.update_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
         if self.selected_file:
-            file_name = os.path.basename(self.selected_file)
-            file_size = os.path.getsize(self.selected_file) / (1024 * 1024)  # MB
-            
-            # 获取PDF页数
-            try:
-                with open(self.selected_file, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: {num_pages}")
-            except Exception as e:
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: 无法读取")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        if "size" not in fields:
+            file_size = LOADING
+        elif fields["size"] is None:
+            file_size = "无法读取"
+        else:
+            file_size = f"{fields['size'] / (1024 * 1024):.2f} MB"
+        num_pages = fields.get("pages", LOADING)
+        self.file_info_label.config(text=f"文件: {os.path.basename(files[0])}\n大小: {file_size}\n页数: {num_pages}")
+    
     def load_metadata(self):
         """加载PDF文件的元数据"""
         try:
-            with open(self.selected_file, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                metadata = pdf_reader.metadata
-                
-                # 填充元数据字段
-                for field_name, var in self.metadata_fields.items():
-                    if hasattr(metadata, field_name.lower()):
-                        value = getattr(metadata, field_name.lower())
-                        var.set(value) if value else var.set("")
+            values = metadata.read_metadata(self.selected_file)
+            
+            # 填充元数据字段
+            for field_name, var in self.metadata_fields.items():
+                var.set(values.get(field_name, ""))
         except Exception as e:
             messagebox.showerror("错误", f"加载PDF元数据时出错: {str(e)}")
     
@@ -177,37 +182,18 @@ class PDFMetadataTool:
             if not messagebox.askyesno("确认", f"文件 {os.path.basename(output_path)} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行元数据保存
-            self.update_metadata(output_path)
-            messagebox.showinfo("成功", f"PDF元数据已成功修改，保存到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"保存PDF元数据时出错: {str(e)}")
+        # 在后台执行元数据保存，避免界面卡顿
+        self.update_metadata(
+            output_path,
+            on_done=lambda result: messagebox.showinfo("成功", f"PDF元数据已成功修改，保存到:\n{output_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"保存PDF元数据时出错: {str(e)}")
+        )
     
-    def update_metadata(self, output_path):
-        """更新PDF元数据的核心功能"""
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            # 添加所有页面
-            for page in pdf_reader.pages:
-                pdf_writer.add_page(page)
-            
-            # 创建新的元数据字典
-            new_metadata = {}
-            for field_name, var in self.metadata_fields.items():
-                value = var.get().strip()
-                if value:
-                    new_metadata[field_name] = value
-            
-            # 更新元数据
-            pdf_writer.add_metadata(new_metadata)
-            
-            # 写入输出文件
-            with open(output_path, 'wb') as out_file:
-                pdf_writer.write(out_file)
+    def update_metadata(self, output_path, on_done=None, on_error=None):
+        """更新PDF元数据的核心功能，提交到共享进程池执行"""
+        values = {field_name: var.get() for field_name, var in self.metadata_fields.items()}
+        return run_in_background(self.parent, metadata.update_metadata, self.selected_file, output_path,
+                                 values, on_done=on_done, on_error=on_error)
 
 # 独立测试函数
 def test_metadata_tool():
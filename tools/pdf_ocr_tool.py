@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader
+
+from engine import ocr
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background
 
 class PDFOCRTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.ocr_output = ""
         
         # 创建界面
@@ -57,14 +61,8 @@ class PDFOCRTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # OCR选项
         ocr_frame = ttk.LabelFrame(left_frame, text="OCR选项")
@@ -141,24 +139,19 @@ class PDFOCRTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
     
@@ -170,7 +163,7 @@ class PDFOCRTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清空所有文件")
     
     def browse_output_dir(self):
@@ -184,7 +177,7 @@ class PDFOCRTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空OCR结果
             self.ocr_text.delete(1.0, tk.END)
@@ -201,50 +194,24 @@ class PDFOCRTool:
             messagebox.showwarning("警告", "请先添加PDF文件")
             return
         
-        try:
-            # 执行OCR识别
-            self.perform_ocr()
-            messagebox.showinfo("成功", "OCR识别已完成")
-        except Exception as e:
-            messagebox.showerror("错误", f"OCR识别时出错: {str(e)}")
+        # 在后台执行OCR识别，避免界面卡顿
+        self.perform_ocr()
     
     def perform_ocr(self):
-        """执行OCR识别的核心功能"""
+        """执行OCR识别的核心功能，提交到共享进程池执行"""
         # 清空之前的OCR结果
         self.ocr_text.delete(1.0, tk.END)
+        self.ocr_text.insert(tk.END, "正在识别...\n")
         
-        # 注意：OCR功能需要安装额外的库，如pytesseract和PIL
-        # 这里我们简化处理，只提取PDF中的文本内容
-        # 实际项目中需要安装并配置Tesseract OCR引擎
-        
-        self.ocr_text.insert(tk.END, "OCR识别结果\n")
-        self.ocr_text.insert(tk.END, "=" * 50 + "\n\n")
-        
-        for pdf_file in self.selected_files:
-            file_name = os.path.basename(pdf_file)
-            self.ocr_text.insert(tk.END, f"文件: {file_name}\n")
-            self.ocr_text.insert(tk.END, "-" * 30 + "\n")
-            
-            try:
-                with open(pdf_file, 'rb') as f:
-                    reader = PdfReader(f)
-                    
-                    # 提取每一页的文本
-                    for page_num, page in enumerate(reader.pages, 1):
-                        self.ocr_text.insert(tk.END, f"第 {page_num} 页:\n")
-                        
-                        # 尝试直接提取文本（对于非扫描PDF）
-                        text = page.extract_text()
-                        if text:
-                            self.ocr_text.insert(tk.END, text + "\n\n")
-                        else:
-                            self.ocr_text.insert(tk.END, "(无法直接提取文本，该PDF可能是扫描件)\n")
-                            self.ocr_text.insert(tk.END, "注意: 完整的OCR功能需要安装Tesseract OCR引擎\n\n")
-            except Exception as e:
-                self.ocr_text.insert(tk.END, f"处理文件时出错: {str(e)}\n\n")
-        
-        self.ocr_text.insert(tk.END, "=" * 50 + "\n")
-        self.ocr_text.insert(tk.END, "OCR识别完成\n")
+        return run_in_background(self.parent, ocr.perform_ocr, list(self.selected_files), self.lang_var.get(),
+                                 on_done=self.ocr_complete, in_pool=False,
+                                 on_error=lambda e: messagebox.showerror("错误", f"OCR识别时出错: {str(e)}"))
+    
+    def ocr_complete(self, text):
+        """OCR识别完成后的回调"""
+        self.ocr_text.delete(1.0, tk.END)
+        self.ocr_text.insert(tk.END, text)
+        messagebox.showinfo("成功", "OCR识别已完成")
     
     def save_ocr_text(self):
         """保存OCR识别结果到文本文件"""
@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import fingerprint, linearize, optimize
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background
 
 class PDFOptimizeTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         
         # 创建界面
         self.create_optimize_interface()
@@ -56,14 +60,8 @@ class PDFOptimizeTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # 优化选项
         options_frame = ttk.LabelFrame(left_frame, text="优化选项")
@@ -76,17 +74,47 @@ class PDFOptimizeTool:
         level_frame.pack(fill=tk.X, padx=5, pady=2)
         
         low_radio = ttk.Radiobutton(level_frame, text="低 (保留更多质量)", 
-                                   variable=self.optimize_level, value="low")
+                                   variable=self.optimize_level, value="low",
+                                   command=self.apply_level_passes)
         low_radio.pack(anchor=tk.W)
         
         medium_radio = ttk.Radiobutton(level_frame, text="中 (平衡质量和大小)", 
-                                      variable=self.optimize_level, value="medium")
+                                      variable=self.optimize_level, value="medium",
+                                      command=self.apply_level_passes)
         medium_radio.pack(anchor=tk.W)
         
         high_radio = ttk.Radiobutton(level_frame, text="高 (更小文件大小)", 
-                                    variable=self.optimize_level, value="high")
+                                    variable=self.optimize_level, value="high",
+                                    command=self.apply_level_passes)
         high_radio.pack(anchor=tk.W)
         
+        # 优化步骤，选择级别时自动勾选对应的默认组合
+        ttk.Label(options_frame, text="优化步骤:").pack(anchor=tk.W, padx=5, pady=2)
+        passes_frame = ttk.Frame(options_frame)
+        passes_frame.pack(fill=tk.X, padx=5, pady=2)
+        self.pass_vars = {}
+        for index, name in enumerate(optimize.PASSES):
+            self.pass_vars[name] = tk.BooleanVar()
+            ttk.Checkbutton(passes_frame, text=optimize.PASS_NAMES[name],
+                            variable=self.pass_vars[name]).grid(row=index // 2, column=index % 2, sticky=tk.W)
+        self.apply_level_passes()
+        
+        # "重新压缩Flate流" 步骤使用的zlib级别
+        flate_frame = ttk.Frame(options_frame)
+        flate_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(flate_frame, text="Flate压缩级别:").pack(side=tk.LEFT)
+        self.flate_level = tk.IntVar(value=9)
+        ttk.Spinbox(flate_frame, from_=1, to=9, increment=1, width=5,
+                    textvariable=self.flate_level).pack(side=tk.LEFT, padx=5)
+        
+        self.linearize_output = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="快速网页查看 (线性化)",
+                        variable=self.linearize_output).pack(anchor=tk.W, padx=5, pady=2)
+        
+        self.skip_known = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="跳过已处理的文件",
+                        variable=self.skip_known).pack(anchor=tk.W, padx=5, pady=2)
+        
         # 右侧输出信息区域
         right_frame = ttk.LabelFrame(content_frame, text="优化信息")
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(5, 0), ipadx=10)
@@ -128,6 +156,16 @@ class PDFOptimizeTool:
                                 command=self.start_optimize, style='Action.TButton')
         optimize_btn.pack(side=tk.RIGHT)
         
+    def apply_level_passes(self):
+        """按优化级别勾选默认的优化步骤"""
+        level_passes = optimize.LEVEL_PASSES[self.optimize_level.get()]
+        for name, variable in self.pass_vars.items():
+            variable.set(name in level_passes)
+    
+    def selected_passes(self):
+        """当前勾选的优化步骤"""
+        return [name for name, variable in self.pass_vars.items() if variable.get()]
+    
     def add_pdf_files(self):
         """添加PDF文件"""
         files = filedialog.askopenfilenames(
@@ -135,24 +173,19 @@ class PDFOptimizeTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
     
@@ -164,7 +197,7 @@ class PDFOptimizeTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清空所有文件")
     
     def browse_output_dir(self):
@@ -178,7 +211,7 @@ class PDFOptimizeTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 清空输出信息
             self.output_text.delete(1.0, tk.END)
@@ -188,6 +221,10 @@ class PDFOptimizeTool:
             
             # 重置优化级别
             self.optimize_level.set("medium")
+            self.apply_level_passes()
+            self.flate_level.set(9)
+            self.linearize_output.set(False)
+            self.skip_known.set(False)
     
     def start_optimize(self):
         """开始优化PDF文件"""
@@ -195,6 +232,12 @@ class PDFOptimizeTool:
             messagebox.showwarning("警告", "请先添加PDF文件")
             return
         
+        if self.linearize_output.get():
+            error = linearize.check_dependency()
+            if error:
+                messagebox.showerror("缺少依赖", error)
+                return
+        
         if not self.output_dir.get():
             # 如果未选择输出目录，使用默认目录
             output_dir = os.path.dirname(self.selected_files[0])
@@ -202,77 +245,61 @@ class PDFOptimizeTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            # 执行优化
-            self.optimize_pdfs(output_dir)
-            messagebox.showinfo("成功", f"PDF优化已完成，结果保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"优化PDF文件时出错: {str(e)}")
+        # 在后台并行优化所有文件，避免界面卡顿
+        self.optimize_pdfs(
+            output_dir,
+            on_done=lambda results: messagebox.showinfo("成功", f"PDF优化已完成，结果保存到:\n{output_dir}"),
+            on_error=lambda e: messagebox.showerror("错误", f"优化PDF文件时出错: {str(e)}")
+        )
     
-    def optimize_pdfs(self, output_dir):
-        """优化PDF文件"""
+    def optimize_pdfs(self, output_dir, on_done=None, on_error=None):
+        """优化PDF文件，各文件在共享进程池中并行优化"""
         self.output_text.delete(1.0, tk.END)
         
         self.output_text.insert(tk.END, "PDF优化开始\n")
         self.output_text.insert(tk.END, "=" * 50 + "\n\n")
         
-        for pdf_file in self.selected_files:
-            file_name = os.path.basename(pdf_file)
-            self.output_text.insert(tk.END, f"正在优化: {file_name}\n")
-            
-            # 获取原始文件大小
-            original_size = os.path.getsize(pdf_file)
-            self.output_text.insert(tk.END, f"原始大小: {self.format_size(original_size)}\n")
+        def done(results):
+            self.show_optimize_log(results)
+            if on_done is not None:
+                on_done(results)
+        
+        return run_in_background(self.parent, optimize.optimize_pdfs, list(self.selected_files), output_dir,
+                                 self.optimize_level.get(), passes=self.selected_passes(),
+                                 linearize=self.linearize_output.get(), flate_level=self.flate_level.get(),
+                                 skip_known=self.skip_known.get(), on_done=done, on_error=on_error, in_pool=False)
+    
+    def show_optimize_log(self, results):
+        """输出每个文件的优化结果"""
+        for result in results:
+            self.output_text.insert(tk.END, f"正在优化: {result.file_name}\n")
+            self.output_text.insert(tk.END, f"原始大小: {self.format_size(result.original_size)}\n")
             
-            try:
-                # 执行优化
-                optimized_file = self.optimize_single_pdf(pdf_file, output_dir)
-                
-                # 获取优化后的文件大小
-                if os.path.exists(optimized_file):
-                    optimized_size = os.path.getsize(optimized_file)
-                    self.output_text.insert(tk.END, f"优化后大小: {self.format_size(optimized_size)}\n")
-                    
-                    # 计算压缩率
-                    compression_ratio = (1 - optimized_size / original_size) * 100
-                    self.output_text.insert(tk.END, f"压缩率: {compression_ratio:.2f}%\n")
-                    self.output_text.insert(tk.END, f"已保存: {self.format_size(original_size - optimized_size)}\n")
-                
+            if "skipped" in result.info:
+                self.output_text.insert(tk.END, f"已跳过: {fingerprint.SKIP_REASONS[result.info['skipped']]}\n\n")
+            elif result.success:
+                self.output_text.insert(tk.END, f"优化后大小: {self.format_size(result.output_size)}\n")
+                self.output_text.insert(tk.END, f"压缩率: {result.reduction:.2f}%\n")
+                self.output_text.insert(tk.END, f"已保存: {self.format_size(result.original_size - result.output_size)}\n")
+                for name, pass_stats in (result.info.get("passes") or {}).items():
+                    if pass_stats["bytes_saved"]:
+                        self.output_text.insert(tk.END, f"  {optimize.PASS_NAMES[name]}: "
+                                                        f"{self.format_size(pass_stats['bytes_saved'])}")
+                        if "throughput" in pass_stats:
+                            self.output_text.insert(tk.END, f" ({self.format_size(pass_stats['throughput'])}/秒)")
+                        self.output_text.insert(tk.END, "\n")
                 self.output_text.insert(tk.END, "优化完成\n\n")
-            except Exception as e:
-                self.output_text.insert(tk.END, f"优化失败: {str(e)}\n\n")
+            else:
+                self.output_text.insert(tk.END, f"优化失败: {result.error}\n\n")
         
         self.output_text.insert(tk.END, "=" * 50 + "\n")
         self.output_text.insert(tk.END, "所有PDF文件优化完成\n")
     
     def optimize_single_pdf(self, pdf_file, output_dir):
         """优化单个PDF文件"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_optimized.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面，这本身就是一种简单的优化
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 注意：更高级的优化需要使用专业的PDF优化库
-                # 这里我们使用PyPDF2的基本功能作为示例
-                
-                # 保存优化后的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                    
-            return output_path
-        except Exception as e:
-            raise Exception(f"优化文件时出错: {str(e)}")
+        return optimize.optimize_single_pdf(pdf_file, output_dir, self.optimize_level.get(),
+                                            self.selected_passes(), linearize=self.linearize_output.get(),
+                                            flate_level=self.flate_level.get())
     
     def format_size(self, size_bytes):
         """格式化文件大小"""
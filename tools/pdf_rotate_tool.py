@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import info, rotate
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, run_in_background
+
 class PDFRotateTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         
         # 创建界面
@@ -47,6 +49,10 @@ class PDFRotateTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(
+            self.parent,
+            [file_size_stage, lambda file: {"pages": info.get_page_count_or_unknown(file, "无法读取")}],
+            self.render_file_info)
         
         # 右侧选项区域
         right_frame = ttk.LabelFrame(content_frame, text="旋转选项")
@@ -89,7 +95,7 @@ class PDFRotateTool:
         range_entry_frame = ttk.Frame(range_frame)
         range_entry_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Label(range_entry_frame, text="格式: 1,3-5,7").pack(anchor=tk.W, pady=(0, 2))
+        ttk.Label(range_entry_frame, text="格式: 1,3-5,7-,1-20/2,odd,!3").pack(anchor=tk.W, pady=(0, 2))
         ttk.Entry(range_entry_frame, textvariable=self.custom_range).pack(fill=tk.X)
         
         # 输出选项
@@ -139,22 +145,25 @@ class PDFRotateTool:
         self.update_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
         if self.selected_file:
-            file_name = os.path.basename(self.selected_file)
-            file_size = os.path.getsize(self.selected_file) / (1024 * 1024)  # MB
-            
-            # 获取PDF页数
-            try:
-                with open(self.selected_file, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: {num_pages}")
-            except Exception as e:
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: 无法读取")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        if "size" not in fields:
+            file_size = LOADING
+        elif fields["size"] is None:
+            file_size = "无法读取"
+        else:
+            file_size = f"{fields['size'] / (1024 * 1024):.2f} MB"
+        num_pages = fields.get("pages", LOADING)
+        self.file_info_label.config(text=f"文件: {os.path.basename(files[0])}\n大小: {file_size}\n页数: {num_pages}")
+    
     def reset_rotate_tool(self):
         """重置PDF旋转工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
@@ -183,74 +192,29 @@ class PDFRotateTool:
             if not messagebox.askyesno("确认", f"文件 {self.output_name.get()} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行旋转
-            self.rotate_pdf(output_path)
-            messagebox.showinfo("成功", f"PDF页面已成功旋转，保存到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"旋转PDF页面时出错: {str(e)}")
-    
-    def rotate_pdf(self, output_path):
-        """旋转PDF页面的核心功能"""
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            pdf_writer = PyPDF2.PdfWriter()
-            num_pages = len(pdf_reader.pages)
-            
-            # 获取要旋转的页面
-            pages_to_rotate = self.get_pages_to_rotate(num_pages)
-            
-            # 旋转页面
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                if page_num in pages_to_rotate:
-                    page.rotate(self.rotate_angle.get())
-                pdf_writer.add_page(page)
-            
-            # 写入输出文件
-            with open(output_path, 'wb') as out_file:
-                pdf_writer.write(out_file)
-    
-    def get_pages_to_rotate(self, total_pages):
-        """获取要旋转的页面列表"""
-        page_range_type = self.page_range_type.get()
-        pages_to_rotate = []
-        
-        if page_range_type == "all":
-            pages_to_rotate = list(range(total_pages))
-        elif page_range_type == "odd":
-            pages_to_rotate = [i for i in range(total_pages) if (i + 1) % 2 == 1]
-        elif page_range_type == "even":
-            pages_to_rotate = [i for i in range(total_pages) if (i + 1) % 2 == 0]
-        elif page_range_type == "custom":
-            pages_to_rotate = self.parse_page_range(self.custom_range.get(), total_pages)
-        
-        return pages_to_rotate
+        # 在后台执行旋转，避免界面卡顿
+        self.rotate_pdf(
+            output_path,
+            on_done=lambda result: messagebox.showinfo("成功", f"PDF页面已成功旋转，保存到:\n{output_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"旋转PDF页面时出错: {str(e)}")
+        )
     
-    def parse_page_range(self, range_str, total_pages):
-        """解析页面范围字符串"""
-        if not range_str.strip():
-            return list(range(total_pages))
-        
-        try:
-            pages = []
-            parts = range_str.split(',')
-            for part in parts:
-                part = part.strip()
-                if '-' in part:
-                    start, end = part.split('-')
-                    start = int(start.strip()) - 1 if start.strip() else 0
-                    end = int(end.strip()) if end.strip() else total_pages
-                    pages.extend(range(max(0, start), min(total_pages, end)))
-                else:
-                    page = int(part.strip()) - 1
-                    if 0 <= page < total_pages:
-                        pages.append(page)
-            return sorted(list(set(pages)))
-        except:
-            messagebox.showwarning("警告", "页面范围格式错误，将旋转所有页面")
-            return list(range(total_pages))
+    def rotate_pdf(self, output_path, on_done=None, on_error=None):
+        """旋转PDF页面的核心功能，提交到共享进程池执行"""
+        scope = self.page_range_type.get()
+        custom_range = self.custom_range.get()
+        if scope == "custom":
+            try:
+                rotate.parse_page_range(custom_range, info.get_page_count(self.selected_file))
+            except ValueError:
+                messagebox.showwarning("警告", "页面范围格式错误，将旋转所有页面")
+                custom_range = ""
+        
+        return run_in_background(self.parent, rotate.rotate_pdf, self.selected_file, output_path,
+                                 angle=self.rotate_angle.get(),
+                                 scope=scope,
+                                 custom_range=custom_range,
+                                 on_done=on_done, on_error=on_error)
 
 # 独立测试函数
 def test_rotate_tool():
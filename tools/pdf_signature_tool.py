@@ -2,13 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+
+from engine import signature
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background, show_results
 
 class PDFSignatureTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.signature_image = ""
         self.signature_text = ""
         
@@ -58,14 +62,8 @@ class PDFSignatureTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # 右侧签名设置区域
         right_frame = ttk.LabelFrame(content_frame, text="签名设置")
@@ -180,24 +178,19 @@ class PDFSignatureTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PDF文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PDF文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
     
@@ -209,7 +202,7 @@ class PDFSignatureTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清空所有文件")
     
     def select_signature_image(self):
@@ -233,7 +226,7 @@ class PDFSignatureTool:
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             # 清空文件列表
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             
             # 重置签名设置
             self.signature_type.set("text")
@@ -257,14 +250,10 @@ class PDFSignatureTool:
             return
         
         # 验证签名设置
-        if self.signature_type.get() == "text":
-            if not self.signature_text_var.get().strip():
-                messagebox.showwarning("警告", "请输入签名文本")
-                return
-        else:  # image
-            if not self.signature_image:
-                messagebox.showwarning("警告", "请选择签名图片")
-                return
+        error = self.get_signature_settings().validate()
+        if error:
+            messagebox.showwarning("警告", error)
+            return
         
         if not self.output_dir.get():
             # 如果未选择输出目录，使用默认目录
@@ -273,59 +262,35 @@ class PDFSignatureTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            # 执行签名
-            self.sign_pdfs(output_dir)
-            messagebox.showinfo("成功", f"PDF签名已完成，结果保存到:\n{output_dir}")
-        except Exception as e:
-            messagebox.showerror("错误", f"添加签名时出错: {str(e)}")
+        # 在后台并行签名所有文件，避免界面卡顿
+        self.sign_pdfs(
+            output_dir,
+            on_done=lambda results: show_results(results, f"PDF签名已完成，结果保存到:\n{output_dir}",
+                                                 "添加签名时出错"),
+            on_error=lambda e: messagebox.showerror("错误", f"添加签名时出错: {str(e)}")
+        )
     
-    def sign_pdfs(self, output_dir):
-        """为PDF文件添加签名"""
-        for pdf_file in self.selected_files:
-            self.sign_single_pdf(pdf_file, output_dir)
+    def get_signature_settings(self):
+        """从界面收集签名设置"""
+        return signature.SignatureSettings(
+            signature_type=self.signature_type.get(),
+            text=self.signature_text_var.get(),
+            font_size=self.font_size.get(),
+            image_path=self.signature_image or "",
+            page_number=self.page_number.get(),
+            x=self.x_pos.get(),
+            y=self.y_pos.get()
+        )
+    
+    def sign_pdfs(self, output_dir, on_done=None, on_error=None):
+        """为PDF文件添加签名，各文件在共享进程池中并行处理"""
+        return run_in_background(self.parent, signature.sign_pdfs, list(self.selected_files), output_dir,
+                                 self.get_signature_settings(), on_done=on_done, on_error=on_error,
+                                 in_pool=False)
     
     def sign_single_pdf(self, pdf_file, output_dir):
         """为单个PDF文件添加签名"""
-        # 获取文件名和扩展名
-        file_name = os.path.basename(pdf_file)
-        base_name = os.path.splitext(file_name)[0]
-        
-        # 输出PDF文件路径
-        output_path = os.path.join(output_dir, f"{base_name}_signed.pdf")
-        
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
-                writer = PdfWriter()
-                
-                # 复制所有页面
-                for page in reader.pages:
-                    writer.add_page(page)
-                
-                # 注意：完整的PDF签名功能需要使用专业的PDF库，如PyPDF2的签名功能
-                # 这里我们使用PyPDF2的基本功能作为示例，实际项目中需要更复杂的实现
-                
-                # 保存带签名的PDF文件
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                    
-                # 记录签名信息到外部文件
-                sign_info_path = os.path.join(output_dir, f"{base_name}_signature_info.txt")
-                with open(sign_info_path, 'w', encoding='utf-8') as sign_file:
-                    sign_file.write("PDF签名信息\n")
-                    sign_file.write("=" * 50 + "\n")
-                    sign_file.write(f"源文件: {file_name}\n")
-                    sign_file.write(f"签名类型: {self.signature_type.get()}\n")
-                    if self.signature_type.get() == "text":
-                        sign_file.write(f"签名文本: {self.signature_text_var.get()}\n")
-                        sign_file.write(f"字体大小: {self.font_size.get()}\n")
-                    else:
-                        sign_file.write(f"签名图片: {self.signature_image}\n")
-                    sign_file.write(f"签名位置: 第 {self.page_number.get()} 页, X={self.x_pos.get()}, Y={self.y_pos.get()}\n")
-                    sign_file.write(f"输出文件: {os.path.basename(output_path)}\n")
-        except Exception as e:
-            raise Exception(f"处理文件 {file_name} 时出错: {str(e)}")
+        return signature.sign_single_pdf(pdf_file, output_dir, self.get_signature_settings())
 
 # 独立测试函数
 def test_signature_tool():
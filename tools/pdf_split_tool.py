@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import info, linearize, split
+from engine.common import format_file_size
+from tools.job_runner import LOADING, FileInfoLoader, run_in_background
+
 class PDFSplitTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         
         # 创建界面
@@ -47,6 +50,7 @@ class PDFSplitTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(self.parent, [self.load_page_count], self.render_file_info)
         
         # 页面预览区域
         preview_frame = ttk.LabelFrame(left_frame, text="页面预览")
@@ -77,12 +81,14 @@ class PDFSplitTool:
                        variable=self.split_mode, value="page_range").pack(anchor=tk.W, pady=2)
         ttk.Radiobutton(mode_frame, text="按固定页数", 
                        variable=self.split_mode, value="fixed_pages").pack(anchor=tk.W, pady=2)
+        ttk.Radiobutton(mode_frame, text="按文件大小", 
+                       variable=self.split_mode, value="max_bytes").pack(anchor=tk.W, pady=2)
         
         # 页面范围输入
         range_frame = ttk.LabelFrame(right_frame, text="页面范围")
         range_frame.pack(fill=tk.X, padx=5, pady=10)
         
-        ttk.Label(range_frame, text="格式: 1-3,5,7-9").pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(range_frame, text="格式: 1-3,5,7-9,10-").pack(anchor=tk.W, pady=(5, 0))
         self.page_range = tk.StringVar()
         range_entry = ttk.Entry(range_frame, textvariable=self.page_range)
         range_entry.pack(fill=tk.X, padx=5, pady=5)
@@ -95,6 +101,14 @@ class PDFSplitTool:
         fixed_entry = ttk.Entry(fixed_frame, textvariable=self.pages_per_split)
         fixed_entry.pack(fill=tk.X, padx=5, pady=5)
         
+        # 按文件大小分割时每份的上限
+        size_frame = ttk.LabelFrame(right_frame, text="每份最大 (MB)")
+        size_frame.pack(fill=tk.X, padx=5, pady=10)
+        
+        self.max_size_mb = tk.StringVar(value="10")
+        size_entry = ttk.Entry(size_frame, textvariable=self.max_size_mb)
+        size_entry.pack(fill=tk.X, padx=5, pady=5)
+        
         # 输出选项
         output_frame = ttk.LabelFrame(right_frame, text="输出选项")
         output_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -104,6 +118,15 @@ class PDFSplitTool:
         prefix_entry = ttk.Entry(output_frame, textvariable=self.output_prefix)
         prefix_entry.pack(fill=tk.X, padx=5, pady=5)
         
+        self.prune_resources = tk.BooleanVar(value=True)
+        prune_check = ttk.Checkbutton(output_frame, text="只保留页面用到的资源", 
+                                      variable=self.prune_resources)
+        prune_check.pack(anchor=tk.W, padx=5, pady=2)
+        
+        self.linearize_output = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="快速网页查看 (线性化)",
+                        variable=self.linearize_output).pack(anchor=tk.W, padx=5, pady=2)
+        
         # 底部按钮区域
         button_frame = ttk.Frame(self.parent)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -133,22 +156,30 @@ class PDFSplitTool:
             self.update_preview()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，页数在后台读取"""
         if self.selected_file:
-            try:
-                with open(self.selected_file, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    page_count = len(pdf_reader.pages)
-                    
-                    file_name = os.path.basename(self.selected_file)
-                    file_info = f"文件: {file_name}\n页数: {page_count}"
-                    self.file_info_label.config(text=file_info)
-                    
-            except Exception as e:
-                messagebox.showerror("错误", f"读取PDF文件时出错: {str(e)}")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def load_page_count(self, file_path):
+        """后台读取页数，出错时记录错误信息"""
+        try:
+            return {"pages": info.get_page_count(file_path)}
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        file_info = f"文件: {os.path.basename(files[0])}\n"
+        if "error" in fields:
+            file_info += f"读取PDF文件时出错: {fields['error']}"
+        else:
+            file_info += f"页数: {fields.get('pages', LOADING)}"
+        self.file_info_label.config(text=file_info)
+    
     def update_preview(self):
         """更新页面预览"""
         self.preview_text.delete(1.0, tk.END)
@@ -158,24 +189,20 @@ class PDFSplitTool:
             return
         
         try:
-            with open(self.selected_file, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                page_count = len(pdf_reader.pages)
-                
-                preview_text = f"PDF文件预览:\n\n"
-                preview_text += f"总页数: {page_count}\n\n"
-                preview_text += "页面列表:\n"
-                
-                # 显示前10页的预览信息
-                for i in range(min(10, page_count)):
-                    page = pdf_reader.pages[i]
-                    text = page.extract_text()[:100]  # 只取前100个字符
-                    preview_text += f"第{i+1}页: {text}...\n"
-                
-                if page_count > 10:
-                    preview_text += f"... 还有 {page_count - 10} 页\n"
-                
-                self.preview_text.insert(tk.END, preview_text)
+            page_count, snippets = info.preview_pdf(self.selected_file, max_pages=10)
+            
+            preview_text = f"PDF文件预览:\n\n"
+            preview_text += f"总页数: {page_count}\n\n"
+            preview_text += "页面列表:\n"
+            
+            # 显示前10页的预览信息
+            for i, text in snippets:
+                preview_text += f"第{i+1}页: {text}...\n"
+            
+            if page_count > 10:
+                preview_text += f"... 还有 {page_count - 10} 页\n"
+            
+            self.preview_text.insert(tk.END, preview_text)
                 
         except Exception as e:
             self.preview_text.insert(tk.END, f"预览时出错: {str(e)}")
@@ -224,7 +251,10 @@ class PDFSplitTool:
             self.split_mode.set("every_page")
             self.page_range.set("")
             self.pages_per_split.set("1")
+            self.max_size_mb.set("10")
             self.output_prefix.set("分割文档_")
+            self.prune_resources.set(True)
+            self.linearize_output.set(False)
             self.update_file_info()
             self.update_preview()
             self.update_interface_state()
@@ -235,142 +265,62 @@ class PDFSplitTool:
             messagebox.showwarning("警告", "请先选择要分割的PDF文件")
             return
         
+        if self.linearize_output.get():
+            error = linearize.check_dependency()
+            if error:
+                messagebox.showerror("缺少依赖", error)
+                return
+        
         # 选择输出目录
         output_dir = filedialog.askdirectory(title="选择保存位置")
         if not output_dir:
             return
         
-        try:
-            # 执行分割
-            result = self.split_pdf(output_dir)
-            messagebox.showinfo("成功", f"PDF文件已成功分割\n生成了 {result} 个文件")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"分割PDF时出错: {str(e)}")
-    
-    def split_pdf(self, output_dir):
-        """分割PDF文件的核心功能"""
-        with open(self.selected_file, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            total_pages = len(pdf_reader.pages)
-            
-            mode = self.split_mode.get()
-            
-            if mode == "every_page":
-                # 每页一个文件
-                return self.split_every_page(pdf_reader, output_dir, total_pages)
-            elif mode == "page_range":
-                # 按页面范围分割
-                return self.split_by_range(pdf_reader, output_dir, total_pages)
-            elif mode == "fixed_pages":
-                # 按固定页数分割
-                return self.split_by_fixed_pages(pdf_reader, output_dir, total_pages)
-    
-    def split_every_page(self, pdf_reader, output_dir, total_pages):
-        """每页一个文件的分割方式"""
-        for page_num in range(total_pages):
-            pdf_writer = PyPDF2.PdfWriter()
-            pdf_writer.add_page(pdf_reader.pages[page_num])
-            
-            output_filename = f"{self.output_prefix.get()}{page_num + 1}.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            with open(output_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
-        
-        return total_pages
+        # 在后台执行分割，避免界面卡顿
+        self.split_pdf(output_dir, on_done=self.split_complete, on_error=self.split_failed)
     
-    def split_by_range(self, pdf_reader, output_dir, total_pages):
-        """按页面范围分割"""
-        range_str = self.page_range.get().strip()
-        if not range_str:
-            messagebox.showwarning("警告", "请输入页面范围")
-            return 0
-        
-        # 解析页面范围
-        ranges = self.parse_page_ranges(range_str, total_pages)
-        if not ranges:
-            return 0
-        
-        file_count = 0
-        for i, (start, end) in enumerate(ranges):
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            for page_num in range(start, end + 1):
-                pdf_writer.add_page(pdf_reader.pages[page_num])
-            
-            output_filename = f"{self.output_prefix.get()}{i + 1}.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            with open(output_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
-            
-            file_count += 1
-        
-        return file_count
+    def split_complete(self, results):
+        """分割完成后的回调"""
+        original_size = sum(result.original_size for result in results)
+        output_size = sum(result.output_size for result in results)
+        message = f"PDF文件已成功分割\n生成了 {len(results)} 个文件"
+        if original_size > output_size:
+            message += (f"\n\n裁剪未用资源: {format_file_size(original_size)} -> "
+                        f"{format_file_size(output_size)}")
+        over_limit = sum(1 for result in results if result.info.get("over_limit"))
+        if over_limit:
+            message += f"\n\n有 {over_limit} 个文件只含一页但仍超过大小上限"
+        messagebox.showinfo("成功", message)
     
-    def split_by_fixed_pages(self, pdf_reader, output_dir, total_pages):
-        """按固定页数分割"""
-        try:
-            pages_per_split = int(self.pages_per_split.get())
-            if pages_per_split <= 0:
-                messagebox.showwarning("警告", "每份页数必须大于0")
-                return 0
-        except ValueError:
-            messagebox.showwarning("警告", "请输入有效的页数")
-            return 0
-        
-        file_count = 0
-        for i in range(0, total_pages, pages_per_split):
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            end_page = min(i + pages_per_split, total_pages)
-            for page_num in range(i, end_page):
-                pdf_writer.add_page(pdf_reader.pages[page_num])
-            
-            output_filename = f"{self.output_prefix.get()}{file_count + 1}.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            with open(output_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
-            
-            file_count += 1
-        
-        return file_count
+    def split_failed(self, error):
+        """分割出错时的回调"""
+        if isinstance(error, ValueError):
+            messagebox.showwarning("警告", str(error))
+        else:
+            messagebox.showerror("错误", f"分割PDF时出错: {str(error)}")
     
-    def parse_page_ranges(self, range_str, total_pages):
-        """解析页面范围字符串"""
-        try:
-            ranges = []
-            parts = range_str.split(',')
-            
-            for part in parts:
-                part = part.strip()
-                if '-' in part:
-                    start_end = part.split('-')
-                    if len(start_end) != 2:
-                        raise ValueError(f"无效的范围格式: {part}")
-                    
-                    start = int(start_end[0].strip()) - 1  # 转换为0-based索引
-                    end = int(start_end[1].strip()) - 1   # 转换为0-based索引
-                    
-                    # 验证范围
-                    if start < 0 or end >= total_pages or start > end:
-                        raise ValueError(f"页面范围超出有效范围: {part}")
-                    
-                    ranges.append((start, end))
-                else:
-                    # 单个页面
-                    page = int(part) - 1  # 转换为0-based索引
-                    if page < 0 or page >= total_pages:
-                        raise ValueError(f"页面超出有效范围: {part}")
-                    
-                    ranges.append((page, page))
-            
-            return ranges
-        except Exception as e:
-            messagebox.showerror("错误", f"解析页面范围时出错: {str(e)}")
-            return None
+    def split_pdf(self, output_dir, on_done=None, on_error=None):
+        """分割PDF文件的核心功能，提交到共享进程池执行"""
+        max_bytes = None
+        if self.split_mode.get() == "max_bytes":
+            try:
+                max_bytes = int(float(self.max_size_mb.get()) * 1024 * 1024)
+            except ValueError:
+                messagebox.showwarning("警告", "请输入有效的文件大小")
+                return None
+        
+        return run_in_background(
+            self.parent, split.split_pdf,
+            self.selected_file, output_dir,
+            mode=self.split_mode.get(),
+            page_range=self.page_range.get(),
+            pages_per_split=self.pages_per_split.get(),
+            output_prefix=self.output_prefix.get(),
+            prune_resources=self.prune_resources.get(),
+            max_bytes=max_bytes,
+            linearize=self.linearize_output.get(),
+            on_done=on_done, on_error=on_error
+        )
 
 # 独立测试函数
 def test_split_tool():
@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
 
+from engine import info, pdf_to_text
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, run_in_background
+
 class PDFToTextTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         
         # 创建界面
@@ -47,6 +49,10 @@ class PDFToTextTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(
+            self.parent,
+            [file_size_stage, lambda file: {"pages": info.get_page_count_or_unknown(file, "无法读取")}],
+            self.render_file_info)
         
         # 右侧选项区域
         right_frame = ttk.LabelFrame(content_frame, text="转换选项")
@@ -66,7 +72,7 @@ class PDFToTextTool:
         range_frame = ttk.LabelFrame(right_frame, text="转换范围 (可选)")
         range_frame.pack(fill=tk.X, padx=5, pady=10)
         
-        ttk.Label(range_frame, text="格式: 1,3-5,7").pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(range_frame, text="格式: 1,3-5,7-,1-20/2,odd,!3").pack(anchor=tk.W, pady=(5, 0))
         self.page_range = tk.StringVar()
         range_entry = ttk.Entry(range_frame, textvariable=self.page_range)
         range_entry.pack(fill=tk.X, padx=5, pady=5)
@@ -117,22 +123,25 @@ class PDFToTextTool:
         self.update_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
         if self.selected_file:
-            file_name = os.path.basename(self.selected_file)
-            file_size = os.path.getsize(self.selected_file) / (1024 * 1024)  # MB
-            
-            # 获取PDF页数
-            try:
-                with open(self.selected_file, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: {num_pages}")
-            except Exception as e:
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: 无法读取")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        if "size" not in fields:
+            file_size = LOADING
+        elif fields["size"] is None:
+            file_size = "无法读取"
+        else:
+            file_size = f"{fields['size'] / (1024 * 1024):.2f} MB"
+        num_pages = fields.get("pages", LOADING)
+        self.file_info_label.config(text=f"文件: {os.path.basename(files[0])}\n大小: {file_size}\n页数: {num_pages}")
+    
     def reset_pdf_to_text_tool(self):
         """重置PDF转文本工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
@@ -160,58 +169,25 @@ class PDFToTextTool:
             if not messagebox.askyesno("确认", f"文件 {self.output_name.get()} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行转换
-            self.convert_pdf_to_text(output_path)
-            messagebox.showinfo("成功", f"PDF转文本已完成，保存到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"转换PDF到文本时出错: {str(e)}")
+        # 在后台执行转换，避免界面卡顿
+        self.convert_pdf_to_text(
+            output_path,
+            on_done=lambda result: messagebox.showinfo("成功", f"PDF转文本已完成，保存到:\n{output_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"转换PDF到文本时出错: {str(e)}")
+        )
     
-    def convert_pdf_to_text(self, output_path):
-        """将PDF转换为文本的核心功能"""
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            num_pages = len(pdf_reader.pages)
-            
-            # 解析页面范围
-            page_indices = self.parse_page_range(self.page_range.get(), num_pages)
-            
-            # 提取文本
-            text_content = ""
-            for page_num in page_indices:
-                page = pdf_reader.pages[page_num]
-                text_content += f"--- 第 {page_num + 1} 页 ---\n"
-                text_content += page.extract_text()
-                text_content += "\n\n"
-            
-            # 保存到文件
-            with open(output_path, 'w', encoding='utf-8') as out_file:
-                out_file.write(text_content)
-    
-    def parse_page_range(self, range_str, total_pages):
-        """解析页面范围字符串"""
-        if not range_str.strip():
-            return list(range(total_pages))
-        
+    def convert_pdf_to_text(self, output_path, on_done=None, on_error=None):
+        """将PDF转换为文本的核心功能，提交到共享进程池执行"""
+        page_range = self.page_range.get()
         try:
-            pages = []
-            parts = range_str.split(',')
-            for part in parts:
-                part = part.strip()
-                if '-' in part:
-                    start, end = part.split('-')
-                    start = int(start.strip()) - 1 if start.strip() else 0
-                    end = int(end.strip()) if end.strip() else total_pages
-                    pages.extend(range(max(0, start), min(total_pages, end)))
-                else:
-                    page = int(part.strip()) - 1
-                    if 0 <= page < total_pages:
-                        pages.append(page)
-            return sorted(list(set(pages)))
-        except:
+            pdf_to_text.parse_page_range(page_range, info.get_page_count(self.selected_file))
+        except ValueError:
             messagebox.showwarning("警告", "页面范围格式错误，将转换所有页面")
-            return list(range(total_pages))
+            page_range = ""
+        
+        return run_in_background(self.parent, pdf_to_text.convert_pdf_to_text,
+                                 self.selected_file, output_path, page_range,
+                                 on_done=on_done, on_error=on_error)
 
 # 独立测试函数
 def test_pdf_to_text_tool():
@@ -3,13 +3,18 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import threading
 from pathlib import Path
-import tempfile
+
+from engine import info, pdf_to_word
+from engine.common import format_file_size
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import LOADING, FileInfoLoader, call_in_main_thread, file_size_stage, size_text
 
 class PDFToWordTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         self.conversion_thread = None
         self.stop_conversion = False
         
@@ -55,13 +60,8 @@ class PDFToWordTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.files_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=8)
-        files_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                       command=self.files_listbox.yview)
-        self.files_listbox.configure(yscrollcommand=files_scrollbar.set)
-        
-        self.files_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        files_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files, height=8)
         
         # 文件信息显示
         info_frame = ttk.Frame(left_frame)
@@ -70,6 +70,7 @@ class PDFToWordTool:
         self.file_info_text = scrolledtext.ScrolledText(info_frame, height=8, wrap=tk.WORD)
         self.file_info_text.pack(fill=tk.BOTH, expand=True)
         self.file_info_text.config(state=tk.DISABLED)
+        self.file_info_loader = FileInfoLoader(self.parent, [file_size_stage, lambda file: {"pages": self.get_pdf_page_count(file)}], self.render_file_info)
         
         # 右侧转换选项区域 - 使用Canvas添加滚动条
         right_container = ttk.Frame(content_frame)
@@ -142,7 +143,7 @@ class PDFToWordTool:
         pages_frame = ttk.LabelFrame(right_frame, text="页面范围")
         pages_frame.pack(fill=tk.X, padx=5, pady=10)
         
-        ttk.Label(pages_frame, text="转换页面范围 (例如: 1-5, 8, 11-13):").pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(pages_frame, text="转换页面范围 (例如: 1-5, 8, 11-, 1-20/2, odd, !3):").pack(anchor=tk.W, pady=(5, 0))
         self.pages_range = tk.StringVar()
         pages_entry = ttk.Entry(pages_frame, textvariable=self.pages_range)
         pages_entry.pack(fill=tk.X, padx=5, pady=5)
@@ -243,10 +244,7 @@ class PDFToWordTool:
             filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.files_listbox.insert(tk.END, os.path.basename(file))
+        self.file_list_view.add(files)
         
         if files:
             self.update_file_info()
@@ -258,67 +256,58 @@ class PDFToWordTool:
             
         if messagebox.askyesno("确认", "确定要清空文件列表吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
+        self.file_info_loader.start(self.selected_files)
+    
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         
-        if not self.selected_files:
+        if not files:
             self.file_info_text.insert(tk.END, "请先选择PDF文件")
             self.file_info_text.config(state=tk.DISABLED)
             return
         
         total_size = 0
+        pending = 0
         file_info = "已选文件信息:\n\n"
         
-        for file in self.selected_files:
-            file_name = os.path.basename(file)
-            file_size = os.path.getsize(file)
-            total_size += file_size
-            
-            # 获取PDF页数
-            page_count = self.get_pdf_page_count(file)
+        for file in files:
+            fields = details.get(file, {})
+            total_size += fields.get("size") or 0
+            if "pages" not in fields:
+                pending += 1
             
-            file_info += f"• {file_name}\n"
-            file_info += f"  大小: {self.format_file_size(file_size)}\n"
-            file_info += f"  页数: {page_count}\n\n"
+            file_info += f"• {os.path.basename(file)}\n"
+            file_info += f"  大小: {size_text(fields)}\n"
+            file_info += f"  页数: {fields.get('pages', LOADING)}\n\n"
         
-        file_info += f"总计: {len(self.selected_files)} 个文件, {self.format_file_size(total_size)}"
+        file_info += f"总计: {len(files)} 个文件, {self.format_file_size(total_size)}"
+        if pending:
+            file_info += f" (还有 {pending} 个文件在读取中)"
         
         self.file_info_text.insert(tk.END, file_info)
         self.file_info_text.config(state=tk.DISABLED)
     
     def get_pdf_page_count(self, file_path):
         """获取PDF文件的页数"""
-        try:
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                return len(pdf_reader.pages)
-        except:
-            return "未知"
+        return info.get_page_count_or_unknown(file_path)
     
     def clear_file_info(self):
         """清空文件信息"""
+        self.file_info_loader.cancel()
         self.file_info_text.config(state=tk.NORMAL)
         self.file_info_text.delete(1.0, tk.END)
         self.file_info_text.config(state=tk.DISABLED)
     
     def format_file_size(self, size_bytes):
         """格式化文件大小显示"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.2f} {size_names[i]}"
+        return format_file_size(size_bytes)
     
     def preview_files(self):
         """预览文件"""
@@ -335,7 +324,7 @@ class PDFToWordTool:
         """重置工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             self.selected_files.clear()
-            self.files_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.clear_file_info()
             self.conversion_engine.set("pdf2docx")
             self.conversion_quality.set("balanced")
@@ -411,19 +400,18 @@ class PDFToWordTool:
         self.reset_ui_after_conversion()
         
         # 显示转换结果
-        success_count = len([r for r in results if r[0]])
+        success_count = len([r for r in results if r.success])
         total_count = len(results)
         
         # 构建结果消息
         result_message = f"转换完成:\n成功: {success_count}/{total_count} 个文件\n\n"
         
         # 添加每个文件的详细结果
-        for success, file_path, output_path, error in results:
-            file_name = os.path.basename(file_path)
-            if success:
-                result_message += f"✓ {file_name}: 转换成功 → {os.path.basename(output_path)}\n"
+        for result in results:
+            if result.success:
+                result_message += f"✓ {result.file_name}: 转换成功 → {os.path.basename(result.output_path)}\n"
             else:
-                result_message += f"✗ {file_name}: {error}\n"
+                result_message += f"✗ {result.file_name}: {result.error}\n"
         
         # 显示结果
         self.show_conversion_results(result_message)
@@ -468,8 +456,9 @@ class PDFToWordTool:
         # 获取操作系统类型
         system = platform.system()
         
-        for success, file_path, output_path, error in results:
-            if success and os.path.exists(output_path):
+        for result in results:
+            output_path = result.output_path
+            if result.success and os.path.exists(output_path):
                 try:
                     if system == "Windows":
                         os.startfile(output_path)
@@ -480,171 +469,49 @@ class PDFToWordTool:
                 except Exception as e:
                     print(f"无法打开文件 {output_path}: {e}")
     
+    def update_progress(self, percent, message=""):
+        """更新进度条和进度标签"""
+        self.progress_var.set(percent)
+        if message:
+            self.progress_label.config(text=message)
+    
+    def report_progress(self, percent, message=""):
+        """后台线程的进度回调，转交主线程更新界面"""
+        call_in_main_thread(self.parent, self.update_progress, percent, message)
+    
     def convert_pdfs(self, output_dir):
         """转换PDF文件的核心功能"""
-        results = []
-        total_files = len(self.selected_files)
-        
-        for i, file_path in enumerate(self.selected_files):
-            if self.stop_conversion:
-                break
-                
-            try:
-                # 更新进度
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                self.progress_label.config(text=f"正在转换: {os.path.basename(file_path)}")
-                
-                # 确定输出路径
-                file_name = os.path.basename(file_path)
-                name, _ = os.path.splitext(file_name)
-                output_name = f"{name}{self.output_suffix.get()}.{self.output_format.get()}"
-                output_path = os.path.join(output_dir, output_name)
-                
-                # 根据选择的引擎执行转换
-                engine = self.conversion_engine.get()
-                if engine == "pdf2docx":
-                    success = self.convert_with_pdf2docx(file_path, output_path)
-                elif engine == "pymupdf":
-                    success = self.convert_with_pymupdf(file_path, output_path)
-                else:
-                    raise ValueError(f"不支持的转换引擎: {engine}")
-                
-                if success:
-                    results.append((True, file_path, output_path, ""))
-                else:
-                    results.append((False, file_path, "", "转换失败"))
-                
-            except Exception as e:
-                results.append((False, file_path, "", str(e)))
-        
-        # 完成进度
-        self.progress_var.set(100)
-        self.progress_label.config(text="转换完成")
-        
-        return results
+        return pdf_to_word.convert_pdfs(
+            list(self.selected_files), output_dir,
+            engine=self.conversion_engine.get(),
+            quality=self.conversion_quality.get(),
+            pages_range=self.pages_range.get(),
+            output_format=self.output_format.get(),
+            output_suffix=self.output_suffix.get(),
+            progress=self.report_progress,
+            should_stop=lambda: self.stop_conversion
+        )
     
     def convert_with_pdf2docx(self, input_path, output_path):
         """使用pdf2docx转换PDF"""
-        from pdf2docx import Converter
-        
-        try:
-            # 创建转换器
-            cv = Converter(input_path)
-            
-            # 设置转换选项
-            convert_args = {}
-            
-            # 设置页面范围
-            pages = self.pages_range.get().strip()
-            if pages:
-                convert_args['pages'] = self.parse_pages_range(pages)
-            
-            # 根据质量设置转换参数
-            quality = self.conversion_quality.get()
-            if quality == "high":
-                convert_args['layout_analysis'] = True
-            elif quality == "fast":
-                convert_args['layout_analysis'] = False
-            
-            # 执行转换
-            cv.convert(output_path, **convert_args)
-            cv.close()
-            
-            return True
-        except Exception as e:
-            print(f"pdf2docx转换错误: {e}")
-            return False
+        return pdf_to_word.convert_with_pdf2docx(input_path, output_path,
+                                                 self.pages_range.get(),
+                                                 self.conversion_quality.get())
     
     def convert_with_pymupdf(self, input_path, output_path):
         """使用PyMuPDF转换PDF"""
-        try:
-            import fitz  # PyMuPDF
-            
-            # 打开PDF文档
-            doc = fitz.open(input_path)
-            
-            # 获取文本内容
-            text = ""
-            pages = self.pages_range.get().strip()
-            
-            if pages:
-                # 转换指定页面
-                page_indices = self.parse_pages_range(pages)
-                for page_num in page_indices:
-                    if 0 <= page_num < len(doc):
-                        page = doc[page_num]
-                        text += page.get_text()
-            else:
-                # 转换所有页面
-                for page in doc:
-                    text += page.get_text()
-            
-            # 关闭PDF文档
-            doc.close()
-            
-            # 保存为文本文件（这里简化处理，实际应该转换为Word格式）
-            # 注意：PyMuPDF本身不支持直接转换为Word，这里只是示例
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text)
-            
-            return True
-        except Exception as e:
-            print(f"PyMuPDF转换错误: {e}")
-            return False
+        return pdf_to_word.convert_with_pymupdf(input_path, output_path, self.pages_range.get())
     
     def parse_pages_range(self, range_str):
         """解析页面范围字符串"""
-        try:
-            pages = []
-            parts = range_str.split(',')
-            
-            for part in parts:
-                part = part.strip()
-                if '-' in part:
-                    start_end = part.split('-')
-                    if len(start_end) != 2:
-                        raise ValueError(f"无效的范围格式: {part}")
-                    
-                    start = int(start_end[0].strip()) - 1  # 转换为0-based索引
-                    end = int(start_end[1].strip()) - 1   # 转换为0-based索引
-                    
-                    pages.extend(range(start, end + 1))
-                else:
-                    # 单个页面
-                    page = int(part) - 1  # 转换为0-based索引
-                    pages.append(page)
-            
-            return pages
-        except Exception as e:
-            raise ValueError(f"解析页面范围时出错: {str(e)}")
+        return pdf_to_word.parse_pages_range(range_str)
     
     def check_dependencies(self):
         """检查必要的依赖库是否已安装"""
-        engine = self.conversion_engine.get()
-        
-        if engine == "pdf2docx":
-            try:
-                from pdf2docx import Converter
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装pdf2docx库。\n\n请运行以下命令安装:\npip install pdf2docx"
-                )
-                return False
-        
-        elif engine == "pymupdf":
-            try:
-                import fitz
-                return True
-            except ImportError:
-                messagebox.showerror(
-                    "缺少依赖", 
-                    "未安装PyMuPDF库。\n\n请运行以下命令安装:\npip install PyMuPDF"
-                )
-                return False
-        
+        error = pdf_to_word.check_dependency(self.conversion_engine.get())
+        if error:
+            messagebox.showerror("缺少依赖", error)
+            return False
         return True
 
 # 独立测试函数
@@ -1,15 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import PyPDF2
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
-from PyPDF2.generic import NameObject, TextStringObject
+
+from engine import info, watermark
+from tools.job_runner import LOADING, FileInfoLoader, file_size_stage, run_in_background
 
 class PDFWatermarkTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
+        self.file_list = file_list if file_list is not None else []
         self.selected_file = None
         self.watermark_type = tk.StringVar(value="text")  # text or image
         
@@ -50,6 +50,10 @@ class PDFWatermarkTool:
         # 文件信息显示
         self.file_info_label = ttk.Label(left_frame, text="未选择文件")
         self.file_info_label.pack(fill=tk.X, padx=5, pady=5)
+        self.file_info_loader = FileInfoLoader(
+            self.parent,
+            [file_size_stage, lambda file: {"pages": info.get_page_count_or_unknown(file, "无法读取")}],
+            self.render_file_info)
         
         # 右侧水印设置区域
         right_frame = ttk.LabelFrame(content_frame, text="水印设置")
@@ -215,22 +219,25 @@ class PDFWatermarkTool:
             self.watermark_image_path.set(image_path)
     
     def update_file_info(self):
-        """更新文件信息显示"""
+        """更新文件信息显示，大小和页数在后台读取"""
         if self.selected_file:
-            file_name = os.path.basename(self.selected_file)
-            file_size = os.path.getsize(self.selected_file) / (1024 * 1024)  # MB
-            
-            # 获取PDF页数
-            try:
-                with open(self.selected_file, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: {num_pages}")
-            except Exception as e:
-                self.file_info_label.config(text=f"文件: {file_name}\n大小: {file_size:.2f} MB\n页数: 无法读取")
+            self.file_info_loader.start([self.selected_file])
         else:
+            self.file_info_loader.cancel()
             self.file_info_label.config(text="未选择文件")
     
+    def render_file_info(self, files, details):
+        """显示已读取到的文件信息"""
+        fields = details.get(files[0], {})
+        if "size" not in fields:
+            file_size = LOADING
+        elif fields["size"] is None:
+            file_size = "无法读取"
+        else:
+            file_size = f"{fields['size'] / (1024 * 1024):.2f} MB"
+        num_pages = fields.get("pages", LOADING)
+        self.file_info_label.config(text=f"文件: {os.path.basename(files[0])}\n大小: {file_size}\n页数: {num_pages}")
+    
     def reset_watermark_tool(self):
         """重置PDF水印工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
@@ -271,73 +278,31 @@ class PDFWatermarkTool:
             if not messagebox.askyesno("确认", f"文件 {os.path.basename(output_path)} 已存在，是否覆盖？"):
                 return
         
-        try:
-            # 执行添加水印
-            if self.watermark_type.get() == "text":
-                self.add_text_watermark(output_path)
-            else:
-                self.add_image_watermark(output_path)
-            messagebox.showinfo("成功", f"PDF水印已成功添加，保存到:\n{output_path}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"添加PDF水印时出错: {str(e)}")
+        # 在后台执行添加水印，避免界面卡顿
+        on_done = lambda result: messagebox.showinfo("成功", f"PDF水印已成功添加，保存到:\n{output_path}")
+        on_error = lambda e: messagebox.showerror("错误", f"添加PDF水印时出错: {str(e)}")
+        if self.watermark_type.get() == "text":
+            self.add_text_watermark(output_path, on_done, on_error)
+        else:
+            self.add_image_watermark(output_path, on_done, on_error)
     
-    def add_text_watermark(self, output_path):
+    def add_text_watermark(self, output_path, on_done=None, on_error=None):
         """添加文字水印"""
-        # 这里使用PyPDF2的基本功能实现简单的文字水印
-        # 注意：PyPDF2不支持直接添加文字水印，需要先创建一个包含文字的PDF页面
-        # 由于复杂度限制，这里实现一个简化版本
-        
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            # 对于简化版本，我们只添加水印文字到元数据
-            # 完整的文字水印需要使用reportlab或其他库创建水印PDF
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                # 根据应用范围决定是否添加水印
-                if self.should_apply_watermark(page_num + 1):
-                    # 简化实现：在页面上添加文字
-                    # 注意：这个实现并不完美，只是演示功能
-                    pass
-                pdf_writer.add_page(page)
-            
-            # 写入输出文件
-            with open(output_path, 'wb') as out_file:
-                pdf_writer.write(out_file)
+        return run_in_background(self.parent, watermark.add_text_watermark, self.selected_file, output_path,
+                                 text=self.watermark_text.get(),
+                                 scope=self.apply_scope.get(),
+                                 on_done=on_done, on_error=on_error)
     
-    def add_image_watermark(self, output_path):
+    def add_image_watermark(self, output_path, on_done=None, on_error=None):
         """添加图片水印"""
-        # 简化实现：由于PyPDF2添加图片水印比较复杂，这里只实现基本框架
-        with open(self.selected_file, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            pdf_writer = PyPDF2.PdfWriter()
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                # 根据应用范围决定是否添加水印
-                if self.should_apply_watermark(page_num + 1):
-                    # 简化实现：在页面上添加图片
-                    # 注意：完整的图片水印需要使用其他库实现
-                    pass
-                pdf_writer.add_page(page)
-            
-            # 写入输出文件
-            with open(output_path, 'wb') as out_file:
-                pdf_writer.write(out_file)
+        return run_in_background(self.parent, watermark.add_image_watermark, self.selected_file, output_path,
+                                 image_path=self.watermark_image_path.get(),
+                                 scope=self.apply_scope.get(),
+                                 on_done=on_done, on_error=on_error)
     
     def should_apply_watermark(self, page_num):
         """根据应用范围决定是否在当前页添加水印"""
-        scope = self.apply_scope.get()
-        if scope == "all":
-            return True
-        elif scope == "odd":
-            return page_num % 2 == 1
-        elif scope == "even":
-            return page_num % 2 == 0
-        return True
+        return watermark.should_apply_watermark(page_num, self.apply_scope.get())
 
 # 独立测试函数
 def test_watermark_tool():
@@ -3,11 +3,16 @@ from tkinter import ttk, filedialog, messagebox
 import os
 from pathlib import Path
 
+from engine import office
+from engine.file_set import FileSet
+from tools.file_list_view import VirtualFileList
+from tools.job_runner import run_in_background, show_results
+
 class PPTToPDFTool:
     def __init__(self, parent_frame, file_list=None):
         self.parent = parent_frame
-        self.file_list = file_list if file_list else []
-        self.selected_files = []
+        self.file_list = file_list if file_list is not None else []
+        self.selected_files = FileSet()
         
         # 创建界面
         self.create_ppt_to_pdf_interface()
@@ -55,14 +60,8 @@ class PPTToPDFTool:
         list_frame = ttk.Frame(left_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建文件列表框和滚动条
-        self.file_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        file_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, 
-                                      command=self.file_listbox.yview)
-        file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.configure(yscrollcommand=file_scrollbar.set)
+        # 文件列表框和滚动条，只显示可见的行
+        self.file_list_view = VirtualFileList(list_frame, self.selected_files)
         
         # 右侧选项区域
         right_frame = ttk.LabelFrame(content_frame, text="转换选项")
@@ -121,24 +120,19 @@ class PPTToPDFTool:
             filetypes=[("PPT文件", "*.pptx;*.ppt"), ("所有文件", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        added = self.file_list_view.add(files)
         
         if files:
-            messagebox.showinfo("成功", f"已添加 {len(files)} 个PPT文件")
+            messagebox.showinfo("成功", f"已添加 {added} 个PPT文件")
     
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_indices = self.file_listbox.curselection()
+        selected_indices = self.file_list_view.selected_indices()
         if not selected_indices:
             messagebox.showwarning("警告", "请先选择要移除的文件")
             return
             
-        for index in reversed(selected_indices):
-            self.file_listbox.delete(index)
-            self.selected_files.pop(index)
+        self.file_list_view.remove_selected()
         
         messagebox.showinfo("成功", f"已移除 {len(selected_indices)} 个文件")
     
@@ -150,7 +144,7 @@ class PPTToPDFTool:
             
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             messagebox.showinfo("成功", "已清空所有文件")
     
     def browse_output_dir(self):
@@ -163,7 +157,7 @@ class PPTToPDFTool:
         """重置工具"""
         if messagebox.askyesno("确认", "确定要重置所有设置吗？"):
             self.selected_files.clear()
-            self.file_listbox.delete(0, tk.END)
+            self.file_list_view.refresh()
             self.output_dir.set("")
             self.include_notes.set(False)
             self.include_handouts.set(False)
@@ -182,33 +176,19 @@ class PPTToPDFTool:
         else:
             output_dir = self.output_dir.get()
         
-        try:
-            # 执行转换
-            self.convert_ppt_to_pdf(output_dir)
-            messagebox.showinfo("成功", f"PPT文件已成功转换为PDF，保存到:\n{output_dir}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"转换PPT文件到PDF时出错: {str(e)}")
+        # 在后台执行转换，避免界面卡顿
+        self.convert_ppt_to_pdf(
+            output_dir,
+            on_done=lambda results: show_results(results, f"PPT文件已成功转换为PDF，保存到:\n{output_dir}",
+                                                 "转换PPT文件到PDF时出错"),
+            on_error=lambda e: messagebox.showerror("错误", f"转换PPT文件到PDF时出错: {str(e)}")
+        )
     
-    def convert_ppt_to_pdf(self, output_dir):
+    def convert_ppt_to_pdf(self, output_dir, on_done=None, on_error=None):
         """将PPT文件转换为PDF的核心功能"""
-        # 这里需要实现PPT转PDF的核心功能
-        # 由于python-pptx库只能读取和编辑PPT文档，不能直接转换为PDF
-        # 我们需要使用其他方法，比如调用Microsoft PowerPoint的COM接口或LibreOffice命令行
-        # 这里我们先实现一个简单的占位符，后续可以扩展为完整功能
-        
-        for ppt_file in self.selected_files:
-            # 获取文件名和扩展名
-            file_name = os.path.basename(ppt_file)
-            base_name = os.path.splitext(file_name)[0]
-            
-            # 输出PDF文件路径
-            pdf_path = os.path.join(output_dir, f"{base_name}.pdf")
-            
-            # 这里只是创建一个空的PDF文件作为占位符
-            # 实际转换功能需要使用外部库或工具
-            with open(pdf_path, 'w') as f:
-                f.write("%PDF-1.4\n1 0 obj<< /Type /Catalog /Pages 2 0 R >>endobj\n2 0 obj<< /Type /Pages /Kids [3 0 R] /Count 1 >>endobj\n3 0 obj<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>endobj\nxref\n0 4\n0000000000 65535 f \n0000000010 00000 n \n0000000053 00000 n \n0000000101 00000 n \ntrailer<< /Size 4 /Root 1 0 R >>\nstartxref\n150\n%%EOF")
+        # 实际转换需要调用Office的COM接口或LibreOffice命令行，目前生成占位PDF
+        return run_in_background(self.parent, office.convert_ppt_to_pdf, list(self.selected_files), output_dir,
+                                 on_done=on_done, on_error=on_error, in_pool=False)
 
 # 独立测试函数
 def test_ppt_to_pdf_tool():
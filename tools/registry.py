@@ -0,0 +1,108 @@
+"""工具注册表：按需导入工具模块，记录导入耗时和导入失败信息"""
+import importlib
+import time
+import traceback
+
+# 工具键 -> (模块名, 类名, 标题, 描述)
+TOOL_SPECS = {
+    # 基础操作
+    "merge": ("tools.pdf_merge_tool", "PDFMergeTool", "PDF合并工具", "将多个PDF文件合并为一个PDF文件"),
+    "split": ("tools.pdf_split_tool", "PDFSplitTool", "PDF分割工具", "将PDF文件分割为多个部分"),
+    "compress": ("tools.pdf_compress_tool", "PDFCompressTool", "PDF压缩工具", "使用多种算法减小PDF文件大小，优化存储和传输"),
+    "encrypt": ("tools.pdf_encrypt_decrypt_tool", "PDFEncryptDecryptTool", "PDF加密/解密工具", "为PDF文件添加密码保护或移除密码保护"),
+
+    # 转换功能
+    "pdf_to_word": ("tools.pdf_to_word_tool", "PDFToWordTool", "PDF转Word工具", "将PDF文件转换为可编辑的Word文档"),
+    "pdf_to_image": ("tools.pdf_image_converter_tool", "PDFImageConverterTool", "PDF与图片互转工具", "PDF转图片或将多张图片合并为PDF"),
+    "pdf_to_text": ("tools.pdf_to_text_tool", "PDFToTextTool", "PDF转文本工具", "从PDF文件中提取文本内容"),
+    "word_to_pdf": ("tools.word_to_pdf_tool", "WordToPDFTool", "Word转PDF工具", "将Word文档转换为PDF格式"),
+    "excel_to_pdf": ("tools.excel_to_pdf_tool", "ExcelToPDFTool", "Excel转PDF工具", "将Excel表格转换为PDF格式"),
+    "ppt_to_pdf": ("tools.ppt_to_pdf_tool", "PPTToPDFTool", "PPT转PDF工具", "将PowerPoint演示文稿转换为PDF格式"),
+
+    # 编辑功能
+    "watermark": ("tools.pdf_watermark_tool", "PDFWatermarkTool", "PDF水印工具", "为PDF文件添加文字或图片水印"),
+    "rotate": ("tools.pdf_rotate_tool", "PDFRotateTool", "PDF旋转工具", "旋转PDF页面方向"),
+    "header_footer": ("tools.pdf_header_footer_tool", "PDFHeaderFooterTool", "PDF页眉页脚工具", "为PDF文件添加页眉和页脚"),
+    "bookmark": ("tools.pdf_bookmark_tool", "PDFBookmarkTool", "PDF书签工具", "为PDF文件添加或编辑书签"),
+    "annotation": ("tools.pdf_annotation_tool", "PDFAnnotationTool", "PDF注释工具", "为PDF文件添加注释、高亮和下划线"),
+    "form": ("tools.pdf_form_tool", "PDFFormTool", "PDF表单工具", "填写或创建PDF表单"),
+
+    # 高级功能
+    "compare": ("tools.pdf_compare_tool", "PDFCompareTool", "PDF比较工具", "比较两个PDF文件的差异"),
+    "ocr": ("tools.pdf_ocr_tool", "PDFOCRTool", "OCR识别工具", "识别扫描PDF中的文字内容"),
+    "batch": ("tools.pdf_batch_tool", "PDFBatchTool", "批量处理工具", "批量处理多个PDF文件"),
+    "optimize": ("tools.pdf_optimize_tool", "PDFOptimizeTool", "PDF优化工具", "优化PDF文件结构和性能"),
+    "signature": ("tools.pdf_signature_tool", "PDFSignatureTool", "PDF签名工具", "为PDF文件添加数字签名"),
+    "metadata": ("tools.pdf_metadata_tool", "PDFMetadataTool", "元数据编辑工具", "编辑PDF文件的元数据信息"),
+}
+
+
+class ToolRegistry:
+    """按需加载工具类，每个模块只导入一次"""
+
+    def __init__(self, specs=None):
+        self.specs = dict(specs or TOOL_SPECS)
+        self.classes = {}
+        self.errors = {}
+        self.error_details = {}
+        self.import_times = {}
+
+    def title(self, key):
+        """工具标题"""
+        return self.specs[key][2]
+
+    def description(self, key):
+        """工具描述"""
+        return self.specs[key][3]
+
+    def is_loaded(self, key):
+        """工具是否已成功加载"""
+        return key in self.classes
+
+    def load(self, key):
+        """加载工具类，失败时返回None并记录错误"""
+        if key in self.classes:
+            return self.classes[key]
+        if key in self.errors:
+            return None
+
+        module_name, class_name = self.specs[key][:2]
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+            tool_class = getattr(module, class_name)
+        except Exception as e:
+            # 只影响当前工具，其他工具仍可正常加载
+            self.errors[key] = f"{type(e).__name__}: {e}"
+            self.error_details[key] = traceback.format_exc()
+            tool_class = None
+        else:
+            self.classes[key] = tool_class
+        finally:
+            self.import_times[key] = time.perf_counter() - start
+
+        return tool_class
+
+    def get_error(self, key):
+        """获取工具的导入错误，没有错误时返回None"""
+        return self.errors.get(key)
+
+    def retry(self, key):
+        """清除导入失败记录，下次加载时重新导入"""
+        self.errors.pop(key, None)
+        self.error_details.pop(key, None)
+        self.import_times.pop(key, None)
+
+    def preload(self, keys=None):
+        """预加载工具，返回导入失败的工具及错误"""
+        for key in keys or self.specs:
+            self.load(key)
+        return dict(self.errors)
+
+    def timing_report(self):
+        """按耗时从高到低生成导入耗时报告"""
+        lines = []
+        for key, seconds in sorted(self.import_times.items(), key=lambda item: item[1], reverse=True):
+            status = "失败" if key in self.errors else "成功"
+            lines.append(f"{self.title(key)}: {seconds * 1000:.1f} ms ({status})")
+        return "\n".join(lines)